@@ -0,0 +1,26 @@
+"""documents: expression index for per-appointment listings
+
+Revision ID: 0008_documents_appt_idx
+Revises: 0007_phase11_experiments
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0008_documents_appt_idx"
+down_revision = "0007_phase11_experiments"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # GET /v1/documents?appointment_id=..&before_id=.. filters on meta->>'appointment_id'
+    # and walks id DESC; this index serves both the filter and the keyset order.
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_documents_meta_appt_id "
+        "ON documents ((meta->>'appointment_id'), id DESC)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_documents_meta_appt_id")
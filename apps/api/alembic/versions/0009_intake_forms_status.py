@@ -0,0 +1,31 @@
+"""intake_forms: status column for flushed autosave drafts
+
+Revision ID: 0009_intake_forms_status
+Revises: 0008_documents_appt_idx
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0009_intake_forms_status"
+down_revision = "0008_documents_appt_idx"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing rows are real submissions; expired drafts are flushed with status='DRAFT'.
+    op.execute(
+        "ALTER TABLE intake_forms "
+        "ADD COLUMN IF NOT EXISTS status VARCHAR(16) NOT NULL DEFAULT 'SUBMITTED'"
+    )
+    # draft resume / latest-submission lookups walk one appointment newest-first
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_intake_forms_appt_id "
+        "ON intake_forms (appointment_id, id DESC)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_intake_forms_appt_id")
+    op.execute("ALTER TABLE intake_forms DROP COLUMN IF EXISTS status")
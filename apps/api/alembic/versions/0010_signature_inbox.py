@@ -0,0 +1,40 @@
+"""signature_inbox: deduplicated webhook events, processed asynchronously
+
+Revision ID: 0010_signature_inbox
+Revises: 0009_intake_forms_status
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0010_signature_inbox"
+down_revision = "0009_intake_forms_status"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS signature_inbox (
+            id           SERIAL PRIMARY KEY,
+            request_id   VARCHAR(128) NOT NULL UNIQUE,
+            payload      JSONB NOT NULL,
+            status       VARCHAR(16) NOT NULL DEFAULT 'PENDING',
+            attempts     INTEGER NOT NULL DEFAULT 0,
+            last_error   TEXT,
+            received_at  TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            processed_at TIMESTAMPTZ
+        )
+        """
+    )
+    # the worker only ever scans the (small) pending tail
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_signature_inbox_pending "
+        "ON signature_inbox (id) WHERE status = 'PENDING'"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_signature_inbox_pending")
+    op.execute("DROP TABLE IF EXISTS signature_inbox")
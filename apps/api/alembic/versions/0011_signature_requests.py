@@ -0,0 +1,65 @@
+"""signature_requests: first-class request rows with status transitions
+
+Revision ID: 0011_signature_requests
+Revises: 0010_signature_inbox
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0011_signature_requests"
+down_revision = "0010_signature_inbox"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS signature_requests (
+            id             SERIAL PRIMARY KEY,
+            request_id     VARCHAR(128) NOT NULL,
+            appointment_id INTEGER,
+            signer_name    VARCHAR(128),
+            email          VARCHAR(255),
+            status         VARCHAR(16) NOT NULL DEFAULT 'PENDING',
+            document_id    INTEGER,
+            created_at     TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            updated_at     TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        )
+        """
+    )
+    op.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_signature_requests_request_id "
+        "ON signature_requests (request_id)"
+    )
+
+    # Backfill: signed requests from their Consent documents, then still-pending ones
+    # from the SIGNATURE_REQUESTED audit trail.
+    op.execute(
+        """
+        INSERT INTO signature_requests (request_id, appointment_id, status, document_id, created_at, updated_at)
+        SELECT DISTINCT ON (meta->>'request_id')
+               meta->>'request_id', NULLIF(meta->>'appointment_id', '')::int, 'SIGNED', id, created_at, created_at
+          FROM documents
+         WHERE kind = 'Consent' AND meta->>'request_id' IS NOT NULL
+         ORDER BY meta->>'request_id', id DESC
+        ON CONFLICT (request_id) DO NOTHING
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO signature_requests (request_id, appointment_id, email, status, created_at, updated_at)
+        SELECT DISTINCT ON (target)
+               target, NULLIF(details->>'appointment_id', '')::int, actor, 'PENDING', created_at, created_at
+          FROM audit_logs
+         WHERE action = 'SIGNATURE_REQUESTED' AND target IS NOT NULL
+         ORDER BY target, id DESC
+        ON CONFLICT (request_id) DO NOTHING
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ux_signature_requests_request_id")
+    op.execute("DROP TABLE IF EXISTS signature_requests")
@@ -0,0 +1,65 @@
+"""move request-time DDL (claims, scribe_sessions, users) into a migration
+
+Revision ID: 0012_runtime_ddl
+Revises: 0011_signature_requests
+Create Date: 2026-10-19
+
+Routers used to run CREATE TABLE / ALTER TABLE ... IF NOT EXISTS on every call
+(billing, tasks/claims, scribe, rbac, admin, billing_eligibility). Everything is
+idempotent here so databases that already received the runtime DDL upgrade cleanly.
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0012_runtime_ddl"
+down_revision = "0011_signature_requests"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # claims: 0001 created the skeleton; billing/claims code grew these columns at runtime
+    for ddl in (
+        "ADD COLUMN IF NOT EXISTS encounter_id TEXT",
+        "ADD COLUMN IF NOT EXISTS appointment_id INT",
+        "ADD COLUMN IF NOT EXISTS total_cents INT NOT NULL DEFAULT 0",
+        "ADD COLUMN IF NOT EXISTS last_submit_at TIMESTAMP",
+        "ADD COLUMN IF NOT EXISTS clearinghouse_resp JSON",
+        "ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()",
+    ):
+        op.execute(f"ALTER TABLE claims {ddl}")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_claims_encounter_id ON claims (encounter_id)")
+
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS scribe_sessions (
+          id SERIAL PRIMARY KEY,
+          appointment_id INTEGER NOT NULL REFERENCES appointments(id) ON DELETE CASCADE,
+          status TEXT NOT NULL DEFAULT 'DRAFT',
+          meta   JSONB NOT NULL DEFAULT '{}'::jsonb,
+          created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        )
+        """
+    )
+    op.execute("ALTER TABLE scribe_sessions ADD COLUMN IF NOT EXISTS meta JSONB NOT NULL DEFAULT '{}'::jsonb")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_scribe_sessions_appointment_id ON scribe_sessions (appointment_id)")
+
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS users (
+          id SERIAL PRIMARY KEY,
+          email TEXT UNIQUE NOT NULL,
+          phone TEXT NULL,
+          password_hash TEXT NULL,
+          role TEXT NOT NULL DEFAULT 'PATIENT',
+          created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        )
+        """
+    )
+    op.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS role TEXT NOT NULL DEFAULT 'PATIENT'")
+
+
+def downgrade() -> None:
+    # Columns/tables may predate this revision (created by the old runtime DDL): keep data.
+    op.execute("DROP INDEX IF EXISTS ix_scribe_sessions_appointment_id")
+    op.execute("DROP INDEX IF EXISTS ix_claims_encounter_id")
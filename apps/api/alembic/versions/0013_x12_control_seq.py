@@ -0,0 +1,25 @@
+"""x12 interchange control numbers from a Postgres sequence
+
+Revision ID: 0013_x12_control_seq
+Revises: 0012_runtime_ddl
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0013_x12_control_seq"
+down_revision = "0012_runtime_ddl"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # ISA13 is 9 digits; CYCLE wraps instead of erroring after 999,999,999 interchanges
+    op.execute(
+        "CREATE SEQUENCE IF NOT EXISTS x12_control_seq "
+        "START 1 MINVALUE 1 MAXVALUE 999999999 CYCLE"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP SEQUENCE IF EXISTS x12_control_seq")
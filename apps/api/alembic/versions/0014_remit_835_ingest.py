@@ -0,0 +1,42 @@
+"""835 remittance ingest: claim payment columns, remit_files, correction-task lookup
+
+Revision ID: 0014_remit_835_ingest
+Revises: 0013_x12_control_seq
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0014_remit_835_ingest"
+down_revision = "0013_x12_control_seq"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE claims ADD COLUMN IF NOT EXISTS paid_cents INTEGER")
+    op.execute("ALTER TABLE claims ADD COLUMN IF NOT EXISTS denial_code VARCHAR(32)")
+    # one row per ingested file; sha256 makes re-delivery of the same file a no-op
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS remit_files (
+            id          SERIAL PRIMARY KEY,
+            sha256      VARCHAR(64) NOT NULL UNIQUE,
+            url         TEXT NOT NULL,
+            stats       JSONB NOT NULL DEFAULT '{}'::jsonb,
+            created_at  TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        )
+        """
+    )
+    # "is there already an open correction task for this claim?" during set-based ingest
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_tasks_claim_correction_claim "
+        "ON tasks ((payload_json->>'claim_id')) WHERE type = 'claim_correction' AND status = 'OPEN'"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_tasks_claim_correction_claim")
+    op.execute("DROP TABLE IF EXISTS remit_files")
+    op.execute("ALTER TABLE claims DROP COLUMN IF EXISTS denial_code")
+    op.execute("ALTER TABLE claims DROP COLUMN IF EXISTS paid_cents")
@@ -0,0 +1,28 @@
+"""nightly eligibility sweep: appointment day-window and follow-up task lookups
+
+Revision ID: 0015_eligibility_sweep
+Revises: 0014_remit_835_ingest
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0015_eligibility_sweep"
+down_revision = "0014_remit_835_ingest"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # "tomorrow's appointments" is a range scan on start_at
+    op.execute("CREATE INDEX IF NOT EXISTS ix_appointments_start_at ON appointments (start_at)")
+    # "is there already an open follow-up for this appointment?" during the bulk insert
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_tasks_eligibility_followup_appt "
+        "ON tasks ((payload_json->>'appointment_id')) WHERE type = 'eligibility_followup' AND status = 'OPEN'"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_tasks_eligibility_followup_appt")
+    op.execute("DROP INDEX IF EXISTS ix_appointments_start_at")
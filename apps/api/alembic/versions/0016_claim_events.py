@@ -0,0 +1,253 @@
+"""claim status history: append-only claim_events, claim_current projection, claim_daily aggregates
+
+Revision ID: 0016_claim_events
+Revises: 0015_eligibility_sweep
+Create Date: 2026-10-19
+
+Every status transition on claims (single-row submits, batch UPDATE ... FROM
+unnest, 835 CTEs) is captured by statement-level triggers with transition
+tables, so set-based writers stay set-based: one INSERT into claim_events per
+statement. A statement trigger on claim_events then folds the new events into
+claim_current (one row per claim) and claim_daily (per-day counters), so RCM
+metrics read a handful of rows instead of scanning history.
+
+Existing claims are backfilled with one synthetic event and their current
+state; daily counters start at this migration, plus the outstanding AR carried
+in as of today.
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0016_claim_events"
+down_revision = "0015_eligibility_sweep"
+branch_labels = None
+depends_on = None
+
+# claims that count towards accounts receivable once they have been submitted
+_AR = "('SUBMITTED','RESUBMIT','DENIED','REJECTED')"
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS claim_events (
+            id           BIGSERIAL PRIMARY KEY,
+            claim_id     INTEGER NOT NULL,
+            from_status  VARCHAR(32),
+            to_status    VARCHAR(32) NOT NULL,
+            total_cents  INTEGER NOT NULL DEFAULT 0,
+            from_total_cents INTEGER,          -- total before the transition (what AR held)
+            paid_cents   INTEGER,
+            denial_code  VARCHAR(32),
+            payer_ref    VARCHAR(128),
+            created_at   TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        )
+        """
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_claim_events_claim ON claim_events (claim_id, id)")
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS claim_current (
+            claim_id            INTEGER PRIMARY KEY,
+            status              VARCHAR(32) NOT NULL,
+            status_since        TIMESTAMPTZ NOT NULL,
+            total_cents         INTEGER NOT NULL DEFAULT 0,
+            submit_count        INTEGER NOT NULL DEFAULT 0,
+            first_submitted_at  TIMESTAMPTZ,
+            first_outcome       VARCHAR(32),   -- PAID | DENIED | REJECTED after the first submission
+            paid_at             TIMESTAMPTZ,
+            transitions         INTEGER NOT NULL DEFAULT 0
+        )
+        """
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_claim_current_status ON claim_current (status, status_since)")
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS claim_daily (
+            day                  DATE PRIMARY KEY,
+            submitted            INTEGER NOT NULL DEFAULT 0,  -- first submissions
+            submitted_cents      BIGINT  NOT NULL DEFAULT 0,
+            first_pass_resolved  INTEGER NOT NULL DEFAULT 0,  -- first adjudication after first submission
+            first_pass_accepted  INTEGER NOT NULL DEFAULT 0,  -- ... that was PAID
+            paid                 INTEGER NOT NULL DEFAULT 0,
+            paid_cents           BIGINT  NOT NULL DEFAULT 0,
+            days_to_pay_sum      DOUBLE PRECISION NOT NULL DEFAULT 0,  -- first submission -> PAID
+            denied               INTEGER NOT NULL DEFAULT 0,
+            rejected             INTEGER NOT NULL DEFAULT 0,
+            ar_delta_cents       BIGINT  NOT NULL DEFAULT 0   -- SUM over all days = outstanding AR
+        )
+        """
+    )
+
+    # -- backfill (before the triggers exist, so it does not count as today's activity)
+    op.execute(
+        """
+        INSERT INTO claim_events (claim_id, from_status, to_status, total_cents, paid_cents, denial_code, payer_ref, created_at)
+        SELECT c.id, NULL, COALESCE(c.status, 'NEW'), COALESCE(c.total_cents, 0), c.paid_cents, c.denial_code,
+               c.payer_ref, COALESCE(c.updated_at, c.created_at, NOW())
+          FROM claims c
+         WHERE NOT EXISTS (SELECT 1 FROM claim_events e WHERE e.claim_id = c.id)
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO claim_current (claim_id, status, status_since, total_cents, submit_count,
+                                   first_submitted_at, paid_at, transitions)
+        SELECT c.id, COALESCE(c.status, 'NEW'), COALESCE(c.updated_at, c.created_at, NOW()), COALESCE(c.total_cents, 0),
+               (c.last_submit_at IS NOT NULL)::int, c.last_submit_at,
+               CASE WHEN c.status = 'PAID' THEN COALESCE(c.updated_at, NOW()) END, 1
+          FROM claims c
+        ON CONFLICT (claim_id) DO NOTHING
+        """
+    )
+    op.execute(
+        f"""
+        INSERT INTO claim_daily (day, ar_delta_cents)
+        SELECT (NOW() AT TIME ZONE 'UTC')::date, COALESCE(SUM(total_cents), 0)
+          FROM claim_current
+         WHERE status IN {_AR} AND first_submitted_at IS NOT NULL
+        ON CONFLICT (day) DO NOTHING
+        """
+    )
+
+    # -- claims -> claim_events (one INSERT per statement)
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION claims_log_insert() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO claim_events (claim_id, from_status, to_status, total_cents, paid_cents, denial_code, payer_ref)
+            SELECT n.id, NULL, COALESCE(n.status, 'NEW'), COALESCE(n.total_cents, 0), n.paid_cents, n.denial_code, n.payer_ref
+              FROM new_rows n;
+            RETURN NULL;
+        END $$
+        """
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION claims_log_update() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO claim_events (claim_id, from_status, to_status, total_cents, from_total_cents,
+                                      paid_cents, denial_code, payer_ref)
+            SELECT n.id, o.status, COALESCE(n.status, 'NEW'), COALESCE(n.total_cents, 0), COALESCE(o.total_cents, 0),
+                   n.paid_cents, n.denial_code, n.payer_ref
+              FROM new_rows n
+              JOIN old_rows o ON o.id = n.id
+             WHERE n.status IS DISTINCT FROM o.status;
+            RETURN NULL;
+        END $$
+        """
+    )
+    op.execute("DROP TRIGGER IF EXISTS trg_claims_log_insert ON claims")
+    op.execute(
+        "CREATE TRIGGER trg_claims_log_insert AFTER INSERT ON claims "
+        "REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION claims_log_insert()"
+    )
+    op.execute("DROP TRIGGER IF EXISTS trg_claims_log_update ON claims")
+    op.execute(
+        "CREATE TRIGGER trg_claims_log_update AFTER UPDATE ON claims "
+        "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION claims_log_update()"
+    )
+
+    # -- claim_events -> claim_current + claim_daily (incremental projection)
+    # `prev` is the projection before this statement's events; one event per claim
+    # per statement (guaranteed by the claims triggers above). The AR leg leaving
+    # from_status subtracts the old total: assemble() changes total_cents and
+    # status in one UPDATE, and subtracting the new total would skew AR for good.
+    op.execute(
+        f"""
+        CREATE OR REPLACE FUNCTION claim_events_project() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            WITH prev AS (
+                SELECT e.*, c.first_submitted_at AS prev_first_sub, c.first_outcome AS prev_first_outcome
+                  FROM new_events e
+                  LEFT JOIN claim_current c ON c.claim_id = e.claim_id
+            ),
+            cur AS (
+                INSERT INTO claim_current AS c (claim_id, status, status_since, total_cents, submit_count,
+                                                first_submitted_at, first_outcome, paid_at, transitions)
+                SELECT p.claim_id, p.to_status, p.created_at, p.total_cents, (p.to_status = 'SUBMITTED')::int,
+                       CASE WHEN p.to_status = 'SUBMITTED' THEN p.created_at END, NULL,
+                       CASE WHEN p.to_status = 'PAID' THEN p.created_at END, 1
+                  FROM prev p
+                ON CONFLICT (claim_id) DO UPDATE SET
+                    status             = EXCLUDED.status,
+                    status_since       = EXCLUDED.status_since,
+                    total_cents        = EXCLUDED.total_cents,
+                    submit_count       = c.submit_count + EXCLUDED.submit_count,
+                    first_submitted_at = COALESCE(c.first_submitted_at, EXCLUDED.first_submitted_at),
+                    first_outcome      = COALESCE(c.first_outcome,
+                                           CASE WHEN c.first_submitted_at IS NOT NULL
+                                                 AND EXCLUDED.status IN ('PAID','DENIED','REJECTED')
+                                                THEN EXCLUDED.status END),
+                    paid_at            = COALESCE(EXCLUDED.paid_at, c.paid_at),
+                    transitions        = c.transitions + 1
+                RETURNING 1
+            )
+            INSERT INTO claim_daily AS d (day, submitted, submitted_cents, first_pass_resolved, first_pass_accepted,
+                                          paid, paid_cents, days_to_pay_sum, denied, rejected, ar_delta_cents)
+            SELECT (p.created_at AT TIME ZONE 'UTC')::date,
+                   COUNT(*) FILTER (WHERE p.to_status = 'SUBMITTED' AND p.prev_first_sub IS NULL),
+                   COALESCE(SUM(p.total_cents) FILTER (WHERE p.to_status = 'SUBMITTED' AND p.prev_first_sub IS NULL), 0),
+                   COUNT(*) FILTER (WHERE p.prev_first_sub IS NOT NULL AND p.prev_first_outcome IS NULL
+                                      AND p.to_status IN ('PAID','DENIED','REJECTED')),
+                   COUNT(*) FILTER (WHERE p.prev_first_sub IS NOT NULL AND p.prev_first_outcome IS NULL
+                                      AND p.to_status = 'PAID'),
+                   COUNT(*) FILTER (WHERE p.to_status = 'PAID'),
+                   COALESCE(SUM(COALESCE(p.paid_cents, p.total_cents)) FILTER (WHERE p.to_status = 'PAID'), 0),
+                   COALESCE(SUM(EXTRACT(EPOCH FROM p.created_at - p.prev_first_sub) / 86400.0)
+                            FILTER (WHERE p.to_status = 'PAID' AND p.prev_first_sub IS NOT NULL), 0),
+                   COUNT(*) FILTER (WHERE p.to_status = 'DENIED'),
+                   COUNT(*) FILTER (WHERE p.to_status = 'REJECTED'),
+                   COALESCE(SUM(
+                       CASE WHEN p.to_status IN {_AR} AND (p.prev_first_sub IS NOT NULL OR p.to_status = 'SUBMITTED')
+                            THEN p.total_cents ELSE 0 END
+                     - CASE WHEN p.from_status IN {_AR} AND p.prev_first_sub IS NOT NULL
+                            THEN COALESCE(p.from_total_cents, p.total_cents) ELSE 0 END), 0)
+              FROM prev p
+             GROUP BY 1
+            ON CONFLICT (day) DO UPDATE SET
+                submitted           = d.submitted + EXCLUDED.submitted,
+                submitted_cents     = d.submitted_cents + EXCLUDED.submitted_cents,
+                first_pass_resolved = d.first_pass_resolved + EXCLUDED.first_pass_resolved,
+                first_pass_accepted = d.first_pass_accepted + EXCLUDED.first_pass_accepted,
+                paid                = d.paid + EXCLUDED.paid,
+                paid_cents          = d.paid_cents + EXCLUDED.paid_cents,
+                days_to_pay_sum     = d.days_to_pay_sum + EXCLUDED.days_to_pay_sum,
+                denied              = d.denied + EXCLUDED.denied,
+                rejected            = d.rejected + EXCLUDED.rejected,
+                ar_delta_cents      = d.ar_delta_cents + EXCLUDED.ar_delta_cents;
+            RETURN NULL;
+        END $$
+        """
+    )
+    op.execute("DROP TRIGGER IF EXISTS trg_claim_events_project ON claim_events")
+    op.execute(
+        "CREATE TRIGGER trg_claim_events_project AFTER INSERT ON claim_events "
+        "REFERENCING NEW TABLE AS new_events FOR EACH STATEMENT EXECUTE FUNCTION claim_events_project()"
+    )
+    # append-only: history is never edited in place
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION claim_events_immutable() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            RAISE EXCEPTION 'claim_events is append-only';
+        END $$
+        """
+    )
+    op.execute("DROP TRIGGER IF EXISTS trg_claim_events_immutable ON claim_events")
+    op.execute(
+        "CREATE TRIGGER trg_claim_events_immutable BEFORE UPDATE OR DELETE ON claim_events "
+        "FOR EACH STATEMENT EXECUTE FUNCTION claim_events_immutable()"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_claims_log_update ON claims")
+    op.execute("DROP TRIGGER IF EXISTS trg_claims_log_insert ON claims")
+    op.execute("DROP TABLE IF EXISTS claim_daily")
+    op.execute("DROP TABLE IF EXISTS claim_current")
+    op.execute("DROP TABLE IF EXISTS claim_events")
+    op.execute("DROP FUNCTION IF EXISTS claim_events_immutable()")
+    op.execute("DROP FUNCTION IF EXISTS claim_events_project()")
+    op.execute("DROP FUNCTION IF EXISTS claims_log_update()")
+    op.execute("DROP FUNCTION IF EXISTS claims_log_insert()")
@@ -0,0 +1,48 @@
+"""coding worklist: partial keyset index on open claims, payer column, denial lookup
+
+Revision ID: 0017_coding_worklist
+Revises: 0016_claim_events
+Create Date: 2026-10-19
+
+The worklist pages open claims newest-first by (updated_at, id). Both indexes
+are partial on the worklist statuses, so millions of historical PAID claims
+add nothing to their size or to the scan.
+
+Locking: adding the STORED generated `payer` column rewrites the whole claims
+table under an ACCESS EXCLUSIVE lock (reads and writes wait until it is done),
+and the two CREATE INDEX statements block writes while they build. On a large
+claims table run this in a maintenance window.
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0017_coding_worklist"
+down_revision = "0016_claim_events"
+branch_labels = None
+depends_on = None
+
+_OPEN = "status IN ('NEW','SUBMITTED','DENIED','REJECTED')"
+
+
+def upgrade() -> None:
+    # 0012 adds updated_at with a default; make sure no row sorts as NULL
+    op.execute("UPDATE claims SET updated_at = COALESCE(created_at, NOW()) WHERE updated_at IS NULL")
+    # payer as sent in the claim payload, filterable without parsing JSON per row.
+    # TEXT, not VARCHAR(n): a longer payload payer must not make claim writes fail.
+    op.execute(
+        "ALTER TABLE claims ADD COLUMN IF NOT EXISTS payer TEXT "
+        "GENERATED ALWAYS AS (payload_json->>'payer') STORED"
+    )
+    op.execute(
+        f"CREATE INDEX IF NOT EXISTS ix_claims_worklist ON claims (updated_at DESC, id DESC) WHERE {_OPEN}"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_claims_worklist_denial "
+        "ON claims (denial_code, updated_at DESC, id DESC) WHERE status IN ('DENIED','REJECTED')"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_claims_worklist_denial")
+    op.execute("DROP INDEX IF EXISTS ix_claims_worklist")
+    op.execute("ALTER TABLE claims DROP COLUMN IF EXISTS payer")
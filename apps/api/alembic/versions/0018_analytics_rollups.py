@@ -0,0 +1,56 @@
+"""analytics rollups: per-day/clinic/channel appointment and eligibility counters
+
+Revision ID: 0018_analytics_rollups
+Revises: 0017_coding_worklist
+Create Date: 2026-10-19
+
+Maintained by analytics.nightly_rollups (app/rollups.py); the dashboards read
+these instead of aggregating appointments / eligibility_responses per request.
+appointments gains a nullable clinic column ('' in the rollups when unset).
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0018_analytics_rollups"
+down_revision = "0017_coding_worklist"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE appointments ADD COLUMN IF NOT EXISTS clinic VARCHAR(64)")
+    # rollup refreshes re-aggregate a window of recent days (appointments: 0015 start_at index)
+    op.execute("CREATE INDEX IF NOT EXISTS ix_eligibility_responses_created_at ON eligibility_responses (created_at)")
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS appt_daily (
+            day              DATE NOT NULL,
+            clinic           VARCHAR(64) NOT NULL DEFAULT '',
+            channel          VARCHAR(64) NOT NULL DEFAULT '',
+            appts            INTEGER NOT NULL DEFAULT 0,
+            no_shows         INTEGER NOT NULL DEFAULT 0,
+            tta_seconds_sum  DOUBLE PRECISION NOT NULL DEFAULT 0,  -- booking -> start
+            tta_count        INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, clinic, channel)
+        )
+        """
+    )
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS elig_daily (
+            day      DATE NOT NULL,
+            clinic   VARCHAR(64) NOT NULL DEFAULT '',
+            channel  VARCHAR(64) NOT NULL DEFAULT '',
+            ok       INTEGER NOT NULL DEFAULT 0,
+            total    INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, clinic, channel)
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS elig_daily")
+    op.execute("DROP TABLE IF EXISTS appt_daily")
+    op.execute("DROP INDEX IF EXISTS ix_eligibility_responses_created_at")
+    op.execute("ALTER TABLE appointments DROP COLUMN IF EXISTS clinic")
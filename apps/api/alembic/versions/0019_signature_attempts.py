@@ -0,0 +1,47 @@
+"""signature retries: per-attempt webhook dedupe
+
+Revision ID: 0019_signature_attempts
+Revises: 0018_analytics_rollups
+Create Date: 2026-10-19
+
+Request ids are deterministic (sig-<appointment_id>) and a retry after FAILED
+reuses the row, so deduplicating the inbox on request_id dropped the webhook of
+every later signing attempt. signature_requests counts attempts and the inbox
+dedupes on event_key: the provider's event id when it sends one, otherwise
+'<request_id>#<attempt>'.
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0019_signature_attempts"
+down_revision = "0018_analytics_rollups"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE signature_requests ADD COLUMN IF NOT EXISTS attempt INTEGER NOT NULL DEFAULT 1")
+    op.execute("ALTER TABLE signature_inbox ADD COLUMN IF NOT EXISTS event_key VARCHAR(192)")
+    op.execute("UPDATE signature_inbox SET event_key = request_id || '#1' WHERE event_key IS NULL")
+    op.execute("ALTER TABLE signature_inbox ALTER COLUMN event_key SET NOT NULL")
+    op.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_signature_inbox_event_key ON signature_inbox (event_key)")
+    op.execute("ALTER TABLE signature_inbox DROP CONSTRAINT IF EXISTS signature_inbox_request_id_key")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_signature_inbox_request_id ON signature_inbox (request_id)")
+
+
+def downgrade() -> None:
+    # keep the first event per request so the old UNIQUE (request_id) can come back
+    op.execute(
+        "DELETE FROM signature_inbox a USING signature_inbox b "
+        "WHERE a.request_id = b.request_id AND a.id > b.id"
+    )
+    op.execute("DROP INDEX IF EXISTS ix_signature_inbox_request_id")
+    op.execute(
+        "DO $$ BEGIN "
+        "IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'signature_inbox_request_id_key') THEN "
+        "ALTER TABLE signature_inbox ADD CONSTRAINT signature_inbox_request_id_key UNIQUE (request_id); "
+        "END IF; END $$"
+    )
+    op.execute("DROP INDEX IF EXISTS ux_signature_inbox_event_key")
+    op.execute("ALTER TABLE signature_inbox DROP COLUMN IF EXISTS event_key")
+    op.execute("ALTER TABLE signature_requests DROP COLUMN IF EXISTS attempt")
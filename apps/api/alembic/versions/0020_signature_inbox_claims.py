@@ -0,0 +1,33 @@
+"""signature_inbox: claim events as PROCESSING instead of holding row locks
+
+Revision ID: 0020_signature_inbox_claims
+Revises: 0019_signature_attempts
+Create Date: 2026-10-19
+
+process_inbox used to keep FOR UPDATE SKIP LOCKED row locks open while it
+rendered PDFs and uploaded them. It now flips a batch to PROCESSING (stamping
+claimed_at) and commits, does the I/O with no transaction open, and finishes
+each event in its own short transaction. A claim older than the lease (worker
+died mid-batch) is picked up again by the next run.
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0020_signature_inbox_claims"
+down_revision = "0019_signature_attempts"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE signature_inbox ADD COLUMN IF NOT EXISTS claimed_at TIMESTAMPTZ")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_signature_inbox_processing "
+        "ON signature_inbox (claimed_at) WHERE status = 'PROCESSING'"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_signature_inbox_processing")
+    op.execute("UPDATE signature_inbox SET status = 'PENDING' WHERE status = 'PROCESSING'")
+    op.execute("ALTER TABLE signature_inbox DROP COLUMN IF EXISTS claimed_at")
@@ -0,0 +1,27 @@
+"""documents: partial index for the latest Intake document of an appointment
+
+Revision ID: 0021_documents_intake_idx
+Revises: 0020_signature_inbox_claims
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0021_documents_intake_idx"
+down_revision = "0020_signature_inbox_claims"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # intake.render_intake_pdf compares every render with the appointment's newest
+    # Intake document (meta->>'appointment_id', id DESC LIMIT 1); partial on kind so
+    # consents and other documents of the same appointment are not walked.
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_documents_intake_appt "
+        "ON documents ((meta->>'appointment_id'), id DESC) WHERE kind = 'Intake'"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_documents_intake_appt")
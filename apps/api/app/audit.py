@@ -1,18 +1,14 @@
+import json
 import logging
 from sqlalchemy import text, bindparam
 import sqlalchemy as sa
 
+from .schema_cache import schema_cache
+
 logger = logging.getLogger("api")
 
 def _col_exists(db, table: str, col: str) -> bool:
-    row = db.execute(
-        text(
-            "SELECT 1 FROM information_schema.columns "
-            "WHERE table_name=:t AND column_name=:c"
-        ),
-        {"t": table, "c": col},
-    ).first()
-    return bool(row)
+    return schema_cache.has_column(db, table, col)
 
 def audit_safe(db, action: str, actor: str, target: str | None = None, meta: dict | None = None):
     """
@@ -4,6 +4,7 @@
 # apps/api/app/celery_app.py
 import os
 from celery import Celery
+from celery.schedules import crontab
 
 BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://redis:6379/0")
 RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", "redis://redis:6379/1")
@@ -38,6 +39,27 @@ celery_app.conf.update(
     # Dev convenience: run tasks inline when set
     task_always_eager=os.getenv("CELERY_TASK_ALWAYS_EAGER", "0") == "1",
     task_eager_propagates=True,
+    beat_schedule={
+        "intake-flush-idle-drafts": {
+            "task": "intake.flush_idle_drafts",
+            "schedule": float(os.getenv("INTAKE_DRAFT_FLUSH_SECONDS", "900")),
+        },
+        # safety net for webhook events whose enqueue was lost
+        "signature-process-inbox": {
+            "task": "signature.process_inbox",
+            "schedule": float(os.getenv("SIGNATURE_INBOX_SWEEP_SECONDS", "60")),
+        },
+        # front desk reads precomputed 271s for tomorrow's schedule
+        "eligibility-sweep-upcoming": {
+            "task": "eligibility.sweep_upcoming",
+            "schedule": crontab(hour=int(os.getenv("ELIGIBILITY_SWEEP_HOUR_UTC", "3")), minute=0),
+        },
+        # appt_daily / elig_daily for the ops and RCM dashboards
+        "analytics-rollups": {
+            "task": "analytics.nightly_rollups",
+            "schedule": float(os.getenv("ANALYTICS_ROLLUP_SECONDS", "900")),
+        },
+    },
 )
 
 
@@ -0,0 +1,81 @@
+# apps/api/app/claim_history.py
+"""
+Read side of the claim status history (0016_claim_events).
+
+Triggers on claims append one claim_events row per status transition and fold
+it into claim_current (per claim) and claim_daily (per day), so the RCM numbers
+below are sums over at most one row per day, however many claims exist:
+
+  first-pass acceptance  first adjudications that were PAID / all first adjudications
+  DSO (days sales outstanding)
+                         outstanding AR / average daily charges submitted in the window
+  days to pay            mean days from first submission to PAID
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Mapping, Optional
+
+from sqlalchemy import text
+
+_WINDOW_SQL = """
+SELECT COALESCE(SUM(submitted)           FILTER (WHERE day >= :start), 0) AS submitted,
+       COALESCE(SUM(submitted_cents)     FILTER (WHERE day >= :start), 0) AS submitted_cents,
+       COALESCE(SUM(first_pass_resolved) FILTER (WHERE day >= :start), 0) AS first_pass_resolved,
+       COALESCE(SUM(first_pass_accepted) FILTER (WHERE day >= :start), 0) AS first_pass_accepted,
+       COALESCE(SUM(paid)                FILTER (WHERE day >= :start), 0) AS paid,
+       COALESCE(SUM(paid_cents)          FILTER (WHERE day >= :start), 0) AS paid_cents,
+       COALESCE(SUM(days_to_pay_sum)     FILTER (WHERE day >= :start), 0) AS days_to_pay_sum,
+       COALESCE(SUM(denied)              FILTER (WHERE day >= :start), 0) AS denied,
+       COALESCE(SUM(rejected)            FILTER (WHERE day >= :start), 0) AS rejected,
+       COALESCE(SUM(ar_delta_cents), 0)                                   AS ar_cents
+  FROM claim_daily
+ WHERE day <= :end
+"""
+
+
+def _ratio(num: float, den: float) -> Optional[float]:
+    return (float(num) / float(den)) if den else None
+
+
+def rcm_metrics(sums: Mapping[str, Any], days: int) -> Dict[str, Any]:
+    """Window sums (see _WINDOW_SQL) -> dashboard metrics."""
+    daily_charges = float(sums["submitted_cents"]) / max(1, int(days))
+    resolved = sums["first_pass_resolved"]
+    return {
+        "first_pass_acceptance": _ratio(sums["first_pass_accepted"], resolved),
+        "dso": _ratio(sums["ar_cents"], daily_charges),
+        "days_to_pay_avg": _ratio(sums["days_to_pay_sum"], sums["paid"]),
+        "ar_cents": int(sums["ar_cents"]),
+        "submitted": int(sums["submitted"]),
+        "paid": int(sums["paid"]),
+        "paid_cents": int(sums["paid_cents"]),
+        "denied": int(sums["denied"]),
+        "rejected": int(sums["rejected"]),
+    }
+
+
+def rcm_window(db, days: int = 90, end: Optional[date] = None) -> Dict[str, Any]:
+    end = end or datetime.utcnow().date()  # claim_daily days are UTC
+    start = end - timedelta(days=max(1, int(days)) - 1)
+    sums = db.execute(text(_WINDOW_SQL), {"start": start, "end": end}).mappings().one()
+    return {"start": start.isoformat(), "end": end.isoformat(), **rcm_metrics(sums, days)}
+
+
+def claim_timeline(db, claim_id: int) -> Dict[str, Any]:
+    """Current projection + every transition, oldest first."""
+    cur = db.execute(text("SELECT * FROM claim_current WHERE claim_id = :id"), {"id": claim_id}).mappings().first()
+    events: List[Dict[str, Any]] = [
+        dict(r) for r in db.execute(
+            text(
+                """
+                SELECT id, from_status, to_status, total_cents, paid_cents, denial_code, payer_ref, created_at
+                  FROM claim_events
+                 WHERE claim_id = :id
+                 ORDER BY id
+                """
+            ),
+            {"id": claim_id},
+        ).mappings()
+    ]
+    return {"claim_id": claim_id, "current": dict(cur) if cur else None, "events": events}
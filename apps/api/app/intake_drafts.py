@@ -0,0 +1,108 @@
+# apps/api/app/intake_drafts.py
+"""
+Server-side intake drafts (autosave).
+
+The UI autosaves partial answers; each save is merged into a Redis hash instead of
+writing a Postgres row:
+
+  intake:draft:<aid>  HASH  "<formId>.<field>" -> JSON-encoded value
+  intake:drafts       ZSET  aid -> last-touch epoch seconds (drives the expiry flush)
+
+A draft reaches `intake_forms` only when:
+  - the patient submits (router merges the draft and deletes it), or
+  - it sits idle for DRAFT_TTL_SECONDS, when `intake.flush_idle_drafts` writes all
+    idle drafts in one batched INSERT with status='DRAFT'.
+
+The Redis key itself lives DRAFT_GRACE_SECONDS longer than the logical TTL so a
+delayed beat run never loses a draft.
+"""
+from __future__ import annotations
+
+import json
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .utils.redis_cache import get_redis_client
+
+DRAFT_TTL_SECONDS = 24 * 3600
+DRAFT_GRACE_SECONDS = 6 * 3600
+DRAFT_INDEX_KEY = "intake:drafts"
+DRAFT_MAX_BYTES = 64 * 1024  # per PATCH body (JSON-encoded answers)
+
+
+def _key(appointment_id: int) -> str:
+    return f"intake:draft:{int(appointment_id)}"
+
+
+def save_draft(appointment_id: int, answers: Dict[str, Any]) -> float:
+    """Merge partial answers (HSET, so concurrent devices only touch their own fields)."""
+    now = time.time()
+    r = get_redis_client()
+    if not answers and not r.hgetall(_key(appointment_id)):
+        return now  # nothing to keep: an empty draft must not sit in the flush index
+    pipe = r.pipeline()
+    if answers:
+        pipe.hset(_key(appointment_id), mapping={k: json.dumps(v) for k, v in answers.items()})
+    pipe.expire(_key(appointment_id), DRAFT_TTL_SECONDS + DRAFT_GRACE_SECONDS)
+    pipe.zadd(DRAFT_INDEX_KEY, {str(int(appointment_id)): now})
+    pipe.execute()
+    return now
+
+
+def load_draft(appointment_id: int) -> Dict[str, Any]:
+    raw = get_redis_client().hgetall(_key(appointment_id)) or {}
+    out: Dict[str, Any] = {}
+    for k, v in raw.items():
+        try:
+            out[k] = json.loads(v)
+        except (TypeError, ValueError):
+            out[k] = v
+    return out
+
+
+def discard_draft(appointment_id: int) -> None:
+    r = get_redis_client()
+    pipe = r.pipeline()
+    pipe.delete(_key(appointment_id))
+    pipe.zrem(DRAFT_INDEX_KEY, str(int(appointment_id)))
+    pipe.execute()
+
+
+def idle_drafts(limit: int = 500, now: Optional[float] = None) -> List[Tuple[int, float, Dict[str, Any]]]:
+    """
+    Drafts untouched for DRAFT_TTL_SECONDS: [(appointment_id, last_touch, answers)].
+    Index entries whose hash is empty or already expired are dropped on the way,
+    so they can never crowd real drafts out of the batch.
+    """
+    now = time.time() if now is None else now
+    r = get_redis_client()
+    out: List[Tuple[int, float, Dict[str, Any]]] = []
+    while True:
+        members = r.zrangebyscore(DRAFT_INDEX_KEY, 0, now - DRAFT_TTL_SECONDS, start=len(out), num=limit - len(out))
+        empty = []
+        for m in members:
+            touched = r.zscore(DRAFT_INDEX_KEY, m)
+            if touched is None:
+                continue
+            answers = load_draft(int(m))
+            if answers:
+                out.append((int(m), float(touched), answers))
+            else:
+                empty.append(m)
+        if empty:
+            r.zrem(DRAFT_INDEX_KEY, *empty)
+        if not empty or len(out) >= limit:
+            return out
+
+
+def release_if_untouched(appointment_id: int, touched: float) -> bool:
+    """
+    Drop a flushed draft unless the patient saved again while we were writing it;
+    in that case the fresher draft stays in Redis and flushes on its own expiry.
+    """
+    r = get_redis_client()
+    current = r.zscore(DRAFT_INDEX_KEY, str(int(appointment_id)))
+    if current is not None and float(current) != touched:
+        return False
+    discard_draft(appointment_id)
+    return True
@@ -0,0 +1,164 @@
+# apps/api/app/intake_validation.py
+"""
+Compiled validators for intake form sets.
+
+A form set is the list the UI renders ([{id, title, schema}, ...]); answers come
+back flattened as "<formId>.<field>" -> value. Each form set is compiled once into
+a flat table of (key, required, check) entries so a submission is validated in a
+single pass with no schema walking, and every problem is reported at once
+(the UI highlights all fields, not just the first).
+
+Form sets are memoized by content fingerprint, so per-reason / dynamic form sets
+(see intake_schemas.schema_for_reason) each compile exactly once per process.
+
+Supported JSON-Schema subset: type (incl. unions), enum, minLength, maxLength,
+pattern, format=date, minimum, maximum, required.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import threading
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# check(value) -> None when valid, else a short user-facing message
+Check = Callable[[Any], Optional[str]]
+
+_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+_TYPE_TESTS: Dict[str, Tuple[Callable[[Any], bool], str]] = {
+    "string": (lambda v: isinstance(v, str), "Must be text"),
+    "boolean": (lambda v: isinstance(v, bool), "Must be yes or no"),
+    "integer": (lambda v: isinstance(v, int) and not isinstance(v, bool), "Must be a whole number"),
+    "number": (lambda v: isinstance(v, (int, float)) and not isinstance(v, bool), "Must be a number"),
+    "object": (lambda v: isinstance(v, dict), "Must be an object"),
+    "array": (lambda v: isinstance(v, list), "Must be a list"),
+    "null": (lambda v: v is None, "Must be empty"),
+}
+
+
+def _is_blank(v: Any) -> bool:
+    return v is None or (isinstance(v, str) and not v.strip())
+
+
+def _compile_field(spec: Dict[str, Any]) -> Check:
+    """Turn one property schema into a flat list of predicates, then a single closure."""
+    steps: List[Check] = []
+
+    types = spec.get("type")
+    if types:
+        names = [types] if isinstance(types, str) else list(types)
+        tests = [_TYPE_TESTS[t][0] for t in names if t in _TYPE_TESTS]
+        msg = _TYPE_TESTS[names[0]][1] if len(names) == 1 and names[0] in _TYPE_TESTS else f"Must be {' or '.join(names)}"
+        if len(tests) == 1:
+            only = tests[0]
+            steps.append(lambda v, _t=only, _m=msg: None if _t(v) else _m)
+        elif tests:
+            steps.append(lambda v, _ts=tuple(tests), _m=msg: None if any(t(v) for t in _ts) else _m)
+
+    if "enum" in spec:
+        allowed = frozenset(json.dumps(x, sort_keys=True) for x in spec["enum"])
+        msg = "Must be one of: " + ", ".join(str(x) for x in spec["enum"])
+        steps.append(lambda v, _a=allowed, _m=msg: None if json.dumps(v, sort_keys=True) in _a else _m)
+
+    if "minLength" in spec:
+        n = int(spec["minLength"])
+        steps.append(lambda v, _n=n: None if not isinstance(v, str) or len(v) >= _n else f"Must be at least {_n} characters")
+    if "maxLength" in spec:
+        n = int(spec["maxLength"])
+        steps.append(lambda v, _n=n: None if not isinstance(v, str) or len(v) <= _n else f"Must be at most {_n} characters")
+    if "pattern" in spec:
+        rx = re.compile(spec["pattern"])
+        steps.append(lambda v, _rx=rx: None if not isinstance(v, str) or _rx.search(v) else "Invalid format")
+    if spec.get("format") == "date":
+        def _date(v: Any) -> Optional[str]:
+            if not isinstance(v, str):
+                return None
+            if _DATE_RE.match(v):
+                try:
+                    date.fromisoformat(v)
+                    return None
+                except ValueError:
+                    pass
+            return "Must be a date (YYYY-MM-DD)"
+        steps.append(_date)
+
+    num = lambda v: isinstance(v, (int, float)) and not isinstance(v, bool)  # noqa: E731
+    if "minimum" in spec:
+        lo = spec["minimum"]
+        steps.append(lambda v, _lo=lo: None if not num(v) or v >= _lo else f"Must be ≥ {_lo}")
+    if "maximum" in spec:
+        hi = spec["maximum"]
+        steps.append(lambda v, _hi=hi: None if not num(v) or v <= _hi else f"Must be ≤ {_hi}")
+
+    if not steps:
+        return lambda v: None
+    if len(steps) == 1:
+        return steps[0]
+
+    def check(v: Any, _steps=tuple(steps)) -> Optional[str]:
+        for step in _steps:
+            err = step(v)
+            if err:
+                return err
+        return None
+
+    return check
+
+
+class FormSetValidator:
+    """Validates a flattened answer map against a compiled form set in one pass."""
+
+    __slots__ = ("fields",)
+
+    def __init__(self, fields: List[Tuple[str, bool, Check]]):
+        self.fields = fields
+
+    def __call__(self, answers: Dict[str, Any]) -> Dict[str, str]:
+        """Returns { "<formId>.<field>": message } — empty when the submission is valid."""
+        errors: Dict[str, str] = {}
+        get = answers.get
+        for key, required, check in self.fields:
+            val = get(key)
+            if _is_blank(val):
+                if required:
+                    errors[key] = "Required"
+                continue
+            err = check(val)
+            if err:
+                errors[key] = err
+        return errors
+
+
+def compile_form_set(forms: List[Dict[str, Any]]) -> FormSetValidator:
+    fields: List[Tuple[str, bool, Check]] = []
+    for f in forms:
+        schema = f.get("schema") or {}
+        props = schema.get("properties") or {}
+        required = set(schema.get("required") or [])
+        # required fields without a property spec still need a presence check
+        for name in list(props) + [r for r in required if r not in props]:
+            fields.append((f"{f['id']}.{name}", name in required, _compile_field(props.get(name) or {})))
+    return FormSetValidator(fields)
+
+
+_cache: Dict[str, FormSetValidator] = {}
+_cache_lock = threading.Lock()
+
+
+def form_set_fingerprint(forms: List[Dict[str, Any]]) -> str:
+    return hashlib.sha256(json.dumps(forms, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def validator_for(forms: List[Dict[str, Any]]) -> FormSetValidator:
+    """Memoized compile: dynamic (e.g. per-reason) form sets pay the compile cost once."""
+    fp = form_set_fingerprint(forms)
+    v = _cache.get(fp)
+    if v is None:
+        with _cache_lock:
+            v = _cache.get(fp)
+            if v is None:
+                v = _cache[fp] = compile_form_set(forms)
+    return v
@@ -1,8 +1,12 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from prometheus_fastapi_instrumentator import Instrumentator
 import os
 from .otel import setup_tracer
+from .db import engine
+from .schema_check import check_schema
 #from .middleware.purpose_of_use import PurposeOfUseMiddleware
 from .routers import health, auth, sessions, agents, appointments, intake, documents, signature, admin, checkin, ops, prechart, pros, tasks, compliance, analytics, encounters, billing_eligibility, rbac, dev
 from .routers import scribe as scribe_router
@@ -12,7 +16,16 @@ from .routers import billing as billing_router
 setup_tracer()
 
 WEB_ORIGIN = os.getenv("WEB_ORIGIN", "http://localhost:5173")
-app = FastAPI(title="Healthcare API", version="0.1.0")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One schema check per process instead of CREATE/ALTER TABLE in request handlers
+    app.state.schema_missing = await run_in_threadpool(check_schema, engine)
+    yield
+
+
+app = FastAPI(title="Healthcare API", version="0.1.0", lifespan=lifespan)
 #app.add_middleware(PurposeOfUseMiddleware)
 app.add_middleware(
     CORSMiddleware,
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey, Text, Index, Boolean 
+from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey, Text, Index, Boolean, BigInteger, Date, Float, Computed
 from sqlalchemy.sql import func
 from .db import Base
 from sqlalchemy.dialects.postgresql import JSONB
@@ -27,6 +27,7 @@ class Appointment(Base):
     fhir_appointment_id = Column(String(128), nullable=True)
     reason = Column(String(256), nullable=True)
     source_channel = Column(String(64), nullable=True)
+    clinic = Column(String(64), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 class IntakeForm(Base):
@@ -34,6 +35,7 @@ class IntakeForm(Base):
     id = Column(Integer, primary_key=True)
     appointment_id = Column(Integer, ForeignKey("appointments.id"))
     answers_json = Column(JSON, nullable=True)
+    status = Column(String(16), nullable=False, server_default="SUBMITTED")  # SUBMITTED | DRAFT (expired autosave)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 class Consent(Base):
@@ -72,8 +74,77 @@ class Claim(Base):
     status = Column(String(32), index=True, default="NEW")
     payer_ref = Column(String(128), nullable=True)
     payload_json = Column(JSON, nullable=True)
+    paid_cents = Column(Integer, nullable=True)       # from the latest 835 CLP04
+    denial_code = Column(String(32), nullable=True)   # e.g. "CO-97" (first CAS of a denied CLP)
+    payer = Column(Text, Computed("payload_json->>'payer'", persisted=True))  # worklist filter
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+class RemitFile(Base):
+    __tablename__ = "remit_files"
+    id = Column(Integer, primary_key=True)
+    sha256 = Column(String(64), unique=True, nullable=False)
+    url = Column(Text, nullable=False)
+    stats = Column(JSONB, nullable=False, server_default=sa_text("'{}'::jsonb"))  # counts + throughput
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+# --- Claim status history (0016_claim_events): written by triggers on claims ---
+class ClaimEvent(Base):
+    __tablename__ = "claim_events"  # append-only
+    id = Column(BigInteger, primary_key=True)
+    claim_id = Column(Integer, nullable=False)
+    from_status = Column(String(32), nullable=True)
+    to_status = Column(String(32), nullable=False)
+    total_cents = Column(Integer, nullable=False, server_default="0")
+    from_total_cents = Column(Integer, nullable=True)  # total before the transition
+    paid_cents = Column(Integer, nullable=True)
+    denial_code = Column(String(32), nullable=True)
+    payer_ref = Column(String(128), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class ClaimCurrent(Base):
+    __tablename__ = "claim_current"  # projection of claim_events, one row per claim
+    claim_id = Column(Integer, primary_key=True)
+    status = Column(String(32), nullable=False)
+    status_since = Column(DateTime(timezone=True), nullable=False)
+    total_cents = Column(Integer, nullable=False, server_default="0")
+    submit_count = Column(Integer, nullable=False, server_default="0")
+    first_submitted_at = Column(DateTime(timezone=True), nullable=True)
+    first_outcome = Column(String(32), nullable=True)  # PAID | DENIED | REJECTED
+    paid_at = Column(DateTime(timezone=True), nullable=True)
+    transitions = Column(Integer, nullable=False, server_default="0")
+
+class ClaimDaily(Base):
+    __tablename__ = "claim_daily"  # per-day counters folded from claim_events
+    day = Column(Date, primary_key=True)
+    submitted = Column(Integer, nullable=False, server_default="0")
+    submitted_cents = Column(BigInteger, nullable=False, server_default="0")
+    first_pass_resolved = Column(Integer, nullable=False, server_default="0")
+    first_pass_accepted = Column(Integer, nullable=False, server_default="0")
+    paid = Column(Integer, nullable=False, server_default="0")
+    paid_cents = Column(BigInteger, nullable=False, server_default="0")
+    days_to_pay_sum = Column(Float, nullable=False, server_default="0")
+    denied = Column(Integer, nullable=False, server_default="0")
+    rejected = Column(Integer, nullable=False, server_default="0")
+    ar_delta_cents = Column(BigInteger, nullable=False, server_default="0")
+
+class ApptDaily(Base):
+    __tablename__ = "appt_daily"  # rebuilt per day window by analytics.nightly_rollups
+    day = Column(Date, primary_key=True)
+    clinic = Column(String(64), primary_key=True, server_default="")
+    channel = Column(String(64), primary_key=True, server_default="")
+    appts = Column(Integer, nullable=False, server_default="0")
+    no_shows = Column(Integer, nullable=False, server_default="0")
+    tta_seconds_sum = Column(Float, nullable=False, server_default="0")
+    tta_count = Column(Integer, nullable=False, server_default="0")
+
+class EligDaily(Base):
+    __tablename__ = "elig_daily"
+    day = Column(Date, primary_key=True)
+    clinic = Column(String(64), primary_key=True, server_default="")
+    channel = Column(String(64), primary_key=True, server_default="")
+    ok = Column(Integer, nullable=False, server_default="0")
+    total = Column(Integer, nullable=False, server_default="0")
+
 class PolicyChunk(Base):
     __tablename__ = "policy_chunks"
     id = Column(Integer, primary_key=True)
@@ -103,12 +174,42 @@ class EligibilityResponse(Base):
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)  
 
 
-# --- Phase 6 optional ORM (tables already created via raw SQL in router) ---
+# --- Signature webhook inbox (one row per signing attempt / provider event; see tasks/signature.py) ---
+class SignatureInbox(Base):
+    __tablename__ = "signature_inbox"
+    id = Column(Integer, primary_key=True)
+    request_id = Column(String(128), index=True, nullable=False)
+    event_key = Column(String(192), unique=True, nullable=False)  # provider event id or "<request_id>#<attempt>"
+    payload = Column(JSONB, nullable=False)
+    status = Column(String(16), nullable=False, server_default="PENDING")  # PENDING|PROCESSING|DONE|FAILED
+    attempts = Column(Integer, nullable=False, server_default="0")
+    last_error = Column(Text, nullable=True)
+    received_at = Column(DateTime(timezone=True), server_default=func.now())
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+    claimed_at = Column(DateTime(timezone=True), nullable=True)  # set while PROCESSING
+
+
+class SignatureRequestRecord(Base):
+    __tablename__ = "signature_requests"
+    id = Column(Integer, primary_key=True)
+    request_id = Column(String(128), unique=True, nullable=False)
+    appointment_id = Column(Integer, nullable=True)
+    signer_name = Column(String(128), nullable=True)
+    email = Column(String(255), nullable=True)
+    status = Column(String(16), nullable=False, server_default="PENDING")  # PENDING|SIGNED|FAILED
+    attempt = Column(Integer, nullable=False, server_default="1")  # +1 on each retry after FAILED
+    document_id = Column(Integer, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+# --- Phase 6 optional ORM (table created in migration 0012_runtime_ddl) ---
 class ScribeSession(Base):
     __tablename__ = "scribe_sessions"
     id = Column(Integer, primary_key=True)
     appointment_id = Column(Integer, index=True, nullable=False)
     status = Column(String(32), index=True, default="DRAFT")
+    meta = Column(JSONB, nullable=False, server_default=sa_text("'{}'::jsonb"))  # draft, model, confidences
     draft_json = Column(JSONB, nullable=True)
     confidence_json = Column(JSONB, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
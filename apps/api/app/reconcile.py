@@ -0,0 +1,195 @@
+# apps/api/app/reconcile.py
+"""
+Remittance-to-claim reconciliation.
+
+Payers echo our identifiers back inconsistently: CLP01 may be our claim id, an
+encounter id, or something reformatted; CLP07 is their own claim number. So
+candidate claims are loaded once into hash indexes and every remit line is
+resolved with O(1) lookups, trying the strongest key first:
+
+  1. id           CLP01 == claims.id
+  2. payer_ref    CLP07 == claims.payer_ref
+  3. encounter    normalised CLP01 == normalised claims.encounter_id / id
+  4. member_dos   (member id, service date, billed amount)
+  5. member_amt   (member id, billed amount)      - only if exactly one candidate
+  6. dos_amt      (service date, billed amount)   - only if exactly one candidate
+                                                    and the line carries no member id
+
+Exact keys (1-3) may hit the same claim more than once (reversal and
+re-adjudication in one file). Fuzzy keys (4-6) only take a claim nobody has
+matched yet and only when unambiguous. A line that names a member never falls
+back past that member: if no claim of theirs fits, it goes to the worklist
+rather than onto another patient's claim. Lines that resolve to nothing are
+returned as unmatched, and the caller writes them to the worklist
+(tasks.type = 'remit_unmatched').
+"""
+from __future__ import annotations
+
+import json
+import re
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import text
+
+from .x12.remit import RemitItem, RemitLine
+
+# claims a remit can still apply to (PAID/DENIED kept for corrections and reversals)
+CANDIDATE_STATUSES = ("SUBMITTED", "RESUBMIT", "PAID", "DENIED", "REJECTED")
+
+_NON_ALNUM = re.compile(r"[^0-9A-Za-z]+")
+_PREFIXED = re.compile(r"([A-Z]+)0+(\d+)")
+
+
+class CandidateClaim(NamedTuple):
+    id: int
+    payer_ref: Optional[str]
+    encounter_id: Optional[str]
+    member_id: Optional[str]
+    service_date: Optional[str]  # CCYYMMDD
+    total_cents: int
+
+
+def norm(value: Optional[str]) -> str:
+    """'ENC-000123' / 'enc 123' / 'enc-123' -> 'ENC123'; pure numbers lose leading zeros."""
+    v = value or ""
+    if not v.isalnum():
+        v = _NON_ALNUM.sub("", v)
+    v = v.upper()
+    if v.isdigit():
+        return v.lstrip("0") or "0"
+    m = _PREFIXED.fullmatch(v)
+    return m.group(1) + m.group(2) if m else v
+
+
+def _d8(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    s = str(value)[:10].replace("-", "")
+    return s if len(s) == 8 and s.isdigit() else None
+
+
+class ClaimIndex:
+    def __init__(self, claims: Iterable[CandidateClaim]) -> None:
+        self.by_id: Dict[int, CandidateClaim] = {}
+        self.by_payer_ref: Dict[str, int] = {}
+        self.by_norm: Dict[str, int] = {}
+        self.by_member_dos_amt: Dict[Tuple[str, str, int], List[int]] = defaultdict(list)
+        self.by_member_amt: Dict[Tuple[str, int], List[int]] = defaultdict(list)
+        self.by_dos_amt: Dict[Tuple[str, int], List[int]] = defaultdict(list)
+        for c in claims:
+            self.add(c)
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    def add(self, c: CandidateClaim) -> None:
+        self.by_id[c.id] = c
+        if c.payer_ref:
+            self.by_payer_ref[c.payer_ref] = c.id
+        self.by_norm.setdefault(str(c.id), c.id)
+        if c.encounter_id:
+            self.by_norm[norm(c.encounter_id)] = c.id
+        if c.member_id:
+            member = norm(c.member_id)
+            if c.service_date:
+                self.by_member_dos_amt[(member, c.service_date, c.total_cents)].append(c.id)
+            self.by_member_amt[(member, c.total_cents)].append(c.id)
+        if c.service_date:
+            self.by_dos_amt[(c.service_date, c.total_cents)].append(c.id)
+
+    @classmethod
+    def load(cls, db, statuses: Tuple[str, ...] = CANDIDATE_STATUSES, batch: int = 10_000) -> "ClaimIndex":
+        """One streamed query (server-side cursor); only the columns the keys need."""
+        result = db.execute(
+            text(
+                """
+                SELECT c.id, c.payer_ref, c.encounter_id, c.total_cents,
+                       COALESCE(c.payload_json->>'member_id', p.mrn) AS member_id,
+                       COALESCE(c.payload_json->>'dos', to_char(c.created_at, 'YYYY-MM-DD')) AS dos
+                  FROM claims c
+                  LEFT JOIN patients p ON p.id = c.patient_id
+                 WHERE c.status = ANY(:st)
+                """
+            ).execution_options(yield_per=batch),
+            {"st": list(statuses)},
+        )
+        return cls(
+            CandidateClaim(int(r.id), r.payer_ref, r.encounter_id, r.member_id, _d8(r.dos), int(r.total_cents or 0))
+            for r in result
+        )
+
+
+class Reconciler:
+    def __init__(self, index: ClaimIndex) -> None:
+        self.index = index
+        self.matched: Set[int] = set()
+        self.methods: Counter = Counter()
+        self.unmatched: List[RemitItem] = []
+
+    def _unique_free(self, ids: Optional[List[int]]) -> Optional[int]:
+        if not ids:
+            return None
+        free = [i for i in ids if i not in self.matched]
+        return free[0] if len(free) == 1 else None
+
+    def match(self, item: RemitItem) -> Tuple[Optional[int], Optional[str]]:
+        ix = self.index
+        pcn = (item.pcn or "").strip()
+        if pcn.isdigit() and int(pcn) in ix.by_id:
+            return int(pcn), "id"
+        if item.payer_claim_ref and item.payer_claim_ref in ix.by_payer_ref:
+            return ix.by_payer_ref[item.payer_claim_ref], "payer_ref"
+        cid = ix.by_norm.get(norm(pcn)) if pcn else None
+        if cid is not None:
+            return cid, "encounter"
+
+        member = norm(item.member_id) if item.member_id else None
+        dos = _d8(item.service_date)
+        amt = item.charge_cents
+        if member and dos:
+            cid = self._unique_free(ix.by_member_dos_amt.get((member, dos, amt)))
+            if cid is not None:
+                return cid, "member_dos"
+        if member:
+            cid = self._unique_free(ix.by_member_amt.get((member, amt)))
+            if cid is not None:
+                return cid, "member_amt"
+            return None, None  # never post a named member's line to someone else's claim
+        if dos:
+            cid = self._unique_free(ix.by_dos_amt.get((dos, amt)))
+            if cid is not None:
+                return cid, "dos_amt"
+        return None, None
+
+    def resolve(self, items: Iterable[RemitItem]) -> Iterator[RemitLine]:
+        """Stream resolved lines; unmatched items accumulate in self.unmatched."""
+        for item in items:
+            cid, method = self.match(item)
+            if cid is None:
+                self.methods["unmatched"] += 1
+                self.unmatched.append(item)
+                continue
+            self.matched.add(cid)
+            self.methods[method] += 1
+            yield item.resolved(cid)
+
+
+def write_worklist(db, items: List[RemitItem], source: str) -> int:
+    """One executemany INSERT of 'remit_unmatched' tasks for the billing worklist."""
+    if not items:
+        return 0
+    db.execute(
+        text(
+            """
+            INSERT INTO tasks(type, status, payload_json, created_at)
+            VALUES ('remit_unmatched', 'OPEN', CAST(:p AS json), NOW())
+            """
+        ),
+        [
+            {"p": json.dumps({"remit": source, **i._asdict()}, separators=(",", ":"))}
+            for i in items
+        ],
+    )
+    return len(items)
+
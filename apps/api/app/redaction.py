@@ -0,0 +1,188 @@
+# apps/api/app/redaction.py
+"""
+PHI redaction for scribe drafts and de-identified exports.
+
+Two matchers, both built once and run in a single pass over the text:
+- An Aho-Corasick automaton over *known* identifiers (patient names, MRNs,
+  phones, emails pulled from the patients table). Cost is O(text) no matter
+  how many identifiers are loaded, unlike one re.sub per identifier.
+- One precompiled alternation of generic patterns (emails, phone numbers,
+  MRN/SSN-like ids, dates, honorific + name) for PHI we have no record of.
+
+redact_batch() joins a batch of documents with a NUL separator and scans the
+whole buffer once, so per-call overhead is paid per batch, not per document.
+Matches are case-insensitive and respect word boundaries; overlapping hits are
+merged and replaced with a [LABEL] token.
+"""
+from __future__ import annotations
+
+import re
+from bisect import bisect_right
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import text as sql_text
+
+_SEP = "\x00"  # never matched by the patterns below (\s and \w exclude NUL)
+
+_MONTHS = r"(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\.?"
+
+PATTERNS: List[Tuple[str, str]] = [
+    ("EMAIL", r"[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}"),
+    ("ID", r"\b\d{3}-\d{2}-\d{4}\b"),  # SSN-shaped
+    ("PHONE", r"(?<![\w+])(?:\+?1[ .-]?)?(?:\(\d{3}\)\s?|\d{3}[ .-])\d{3}[ .-]\d{4}\b"),
+    ("MRN", r"\b(?:MRN|medical record(?: number| no\.?)?)\s*[:#]?\s*[A-Za-z0-9-]*\d[A-Za-z0-9-]*"),
+    ("DATE", r"\b\d{4}-\d{1,2}-\d{1,2}\b|\b\d{1,2}[/-]\d{1,2}[/-](?:\d{4}|\d{2})\b|"
+             r"\b" + _MONTHS + r" \d{1,2}(?:st|nd|rd|th)?,? \d{4}\b|\b\d{1,2} " + _MONTHS + r" \d{4}\b"),
+    ("NAME", r"\b(?:Mr|Mrs|Ms|Miss|Mx|Dr)\.? [A-Z][a-zA-Z'-]+(?: [A-Z][a-zA-Z'-]+)?"),
+]
+# every pattern starts a token, so the lookbehind rejects mid-word positions before
+# any branch is tried (~2x faster than the bare alternation on note-like text)
+_GENERIC = re.compile(
+    r"(?<![A-Za-z0-9])(?:" + "|".join(f"(?P<{label}>{rx})" for label, rx in PATTERNS) + ")",
+    re.IGNORECASE,
+)
+# honorific names must stay capitalised even under IGNORECASE ("dr. visit" is not a name)
+_NAME_CASE = re.compile(r"[A-Z][a-zA-Z'-]+$")
+
+
+class Redacted(NamedTuple):
+    text: str
+    counts: Dict[str, int]
+
+
+def _lower(s: str) -> str:
+    low = s.lower()
+    # a few code points change length when lowered (e.g. "İ"); keep offsets aligned
+    return low if len(low) == len(s) else "".join(c.lower()[0] for c in s)
+
+
+class AhoCorasick:
+    """Case-insensitive multi-pattern matcher; finditer() yields (start, end, label)."""
+
+    def __init__(self, terms: Iterable[Tuple[str, str]]) -> None:
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, str]]] = [[]]  # (term length, label)
+        for term, label in terms:
+            self._add(_lower(term.strip()), label)
+        self._build()
+
+    def __len__(self) -> int:
+        return sum(len(o) for o in self._out)
+
+    def _add(self, term: str, label: str) -> None:
+        if len(term) < 2:
+            return
+        node = 0
+        for ch in term:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        if all(length != len(term) for length, _ in self._out[node]):
+            self._out[node].append((len(term), label))
+
+    def _build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        if len(self._goto) == 1:
+            return
+        goto, fail, out = self._goto, self._fail, self._out
+        low = _lower(text)
+        n = len(text)
+        node = 0
+        for i, ch in enumerate(low):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                end = i + 1
+                for length, label in out[node]:
+                    start = end - length
+                    # whole words only: "Ann" must not hit "Annual"
+                    if (start == 0 or not low[start - 1].isalnum()) and (end == n or not low[end].isalnum()):
+                        yield start, end, label
+
+
+class Redactor:
+    def __init__(self, identifiers: Iterable[Tuple[str, str]] = ()) -> None:
+        self.known = AhoCorasick(identifiers)
+
+    def _spans(self, text: str) -> List[Tuple[int, int, str]]:
+        spans = list(self.known.finditer(text))
+        for m in _GENERIC.finditer(text):
+            label = m.lastgroup or "ID"
+            if label == "NAME" and not _NAME_CASE.match(m.group(0).split()[-1]):
+                continue
+            spans.append((m.start(), m.end(), label))
+        spans.sort(key=lambda s: (s[0], -s[1]))
+
+        merged: List[Tuple[int, int, str]] = []
+        for start, end, label in spans:
+            if merged and start < merged[-1][1]:
+                if end > merged[-1][1]:
+                    merged[-1] = (merged[-1][0], end, merged[-1][2])
+                continue
+            merged.append((start, end, label))
+        return merged
+
+    def redact(self, text: str) -> Redacted:
+        return self.redact_batch([text])[0]
+
+    def redact_batch(self, texts: Sequence[Optional[str]]) -> List[Redacted]:
+        docs = [(t or "").replace(_SEP, "") for t in texts]
+        buf = _SEP.join(docs)
+        starts, pos = [], 0
+        for d in docs:
+            starts.append(pos)
+            pos += len(d) + 1
+
+        counts: List[Dict[str, int]] = [{} for _ in docs]
+        parts: List[str] = []
+        last = 0
+        for start, end, label in self._spans(buf):
+            parts.append(buf[last:start])
+            parts.append(f"[{label}]")
+            last = end
+            c = counts[bisect_right(starts, start) - 1]
+            c[label] = c.get(label, 0) + 1
+        parts.append(buf[last:])
+
+        out = "".join(parts).split(_SEP)
+        return [Redacted(t, c) for t, c in zip(out, counts)]
+
+
+def patient_identifiers(db, patient_ids: Iterable[int]) -> List[Tuple[str, str]]:
+    """Known identifiers (term, label) for the given patients, for the Aho-Corasick matcher."""
+    ids = sorted({int(p) for p in patient_ids if p is not None})
+    if not ids:
+        return []
+    rows = db.execute(
+        sql_text("SELECT first_name, last_name, mrn, phone, email FROM patients WHERE id = ANY(:ids)"),
+        {"ids": ids},
+    ).mappings().all()
+    terms: List[Tuple[str, str]] = []
+    for r in rows:
+        first, last = (r["first_name"] or "").strip(), (r["last_name"] or "").strip()
+        for name in (first, last, f"{first} {last}".strip(), f"{last}, {first}".strip(", ")):
+            if name:
+                terms.append((name, "NAME"))
+        for col, label in (("mrn", "MRN"), ("phone", "PHONE"), ("email", "EMAIL")):
+            if r[col]:
+                terms.append((str(r[col]), label))
+    return terms
@@ -0,0 +1,151 @@
+# apps/api/app/rollups.py
+"""
+Per-day, per-clinic, per-channel rollups for the ops and RCM dashboards
+(0018_analytics_rollups).
+
+  appt_daily  appointments by start day: count, no-shows, booking->start seconds
+  elig_daily  eligibility_responses by check day: ok / total, with the
+              appointment's clinic and channel
+
+refresh() re-aggregates only a window of recent days (ANALYTICS_ROLLUP_LOOKBACK_DAYS
+back, ANALYTICS_ROLLUP_HORIZON_DAYS ahead for future bookings) with a DELETE + INSERT
+per table in one transaction; days outside the window are final. Work per run
+is bounded by the window, not by history. An empty rollup table (first run)
+or full=True rebuilds every day. The endpoints then sum at most
+days x clinics x channels rows for any date range.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from sqlalchemy import text
+
+from .settings import settings
+
+_LOCK_KEY = 180018  # pg advisory lock: one refresh at a time
+
+_APPT_DELETE = "DELETE FROM appt_daily WHERE day >= :lo AND day < :hi"
+_APPT_INSERT = """
+INSERT INTO appt_daily (day, clinic, channel, appts, no_shows, tta_seconds_sum, tta_count)
+SELECT (start_at AT TIME ZONE 'UTC')::date,
+       COALESCE(clinic, ''),
+       COALESCE(lower(source_channel), ''),
+       COUNT(*),
+       COUNT(*) FILTER (WHERE lower(status) IN ('no_show', 'noshow')),
+       COALESCE(SUM(EXTRACT(EPOCH FROM (start_at - created_at))) FILTER (WHERE created_at IS NOT NULL), 0),
+       COUNT(*) FILTER (WHERE created_at IS NOT NULL)
+  FROM appointments
+ WHERE start_at >= :lo_ts AND start_at < :hi_ts
+ GROUP BY 1, 2, 3
+"""
+
+_ELIG_DELETE = "DELETE FROM elig_daily WHERE day >= :lo AND day < :hi"
+# eligibility_responses.created_at is naive UTC
+_ELIG_INSERT = """
+INSERT INTO elig_daily (day, clinic, channel, ok, total)
+SELECT e.created_at::date,
+       COALESCE(a.clinic, ''),
+       COALESCE(lower(a.source_channel), ''),
+       COUNT(*) FILTER (WHERE e.eligible),
+       COUNT(*)
+  FROM eligibility_responses e
+  LEFT JOIN appointments a ON a.id = e.appointment_id
+ WHERE e.created_at >= :lo_naive AND e.created_at < :hi_naive
+ GROUP BY 1, 2, 3
+"""
+
+_BOUNDS = """
+SELECT (SELECT (MIN(start_at) AT TIME ZONE 'UTC')::date FROM appointments)       AS appt_lo,
+       (SELECT (MAX(start_at) AT TIME ZONE 'UTC')::date FROM appointments)       AS appt_hi,
+       (SELECT MIN(created_at)::date FROM eligibility_responses)                AS elig_lo,
+       (SELECT MAX(created_at)::date FROM eligibility_responses)                AS elig_hi,
+       NOT EXISTS (SELECT 1 FROM appt_daily) AND NOT EXISTS (SELECT 1 FROM elig_daily) AS empty
+"""
+
+
+def _range(lo: date, hi: date) -> Dict[str, Any]:
+    """[lo, hi) as dates, UTC timestamps and naive UTC timestamps."""
+    lo_ts = datetime(lo.year, lo.month, lo.day)
+    hi_ts = datetime(hi.year, hi.month, hi.day)
+    return {"lo": lo, "hi": hi, "lo_ts": lo_ts.isoformat() + "+00:00", "hi_ts": hi_ts.isoformat() + "+00:00",
+            "lo_naive": lo_ts, "hi_naive": hi_ts}
+
+
+def refresh_window(today: date, lookback_days: Optional[int] = None,
+                   horizon_days: Optional[int] = None) -> Tuple[date, date]:
+    """[today - lookback, today + horizon] as a half-open day range."""
+    lookback = settings.analytics_rollup_lookback_days if lookback_days is None else lookback_days
+    horizon = settings.analytics_rollup_horizon_days if horizon_days is None else horizon_days
+    return today - timedelta(days=lookback), today + timedelta(days=horizon + 1)
+
+
+def refresh(db, full: bool = False, today: Optional[date] = None,
+            lookback_days: Optional[int] = None, horizon_days: Optional[int] = None) -> Dict[str, Any]:
+    """Rebuild the rollup rows for the refresh window (or everything); caller commits."""
+    if not db.execute(text("SELECT pg_try_advisory_xact_lock(:k)"), {"k": _LOCK_KEY}).scalar():
+        return {"skipped": "another refresh is running"}
+
+    today = today or datetime.utcnow().date()
+    appt_lo, appt_hi = elig_lo, elig_hi = refresh_window(today, lookback_days, horizon_days)
+    b = db.execute(text(_BOUNDS)).mappings().one()
+    full = full or bool(b["empty"])
+    if full:
+        appt_lo = min(filter(None, [b["appt_lo"], appt_lo]))
+        appt_hi = max(filter(None, [b["appt_hi"] and b["appt_hi"] + timedelta(days=1), appt_hi]))
+        elig_lo = min(filter(None, [b["elig_lo"], elig_lo]))
+        elig_hi = max(filter(None, [b["elig_hi"] and b["elig_hi"] + timedelta(days=1), elig_hi]))
+
+    appt = _range(appt_lo, appt_hi)
+    db.execute(text(_APPT_DELETE), appt)
+    appt_rows = db.execute(text(_APPT_INSERT), appt).rowcount
+    elig = _range(elig_lo, elig_hi)
+    db.execute(text(_ELIG_DELETE), elig)
+    elig_rows = db.execute(text(_ELIG_INSERT), elig).rowcount
+    return {"full": full, "appt_days": [appt_lo.isoformat(), appt_hi.isoformat()], "appt_rows": appt_rows,
+            "elig_days": [elig_lo.isoformat(), elig_hi.isoformat()], "elig_rows": elig_rows}
+
+
+# ---------------------------------------------------------------------------
+# Read side
+# ---------------------------------------------------------------------------
+def day_filters(start: Optional[date], end: Optional[date], clinic: Optional[str], channel: Optional[str]):
+    """WHERE clause + params over (day, clinic, channel) for either rollup table."""
+    where, params = [], {}
+    if start:
+        where.append("day >= :start"); params["start"] = start
+    if end:
+        where.append("day <= :end"); params["end"] = end
+    if clinic is not None:
+        where.append("clinic = :clinic"); params["clinic"] = clinic
+    if channel is not None:
+        where.append("channel = :channel"); params["channel"] = channel.lower()
+    return (" WHERE " + " AND ".join(where)) if where else "", params
+
+
+def ops_metrics(sums: Mapping[str, Any]) -> Dict[str, Any]:
+    appts = int(sums["appts"] or 0)
+    tta_n = int(sums["tta_count"] or 0)
+    return {
+        "appointments": appts,
+        "no_show_rate": (float(sums["no_shows"] or 0) / appts) if appts else 0.0,
+        "tta_hours_avg": (float(sums["tta_seconds_sum"] or 0) / tta_n / 3600.0) if tta_n else None,
+    }
+
+
+def ops_window(db, start: Optional[date] = None, end: Optional[date] = None,
+               clinic: Optional[str] = None, channel: Optional[str] = None) -> Dict[str, Any]:
+    where, params = day_filters(start, end, clinic, channel)
+    sums = db.execute(
+        text("SELECT SUM(appts) AS appts, SUM(no_shows) AS no_shows, SUM(tta_seconds_sum) AS tta_seconds_sum, "
+             "SUM(tta_count) AS tta_count FROM appt_daily" + where),
+        params,
+    ).mappings().one()
+    return ops_metrics(sums)
+
+
+def eligibility_ok_rate(db, start: Optional[date] = None, end: Optional[date] = None,
+                        clinic: Optional[str] = None, channel: Optional[str] = None) -> Optional[float]:
+    where, params = day_filters(start, end, clinic, channel)
+    r = db.execute(text("SELECT SUM(ok) AS ok, SUM(total) AS total FROM elig_daily" + where), params).mappings().one()
+    return (float(r["ok"] or 0) / float(r["total"])) if r["total"] else None
@@ -70,18 +70,6 @@ def create_admin_task(
     """
     _require_ops_pou(x_purpose_of_use)
 
-    # Ensure minimal 'tasks' schema exists (idempotent)
-    db.execute(text("""
-      CREATE TABLE IF NOT EXISTS tasks (
-        id SERIAL PRIMARY KEY,
-        type TEXT NOT NULL,
-        status TEXT NOT NULL DEFAULT 'open',
-        payload_json JSON NOT NULL DEFAULT '{}'::json,
-        assignee TEXT NULL,
-        created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
-      )
-    """))
-
     ttype = str(body.get("type") or "eligibility_followup")
     status = str(body.get("status") or "open").lower()
     payload = body.get("payload_json") or {}
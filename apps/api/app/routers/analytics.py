@@ -1,16 +1,19 @@
 # apps/api/app/routers/analytics.py
 from __future__ import annotations
 
-import csv, io
+from datetime import date, datetime, timedelta
 from typing import Optional, Dict, Any, List
 
 import sqlalchemy as sa
 from sqlalchemy import text, bindparam
 from sqlalchemy.orm import Session
 from fastapi import APIRouter, Depends, Query, Request, HTTPException
-from fastapi.responses import StreamingResponse
 
+from app import rollups
+from app.claim_history import rcm_window
 from app.db import get_db
+from app.schema_cache import schema_cache
+from app.utils.export_stream import FORMAT_PATTERN, export_response, query_rows
 from app.middleware.purpose_of_use import pou_required  # shows PoU header in Swagger
 from app.models import Experiment  # ORM: id, name, status, variants(JSON), start_at, end_at, created_at
 
@@ -18,14 +21,10 @@ router = APIRouter(prefix="/v1", tags=["analytics", "experiments"])
 
 # -------------- small helpers ------------------------------------------------
 def _table_exists(db: Session, table: str) -> bool:
-    q = text("""SELECT 1 FROM information_schema.tables
-                WHERE table_schema='public' AND table_name=:t""")
-    return db.execute(q, {"t": table}).first() is not None
+    return schema_cache.table_exists(db, table)
 
-def _columns(db: Session, table: str) -> set[str]:
-    q = text("""SELECT column_name FROM information_schema.columns
-                WHERE table_schema='public' AND table_name=:t""")
-    return {r[0] for r in db.execute(q, {"t": table}).all()}
+def _columns(db: Session, table: str) -> frozenset[str]:
+    return schema_cache.columns(db, table)
 
 def _pick_first_present(db: Session, table: str, candidates: list[str]) -> Optional[str]:
     cols = _columns(db, table)
@@ -34,14 +33,13 @@ def _pick_first_present(db: Session, table: str, candidates: list[str]) -> Optio
             return c
     return None
 
-def _csv_response(rows: list[Dict[str, Any]]):
-    buf = io.StringIO()
-    if rows:
-        writer = csv.DictWriter(buf, fieldnames=list(rows[0].keys()))
-        writer.writeheader()
-        for r in rows:
-            writer.writerow(r)
-    return StreamingResponse(iter([buf.getvalue().encode("utf-8")]), media_type="text/csv")
+def _respond(request: Request, data: Dict[str, Any], csv: int, fmt: Optional[str], name: str):
+    """JSON by default; ?csv=1 or ?format=csv|arrow|parquet streams the row instead."""
+    if csv or fmt:
+        return export_response(request, [data], fmt or "csv", filename=name)
+    return data
+
+_FORMAT = Query(None, alias="format", pattern=FORMAT_PATTERN, description="csv | arrow | parquet")
 
 # -------------- /v1/analytics/ops -------------------------------------------
 @router.get(
@@ -49,10 +47,20 @@ def _csv_response(rows: list[Dict[str, Any]]):
     dependencies=[Depends(pou_required({"OPERATIONS"}))],
     summary="Ops metrics: no-show rate, avg time-to-appointment (hours)",
 )
-def analytics_ops(request: Request, csv: int = Query(0, ge=0, le=1), db: Session = Depends(get_db)):
+def analytics_ops(request: Request, csv: int = Query(0, ge=0, le=1), fmt: Optional[str] = _FORMAT,
+                  start: Optional[date] = Query(None, description="first appointment day (UTC), inclusive"),
+                  end: Optional[date] = Query(None, description="last appointment day (UTC), inclusive"),
+                  clinic: Optional[str] = Query(None, description="'' = appointments without a clinic"),
+                  channel: Optional[str] = Query(None, description="source_channel"),
+                  db: Session = Depends(get_db)):
+    # per-day rollups kept by analytics.nightly_rollups (0018_analytics_rollups)
+    if _table_exists(db, "appt_daily"):
+        data = {"available": True, **rollups.ops_window(db, start, end, clinic, channel)}
+        return _respond(request, data, csv, fmt, "ops")
+
     if not _table_exists(db, "appointments"):
         data = {"available": False, "reason": "appointments table not found"}
-        return _csv_response([data]) if csv else data
+        return _respond(request, data, csv, fmt, "ops")
 
     status_col  = _pick_first_present(db, "appointments", ["status", "state"])
     start_col   = _pick_first_present(db, "appointments", ["start_at", "starts_at", "scheduled_at"])
@@ -70,17 +78,23 @@ def analytics_ops(request: Request, csv: int = Query(0, ge=0, le=1), db: Session
 
     row = db.execute(text(f"SELECT {noshow_sql} AS no_show_rate, {tta_sql} AS tta_hours_avg FROM appointments")).mappings().first() or {}
     data = {"available": True, "no_show_rate": row.get("no_show_rate"), "tta_hours_avg": row.get("tta_hours_avg")}
-    return _csv_response([data]) if csv else data
+    return _respond(request, data, csv, fmt, "ops")
 
 # -------------- /v1/analytics/rcm -------------------------------------------
 @router.get(
     "/analytics/rcm",
     dependencies=[Depends(pou_required({"OPERATIONS"}))],
-    summary="RCM metrics: first-pass acceptance; DSO if available",
+    summary="RCM metrics: first-pass acceptance, DSO, days to pay (claim_daily window)",
 )
-def analytics_rcm(request: Request, csv: int = Query(0, ge=0, le=1), db: Session = Depends(get_db)):
-    fpa = None
-    if _table_exists(db, "eligibility_responses"):
+def analytics_rcm(request: Request, csv: int = Query(0, ge=0, le=1), fmt: Optional[str] = _FORMAT,
+                  days: int = Query(90, ge=1, le=3650, description="window ending today (UTC)"),
+                  db: Session = Depends(get_db)):
+    # eligibility ok-rate (what this endpoint used to report as first-pass acceptance)
+    elig_ok_rate = None
+    if _table_exists(db, "elig_daily"):
+        today = datetime.utcnow().date()
+        elig_ok_rate = rollups.eligibility_ok_rate(db, start=today - timedelta(days=days - 1), end=today)
+    elif _table_exists(db, "eligibility_responses"):
         r = db.execute(text("""
             SELECT COUNT(*)::float AS total,
                    SUM(CASE WHEN eligible THEN 1 ELSE 0 END)::float AS ok
@@ -88,20 +102,33 @@ def analytics_rcm(request: Request, csv: int = Query(0, ge=0, le=1), db: Session
         """)).mappings().first()
         total = (r["total"] or 0.0) if r else 0.0
         ok = (r["ok"] or 0.0) if r else 0.0
-        fpa = (ok / total) if total else None
-
-    dso = None; dso_available = False
-    if _table_exists(db, "payments") and _table_exists(db, "invoices"):
-        dso_available = True
-        r = db.execute(text("""
-            SELECT AVG(EXTRACT(EPOCH FROM (p.received_at - i.issued_at)))/86400.0 AS dso
-            FROM invoices i JOIN payments p ON p.invoice_id = i.id
-            WHERE p.received_at IS NOT NULL AND i.issued_at IS NOT NULL
-        """)).mappings().first()
-        dso = r.get("dso") if r else None
-
-    data = {"available": True, "first_pass_acceptance": fpa, "dso": dso, "dso_available": dso_available}
-    return _csv_response([data]) if csv else data
+        elig_ok_rate = (ok / total) if total else None
+
+    # claim status history: sums over one row per day (0016_claim_events)
+    if _table_exists(db, "claim_daily"):
+        rcm = rcm_window(db, days)
+        data = {"available": True, **rcm, "dso_available": True, "eligibility_ok_rate": elig_ok_rate}
+    else:
+        data = {"available": True, "first_pass_acceptance": None, "dso": None, "dso_available": False,
+                "eligibility_ok_rate": elig_ok_rate}
+    return _respond(request, data, csv, fmt, "rcm")
+
+# -------------- /v1/analytics/ops/daily (extract) ---------------------------
+@router.get(
+    "/analytics/ops/daily",
+    dependencies=[Depends(pou_required({"OPERATIONS"}))],
+    summary="Per-day/clinic/channel appointment rollup rows, streamed (csv | arrow | parquet)",
+)
+def analytics_ops_daily(request: Request, fmt: str = Query("csv", alias="format", pattern=FORMAT_PATTERN),
+                        start: Optional[date] = Query(None), end: Optional[date] = Query(None),
+                        clinic: Optional[str] = Query(None), channel: Optional[str] = Query(None),
+                        db: Session = Depends(get_db)):
+    if not _table_exists(db, "appt_daily"):
+        raise HTTPException(404, "appt_daily not found (run alembic upgrade head)")
+    where, params = rollups.day_filters(start, end, clinic, channel)
+    sql = ("SELECT day, clinic, channel, appts, no_shows, tta_seconds_sum, tta_count FROM appt_daily"
+           + where + " ORDER BY day, clinic, channel")
+    return export_response(request, query_rows(sql, params), fmt, filename="appt_daily")
 
 # -------------- Experiments: POST + GET list --------------------------------
 from pydantic import BaseModel, Field, validator
@@ -19,7 +19,8 @@ def create_appointment(payload: dict, db=Depends(get_db)):
       "reason": "annual physical",
       "start": "...Z",
       "end": "...Z",
-      "source_channel": "web" | "portal" | "sms" | "admin" | ...
+      "source_channel": "web" | "portal" | "sms" | "admin" | ...,
+      "clinic": "north"              # optional, ops dashboards group by it
     }
     """
     # 1) Create in EHR mock (returns a FHIR Appointment id)
@@ -46,9 +47,9 @@ def create_appointment(payload: dict, db=Depends(get_db)):
     row = db.execute(
         text("""
         INSERT INTO appointments
-          (patient_id, reason, start_at, end_at, status, fhir_appointment_id, source_channel)
+          (patient_id, reason, start_at, end_at, status, fhir_appointment_id, source_channel, clinic)
         VALUES
-          (:pid, :reason, :start, :end, 'BOOKED', :fhir_id, :src)
+          (:pid, :reason, :start, :end, 'BOOKED', :fhir_id, :src, :clinic)
         RETURNING id
         """),
         {
@@ -58,6 +59,7 @@ def create_appointment(payload: dict, db=Depends(get_db)):
             "end": payload.get("end"),
             "fhir_id": fhir_appt.get("id"),
             "src": src,
+            "clinic": (str(payload.get("clinic")).strip() or None) if payload.get("clinic") else None,
         },
     ).first()
 
@@ -85,7 +87,7 @@ def read_appointment(
         text("""
         SELECT
           id, patient_id, reason, start_at, end_at, status,
-          fhir_appointment_id, source_channel, created_at
+          fhir_appointment_id, source_channel, clinic, created_at
         FROM appointments
         WHERE id = :id
         """),
@@ -2,16 +2,19 @@
 from __future__ import annotations
 import sqlalchemy as sa
 import json, datetime as dt, httpx, logging
-from typing import Any, Dict, Optional, List
-from fastapi import APIRouter, Depends, Header, HTTPException, Path, Query
+from typing import Any, Dict, Optional, List, Tuple
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy import text, bindparam
 from sqlalchemy.orm import Session
 from datetime import datetime
-import httpx, os
+import base64, hashlib, httpx, os, tempfile
 from ..db import SessionLocal, get_db
 from ..settings import settings
 from ..middleware.purpose_of_use import require_pou
 from ..celery_app import celery_app
+from ..x12 import build_interchange, claim_from_row, next_control_number
+from ..scrubber import ClaimBatch, edits_json, get_scrubber, load_existing
 
 log = logging.getLogger(__name__)
 
@@ -25,49 +28,7 @@ def get_db():
     finally:
         db.close()
 
-# --- minimal schema bootstrap so you don't need a migration for the demo -----
-# NOTE: does nothing if the table already exists.
-CREATE_CLAIMS_SQL = """
-CREATE TABLE IF NOT EXISTS claims (
-  id SERIAL PRIMARY KEY,
-  encounter_id TEXT NOT NULL,
-  appointment_id INT NULL,
-  patient_id INT NULL,
-  status TEXT NOT NULL DEFAULT 'NEW',         -- NEW | SUBMITTED | PAID | DENIED | REJECTED
-  payer_ref TEXT NULL,                        -- clearinghouse reference / claim # returned by adapter
-  total_cents INT NULL,
-  payload_json JSON NOT NULL DEFAULT '{}'::json,  -- "837-like" assembled payload
-  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
-  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
-);
-CREATE INDEX IF NOT EXISTS ix_claims_status ON claims(status);
-"""
-
-# imports (make sure both are present)
-def _ensure_claims_schema(db: Session) -> None:
-    """
-    Dev-safe: create 'claims' if missing and add any columns we need.
-    Idempotent on every call. Avoids dropping user data.
-    """
-    # Create if not exists with a minimal skeleton
-    db.execute(text("""
-        CREATE TABLE IF NOT EXISTS claims (
-          id SERIAL PRIMARY KEY
-        )
-    """))
-
-    # Add/patch columns we need (no failures if they already exist)
-    db.execute(text("ALTER TABLE claims ADD COLUMN IF NOT EXISTS encounter_id TEXT"))
-    db.execute(text("ALTER TABLE claims ADD COLUMN IF NOT EXISTS appointment_id INT"))
-    db.execute(text("ALTER TABLE claims ADD COLUMN IF NOT EXISTS patient_id INT REFERENCES patients(id)"))
-    db.execute(text("ALTER TABLE claims ADD COLUMN IF NOT EXISTS status TEXT NOT NULL DEFAULT 'NEW'"))
-    db.execute(text("ALTER TABLE claims ADD COLUMN IF NOT EXISTS total_cents INT NOT NULL DEFAULT 0"))
-    db.execute(text("ALTER TABLE claims ADD COLUMN IF NOT EXISTS payload_json JSON NOT NULL DEFAULT '{}'::json"))
-    db.execute(text("ALTER TABLE claims ADD COLUMN IF NOT EXISTS created_at TIMESTAMP NOT NULL DEFAULT NOW()"))
-
-    # Optional: if you want NOT NULL on encounter_id later, only set it after backfilling
-    db.commit()
-
+# --- schema lives in Alembic (claims columns: 0012_runtime_ddl) ----------------
 # --- seed endpoint (dev only) ------------------------------------------------
 
 @router.post(
@@ -83,8 +44,6 @@ def seed_claim_for_demo(
     Dev-only helper to create a simple NEW claim so the UI has data.
     Looks up patient_id from appointment if available.
     """
-    _ensure_claims_schema(db)
-
     # Resolve patient_id from appointments if present (NULL is fine in demo)
     patient_id: Optional[int] = None
     if appointment_id is not None:
@@ -128,6 +87,65 @@ def seed_claim_for_demo(
 
 
 # --- required API: open worklist for coder/biller -----------------------------
+WORKLIST_STATUSES = ("NEW", "SUBMITTED", "DENIED", "REJECTED")
+
+
+def _encode_cursor(updated_at: datetime, claim_id: int) -> str:
+    raw = f"{updated_at.isoformat()}|{int(claim_id)}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        ts, _, cid = raw.rpartition("|")
+        return datetime.fromisoformat(ts), int(cid)
+    except Exception:
+        raise HTTPException(400, detail="Invalid cursor")
+
+
+def _worklist(
+    db: Session,
+    limit: int,
+    cursor: Optional[str] = None,
+    status: Optional[List[str]] = None,
+    payer: Optional[str] = None,
+    denial_code: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Open claims newest-first, keyset-paged on (updated_at, id): every page is an
+    index range scan on ix_claims_worklist (partial on the worklist statuses, see
+    0017_coding_worklist), however deep the page and however many PAID claims exist.
+    """
+    # the literal IN list must stay: it is what lets the planner use the partial index
+    where = ["status IN ('NEW','SUBMITTED','DENIED','REJECTED')"]
+    params: Dict[str, Any] = {"n": limit}
+    if status:
+        wanted = [s.upper() for s in status]
+        bad = sorted(set(wanted) - set(WORKLIST_STATUSES))
+        if bad:
+            raise HTTPException(422, detail=f"Not worklist statuses: {', '.join(bad)}")
+        where.append("status = ANY(:st)"); params["st"] = wanted
+    if payer:
+        where.append("payer = :payer"); params["payer"] = payer
+    if denial_code:
+        where.append("denial_code = :dc"); params["dc"] = denial_code.upper()
+    if cursor:
+        ts, cid = _decode_cursor(cursor)
+        where.append("(updated_at, id) < (:c_ts, :c_id)"); params.update(c_ts=ts, c_id=cid)
+
+    rows = db.execute(
+        text(
+            "SELECT id, encounter_id, appointment_id, status, payer, payer_ref, denial_code, total_cents, "
+            "payload_json, updated_at FROM claims WHERE " + " AND ".join(where) +
+            " ORDER BY updated_at DESC, id DESC LIMIT :n"
+        ),
+        params,
+    ).mappings().all()
+    next_cursor = _encode_cursor(rows[-1]["updated_at"], rows[-1]["id"]) if len(rows) == limit else None
+    return {"items": [dict(r) for r in rows], "next_cursor": next_cursor}
+
+
 @router.get(
     "/coding/cases",
     dependencies=[Depends(require_pou({"OPERATIONS", "PAYMENT"}))],
@@ -135,25 +153,17 @@ def seed_claim_for_demo(
 def list_coding_cases(
     db: Session = Depends(get_db),
     limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="Keyset pagination: next_cursor from the previous page"),
+    status: Optional[List[str]] = Query(None, description="Subset of NEW, SUBMITTED, DENIED, REJECTED"),
+    payer: Optional[str] = Query(None),
+    denial_code: Optional[str] = Query(None, description="E.g., CO-97"),
 ):
     """
     Returns claims that are relevant to coders/billers.
     NEW, SUBMITTED (in-flight), DENIED/REJECTED (work), PAID is filtered out.
+    Most recently updated first; page with next_cursor.
     """
-    _ensure_claims_table(db)
-    rows = db.execute(
-        text(
-            """
-            SELECT id, encounter_id, appointment_id, status, payer_ref, total_cents, payload_json, updated_at
-            FROM claims
-            WHERE status IN ('NEW','SUBMITTED','DENIED','REJECTED')
-            ORDER BY updated_at DESC
-            LIMIT :n
-            """
-        ),
-        {"n": limit},
-    ).mappings().all()
-    return {"items": [dict(r) for r in rows]}
+    return _worklist(db, limit, cursor, status, payer, denial_code)
 
 # Convenience: detail for the claim page
 @router.get(
@@ -161,7 +171,6 @@ def list_coding_cases(
     dependencies=[Depends(require_pou({"OPERATIONS", "PAYMENT"}))],
 )
 def get_claim(claim_id: int = Path(...), db: Session = Depends(get_db)):
-    _ensure_claims_table(db)
     row = db.execute(
         text("SELECT * FROM claims WHERE id=:id"),
         {"id": claim_id},
@@ -170,49 +179,36 @@ def get_claim(claim_id: int = Path(...), db: Session = Depends(get_db)):
         raise HTTPException(404, "Claim not found")
     return dict(row)
 
-# --- required API: submit a claim to the billing adapter ----------------------
-
-# ---------------------------------------------------------------------------
-# Schema helpers (idempotent — safe to call every time)
-# ---------------------------------------------------------------------------
+# Status history: every transition + the current projection (0016_claim_events)
+@router.get(
+    "/claims/{claim_id}/events",
+    dependencies=[Depends(require_pou({"OPERATIONS", "PAYMENT"}))],
+)
+def get_claim_events(claim_id: int = Path(...), db: Session = Depends(get_db)):
+    from ..claim_history import claim_timeline
 
-def _ensure_claims_schema(db: Session) -> None:
-    db.execute(text("CREATE TABLE IF NOT EXISTS claims (id SERIAL PRIMARY KEY)"))
-    db.execute(text("ALTER TABLE claims ADD COLUMN IF NOT EXISTS encounter_id TEXT"))
-    db.execute(text("ALTER TABLE claims ADD COLUMN IF NOT EXISTS appointment_id INT"))
-    db.execute(text("ALTER TABLE claims ADD COLUMN IF NOT EXISTS patient_id INT REFERENCES patients(id)"))
-    db.execute(text("ALTER TABLE claims ADD COLUMN IF NOT EXISTS status TEXT NOT NULL DEFAULT 'NEW'"))
-    db.execute(text("ALTER TABLE claims ADD COLUMN IF NOT EXISTS total_cents INT NOT NULL DEFAULT 0"))
-    db.execute(text("ALTER TABLE claims ADD COLUMN IF NOT EXISTS payload_json JSON NOT NULL DEFAULT '{}'::json"))
-    db.execute(text("ALTER TABLE claims ADD COLUMN IF NOT EXISTS payer_ref TEXT"))
-    db.execute(text("ALTER TABLE claims ADD COLUMN IF NOT EXISTS last_submit_at TIMESTAMP"))
-    db.execute(text("ALTER TABLE claims ADD COLUMN IF NOT EXISTS clearinghouse_resp JSON"))
-    db.execute(text("ALTER TABLE claims ADD COLUMN IF NOT EXISTS created_at TIMESTAMP NOT NULL DEFAULT NOW()"))
-    db.commit()
+    out = claim_timeline(db, claim_id)
+    if out["current"] is None and not out["events"]:
+        raise HTTPException(404, "Claim not found")
+    return out
 
-# old callsites used this name; keep an alias so they don’t 500:
-def _ensure_claims_table(db: Session) -> None:
-    _ensure_claims_schema(db)
+# --- required API: submit a claim to the billing adapter ----------------------
 
 # ---------------------------------------------------------------------------
-# Simple 837 assembler (demo). In prod, call your Celery task instead.
+# 837P for one claim (app/x12 writer; control number from x12_control_seq)
 # ---------------------------------------------------------------------------
 
-def _assemble_837(payload: Dict[str, Any]) -> str:
-    enc = payload.get("encounter_id") or "enc-?"
-    now = datetime.utcnow()
-    total = sum(int(x.get("charge_cents", 0)) for x in payload.get("svc", [])) / 100.0
-    segs = [
-        f"ISA*00*          *00*          *ZZ*SENDER         *ZZ*PAYERID        *{now:%y%m%d}*{now:%H%M}*^*00501*000000905*0*T*:~",
-        "GS*HC*SENDER*PAYERID*20250101*0101*1*X*005010X222A1~",
-        "ST*837*0001*005010X222A1~",
-        f"BHT*0019*00*{enc}*{now:%Y%m%d}*{now:%H%M}*CH~",
-        "SE*5*0001~",
-        "GE*1*1~",
-        "IEA*1*000000905~",
-        f"NM1*GW*1*TOTAL****{total:.2f}~",
-    ]
-    return "\n".join(segs)
+def _assemble_837(db: Session, claim_id: int) -> str:
+    row = db.execute(
+        text("""
+            SELECT c.id, c.payload_json, p.first_name, p.last_name, p.mrn
+            FROM claims c
+            LEFT JOIN patients p ON p.id = c.patient_id
+            WHERE c.id = :id
+        """),
+        {"id": claim_id},
+    ).mappings().first()
+    return build_interchange([claim_from_row(row)], next_control_number(db))
 
 ADAPTER_BASE = getattr(settings, "billing_adapter_base", os.getenv("BILLING_ADAPTER_BASE", "http://billing-adapter:9100"))
 
@@ -233,11 +229,9 @@ def submit_claim(
     db: Session = Depends(get_db),
     x_purpose_of_use: Optional[str] = Header(default=None, convert_underscores=False),
 ):
-    _ensure_claims_table(db)
-
     row = db.execute(
         text("""
-            SELECT id, status, payload_json
+            SELECT id, status, patient_id, payload_json, created_at
             FROM claims
             WHERE id = :id
         """),
@@ -251,8 +245,14 @@ def submit_claim(
     if status not in {"NEW", "RESUBMIT", "DENIED"}:
         raise HTTPException(409, detail=f"Claim is {status}; cannot submit")
 
+    # scrub before anything leaves the building; errors block, warnings ride along
+    batch = ClaimBatch([row])
+    scrub = get_scrubber().scrub(batch, load_existing(db, batch))
+    if scrub.blocked:
+        raise HTTPException(422, detail={"error": "scrub_failed", "edits": edits_json(scrub.edits)})
+
     payload = row["payload_json"] or {}
-    edi837 = _assemble_837(payload)
+    edi837 = _assemble_837(db, claim_id)
 
     # Try billing-adapter; fall back to a simulated accept if unavailable
     payer_ref = f"demo-{claim_id}"
@@ -282,6 +282,7 @@ def submit_claim(
             SET status = :status,
                 payer_ref = :ref,
                 last_submit_at = NOW(),
+                updated_at = NOW(),
                 clearinghouse_resp = CAST(:resp AS JSON)
             WHERE id = :id
         """),
@@ -301,8 +302,35 @@ def submit_claim(
         "payer_ref": payer_ref,
         "adapter_base": ADAPTER_BASE,
         "simulated": bool(ch_resp.get("simulated")),
+        "scrub": edits_json(scrub.edits),
     }
 
+# ---------------------------------------------------------------------------
+# Batch submit: NEW/RESUBMIT claims -> multi-claim 837 interchanges (Celery)
+# ---------------------------------------------------------------------------
+@router.post(
+    "/claims/submit-batch",
+    dependencies=[Depends(require_pou({"PAYMENT", "OPERATIONS"}))],
+)
+def submit_claims_batch(
+    limit: int = Query(1000, ge=1, le=10000),
+    per_interchange: int = Query(100, ge=1, le=5000),
+):
+    """
+    Queue end-of-day submission (tasks/claims.submit_batch). Runs inline when the
+    broker is unavailable (dev), like the compliance jobs.
+    """
+    from kombu.exceptions import OperationalError
+    from ..tasks.claims import submit_batch
+
+    try:
+        if not celery_app.conf.task_always_eager:
+            res = submit_batch.delay(limit, per_interchange)
+            return {"queued": True, "task_id": res.id}
+    except OperationalError:
+        pass
+    return {"queued": False, "result": submit_batch.apply(args=[limit, per_interchange]).get()}
+
 # --- optional: mock an 835 remit to flip status (PAID or DENIED) -------------
 @router.post(
     "/remits/mock",
@@ -317,12 +345,47 @@ def mock_835_ingest(
     """
     Testing helper: simulate an 835. If paid_cents>0 -> PAID else -> DENIED with code.
     """
-    _ensure_claims_table(db)
     payload = {"claim_id": claim_id, "paid_cents": paid_cents, "denial_code": denial_code}
     celery_app.send_task("remits.ingest_835", kwargs={"remit": payload})
     return {"queued": True, "payload": payload}
 
 
+# --- real 835 files: store, then ingest set-based (tasks/claims.ingest_835_file)
+@router.post(
+    "/remits/835",
+    status_code=202,
+    dependencies=[Depends(require_pou({"PAYMENT", "OPERATIONS"}))],
+)
+async def upload_835(request: Request):
+    """
+    Raw X12 835 body. The upload is spooled to disk while hashing, stored under
+    remits/835/<sha256>.x12, and ingested by a worker (inline when no broker).
+    The same file sent twice is applied once.
+    """
+    from kombu.exceptions import OperationalError
+    from ..storage import get_storage
+    from ..tasks.claims import ingest_835_file
+
+    digest = hashlib.sha256()
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as spool:
+        async for chunk in request.stream():
+            digest.update(chunk)
+            spool.write(chunk)
+        if spool.tell() == 0:
+            raise HTTPException(400, detail="Empty 835 body")
+        sha = digest.hexdigest()
+        url, _ = await run_in_threadpool(get_storage().put_file, f"remits/835/{sha}.x12", spool, "application/edi-x12")
+
+    try:
+        if not celery_app.conf.task_always_eager:
+            res = ingest_835_file.delay(url, sha)
+            return {"queued": True, "task_id": res.id, "sha256": sha, "url": url}
+    except OperationalError:
+        pass
+    result = await run_in_threadpool(lambda: ingest_835_file.apply(args=[url, sha]).get())
+    return {"queued": False, "sha256": sha, "url": url, "result": result}
+
+
 # --- UI compatibility aliases: /v1/billing/cases & /v1/billing/claims/:id ----
 from fastapi import APIRouter, Depends, HTTPException, Path, Query, Header
 from sqlalchemy.orm import Session
@@ -333,35 +396,19 @@ from typing import Optional, Dict, Any
 from ..db import get_db
 from ..middleware.purpose_of_use import require_pou
 
-# Reuse your existing helpers if defined; otherwise define no-op shims:
-def _ensure_claims_table(db: Session):  # alias to your ensure function
-    try:
-        _ensure_claims_schema(db)  # if you have it
-    except NameError:
-        db.execute(text("CREATE TABLE IF NOT EXISTS claims (id SERIAL PRIMARY KEY)"))
-        db.execute(text("ALTER TABLE claims ADD COLUMN IF NOT EXISTS encounter_id TEXT"))
-        db.execute(text("ALTER TABLE claims ADD COLUMN IF NOT EXISTS status TEXT NOT NULL DEFAULT 'NEW'"))
-        db.execute(text("ALTER TABLE claims ADD COLUMN IF NOT EXISTS payload_json JSON NOT NULL DEFAULT '{}'::json"))
-        db.commit()
-
 @router.get("/billing/cases", dependencies=[Depends(require_pou({"OPERATIONS","PAYMENT"}))])
-def ui_billing_cases(db: Session = Depends(get_db), limit: int = Query(50, ge=1, le=200)):
-    _ensure_claims_table(db)
-    rows = db.execute(
-        text("""
-          SELECT id, encounter_id, appointment_id, status, payer_ref, total_cents, payload_json, NOW() AS updated_at
-          FROM claims
-          WHERE status IN ('NEW','SUBMITTED','DENIED','REJECTED')
-          ORDER BY id DESC
-          LIMIT :n
-        """),
-        {"n": limit},
-    ).mappings().all()
-    return {"items": [dict(r) for r in rows]}
+def ui_billing_cases(
+    db: Session = Depends(get_db),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None),
+    status: Optional[List[str]] = Query(None),
+    payer: Optional[str] = Query(None),
+    denial_code: Optional[str] = Query(None),
+):
+    return _worklist(db, limit, cursor, status, payer, denial_code)
 
 @router.get("/billing/claims/{claim_id}", dependencies=[Depends(require_pou({"OPERATIONS","PAYMENT"}))])
 def ui_get_claim(claim_id: int = Path(...), db: Session = Depends(get_db)):
-    _ensure_claims_table(db)
     row = db.execute(text("SELECT * FROM claims WHERE id=:id"), {"id": claim_id}).mappings().first()
     if not row:
         raise HTTPException(404, "Claim not found")
@@ -379,13 +426,12 @@ def ui_submit_claim(
         return submit_claim(claim_id, db, x_purpose_of_use)  # type: ignore
     except NameError:
         # Minimal inline fallback
-        _ensure_claims_table(db)
         row = db.execute(text("SELECT id, status, payload_json FROM claims WHERE id=:id"), {"id": claim_id}).mappings().first()
         if not row:
             raise HTTPException(404, "Claim not found")
         # Simulate submit
         db.execute(
-          text("UPDATE claims SET status='SUBMITTED', payer_ref = COALESCE(payer_ref, :ref) WHERE id=:id"),
+          text("UPDATE claims SET status='SUBMITTED', payer_ref = COALESCE(payer_ref, :ref), updated_at = NOW() WHERE id=:id"),
           {"id": claim_id, "ref": f"CH-{claim_id}"},
         )
         db.commit()
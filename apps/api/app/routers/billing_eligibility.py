@@ -10,6 +10,8 @@ import httpx, os
 from datetime import datetime
 
 from ..db import get_db
+from ..settings import settings
+from ..utils.eligibility_cache import cache_key, eligibility_cache
 
 router = APIRouter(prefix="/v1/billing", tags=["billing"])
 
@@ -27,7 +29,7 @@ def _fetch_patient_email(db: Session, pid: int) -> Optional[str]:
 def _latest_appt_for_patient(db: Session, pid: int) -> Optional[Dict[str, Any]]:
     r = db.execute(
         text("""
-          SELECT id, reason
+          SELECT id, reason, start_at
           FROM appointments
           WHERE patient_id = :pid
           ORDER BY COALESCE(start_at, NOW()) DESC
@@ -44,7 +46,7 @@ def _insurance_from_intake(db: Session, appt_id: Optional[int]) -> Optional[str]
         text("""
           SELECT answers_json->>'insurance_number' AS ins
           FROM intake_forms
-          WHERE appointment_id = :aid
+          WHERE appointment_id = :aid AND status <> 'DRAFT'
           ORDER BY id DESC
           LIMIT 1
         """),
@@ -64,7 +66,8 @@ def run_eligibility(
 
     - Resolves context (appointment reason, patient email)
     - Pulls insurance_number from latest intake for that appointment if available
-    - Calls billing-adapter /eligibility
+    - Calls billing-adapter /eligibility, through the 271 cache (same member,
+      payer and service date within the TTL -> no second payer call)
     - Persists a row in eligibility_responses (if table exists)
     - Returns a compact 'result' with mismatch flag (eligible==False OR plan mismatch)
     """
@@ -74,7 +77,7 @@ def run_eligibility(
     appt = None
     if appointment_id:
         appt = db.execute(
-            text("SELECT id, reason FROM appointments WHERE id=:id"),
+            text("SELECT id, reason, start_at FROM appointments WHERE id=:id"),
             {"id": appointment_id},
         ).mappings().first()
         if not appt:
@@ -109,33 +112,26 @@ def run_eligibility(
         "insurance_number": insurance_number,
         "reason": reason,
     }
-    eligible, plan, copay, raw = False, "UNKNOWN", 0, {}
-    try:
+    key = cache_key(insurance_number, settings.x12_receiver_id, appt["start_at"] if appt else None)
+
+    def _fetch() -> Dict[str, Any]:
         with httpx.Client(timeout=8) as client:
             r = client.post(f"{ADAPTER_BASE}/eligibility", json=payload)
-            data = r.json()
-            eligible = bool(data.get("eligible"))
-            plan = data.get("plan") or plan
-            copay = int(data.get("copay_cents") or 0)
-            raw = data.get("raw_json") or data
+            r.raise_for_status()
+            return r.json()
+
+    eligible, plan, copay, raw, cache = False, "UNKNOWN", 0, {}, None
+    try:
+        data, cache = eligibility_cache.get_or_fetch(key, _fetch)
+        eligible = bool(data.get("eligible"))
+        plan = data.get("plan") or plan
+        copay = int(data.get("copay_cents") or 0)
+        raw = data.get("raw_json") or data
     except Exception as _e:
         # Keep a negative but informative outcome
         raw = {"simulated": True, "error": str(_e)}
 
     # Persist outcome (idempotent enough for repeated checks)
-    db.execute(
-        text("""
-          CREATE TABLE IF NOT EXISTS eligibility_responses (
-            id SERIAL PRIMARY KEY,
-            appointment_id INT NOT NULL,
-            eligible BOOLEAN NOT NULL,
-            plan TEXT NULL,
-            copay_cents INT NULL,
-            raw_json JSONB NOT NULL DEFAULT '{}'::jsonb,
-            created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
-          )
-        """)
-    )
     db.execute(
         text("""
           INSERT INTO eligibility_responses (appointment_id, eligible, plan, copay_cents, raw_json)
@@ -158,6 +154,7 @@ def run_eligibility(
             "recorded_plan": recorded_plan,
             "mismatch": mismatch,
             "raw": raw,
+            "cache": cache,
             "adapter_base": ADAPTER_BASE,
         }
     }
@@ -12,6 +12,8 @@ from datetime import datetime, timezone
 from app.middleware.purpose_of_use import require_pou, doc_purpose_of_use
 from app.db import get_db
 from app.celery_app import celery_app
+from app.storage import storage_response
+from app.utils.export_stream import FORMAT_PATTERN, export_response, query_rows
 from kombu.exceptions import OperationalError
 
 # If you have Celery tasks wired
@@ -21,7 +23,7 @@ router = APIRouter(prefix="/v1/compliance", tags=["compliance"])
 
 # ---------- Bodies ----------
 class ExportBody(BaseModel):
-    patient_id: int | None = Field(None, description="Restrict export to a patient (optional)")
+    patient_id: int = Field(..., description="Patient whose data is exported (required)")
     reason: str | None = Field(None, description="Business justification / note")
 
 class PiaPackBody(BaseModel):
@@ -52,11 +54,14 @@ def get_audit(
     patient_id: Optional[int] = Query(None),
     since: Optional[str] = Query(None, description="ISO timestamp filter"),
     limit: int = Query(200, ge=1, le=2000),
+    fmt: Optional[str] = Query(None, alias="format", pattern=FORMAT_PATTERN,
+                               description="csv | arrow | parquet: stream every matching row (no limit)"),
     db: Session = Depends(get_db),
 ):
     """
     List audit entries (redacted). Middleware elsewhere appends rows.
     Requires PoU=OPERATIONS; the UI sends it via complianceGet().
+    With ?format= the full filtered log is streamed as a file instead.
     """
     sql = """
         SELECT id, actor, action, target, details, patient_id, created_at
@@ -70,6 +75,10 @@ def get_audit(
         sql += " AND patient_id = :pid"; params["pid"] = patient_id
     if since:
         sql += " AND created_at >= :since"; params["since"] = since
+    if fmt:
+        rows = query_rows(sql + " ORDER BY id DESC", params)
+        redacted = ({**r, "details": _redact_meta(r.get("details"))} for r in rows)
+        return export_response(request, redacted, fmt, filename="audit")
     sql += " ORDER BY id DESC LIMIT :lim"
     params["lim"] = limit
 
@@ -86,8 +95,8 @@ def get_audit(
     "/export",
     dependencies=[Depends(doc_purpose_of_use), Depends(require_pou({"OPERATIONS"}))],
 )
-def request_export(body: ExportBody | None = None, db: Session = Depends(get_db)):
-    meta = (body.model_dump(exclude_none=True) if body else {})
+def request_export(body: ExportBody, db: Session = Depends(get_db)):
+    meta = body.model_dump(exclude_none=True)
     row = db.execute(
         text("""
             INSERT INTO compliance_requests (kind, status, meta, created_at)
@@ -186,44 +195,63 @@ def get_request_status(rid: int = Path(...), db: Session = Depends(get_db)):
     # Return meta as JSON (sa maps OK); UI only reads 'status'
     return d
 
+# ---------- GET /requests/{id}/artifact (download export / PIA pack) ----------
+@router.get(
+    "/requests/{rid}/artifact",
+    dependencies=[Depends(doc_purpose_of_use), Depends(require_pou({"OPERATIONS"}))],
+)
+def get_request_artifact(rid: int = Path(...), db: Session = Depends(get_db)):
+    row = db.execute(
+        text("SELECT kind, meta FROM compliance_requests WHERE id = :id"),
+        {"id": rid},
+    ).mappings().first()
+    if not row:
+        raise HTTPException(404, "Request not found")
+    url = (row["meta"] or {}).get("result_url")
+    if not url:
+        raise HTTPException(404, "Artifact not ready")
+    return storage_response(url, filename=f"{row['kind']}-{rid}.pdf")
+
+def _retention_row(r, now: datetime) -> Dict[str, Any]:
+    created = r["created_at"]
+    age_days = 0
+    if created:
+        # created_at assumed timezone-aware; if not, adjust as needed
+        delta = now - created
+        age_days = int(delta.total_seconds() // 86400)
+    return {
+        "doc_id": int(r["doc_id"]),
+        "kind": r.get("kind") or "",
+        "created_at": created.isoformat() if created else None,
+        "age_days": age_days,
+        "flagged": bool(age_days >= 365),
+    }
+
 # ---------- POST /retention (compute counters + rows) ----------
 @router.post(
     "/retention",
     dependencies=[Depends(doc_purpose_of_use), Depends(require_pou({"OPERATIONS"}))],
 )
-def retention_scan(db: Session = Depends(get_db)):
+def retention_scan(
+    request: Request,
+    fmt: Optional[str] = Query(None, alias="format", pattern=FORMAT_PATTERN,
+                               description="csv | arrow | parquet: stream every document (no 1000-row cap)"),
+    db: Session = Depends(get_db),
+):
     """
     Very simple retention "scan":
       - Look at documents and compute age (days)
       - Flag those older than 365d (example policy)
       - Return the rows so UI can download CSV
+    With ?format= every document is streamed as a file instead.
     """
     now = datetime.now(timezone.utc)
+    sql = "SELECT id AS doc_id, kind, created_at FROM documents ORDER BY id DESC"
 
-    rows = db.execute(
-        text("""
-            SELECT id AS doc_id, kind, created_at
-              FROM documents
-          ORDER BY id DESC
-             LIMIT 1000
-        """)
-    ).mappings().all()
-
-    out: List[Dict[str, Any]] = []
-    for r in rows:
-        created = r["created_at"]
-        age_days = 0
-        if created:
-            # created_at assumed timezone-aware; if not, adjust as needed
-            delta = now - created
-            age_days = int(delta.total_seconds() // 86400)
-
-        out.append({
-            "doc_id": int(r["doc_id"]),
-            "kind": r.get("kind") or "",
-            "created_at": created.isoformat() if created else None,
-            "age_days": age_days,
-            "flagged": bool(age_days >= 365),
-        })
+    if fmt:
+        rows = (_retention_row(r, now) for r in query_rows(sql))
+        return export_response(request, rows, fmt, filename="retention")
 
+    rows = db.execute(text(sql + " LIMIT 1000")).mappings().all()
+    out: List[Dict[str, Any]] = [_retention_row(r, now) for r in rows]
     return {"ok": True, "generated_at": now.isoformat(), "rows": out}
@@ -1,16 +1,24 @@
 # apps/api/app/routers/documents.py
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, Header, HTTPException, Path, Query, Request
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from typing import Optional, Dict, Any, Literal
+from typing import Optional, Dict, Any, List, Literal
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 import base64
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
+from urllib.parse import unquote_to_bytes
 
 from ..db import get_db
 from ..settings import settings
+from ..storage import storage_response
+from ..utils.discharge_index import discharge_etag, latest_discharge, remember_latest_discharge
 
 # PyJWT is required
 try:
@@ -90,40 +98,152 @@ def _data_url(html: str) -> str:
     return "data:text/html;base64," + base64.b64encode(html.encode("utf-8")).decode("ascii")
 
 
+class _VerifiedTokenCache:
+    """
+    Tiny LRU of already-verified portal tokens -> claims, honoured until each token's exp.
+    Only successful verifications are cached; expiry is re-checked on every hit.
+    """
+
+    def __init__(self, maxsize: int = 2048):
+        self.maxsize = maxsize
+        self._items: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            claims = self._items.get(token)
+            if claims is None:
+                return None
+            if float(claims.get("exp", 0)) <= time.time():
+                self._items.pop(token, None)
+                return None
+            self._items.move_to_end(token)
+            return claims
+
+    def put(self, token: str, claims: Dict[str, Any]) -> None:
+        if "exp" not in claims:
+            return  # never cache tokens that don't expire
+        with self._lock:
+            self._items[token] = claims
+            self._items.move_to_end(token)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+
+_portal_tokens = _VerifiedTokenCache()
+
+
+def _verify_portal_token(token: str) -> Dict[str, Any]:
+    claims = _portal_tokens.get(token)
+    if claims is not None:
+        return claims
+    try:
+        claims = jwt.decode(token, settings.jwt_secret, algorithms=["HS256"])
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(404, detail="Discharge not found or token expired")
+    except Exception:
+        raise HTTPException(403, detail="Invalid token")
+    _portal_tokens.put(token, claims)
+    return claims
+
+
 # ---------------------------
-# List / Get (unchanged, handy for debugging)
+# List / Get
 # ---------------------------
 
-# apps/api/app/routers/documents.py  (replace the list endpoint only)
+# Sparse fieldset for GET /documents. "url" can be a multi-MB data: URL, so it is
+# opt-in; by default callers get metadata plus a content_url to fetch the body.
+_DOC_FIELDS: Dict[str, Optional[str]] = {
+    "id": "id",
+    "patient_id": "patient_id",
+    "kind": "kind",
+    "title": "(meta->>'title') AS title",
+    "meta": "meta",
+    "created_at": "created_at",
+    "url": "url",
+    "content_url": None,  # derived from id, never read from the table
+}
+_DEFAULT_DOC_FIELDS = ["id", "patient_id", "kind", "title", "meta", "created_at", "content_url"]
+
+
+def _parse_fields(fields: Optional[str]) -> List[str]:
+    if not fields:
+        return list(_DEFAULT_DOC_FIELDS)
+    wanted = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in wanted if f not in _DOC_FIELDS]
+    if unknown:
+        raise HTTPException(422, detail=f"Unknown fields: {', '.join(unknown)} (allowed: {', '.join(_DOC_FIELDS)})")
+    return wanted
+
 
 @router.get("/documents")
 def list_documents(
     appointment_id: Optional[int] = Query(default=None),
-    limit: int = Query(default=20),
+    limit: int = Query(default=20, ge=1, le=200),
+    before_id: Optional[int] = Query(default=None, description="Keyset pagination: return rows with id < before_id"),
+    fields: Optional[str] = Query(
+        default=None,
+        description="Comma-separated sparse fieldset, e.g. 'id,kind,title'. 'url' (inline body) is opt-in.",
+    ),
     db: Session = Depends(get_db),
 ):
     """
     If appointment_id is provided, return docs whose meta.appointment_id == :appointment_id.
-    Otherwise return the latest N documents.
+    Otherwise return the latest N documents. Newest first; page with next_before_id.
     """
+    wanted = _parse_fields(fields)
+    cols = ["id"] + [_DOC_FIELDS[f] for f in wanted if _DOC_FIELDS[f] and f != "id"]
+
+    where = []
+    params: Dict[str, Any] = {"n": limit}
     if appointment_id:
-        rows = db.execute(
-            text(
-                "SELECT id, patient_id, kind, url, meta, created_at "
-                "FROM documents WHERE (meta->>'appointment_id') = :aid "
-                "ORDER BY id DESC LIMIT :n"
-            ),
-            {"aid": str(appointment_id), "n": limit},
-        ).mappings().all()
-    else:
-        rows = db.execute(
-            text(
-                "SELECT id, patient_id, kind, url, meta, created_at "
-                "FROM documents ORDER BY id DESC LIMIT :n"
-            ),
-            {"n": limit},
-        ).mappings().all()
-    return {"documents": [dict(r) for r in rows]}
+        where.append("(meta->>'appointment_id') = :aid"); params["aid"] = str(appointment_id)
+    if before_id:
+        where.append("id < :before_id"); params["before_id"] = before_id
+
+    sql = f"SELECT {', '.join(cols)} FROM documents"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY id DESC LIMIT :n"
+
+    rows = db.execute(text(sql), params).mappings().all()
+
+    docs = []
+    for r in rows:
+        d = {f: r[f] for f in wanted if _DOC_FIELDS[f]}
+        if "content_url" in wanted:
+            d["content_url"] = f"/v1/documents/{r['id']}/content"
+        docs.append(d)
+
+    next_before_id = int(rows[-1]["id"]) if len(rows) == limit else None
+    return {"documents": docs, "next_before_id": next_before_id}
+
+
+def _data_url_response(url: str) -> Response:
+    """Decode a data: URL (how rendered HTML docs are stored) into a plain response."""
+    header, _, payload = url.partition(",")
+    media_type = header[len("data:"):].split(";", 1)[0] or "text/plain"
+    body = base64.b64decode(payload) if header.endswith(";base64") else unquote_to_bytes(payload)
+    return Response(content=body, media_type=media_type)
+
+
+@router.get("/documents/{doc_id}/content")
+def get_document_content(doc_id: int = Path(...), db: Session = Depends(get_db)):
+    """
+    Serve the document body. Stored objects (s3:// or local://) are streamed by the
+    storage backend; the filesystem backend hands the file to FileResponse directly.
+    """
+    row = db.execute(
+        text("SELECT url FROM documents WHERE id = :id"),
+        {"id": doc_id},
+    ).mappings().first()
+    if not row or not row["url"]:
+        raise HTTPException(404, detail="Document not found")
+
+    url = row["url"]
+    if url.startswith("data:"):
+        return _data_url_response(url)
+    return storage_response(url)
 
 # ---------------------------
 # Phase 7: Render Discharge
@@ -202,6 +322,7 @@ def render_document(
         },
     ).scalar_one()
     db.commit()
+    remember_latest_discharge(body.encounter_id, doc_id, url)
 
     # 4) Mint a portal token that encodes encounter + doc and expires in 7 days
     token = jwt.encode(
@@ -234,44 +355,65 @@ def render_document(
 @router.get("/documents/discharge/{encounter_id}")
 def get_discharge_for_portal(
     encounter_id: str,
+    request: Request,
     token: str = Query(...),
     db: Session = Depends(get_db),
 ):
     """
     Portal-safe fetch: latest Discharge for this encounter IF the token is valid
     and enc claim matches the path param.
+    - Verified tokens are cached until their exp (link scanners re-hit the same URL).
+    - Latest doc id + ETag come from the discharge index; If-None-Match -> 304
+      without touching the database.
     """
-    try:
-        payload = jwt.decode(token, settings.jwt_secret, algorithms=["HS256"])
-        if payload.get("enc") != encounter_id:
-            raise HTTPException(403, detail="Token mismatch")
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(404, detail="Discharge not found or token expired")
-    except Exception:
+    payload = _verify_portal_token(token)
+    if payload.get("enc") != encounter_id:
         raise HTTPException(403, detail="Invalid token")
 
-    row = db.execute(
-        text(
-            """
-            SELECT id, kind, url, meta, created_at
-            FROM documents
-            WHERE kind='Discharge' AND (meta->>'encounter_id') = :enc
-            ORDER BY id DESC
-            LIMIT 1
-            """
-        ),
-        {"enc": encounter_id},
-    ).mappings().first()
+    cache_headers = {"Cache-Control": "private, max-age=300"}
+    if_none_match = request.headers.get("if-none-match")
+
+    row = None
+    indexed = latest_discharge(encounter_id)
+    if indexed:
+        doc_id, etag = indexed
+        if if_none_match and etag in {t.strip() for t in if_none_match.split(",")}:
+            return Response(status_code=304, headers={**cache_headers, "ETag": etag})
+        row = db.execute(
+            text("SELECT id, kind, url, meta, created_at FROM documents WHERE id = :id AND kind='Discharge'"),
+            {"id": doc_id},
+        ).mappings().first()
+
     if not row:
-        raise HTTPException(404, detail="Discharge not found")
+        # Index miss (e.g. docs written before the index existed): fall back once, then remember.
+        row = db.execute(
+            text(
+                """
+                SELECT id, kind, url, meta, created_at
+                FROM documents
+                WHERE kind='Discharge' AND (meta->>'encounter_id') = :enc
+                ORDER BY id DESC
+                LIMIT 1
+                """
+            ),
+            {"enc": encounter_id},
+        ).mappings().first()
+        if not row:
+            raise HTTPException(404, detail="Discharge not found")
+        remember_latest_discharge(encounter_id, row["id"], row["url"])
 
-    return {
+    etag = discharge_etag(row["id"], row["url"])
+    if if_none_match and etag in {t.strip() for t in if_none_match.split(",")}:
+        return Response(status_code=304, headers={**cache_headers, "ETag": etag})
+
+    body = {
         "id": row["id"],
         "kind": row["kind"],
         "url": row["url"],
         "meta": row["meta"],
         "created_at": row["created_at"],
     }
+    return JSONResponse(content=jsonable_encoder(body), headers={**cache_headers, "ETag": etag})
 
 
 def _render_simple_pdf(title: str, data: Dict[str, Any]) -> bytes:
@@ -5,9 +5,12 @@ from typing import Dict, Any, Optional, List
 from sqlalchemy import text, bindparam
 import sqlalchemy as sa
 import httpx
+import json
 from datetime import datetime
 from ..db import SessionLocal
-from ..tasks.intake import render_intake_pdf
+from ..tasks.intake import render_intake_pdf, answers_hash, render_is_current
+from ..intake_validation import validator_for
+from ..intake_drafts import save_draft, load_draft, discard_draft, DRAFT_TTL_SECONDS, DRAFT_MAX_BYTES
 
 router = APIRouter()
 
@@ -76,20 +79,81 @@ def get_intake_forms(appointment_id: int = Query(...), db=Depends(get_db)):
 class IntakeSubmit(BaseModel):
     answers: Dict[str, Any]  # flattened as "<formId>.<field>" -> value
 
-def _validate_required(forms: List[Dict[str, Any]], answers: Dict[str, Any]) -> Dict[str, str]:
+# Compiled once at import (i.e. app startup); see app/intake_validation.py.
+_FORMS_VALIDATOR = validator_for(FORMS)
+
+def _validate_answers(answers: Dict[str, Any]) -> Dict[str, str]:
     """
-    Build { "<formId>.<field>": "Required" } when any required field is missing/empty.
+    Build { "<formId>.<field>": "<message>" } for missing required fields and type/format errors.
     """
-    errors: Dict[str, str] = {}
-    for f in forms:
-        fid = f["id"]
-        req = (f.get("schema") or {}).get("required", []) or []
-        for field in req:
-            key = f"{fid}.{field}"
-            val = answers.get(key, None)
-            if (val is None) or (isinstance(val, str) and not val.strip()):
-                errors[key] = "Required"
-    return errors
+    return _FORMS_VALIDATOR(answers)
+
+class IntakeDraftPatch(BaseModel):
+    answers: Dict[str, Any]  # partial; same "<formId>.<field>" keys as submit
+
+# Only fields the forms define can be drafted, so a draft is bounded by the form set.
+_DRAFT_KEYS = {f"{f['id']}.{name}" for f in FORMS for name in (f["schema"].get("properties") or {})}
+
+def _require_pou(x_purpose_of_use: Optional[str]) -> None:
+    if not x_purpose_of_use or x_purpose_of_use.upper() not in ("TREATMENT", "OPERATIONS"):
+        raise HTTPException(400, "X-Purpose-Of-Use required (TREATMENT|OPERATIONS)")
+
+def _require_appointment(db, appointment_id: int) -> None:
+    if not db.execute(text("SELECT id FROM appointments WHERE id=:id"), {"id": appointment_id}).first():
+        raise HTTPException(404, "Appointment not found")
+
+def _latest_db_draft(db, appointment_id: int) -> Dict[str, Any]:
+    """Drafts flushed on expiry are resumable until a submission supersedes them."""
+    row = db.execute(
+        text("SELECT status, answers_json FROM intake_forms "
+             "WHERE appointment_id = :aid ORDER BY id DESC LIMIT 1"),
+        {"aid": appointment_id},
+    ).first()
+    if row and row.status == "DRAFT":
+        return dict(row.answers_json or {})
+    return {}
+
+@router.patch("/v1/intake/forms/{appointment_id}/draft")
+def patch_intake_draft(
+    appointment_id: int = Path(...),
+    body: IntakeDraftPatch = ...,
+    x_purpose_of_use: Optional[str] = Header(None, alias="X-Purpose-Of-Use"),
+    db=Depends(get_db),
+):
+    """
+    Autosave: merge partial answers into the Redis draft. No Postgres write here;
+    the draft reaches intake_forms on submit or when it expires (see intake.flush_idle_drafts).
+    """
+    _require_pou(x_purpose_of_use)
+    answers = body.answers or {}
+    unknown = sorted(k for k in answers if k not in _DRAFT_KEYS)
+    if unknown:
+        raise HTTPException(422, f"Unknown intake fields: {', '.join(unknown[:10])}")
+    if len(json.dumps(answers, default=str)) > DRAFT_MAX_BYTES:
+        raise HTTPException(413, f"Draft larger than {DRAFT_MAX_BYTES} bytes")
+    _require_appointment(db, appointment_id)
+    saved_at = save_draft(appointment_id, answers)
+    return {
+        "ok": True,
+        "appointment_id": appointment_id,
+        "saved": len(answers),
+        "expires_at": datetime.utcfromtimestamp(saved_at + DRAFT_TTL_SECONDS).isoformat() + "Z",
+    }
+
+@router.get("/v1/intake/forms/{appointment_id}/draft")
+def get_intake_draft(
+    appointment_id: int = Path(...),
+    x_purpose_of_use: Optional[str] = Header(None, alias="X-Purpose-Of-Use"),
+    db=Depends(get_db),
+):
+    """Resume on any device: Redis draft first, then the last expired draft flushed to the DB."""
+    _require_pou(x_purpose_of_use)
+    _require_appointment(db, appointment_id)
+    answers = load_draft(appointment_id)
+    source = "cache"
+    if not answers:
+        answers, source = _latest_db_draft(db, appointment_id), "db"
+    return {"appointment_id": appointment_id, "answers": answers, "source": source if answers else None}
 
 def _consent_needed(db, appointment_id: int, answers: Dict[str, Any]) -> bool:
     """
@@ -113,19 +177,21 @@ def submit_intake(
     db=Depends(get_db)
 ):
     # --- 0) PoU: accept TREATMENT / OPERATIONS like the rest of your API ---
-    if not x_purpose_of_use or x_purpose_of_use.upper() not in ("TREATMENT", "OPERATIONS"):
-        raise HTTPException(400, "X-Purpose-Of-Use required (TREATMENT|OPERATIONS)")
+    _require_pou(x_purpose_of_use)
+
+    # --- 0b) Fold in the autosaved draft; explicitly submitted answers win ---
+    body.answers = {**load_draft(appointment_id), **(body.answers or {})}
 
-    # --- 1) Validate required fields and return a "soft" 200 with errors for UI highlighting ---
-    errors = _validate_required(FORMS, body.answers or {})
+    # --- 1) Validate answers and return a "soft" 200 with errors for UI highlighting ---
+    errors = _validate_answers(body.answers or {})
     if errors:
         # UI will keep user on the page, highlight fields, and preserve answers
         return {"ok": False, "errors": errors}
 
     # --- 2) Persist intake answers (your original behavior) ---
     db.execute(
-        text("INSERT INTO intake_forms (appointment_id, answers_json, created_at) "
-             "VALUES (:aid, :ans, NOW())")
+        text("INSERT INTO intake_forms (appointment_id, answers_json, status, created_at) "
+             "VALUES (:aid, :ans, 'SUBMITTED', NOW())")
         .bindparams(bindparam("ans", type_=sa.JSON())),
         {"aid": appointment_id, "ans": body.answers},
     )
@@ -136,12 +202,18 @@ def submit_intake(
         {"actor": "patient", "t": str(appointment_id), "d": {"count": len(body.answers)}},
     )
     db.commit()
-
-    # --- 3) Fire PDF render (async, non-blocking) ---
     try:
-        render_intake_pdf.delay(appointment_id, body.answers)
+        discard_draft(appointment_id)
     except Exception:
-        pass  # do not block user flow in dev
+        pass  # an orphaned draft just expires; its flush is superseded by this row
+
+    # --- 3) Fire PDF render (async, non-blocking); identical resubmits stop at one Redis GET ---
+    digest = answers_hash(appointment_id, body.answers)
+    if not render_is_current(appointment_id, digest):
+        try:
+            render_intake_pdf.delay(appointment_id, body.answers, digest)
+        except Exception:
+            pass  # do not block user flow in dev
 
     # --- 4) Decide next step: Consent OR Docs ---
     if _consent_needed(db, appointment_id, body.answers):
@@ -13,25 +13,9 @@ router = APIRouter(prefix="/v1", tags=["rbac", "auth"])
 # -- Roles we support
 Role = Literal["PATIENT", "CLINICIAN", "OPS"]
 
-# -- Ensure "users" table has a role column (idempotent, safe in dev)
-def _ensure_users_role(db: Session) -> None:
-    db.execute(text("""
-        CREATE TABLE IF NOT EXISTS users (
-          id SERIAL PRIMARY KEY,
-          email TEXT UNIQUE NOT NULL,
-          phone TEXT NULL,
-          password_hash TEXT NULL,
-          role TEXT NOT NULL DEFAULT 'PATIENT',
-          created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
-        );
-    """))
-    db.execute(text("ALTER TABLE users ADD COLUMN IF NOT EXISTS role TEXT NOT NULL DEFAULT 'PATIENT'"))
-    db.commit()
-
 # -- Seed 3 personas (safe to re-run)
 @router.post("/admin/seed/personas")
 def seed_personas(db: Session = Depends(get_db)):
-    _ensure_users_role(db)
     for email, role in [
         ("patient1@example.com",   "PATIENT"),
         ("clinician1@example.com", "CLINICIAN"),
@@ -80,7 +64,6 @@ def _current_user(request: Request, db: Session) -> Dict[str, Any] | None:
 # --- Who am I? -> used by the frontend guard
 @router.get("/auth/me")
 def auth_me(request: Request, db: Session = Depends(get_db)):
-    _ensure_users_role(db)
     u = _current_user(request, db)
     if not u:
         return {"role": "ANON"}
@@ -93,7 +76,6 @@ def dev_session(
     email: str = Query(..., description="Use a seeded email, e.g. patient1@example.com"),
     db: Session = Depends(get_db),
 ):
-    _ensure_users_role(db)
     row = db.execute(text("SELECT id, role FROM users WHERE email=:e"), {"e": email}).mappings().first()
     if not row:
         raise HTTPException(404, "User not found; seed via POST /v1/admin/seed/personas")
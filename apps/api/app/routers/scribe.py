@@ -1,41 +1,35 @@
 # apps/api/app/routers/scribe.py
 from __future__ import annotations
 
+import base64
+import json
 import os
-from typing import Optional, Dict, Any
+import re
+from functools import lru_cache
+from typing import Optional, Dict, Any, Iterator, List, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException, Body, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
-from ..db import get_db
+from ..db import get_db, SessionLocal
 from ..middleware.purpose_of_use import require_pou
+from ..scribe_audio import (
+    MAX_CHUNK_BYTES, accept_chunk, audio_key, commit_chunk, content_type_for, ingest_state, release_chunk,
+    running_draft, transcript,
+)
+from ..settings import settings
+from ..storage import get_storage
+from ..tasks.scribe import transcribe_chunk
+from ..utils.llm_governor import cached_draft, draft_cache_key, llm_governor, store_draft
 
 router = APIRouter(prefix="/v1/scribe", tags=["scribe"])
 
 EHR_BASE = os.getenv("EHR_CONNECTOR_URL", "http://ehr-connector:8100")
 
-# -----------------------------------------------------------------------------
-# DDL helper (idempotent) – keeps demo simple without a migration
-# -----------------------------------------------------------------------------
-def _ensure_tables(db: Session) -> None:
-    db.execute(
-        text(
-            """
-            CREATE TABLE IF NOT EXISTS scribe_sessions (
-              id SERIAL PRIMARY KEY,
-              appointment_id INTEGER NOT NULL REFERENCES appointments(id) ON DELETE CASCADE,
-              status TEXT NOT NULL DEFAULT 'DRAFT',      -- DRAFT | APPROVED
-              meta   JSONB NOT NULL DEFAULT '{}'::jsonb, -- model, confidences, etc.
-              created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
-            );
-            """
-        )
-    )
-    db.commit()
-
-
 # -----------------------------------------------------------------------------
 # I/O models
 # -----------------------------------------------------------------------------
@@ -68,7 +62,7 @@ def _stub_draft(appt: Dict[str, Any]) -> str:
     )
 
 
-def _generate_draft(db: Session, appt_id: int) -> str:
+def _load_appointment(db: Session, appt_id: int) -> Dict[str, Any]:
     appt = db.execute(
         text(
             """
@@ -81,39 +75,191 @@ def _generate_draft(db: Session, appt_id: int) -> str:
     ).mappings().first()
     if not appt:
         raise HTTPException(status_code=404, detail="Appointment not found")
+    return dict(appt)
+
+
+def _draft_messages(appt: Dict[str, Any]) -> List[Dict[str, str]]:
+    prompt = (
+        "Create a concise SOAP note draft for a primary-care visit. "
+        "Use short bullet-like sentences. Do not invent PHI.\n\n"
+        f"Appointment ID: {appt['id']}\n"
+        f"Reason: {appt.get('reason','')}\n"
+        f"Start:  {appt.get('start_at')}\n"
+        f"End:    {appt.get('end_at')}\n"
+    )
+    return [
+        {"role": "system", "content": "You are a clinical scribe assistant."},
+        {"role": "user", "content": prompt},
+    ]
+
+
+def _use_llm() -> bool:
+    # SCRIBE_DRAFT_GENERATOR=stub forces the deterministic generator (tests, demos)
+    return bool(os.getenv("OPENAI_API_KEY")) and os.getenv("SCRIBE_DRAFT_GENERATOR", "auto") != "stub"
+
 
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        return _stub_draft(dict(appt))
+# bump when _draft_messages changes so cached drafts from the old prompt are not reused
+DRAFT_PROMPT_VERSION = "soap-v1"
+
+
+def _model() -> str:
+    return os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+
+
+@lru_cache(maxsize=1)
+def _openai_client():
+    # one client (and connection pool) per process; the governor bounds its concurrency
+    from openai import OpenAI
+    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"), timeout=settings.llm_call_timeout_seconds, max_retries=0)
+
+
+def _draft_key(appt: Dict[str, Any]) -> str:
+    ctx = {k: appt.get(k) for k in ("id", "reason", "start_at", "end_at")}
+    return draft_cache_key(ctx, _model(), DRAFT_PROMPT_VERSION)
+
+
+def _generate_draft(db: Session, appt_id: int) -> str:
+    """
+    Restarted sessions for an unchanged appointment reuse the cached draft; fresh calls
+    go through the LLM governor (bounded concurrency + circuit breaker) and fall back
+    to the stub immediately when the model is saturated, slow or failing.
+    """
+    appt = _load_appointment(db, appt_id)
+    if not _use_llm():
+        return _stub_draft(appt)
+
+    key = _draft_key(appt)
+    hit = cached_draft(key)
+    if hit:
+        return hit
 
     try:
-        from openai import OpenAI
-        client = OpenAI(api_key=api_key)
-        model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
-
-        prompt = (
-            "Create a concise SOAP note draft for a primary-care visit. "
-            "Use short bullet-like sentences. Do not invent PHI.\n\n"
-            f"Appointment ID: {appt['id']}\n"
-            f"Reason: {appt.get('reason','')}\n"
-            f"Start:  {appt.get('start_at')}\n"
-            f"End:    {appt.get('end_at')}\n"
-        )
+        with llm_governor.slot() as call:
+            out = _openai_client().chat.completions.create(
+                model=_model(),
+                messages=_draft_messages(appt),
+                temperature=0.2,
+                max_tokens=450,
+            )
+            call.ok()
+        text_out = (out.choices[0].message.content or "").strip()
+    except Exception:
+        # LLMUnavailable or any upstream failure must not block the workflow – UI keeps manual note enabled
+        return _stub_draft(appt)
+    if not text_out:
+        return _stub_draft(appt)
+    store_draft(key, text_out)
+    return text_out
+
+
+def _word_stream(draft: str) -> Iterator[str]:
+    for tok in re.findall(r"\S+\s*", draft):
+        yield tok
 
-        out = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": "You are a clinical scribe assistant."},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.2,
-            max_tokens=450,
+
+def _stub_stream(appt: Dict[str, Any]) -> Iterator[str]:
+    """Deterministic token stream: the stub draft, one word (plus its separator) at a time."""
+    yield from _word_stream(_stub_draft(appt))
+
+
+def _stream_draft(appt: Dict[str, Any]) -> Iterator[str]:
+    """
+    Yield draft text as the model produces it. A cached draft for the same context is
+    replayed; otherwise the call holds an LLM governor slot for the whole stream (its
+    breaker latency is time-to-first-token). Falls back to the stub stream when no model
+    is configured, the governor sheds the call, or the upstream fails before producing
+    anything; a mid-stream failure just ends the stream (the clinician keeps what
+    arrived and can edit).
+    """
+    if not _use_llm():
+        yield from _stub_stream(appt)
+        return
+
+    key = _draft_key(appt)
+    hit = cached_draft(key)
+    if hit:
+        yield from _word_stream(hit)
+        return
+
+    parts: List[str] = []
+    try:
+        with llm_governor.slot() as call:
+            stream = _openai_client().chat.completions.create(
+                model=_model(),
+                messages=_draft_messages(appt),
+                temperature=0.2,
+                max_tokens=450,
+                stream=True,
+            )
+            for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    call.ok()
+                    parts.append(delta)
+                    yield delta
+    except Exception:
+        if parts:
+            return
+    if parts:
+        store_draft(key, "".join(parts).strip())
+    else:
+        yield from _stub_stream(appt)
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _insert_draft_note(db: Session, session_id: int, appointment_id: int) -> None:
+    # Write a DRAFT EncounterNote document; meta column is JSON → build via JSONB then cast ::json
+    db.execute(
+        text(
+            """
+            INSERT INTO documents(kind, url, meta)
+            VALUES (
+              'EncounterNote',
+              :url,
+              (
+                jsonb_build_object(
+                  'session_id', :sid,
+                  'appointment_id', :aid,
+                  'status', 'DRAFT'
+                )
+              )::json
+            )
+            """
+        ),
+        {"url": f"inline://scribe/{session_id}.txt", "sid": session_id, "aid": appointment_id},
+    )
+
+
+def _persist_draft(session_id: int, draft: str) -> None:
+    """Store a finished streamed draft (best-effort: the client already has the text)."""
+    db = SessionLocal()
+    try:
+        db.execute(
+            text(
+                "UPDATE scribe_sessions SET meta = (meta - 'streaming') || jsonb_build_object('draft', CAST(:d AS text)) "
+                "WHERE id = :sid"
+            ),
+            {"sid": session_id, "d": draft},
         )
-        text_out = (out.choices[0].message.content or "").strip()
-        return text_out or _stub_draft(dict(appt))
+        db.execute(
+            text(
+                """
+                UPDATE documents
+                SET meta = (COALESCE(meta::jsonb, '{}'::jsonb)
+                            || jsonb_build_object('draft_preview', CAST(:d AS text)))::json
+                WHERE kind='EncounterNote' AND (meta->>'session_id')::int = :sid
+                """
+            ),
+            {"sid": session_id, "d": draft[:4000]},
+        )
+        db.commit()
     except Exception:
-        # Any upstream failure must not block the workflow – UI keeps manual note enabled
-        return _stub_draft(dict(appt))
+        db.rollback()
+    finally:
+        db.close()
 
 
 # -----------------------------------------------------------------------------
@@ -132,8 +278,6 @@ def start_session(body: StartReq, db: Session = Depends(get_db)):
     - Generates an initial draft (OpenAI if configured; otherwise stub).
     - Inserts a DRAFT 'EncounterNote' document (documents.meta is JSON, not JSONB).
     """
-    _ensure_tables(db)
-
     # Create a session row
     row = db.execute(
         text(
@@ -147,29 +291,52 @@ def start_session(body: StartReq, db: Session = Depends(get_db)):
     # Produce initial draft (non-blocking, always returns text)
     draft = _generate_draft(db, body.appointment_id)
 
-    # Write a DRAFT EncounterNote document; meta column is JSON → build via JSONB then cast ::json
-    db.execute(
+    _insert_draft_note(db, session_id, body.appointment_id)
+    db.commit()
+
+    return StartResp(session_id=session_id, draft=draft)
+
+
+@router.post(
+    "/sessions/stream",
+    dependencies=[Depends(require_pou({"TREATMENT"}))],
+)
+def start_session_stream(body: StartReq, db: Session = Depends(get_db)):
+    """
+    Streaming variant of POST /sessions (text/event-stream).
+    The session + DRAFT EncounterNote are committed *before* generation starts, so no
+    transaction is held open while the model runs. Events:
+      session {session_id}  ->  token {t} ...  ->  done {session_id, draft}
+    The final draft is persisted to scribe_sessions.meta and the note's draft_preview.
+    """
+    appt = _load_appointment(db, body.appointment_id)  # 404 before the stream starts
+
+    session_id = int(db.execute(
         text(
-            """
-            INSERT INTO documents(kind, url, meta)
-            VALUES (
-              'EncounterNote',
-              :url,
-              (
-                jsonb_build_object(
-                  'session_id', :sid,
-                  'appointment_id', :aid,
-                  'status', 'DRAFT'
-                )
-              )::json
-            )
-            """
+            "INSERT INTO scribe_sessions(appointment_id, status, meta) "
+            "VALUES (:aid, 'DRAFT', '{\"streaming\": true}'::jsonb) RETURNING id"
         ),
-        {"url": f"inline://scribe/{session_id}.txt", "sid": session_id, "aid": body.appointment_id},
-    )
+        {"aid": body.appointment_id},
+    ).scalar())
+    _insert_draft_note(db, session_id, body.appointment_id)
     db.commit()
 
-    return StartResp(session_id=session_id, draft=draft)
+    def events() -> Iterator[str]:
+        yield _sse("session", {"session_id": session_id, "appointment_id": body.appointment_id})
+        parts: List[str] = []
+        for tok in _stream_draft(appt):
+            parts.append(tok)
+            yield _sse("token", {"t": tok})
+        draft = "".join(parts).strip() or _stub_draft(appt)
+        _persist_draft(session_id, draft)
+        yield _sse("done", {"session_id": session_id, "draft": draft, "status": "DRAFT"})
+
+    # the request-scoped session is closed by the time the body streams; _persist_draft opens its own
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 class ApproveBody(BaseModel):
@@ -196,8 +363,6 @@ def approve_session(
     - Best-effort: kick a renderer (Celery) to produce patient-facing summary.
     - Return an encounter_id that the UI can use to deep-link to /portal/summary/:encId
     """
-    _ensure_tables(db)
-
     sess = db.execute(
         text("SELECT id, appointment_id, status FROM scribe_sessions WHERE id = :sid"),
         {"sid": session_id},
@@ -273,3 +438,128 @@ def approve_session(
         pass  # safe no-op in dev
 
     return ApproveResp(ok=True, session_id=session_id, status="APPROVED", encounter_id=encounter_id)
+
+
+# -----------------------------------------------------------------------------
+# Ambient audio: chunked upload -> storage append -> transcription -> running draft
+# -----------------------------------------------------------------------------
+def _audio_session(session_id: int) -> int:
+    """404 for unknown sessions; only the first chunk pays for the DB lookup."""
+    if ingest_state(session_id)["started"]:
+        return session_id
+    db = SessionLocal()
+    try:
+        row = db.execute(text("SELECT 1 FROM scribe_sessions WHERE id = :sid"), {"sid": session_id}).first()
+    finally:
+        db.close()
+    if not row:
+        raise HTTPException(status_code=404, detail="Scribe session not found")
+    return session_id
+
+
+def _enqueue_transcription(session_id: int, seq: int, chunk: bytes, content_type: Optional[str]) -> None:
+    args = (session_id, seq, base64.b64encode(chunk).decode("ascii"), content_type)
+    try:
+        transcribe_chunk.delay(*args)
+    except Exception:
+        transcribe_chunk.run(*args)  # no broker (dev): transcribe inline; backpressure still applies
+
+
+def _ingest_chunk(session_id: int, seq: int, chunk: bytes, content_type: Optional[str]) -> Tuple[str, Dict[str, int]]:
+    """accept -> storage append -> commit -> enqueue; returns (outcome, state) as accept_chunk does."""
+    outcome, state = accept_chunk(session_id, seq, len(chunk), content_type)
+    if outcome != "ok":
+        return outcome, state
+    try:
+        get_storage().append(audio_key(session_id), chunk, seq)
+    except Exception:
+        release_chunk(session_id, seq)  # nothing advanced: the retry of this seq is accepted
+        raise HTTPException(status_code=503, detail="Audio storage unavailable; retry this chunk",
+                            headers={"Retry-After": "1"})
+    commit_chunk(session_id, seq, len(chunk), content_type)
+    _enqueue_transcription(session_id, seq, chunk, content_type)
+    return outcome, ingest_state(session_id)
+
+
+@router.post(
+    "/sessions/{session_id}/audio",
+    status_code=202,
+    dependencies=[Depends(require_pou({"TREATMENT"}))],
+)
+async def upload_audio_chunk(
+    request: Request,
+    seq: int = Query(..., ge=0, description="0-based chunk sequence number"),
+    session_id: int = Depends(_audio_session),
+):
+    """
+    Append one audio chunk (raw body, <= 1 MiB) to the session recording.
+    - Chunks must arrive in order; a retried chunk is acknowledged without a second write,
+      a gap returns 409 with the expected seq.
+    - 429 + Retry-After while the transcription backlog is full (backpressure).
+    - Accepted chunks are appended to object storage and queued for transcription;
+      transcript segments update the running draft (GET .../draft/live).
+    """
+    chunk = bytearray()
+    async for part in request.stream():
+        chunk.extend(part)
+        if len(chunk) > MAX_CHUNK_BYTES:
+            raise HTTPException(status_code=413, detail=f"Chunk exceeds {MAX_CHUNK_BYTES} bytes")
+    if not chunk:
+        raise HTTPException(status_code=400, detail="Empty chunk")
+
+    content_type = request.headers.get("content-type")
+    # Redis, storage and the broker are all blocking clients: keep them off the event loop
+    outcome, state = await run_in_threadpool(_ingest_chunk, session_id, seq, bytes(chunk), content_type)
+    if outcome == "gap":
+        return JSONResponse({"detail": "Out-of-order chunk", "expected_seq": state["next_seq"]}, status_code=409)
+    if outcome == "busy":
+        return JSONResponse({"detail": "Transcription backlog full", "backlog": state["backlog"]},
+                            status_code=429, headers={"Retry-After": "1"})
+
+    return {
+        "session_id": session_id,
+        "seq": seq,
+        "duplicate": outcome == "duplicate",
+        "next_seq": state["next_seq"],
+        "backlog": state["backlog"],
+    }
+
+
+@router.get(
+    "/sessions/{session_id}/draft/live",
+    dependencies=[Depends(require_pou({"TREATMENT"}))],
+)
+def live_draft(session_id: int):
+    """Running SOAP draft built from the transcript so far (Redis only, no DB)."""
+    state = ingest_state(session_id)
+    return {"session_id": session_id, "draft": running_draft(session_id), **state}
+
+
+@router.post(
+    "/sessions/{session_id}/audio/finish",
+    dependencies=[Depends(require_pou({"TREATMENT"}))],
+)
+def finish_audio(session_id: int = Depends(_audio_session), db: Session = Depends(get_db)):
+    """
+    End of visit: seal the recording object and persist transcript + running draft
+    into scribe_sessions.meta. `pending` > 0 means a few chunks were still being
+    transcribed; the live draft endpoint keeps updating until they land.
+    """
+    state = ingest_state(session_id)
+    url, sha = (None, None)
+    if state["received"]:
+        url, sha = get_storage().finalize(audio_key(session_id), content_type_for(session_id))
+    draft = running_draft(session_id)
+    segments = transcript(session_id)
+    db.execute(
+        text(
+            "UPDATE scribe_sessions SET meta = COALESCE(meta, '{}'::jsonb) || CAST(:m AS jsonb) WHERE id = :sid"
+        ),
+        {"sid": session_id, "m": json.dumps({
+            "audio_url": url, "audio_sha256": sha, "audio_bytes": state["bytes"],
+            "transcript": " ".join(str(x["text"]) for x in segments), "draft": draft,
+        })},
+    )
+    db.commit()
+    return {"session_id": session_id, "audio_url": url, "draft": draft,
+            "segments": len(segments), "pending": state["backlog"]}
@@ -1,14 +1,17 @@
 # apps/api/app/routers/signature.py
-import hmac, hashlib, os
-from fastapi import APIRouter, Depends, HTTPException, Header, Request
+import asyncio, hmac, hashlib, os
+from typing import Any, Dict
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy import text, bindparam
 import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
 from ..db import SessionLocal
-from ..storage import put_pdf_and_sha
-from reportlab.lib.pagesizes import LETTER
-from reportlab.pdfgen import canvas
-import io, json
+from ..tasks.signature import process_inbox
+from ..utils.signature_status import TERMINAL, publish_status, read_status, sse_event, status_subscription
+import json
 
 router = APIRouter()
 
@@ -28,6 +31,22 @@ class SignatureRequest(BaseModel):
 def create_signature_request(req: SignatureRequest, db=Depends(get_db)):
     # In real life call an e-sign provider; here we return a mock request id + URL.
     rid = f"sig-{req.appointment_id}"
+    # A retry after FAILED goes back to PENDING as a new attempt (its webhook is a new
+    # inbox event); a SIGNED request stays signed.
+    row = db.execute(
+        text("""
+          INSERT INTO signature_requests (request_id, appointment_id, signer_name, email, status, created_at, updated_at)
+          VALUES (:rid, :aid, :name, :email, 'PENDING', NOW(), NOW())
+          ON CONFLICT (request_id) DO UPDATE
+             SET signer_name = EXCLUDED.signer_name, email = EXCLUDED.email,
+                 status = CASE WHEN signature_requests.status = 'SIGNED' THEN 'SIGNED' ELSE 'PENDING' END,
+                 attempt = signature_requests.attempt
+                           + CASE WHEN signature_requests.status = 'FAILED' THEN 1 ELSE 0 END,
+                 updated_at = NOW()
+          RETURNING request_id, appointment_id, status, document_id, attempt
+        """),
+        {"rid": rid, "aid": req.appointment_id, "name": req.signer_name, "email": req.email},
+    ).mappings().first()
     # Audit request creation
     db.execute(
         text("INSERT INTO audit_logs (actor, action, target, details, created_at) "
@@ -36,93 +55,137 @@ def create_signature_request(req: SignatureRequest, db=Depends(get_db)):
         {"a": req.email, "t": rid, "d": {"appointment_id": req.appointment_id, "signer": req.signer_name}},
     )
     db.commit()
-    return {"request_id": rid, "redirect_url": f"/consent/{rid}"}
-
-def _make_consent_pdf(appointment_id: int, signer_name: str) -> bytes:
-    buf = io.BytesIO()
-    c = canvas.Canvas(buf, pagesize=LETTER)
-    w, h = LETTER
-    y = h - 50
-    c.setFont("Helvetica-Bold", 14); c.drawString(50, y, "Consent to Treat"); y -= 30
-    c.setFont("Helvetica", 10)
-    c.drawString(50, y, f"Appointment #{appointment_id}"); y -= 16
-    c.drawString(50, y, f"Signed by: {signer_name}"); y -= 16
-    c.drawString(50, y, "I consent to the proposed care plan."); y -= 16
-    c.showPage(); c.save(); return buf.getvalue()
-
-@router.post("/v1/signature/webhook")
+    attempt = row["attempt"] if row else 1
+    publish_status({k: v for k, v in row.items() if k != "attempt"} if row else None)
+    return {"request_id": rid, "attempt": attempt, "redirect_url": f"/consent/{rid}"}
+
+def _event_key(payload: Dict[str, Any]) -> str | None:
+    """
+    Inbox dedupe key: the provider's event id, else '<request_id>#<attempt>'. None when
+    the payload carries neither, and the insert keys on the request's current attempt.
+    """
+    if payload.get("event_id"):
+        return f"evt:{payload['event_id']}"
+    if payload.get("attempt") is not None:
+        return f"{payload['request_id']}#{int(payload['attempt'])}"
+    return None
+
+
+def _store_event(db, rid: str, event_key: str | None, payload: Dict[str, Any]) -> bool:
+    """Insert into signature_inbox and kick the worker -> False when the event is a duplicate."""
+    row = db.execute(
+        text("""
+          INSERT INTO signature_inbox (request_id, event_key, payload, received_at)
+          VALUES (:rid,
+                  COALESCE(:ek, :rid || '#' || COALESCE(
+                      (SELECT attempt FROM signature_requests WHERE request_id = :rid), 1)),
+                  :p, NOW())
+          ON CONFLICT (event_key) DO NOTHING
+          RETURNING id
+        """)
+        .bindparams(bindparam("p", type_=JSONB())),
+        {"rid": rid, "ek": event_key, "p": payload},
+    ).first()
+    db.commit()
+
+    if row:
+        try:
+            process_inbox.delay()
+        except Exception:
+            pass  # the beat sweep picks it up
+    return row is not None
+
+
+@router.post("/v1/signature/webhook", status_code=202)
 async def signature_webhook(
     request: Request,
     x_signature: str = Header(None, alias="X-Signature"),
     db=Depends(get_db),
 ):
+    """
+    Fast ack: verify, store the raw event in signature_inbox (deduplicated per signing
+    attempt, see _event_key),
+    return 202. The PDF/upload/inserts happen in signature.process_inbox, so provider
+    retries neither wait on S3 nor create duplicate consents.
+    """
     raw = await request.body()
     expected = hmac.new(WEBHOOK_SECRET.encode(), raw, hashlib.sha256).hexdigest()
     if not x_signature or not hmac.compare_digest(x_signature, expected):
         raise HTTPException(401, "invalid signature")
 
-    payload = await request.json()
-    rid = payload.get("request_id")
-    appointment_id = int(payload.get("appointment_id"))
-    signer_name = payload.get("signer_name", "Unknown")
-    signer_ip = payload.get("signer_ip", "127.0.0.1")
+    try:
+        payload = json.loads(raw)
+        rid = str(payload["request_id"])
+        int(payload["appointment_id"])
+        event_key = _event_key(payload)
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(400, "request_id and appointment_id required")
 
-    # Generate a PDF for the signed consent and upload
-    pdf = _make_consent_pdf(appointment_id, signer_name)
-    key = f"consent/{rid}.pdf"
-    url, sha = put_pdf_and_sha(key, pdf)
+    # sync DB driver and Celery client: run them off the event loop
+    inserted = await run_in_threadpool(_store_event, db, rid, event_key, payload)
+    return {"ok": True, "request_id": rid, "duplicate": not inserted}
 
-    # Resolve patient_id (nullable is allowed)
-    row = db.execute(text("SELECT patient_id FROM appointments WHERE id=:id"), {"id": appointment_id}).first()
-    patient_id = row.patient_id if row else None
+# ---------------------------------------------------------------------------
+# Status: signature_requests row + Redis pub/sub push (app/utils/signature_status.py)
+# ---------------------------------------------------------------------------
+MAX_WAIT_SECONDS = 30
+SSE_MAX_SECONDS = 300
+SSE_KEEPALIVE_SECONDS = 15
 
-    # Insert into consents
-    db.execute(
-        text("INSERT INTO consents (patient_id, pdf_url, sha256, signer_name, signer_ip, signed_at, created_at) "
-             "VALUES (:pid, :url, :sha, :name, :ip, NOW(), NOW())"),
-        {"pid": patient_id, "url": url, "sha": sha, "name": signer_name, "ip": signer_ip},
-    )
 
-    # Insert a 'Consent' document (meta stores sha/title/request_id)
-    meta = {"title": "Consent (SIGNED)", "sha256": sha, "request_id": rid, "appointment_id": appointment_id}
-    db.execute(
-        text("INSERT INTO documents (patient_id, kind, url, meta, created_at) "
-             "VALUES (:pid, 'Consent', :url, :meta, NOW())")
-        .bindparams(bindparam("meta", type_=sa.JSON())),
-        {"pid": patient_id, "url": url, "meta": meta},
-    )
-
-    # Audit
-    db.execute(
-        text("INSERT INTO audit_logs (actor, action, target, details, created_at) "
-             "VALUES (:a, 'CONSENT_SIGNED', :t, :d, NOW())")
-        .bindparams(bindparam("d", type_=sa.JSON())),
-        {"a": signer_name, "t": rid, "d": {"appointment_id": appointment_id, "pdf": url}},
-    )
-
-    db.commit()
-    return {"ok": True}
+def _read_status(request_id: str) -> Dict[str, Any]:
+    # own session: used from the threadpool inside long-poll / SSE loops
+    db = SessionLocal()
+    try:
+        return read_status(db, request_id)
+    finally:
+        db.close()
 
-# apps/api/app/routers/signature.py  (append to the bottom)
 
 @router.get("/v1/signature/requests/{request_id}")
-def get_signature_request(request_id: str, db=Depends(get_db)):
+async def get_signature_request(request_id: str, wait: int = Query(0, ge=0, le=MAX_WAIT_SECONDS)):
     """
-    Poll the status of a signature request.
-    We consider the request SIGNED if a Consent document exists whose meta.request_id == request_id.
-    Otherwise it's PENDING. You can add FAIL states if you log failures separately.
+    Status of a signature request (PENDING | SIGNED | FAILED).
+    With ?wait=N the call long-polls: it returns as soon as the request leaves PENDING
+    (pushed via Redis pub/sub) or after N seconds with the current state.
     """
-    row = db.execute(
-        text(
-            "SELECT (meta->>'appointment_id') AS appointment_id "
-            "FROM documents WHERE kind='Consent' AND (meta->>'request_id') = :rid "
-            "ORDER BY id DESC LIMIT 1"
-        ),
-        {"rid": request_id},
-    ).mappings().first()
-
-    if row:
-        return {"request_id": request_id, "status": "SIGNED", "appointment_id": int(row["appointment_id"])}
-
-    # simple mock: if nothing is signed yet, it's pending
-    return {"request_id": request_id, "status": "PENDING"}
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + wait
+    async with status_subscription(request_id) as sub:
+        while True:
+            state = await run_in_threadpool(_read_status, request_id)
+            remaining = deadline - loop.time()
+            if state["status"] in TERMINAL or remaining <= 0:
+                return state
+            await sub.wait(remaining)
+
+
+@router.get("/v1/signature/requests/{request_id}/events")
+async def signature_request_events(request_id: str):
+    """
+    SSE stream: one `status` event now and on every change; closes once the request
+    is terminal (or after SSE_MAX_SECONDS; EventSource reconnects on its own).
+    """
+    async def gen():
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + SSE_MAX_SECONDS
+        last, last_sent = None, loop.time()
+        async with status_subscription(request_id) as sub:
+            while True:
+                state = await run_in_threadpool(_read_status, request_id)
+                if state != last:
+                    yield sse_event(state)
+                    last, last_sent = state, loop.time()
+                elif loop.time() - last_sent >= SSE_KEEPALIVE_SECONDS:
+                    yield ": keepalive\n\n"
+                    last_sent = loop.time()
+                remaining = deadline - loop.time()
+                if state["status"] in TERMINAL or remaining <= 0:
+                    return
+                await sub.wait(min(remaining, SSE_KEEPALIVE_SECONDS))
+
+    return StreamingResponse(
+        gen(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,87 @@
+# apps/api/app/schema_cache.py
+"""
+Process-level cache of which tables and columns exist.
+
+Routers that adapt to the schema (analytics, audit_safe) used to ask
+information_schema on every request, several times. Instead the whole public
+column list is loaded in one query and kept per process, tagged with the
+alembic_version it was read at. At most every SCHEMA_CACHE_RECHECK_SECONDS the
+next caller re-reads alembic_version (one primary-key row) and reloads the
+snapshot only if a migration has run since; every other call is a dict lookup.
+
+Without an alembic_version table (dev databases built by create_all) the
+snapshot is simply reloaded every recheck interval.
+
+Usage:
+    schema_cache.table_exists(db, "appt_daily")
+    schema_cache.has_column(db, "audit_logs", "details")
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from sqlalchemy import text
+
+from .settings import settings
+
+_COLUMNS_SQL = """
+SELECT table_name, column_name
+  FROM information_schema.columns
+ WHERE table_schema = current_schema()
+"""
+_VERSION_SQL = "SELECT version_num FROM alembic_version ORDER BY version_num"
+
+_Snapshot = Tuple[Optional[str], Dict[str, FrozenSet[str]]]
+
+
+class SchemaCache:
+    def __init__(self, recheck_seconds: float) -> None:
+        self.recheck_seconds = float(recheck_seconds)
+        self._lock = threading.Lock()
+        self._snapshot: Optional[_Snapshot] = None
+        self._checked_at = 0.0
+
+    @staticmethod
+    def _version(db) -> Optional[str]:
+        return ",".join(r[0] for r in db.execute(text(_VERSION_SQL)).all()) or None
+
+    def _load(self, db) -> _Snapshot:
+        tables: Dict[str, set] = {}
+        for table, column in db.execute(text(_COLUMNS_SQL)).all():
+            tables.setdefault(table, set()).add(column)
+        version = self._version(db) if "alembic_version" in tables else None
+        return version, {t: frozenset(cols) for t, cols in tables.items()}
+
+    def _tables(self, db) -> Dict[str, FrozenSet[str]]:
+        snap = self._snapshot
+        now = time.monotonic()
+        if snap is not None and now - self._checked_at < self.recheck_seconds:
+            return snap[1]
+        with self._lock:
+            snap = self._snapshot
+            if snap is not None and now - self._checked_at < self.recheck_seconds:
+                return snap[1]  # another thread refreshed while we waited
+            if snap is None or snap[0] is None or self._version(db) != snap[0]:
+                snap = self._snapshot = self._load(db)
+            self._checked_at = time.monotonic()
+            return snap[1]
+
+    # -- public -----------------------------------------------------------------
+    def columns(self, db, table: str) -> FrozenSet[str]:
+        return self._tables(db).get(table, frozenset())
+
+    def table_exists(self, db, table: str) -> bool:
+        return table in self._tables(db)
+
+    def has_column(self, db, table: str, column: str) -> bool:
+        return column in self.columns(db, table)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._snapshot = None
+            self._checked_at = 0.0
+
+
+schema_cache = SchemaCache(recheck_seconds=settings.schema_cache_recheck_seconds)
@@ -0,0 +1,84 @@
+# apps/api/app/schema_check.py
+"""
+One-time startup schema check.
+
+Schema changes live in Alembic (see 0012_runtime_ddl); request handlers no longer
+run CREATE/ALTER TABLE. At startup we compare the columns the raw-SQL routers rely
+on against information_schema in a single query and log what is missing, so a
+forgotten `alembic upgrade head` shows up in the logs instead of as a 500 later.
+
+Non-fatal by default (the API still boots without a database, e.g. in tests);
+set SCHEMA_CHECK_STRICT=1 to refuse to start on a mismatch.
+"""
+from __future__ import annotations
+
+import logging
+import os
+from typing import Dict, List, Set
+
+from sqlalchemy import text
+
+log = logging.getLogger(__name__)
+
+# table -> columns used by raw SQL in routers/tasks
+REQUIRED_COLUMNS: Dict[str, Set[str]] = {
+    "claims": {"id", "encounter_id", "appointment_id", "patient_id", "status", "payer_ref",
+               "total_cents", "payload_json", "last_submit_at", "clearinghouse_resp",
+               "created_at", "updated_at", "paid_cents", "denial_code", "payer"},
+    "scribe_sessions": {"id", "appointment_id", "status", "meta", "created_at"},
+    "users": {"id", "email", "role"},
+    "tasks": {"id", "type", "status", "payload_json", "created_at"},
+    "eligibility_responses": {"id", "appointment_id", "eligible", "plan", "copay_cents", "raw_json"},
+    "intake_forms": {"id", "appointment_id", "answers_json", "status", "created_at"},
+    "signature_inbox": {"id", "request_id", "event_key", "payload", "status", "attempts"},
+    "signature_requests": {"id", "request_id", "appointment_id", "status", "document_id", "attempt"},
+    "remit_files": {"id", "sha256", "url", "stats"},
+    "claim_events": {"id", "claim_id", "from_status", "to_status", "created_at"},
+    "claim_current": {"claim_id", "status", "status_since", "first_submitted_at", "first_outcome", "paid_at"},
+    "claim_daily": {"day", "submitted", "submitted_cents", "first_pass_resolved", "first_pass_accepted",
+                    "paid", "paid_cents", "days_to_pay_sum", "denied", "rejected", "ar_delta_cents"},
+    "appointments": {"id", "start_at", "status", "source_channel", "clinic", "created_at"},
+    "appt_daily": {"day", "clinic", "channel", "appts", "no_shows", "tta_seconds_sum", "tta_count"},
+    "elig_daily": {"day", "clinic", "channel", "ok", "total"},
+}
+
+
+def missing_schema(conn) -> Dict[str, List[str]]:
+    """{table: [missing columns]} ("*" = whole table missing); empty when all present."""
+    rows = conn.execute(
+        text(
+            "SELECT table_name, column_name FROM information_schema.columns "
+            "WHERE table_schema = current_schema() AND table_name = ANY(:tables)"
+        ),
+        {"tables": list(REQUIRED_COLUMNS)},
+    ).all()
+    present: Dict[str, Set[str]] = {}
+    for table, column in rows:
+        present.setdefault(table, set()).add(column)
+
+    out: Dict[str, List[str]] = {}
+    for table, cols in REQUIRED_COLUMNS.items():
+        if table not in present:
+            out[table] = ["*"]
+        elif cols - present[table]:
+            out[table] = sorted(cols - present[table])
+    return out
+
+
+def check_schema(engine) -> Dict[str, List[str]]:
+    strict = os.getenv("SCHEMA_CHECK_STRICT", "0") == "1"
+    try:
+        with engine.connect() as conn:
+            missing = missing_schema(conn)
+    except Exception as e:
+        if strict:
+            raise
+        log.warning("schema check skipped (database unavailable): %s", e)
+        return {}
+
+    if missing:
+        msg = "database schema is behind the code; run `alembic upgrade head`. Missing: %s"
+        if strict:
+            raise RuntimeError(msg % missing)
+        log.warning(msg, missing)
+    return missing
@@ -0,0 +1,185 @@
+# apps/api/app/scribe_audio.py
+"""
+Ambient scribe audio: per-session ingest state, transcript and running draft.
+
+Redis layout (all keys expire SESSION_TTL_SECONDS after the last write):
+  scribe:audio:<sid>       HASH  next_seq, received, transcribed, abandoned, bytes, content_type
+  scribe:inflight:<sid>    ZSET  seq -> epoch seconds it was queued for transcription
+  scribe:transcript:<sid>  LIST  JSON {"seq", "text"} in arrival order
+  scribe:sections:<sid>:X  LIST  JSON {"seq", "text"} per SOAP section X
+
+Backpressure: a chunk is refused (429) while more than MAX_BACKLOG chunks are
+waiting for transcription, so a slow transcriber slows the uploader down instead
+of growing an unbounded queue. The backlog is the in-flight set, not
+received - transcribed: a chunk whose transcription has not landed within
+INFLIGHT_TIMEOUT_SECONDS (task lost, worker died) is counted as abandoned and
+dropped from it, so a lost task never wedges the session at 429.
+
+Each transcribed segment is folded into the SOAP sections right away (a cheap
+keyword router, O(segment)), so the draft is current when the visit ends instead
+of being generated from the full transcript afterwards.
+"""
+from __future__ import annotations
+
+import json
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .utils.redis_cache import get_redis_client
+
+MAX_CHUNK_BYTES = 1024 * 1024
+MAX_BACKLOG = 8
+INFLIGHT_TIMEOUT_SECONDS = 120
+SESSION_TTL_SECONDS = 6 * 3600
+
+SECTIONS = ("S", "O", "A", "P")
+SECTION_TITLES = {"S": "Subjective", "O": "Objective", "A": "Assessment", "P": "Plan"}
+
+_ROUTES: List[Tuple[str, re.Pattern]] = [
+    ("P", re.compile(r"\b(plan|prescrib\w*|follow[- ]?up|refer\w*|return|start\w*|increase|continue|order\w*)\b", re.I)),
+    ("A", re.compile(r"\b(assess\w*|diagnos\w*|likely|consistent with|impression|rule out|differential)\b", re.I)),
+    ("O", re.compile(r"\b(blood pressure|bp|pulse|heart rate|temp\w*|exam\w*|vitals?|auscultat\w*|lungs?|oxygen|sat\w*|weight)\b", re.I)),
+]
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")  # "37.9" stays one sentence
+
+
+def audio_key(session_id: int) -> str:
+    return f"scribe/audio/session-{int(session_id)}"
+
+
+def _state_key(sid: int) -> str:
+    return f"scribe:audio:{int(sid)}"
+
+
+def _transcript_key(sid: int) -> str:
+    return f"scribe:transcript:{int(sid)}"
+
+
+def _section_key(sid: int, section: str) -> str:
+    return f"scribe:sections:{int(sid)}:{section}"
+
+
+def _inflight_key(sid: int) -> str:
+    return f"scribe:inflight:{int(sid)}"
+
+
+def _touch(pipe, sid: int) -> None:
+    keys = (_state_key(sid), _transcript_key(sid), _inflight_key(sid))
+    for k in keys + tuple(_section_key(sid, x) for x in SECTIONS):
+        pipe.expire(k, SESSION_TTL_SECONDS)
+
+
+def ingest_state(session_id: int, now: Optional[float] = None) -> Dict[str, int]:
+    r = get_redis_client()
+    raw = r.hgetall(_state_key(session_id)) or {}
+    out = {k: int(raw.get(k, 0)) for k in ("next_seq", "received", "transcribed", "abandoned", "bytes")}
+    cutoff = (now if now is not None else time.time()) - INFLIGHT_TIMEOUT_SECONDS
+    out["backlog"] = len(r.zrangebyscore(_inflight_key(session_id), cutoff, "+inf"))
+    out["started"] = bool(raw)
+    return out
+
+
+def reap_inflight(session_id: int, now: Optional[float] = None) -> int:
+    """Drop chunks queued longer than INFLIGHT_TIMEOUT_SECONDS ago; count them as abandoned."""
+    r = get_redis_client()
+    cutoff = (now if now is not None else time.time()) - INFLIGHT_TIMEOUT_SECONDS
+    stale = r.zrangebyscore(_inflight_key(session_id), "-inf", cutoff)
+    gone = r.zrem(_inflight_key(session_id), *stale) if stale else 0
+    if gone:
+        r.hincrby(_state_key(session_id), "abandoned", gone)
+    return gone
+
+
+def _claim_key(sid: int, seq: int) -> str:
+    return f"{_state_key(sid)}:seq:{int(seq)}"
+
+
+def accept_chunk(session_id: int, seq: int, size: int, content_type: Optional[str] = None,
+                 now: Optional[float] = None) -> Tuple[str, Dict[str, int]]:
+    """
+    Decide what to do with chunk `seq`:
+      ("ok", state)        -> caller stores it, then commit_chunk() (release_chunk() if storing fails)
+      ("duplicate", state) -> retry of an accepted chunk; acknowledge, do nothing
+      ("gap", state)       -> out of order; client must resend from state["next_seq"]
+      ("busy", state)      -> transcription backlog full; retry later
+    """
+    r = get_redis_client()
+    reap_inflight(session_id, now)
+    state = ingest_state(session_id, now)
+    if seq < state["next_seq"]:
+        return "duplicate", state
+    if seq > state["next_seq"]:
+        return "gap", state
+    if state["backlog"] >= MAX_BACKLOG:
+        return "busy", state
+    # two concurrent uploads of the same seq: exactly one wins the claim
+    if not r.set(_claim_key(session_id, seq), "1", ex=SESSION_TTL_SECONDS, nx=True):
+        return "duplicate", state
+    return "ok", state
+
+
+def commit_chunk(session_id: int, seq: int, size: int, content_type: Optional[str] = None,
+                 now: Optional[float] = None) -> Dict[str, int]:
+    """The claimed chunk is in storage: advance next_seq and count it into the backlog."""
+    pipe = get_redis_client().pipeline()
+    pipe.zadd(_inflight_key(session_id), {str(int(seq)): now if now is not None else time.time()})
+    pipe.hincrby(_state_key(session_id), "next_seq", 1)
+    pipe.hincrby(_state_key(session_id), "received", 1)
+    pipe.hincrby(_state_key(session_id), "bytes", int(size))
+    if seq == 0 and content_type:
+        pipe.hset(_state_key(session_id), "content_type", content_type)
+    _touch(pipe, session_id)
+    pipe.execute()
+    return ingest_state(session_id, now)
+
+
+def release_chunk(session_id: int, seq: int) -> None:
+    """Storing the claimed chunk failed: drop the claim so the client's retry is accepted."""
+    get_redis_client().delete(_claim_key(session_id, seq))
+
+
+def content_type_for(session_id: int) -> Optional[str]:
+    return get_redis_client().hget(_state_key(session_id), "content_type")
+
+
+def route_sentence(sentence: str) -> str:
+    for section, rx in _ROUTES:
+        if rx.search(sentence):
+            return section
+    return "S"
+
+
+def record_segment(session_id: int, seq: int, text: str) -> None:
+    """
+    Append a transcript segment and fold its sentences into the SOAP sections.
+    Only RPUSHes, so segments transcribed in parallel never overwrite each other.
+    """
+    r = get_redis_client()
+    pipe = r.pipeline()
+    pipe.rpush(_transcript_key(session_id), json.dumps({"seq": int(seq), "text": text}))
+    for sentence in _SENTENCE_END.split((text or "").strip()):
+        if sentence:
+            pipe.rpush(_section_key(session_id, route_sentence(sentence)),
+                       json.dumps({"seq": int(seq), "text": sentence}))
+    pipe.zrem(_inflight_key(session_id), str(int(seq)))
+    pipe.hincrby(_state_key(session_id), "transcribed", 1)
+    _touch(pipe, session_id)
+    pipe.execute()
+
+
+def _ordered(key: str) -> List[Dict[str, object]]:
+    items = [json.loads(x) for x in get_redis_client().lrange(key, 0, -1)]
+    return sorted(items, key=lambda x: x["seq"])  # stable: sentence order within a chunk is kept
+
+
+def transcript(session_id: int) -> List[Dict[str, object]]:
+    return _ordered(_transcript_key(session_id))
+
+
+def running_draft(session_id: int) -> str:
+    lines = []
+    for s in SECTIONS:
+        body = " ".join(str(x["text"]) for x in _ordered(_section_key(session_id, s)))
+        lines.append(f"{SECTION_TITLES[s]}: {body or '—'}")
+    return "\n".join(lines)
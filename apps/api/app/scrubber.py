@@ -0,0 +1,346 @@
+# apps/api/app/scrubber.py
+"""
+Pre-submission claim scrubber.
+
+Rules are declared as data (DEFAULT_RULES, or a JSON file at
+CLAIM_SCRUB_RULES_PATH) and compiled once into evaluators: regexes are
+compiled, per-CPT limits and CPT->ICD pairings become prefix lookup tables.
+A batch of claims is laid out column-wise (ClaimBatch: one list per claim
+field, plus flattened service-line columns), and each compiled rule makes a
+single pass over the columns it needs for the whole batch, instead of every
+claim walking every rule.
+
+Rule kinds:
+  required   claim field must be present            (facility, svc, diag)
+  pattern    every code in a column matches a regex (CPT / ICD-10 format)
+  range      numeric line column within [min, max], max overridable per CPT prefix
+  pairing    a line whose CPT has a pairing entry needs a diagnosis with an
+             allowed ICD-10 prefix
+  duplicate  same patient + service date + CPT set as another claim in the
+             batch or an already submitted/paid claim
+
+Severity "error" blocks submission; "warning" is reported only. Per-rule
+evaluation time and edit counts are exported as prometheus metrics.
+"""
+from __future__ import annotations
+
+import json
+import re
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Sequence, Set, Tuple
+
+from prometheus_client import Counter, Histogram
+from sqlalchemy import text
+
+from .settings import settings
+
+SCRUB_RULE_SECONDS = Histogram(
+    "claim_scrub_rule_seconds", "Time to evaluate one scrubber rule over a batch", ["rule"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1),
+)
+SCRUB_EDITS = Counter("claim_scrub_edits_total", "Scrubber edits raised", ["rule", "severity"])
+SCRUB_CLAIMS = Counter("claim_scrub_claims_total", "Claims scrubbed", ["outcome"])  # clean|warning|blocked
+
+# statuses a new claim can duplicate
+DUPLICATE_OF_STATUSES = ("SUBMITTED", "PAID")
+
+DEFAULT_RULES: List[Dict[str, Any]] = [
+    {"id": "facility_missing", "kind": "required", "field": "facility", "severity": "error",
+     "message": "missing facility"},
+    {"id": "svc_missing", "kind": "required", "field": "svc", "severity": "error",
+     "message": "no service lines"},
+    {"id": "diag_missing", "kind": "required", "field": "diag", "severity": "error",
+     "message": "no diagnosis codes"},
+    {"id": "cpt_format", "kind": "pattern", "column": "cpt", "regex": r"[0-9]{4}[0-9A-Z]|[A-V][0-9]{4}",
+     "severity": "error", "message": "invalid CPT/HCPCS code {value!r}"},
+    {"id": "icd_format", "kind": "pattern", "column": "diag", "regex": r"[A-Z][0-9][0-9A-Z][0-9A-Z]{0,4}",
+     "severity": "error", "message": "invalid ICD-10 code {value!r}"},
+    {"id": "units_range", "kind": "range", "column": "units", "min": 1, "max": 24, "severity": "error",
+     "by_cpt": {"992": 1, "993": 1, "994": 1},  # E/M: one per encounter
+     "message": "{value} units outside {min}..{max} for {cpt}"},
+    {"id": "charge_range", "kind": "range", "column": "charge", "min": 1, "max": 2_500_000, "severity": "warning",
+     "by_cpt": {"992": 100_000, "36415": 10_000},
+     "message": "unit charge {value} cents outside {min}..{max} for {cpt}"},
+    {"id": "cpt_icd_pairing", "kind": "pairing", "severity": "warning",
+     "pairs": {
+         "87880": ["J02", "J03", "J06"],           # strep test -> pharyngitis/tonsillitis/URI
+         "87804": ["J09", "J10", "J11", "R50"],    # flu test -> influenza/fever
+         "71045": ["J", "R05", "R06", "R07", "R50"],  # chest x-ray -> respiratory / chest symptoms
+         "93000": ["I", "R00", "R07", "R55", "Z01"],  # ECG -> circulatory / chest pain / pre-op
+         "82947": ["E08", "E09", "E10", "E11", "E13", "R73", "Z13"],  # glucose
+         "83036": ["E08", "E09", "E10", "E11", "E13", "R73", "Z13"],  # HbA1c
+     },
+     "message": "{cpt} is not supported by any diagnosis on the claim"},
+    {"id": "duplicate_claim", "kind": "duplicate", "severity": "error",
+     "message": "duplicate of claim {value} (same patient, date of service and CPTs)"},
+]
+
+
+class Edit(NamedTuple):
+    claim_id: int
+    rule: str
+    severity: str
+    message: str
+    line: Optional[int] = None  # 1-based service line, None for claim-level edits
+
+
+def _code(value: Any) -> str:
+    return str(value or "").strip().upper().replace(".", "")
+
+
+class ClaimBatch:
+    """Column-wise view of claims rows (id, patient_id, payload_json[, created_at])."""
+
+    def __init__(self, rows: Iterable[Mapping[str, Any]]) -> None:
+        self.ids: List[int] = []
+        self.patient_ids: List[Optional[int]] = []
+        self.dos: List[str] = []
+        self.payloads: List[Dict[str, Any]] = []
+        self.diag: List[Tuple[str, ...]] = []
+        self.claim_cpts: List[Tuple[str, ...]] = []
+        # service lines, flattened; line_claim indexes into the claim columns
+        self.line_claim: List[int] = []
+        self.line_no: List[int] = []
+        self.cpt: List[str] = []
+        self.units: List[int] = []
+        self.charge: List[int] = []
+        for r in rows:
+            self.add(r)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, row: Mapping[str, Any]) -> None:
+        p = row.get("payload_json") or {}
+        i = len(self.ids)
+        self.ids.append(int(row["id"]))
+        self.patient_ids.append(row.get("patient_id"))
+        dos = p.get("dos") or p.get("service_date") or row.get("created_at")
+        self.dos.append(str(dos)[:10] if dos else "")
+        self.payloads.append(p)
+        self.diag.append(tuple(_code(d) for d in (p.get("diag") or []) if d))
+        svc = p.get("svc") or []
+        cpts = [_code(s.get("cpt")) for s in svc]
+        self.claim_cpts.append(tuple(sorted(cpts)))
+        self.line_claim.extend([i] * len(svc))
+        self.line_no.extend(range(1, len(svc) + 1))
+        self.cpt.extend(cpts)
+        self.units.extend(int(s.get("units", 1) or 0) for s in svc)
+        self.charge.extend(int(s.get("charge_cents", 0) or 0) for s in svc)
+
+    def duplicate_key(self, i: int) -> Optional[Tuple[Any, str, Tuple[str, ...]]]:
+        if self.patient_ids[i] is None or not self.dos[i]:
+            return None
+        cpts = self.claim_cpts[i]
+        return (self.patient_ids[i], self.dos[i], cpts) if cpts else None
+
+
+def _by_prefix(table: Mapping[str, Any]) -> Tuple[Dict[str, Any], Tuple[int, ...]]:
+    """Prefix table + the prefix lengths to probe, longest first."""
+    return dict(table), tuple(sorted({len(k) for k in table}, reverse=True))
+
+
+def _lookup(table: Dict[str, Any], lengths: Tuple[int, ...], code: str, default: Any = None) -> Any:
+    for n in lengths:
+        hit = table.get(code[:n])
+        if hit is not None:
+            return hit
+    return default
+
+
+class Rule:
+    """A compiled rule: evaluate(batch, ctx) yields (claim index, line no, message)."""
+
+    def __init__(self, spec: Mapping[str, Any]) -> None:
+        self.id = spec["id"]
+        self.severity = spec.get("severity", "error")
+        self.message = spec.get("message", self.id)
+        self.spec = spec
+
+    def evaluate(self, batch: ClaimBatch, ctx: Dict[str, Any]) -> Iterator[Tuple[int, Optional[int], str]]:
+        raise NotImplementedError
+
+
+class _Required(Rule):
+    def evaluate(self, batch, ctx):
+        field = self.spec["field"]
+        for i, p in enumerate(batch.payloads):
+            if not p.get(field):
+                yield i, None, self.message
+
+
+class _Pattern(Rule):
+    def __init__(self, spec):
+        super().__init__(spec)
+        self.match = re.compile(spec["regex"]).fullmatch
+
+    def evaluate(self, batch, ctx):
+        # codes repeat heavily across a batch: match each distinct code once
+        match, column = self.match, self.spec["column"]
+        if column == "diag":
+            bad = {c for c in {c for codes in batch.diag for c in codes} if not match(c)}
+            if bad:
+                for i, codes in enumerate(batch.diag):
+                    for code in bad.intersection(codes):
+                        yield i, None, self.message.format(value=code)
+        else:
+            values = getattr(batch, column)
+            bad = {c for c in set(values) if not match(c)}
+            if bad:
+                for k, code in enumerate(values):
+                    if code in bad:
+                        yield batch.line_claim[k], batch.line_no[k], self.message.format(value=code)
+
+
+class _Range(Rule):
+    def __init__(self, spec):
+        super().__init__(spec)
+        self.lo = int(spec.get("min", 0))
+        self.hi = int(spec["max"])
+        self.by_cpt, self.lengths = _by_prefix(spec.get("by_cpt") or {})
+
+    def evaluate(self, batch, ctx):
+        lo, hi = self.lo, self.hi
+        tops = {c: _lookup(self.by_cpt, self.lengths, c, hi) for c in set(batch.cpt)}
+        values = getattr(batch, self.spec["column"])
+        for k, (v, cpt) in enumerate(zip(values, batch.cpt)):
+            top = tops[cpt]
+            if v < lo or v > top:
+                yield batch.line_claim[k], batch.line_no[k], self.message.format(value=v, min=lo, max=top, cpt=cpt)
+
+
+class _Pairing(Rule):
+    def __init__(self, spec):
+        super().__init__(spec)
+        pairs = {_code(cpt): tuple(_code(p) for p in allowed) for cpt, allowed in spec["pairs"].items()}
+        self.pairs, self.lengths = _by_prefix(pairs)
+
+    def evaluate(self, batch, ctx):
+        allowed_by = {c: _lookup(self.pairs, self.lengths, c) for c in set(batch.cpt)}
+        if not any(allowed_by.values()):
+            return
+        diag, line_claim = batch.diag, batch.line_claim
+        for k, cpt in enumerate(batch.cpt):
+            allowed = allowed_by[cpt]
+            if allowed is None:
+                continue
+            codes = diag[line_claim[k]]
+            if not any(code.startswith(allowed) for code in codes):
+                yield batch.line_claim[k], batch.line_no[k], self.message.format(cpt=cpt)
+
+
+class _Duplicate(Rule):
+    def evaluate(self, batch, ctx):
+        seen: Dict[Any, int] = dict(ctx.get("existing") or {})
+        for i in range(len(batch)):
+            key = batch.duplicate_key(i)
+            if key is None:
+                continue
+            other = seen.get(key)
+            if other is not None and other != batch.ids[i]:
+                yield i, None, self.message.format(value=other)
+            else:
+                seen.setdefault(key, batch.ids[i])
+
+
+_KINDS = {"required": _Required, "pattern": _Pattern, "range": _Range, "pairing": _Pairing, "duplicate": _Duplicate}
+
+
+def compile_rules(specs: Sequence[Mapping[str, Any]]) -> List[Rule]:
+    rules = []
+    for spec in specs:
+        if spec.get("enabled", True) is False:
+            continue
+        kind = _KINDS.get(spec.get("kind"))
+        if kind is None:
+            raise ValueError(f"unknown scrubber rule kind {spec.get('kind')!r} ({spec.get('id')})")
+        rules.append(kind(spec))
+    return rules
+
+
+class ScrubReport(NamedTuple):
+    edits: List[Edit]
+    timings: Dict[str, float]  # rule id -> seconds for the batch
+
+    def for_claim(self, claim_id: int) -> List[Edit]:
+        return [e for e in self.edits if e.claim_id == claim_id]
+
+    @property
+    def blocked(self) -> Set[int]:
+        return {e.claim_id for e in self.edits if e.severity == "error"}
+
+
+class Scrubber:
+    def __init__(self, specs: Sequence[Mapping[str, Any]] = DEFAULT_RULES) -> None:
+        self.rules = compile_rules(specs)
+
+    def scrub(self, rows: Iterable[Mapping[str, Any]], existing: Optional[Mapping[Any, int]] = None) -> ScrubReport:
+        """`existing`: duplicate_key -> claim id of already submitted claims (see load_existing)."""
+        batch = rows if isinstance(rows, ClaimBatch) else ClaimBatch(rows)
+        ctx = {"existing": existing or {}}
+        edits: List[Edit] = []
+        timings: Dict[str, float] = {}
+        for rule in self.rules:
+            t0 = time.perf_counter()
+            found = [Edit(batch.ids[i], rule.id, rule.severity, msg, line)
+                     for i, line, msg in rule.evaluate(batch, ctx)]
+            timings[rule.id] = elapsed = time.perf_counter() - t0
+            SCRUB_RULE_SECONDS.labels(rule.id).observe(elapsed)
+            if found:
+                SCRUB_EDITS.labels(rule.id, rule.severity).inc(len(found))
+                edits.extend(found)
+
+        report = ScrubReport(edits, timings)
+        blocked, flagged = report.blocked, {e.claim_id for e in edits}
+        for outcome, n in (("blocked", len(blocked)), ("warning", len(flagged - blocked)),
+                           ("clean", len(batch) - len(flagged))):
+            if n:
+                SCRUB_CLAIMS.labels(outcome).inc(n)
+        return report
+
+
+def load_existing(db, batch: ClaimBatch) -> Dict[Any, int]:
+    """Duplicate keys of submitted/paid claims for the batch's patients, in one query."""
+    pids = sorted({p for p in batch.patient_ids if p is not None})
+    if not pids:
+        return {}
+    rows = db.execute(
+        text(
+            """
+            SELECT id, patient_id, payload_json, created_at
+              FROM claims
+             WHERE patient_id = ANY(:pids) AND status = ANY(:st) AND id <> ALL(:ids)
+            """
+        ),
+        {"pids": pids, "st": list(DUPLICATE_OF_STATUSES), "ids": batch.ids},
+    ).mappings()
+    prior = ClaimBatch(rows)
+    out: Dict[Any, int] = {}
+    for i, cid in enumerate(prior.ids):
+        key = prior.duplicate_key(i)
+        if key is not None:
+            out.setdefault(key, cid)
+    return out
+
+
+def edits_json(edits: Iterable[Edit]) -> List[Dict[str, Any]]:
+    return [e._asdict() for e in edits]
+
+
+def _load_specs() -> Sequence[Mapping[str, Any]]:
+    path = settings.claim_scrub_rules_path
+    if not path:
+        return DEFAULT_RULES
+    with open(path, "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+_scrubber: Optional[Scrubber] = None
+
+
+def get_scrubber() -> Scrubber:
+    """Process-wide scrubber; rules are compiled on first use."""
+    global _scrubber
+    if _scrubber is None:
+        _scrubber = Scrubber(_load_specs())
+    return _scrubber
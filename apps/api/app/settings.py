@@ -16,10 +16,58 @@ class Settings(BaseSettings):
     s3_secret_key: str = Field(default="minio12345", alias="S3_SECRET_KEY")
     s3_bucket: str = Field(default="docs", alias="S3_BUCKET")
     s3_bucket_docs: str = "docs"
+    # Object storage backend: "s3" (S3/MinIO) or "local" (filesystem under storage_root)
+    storage_backend: str = Field(default="s3", alias="STORAGE_BACKEND")
+    storage_root: str = Field(default="/data/storage", alias="STORAGE_ROOT")
     signature_adapter_base: str = "http://signature-adapter:9000"
     signature_webhook_secret: str = "dev-signature-secret"  # HMAC secret for webhook
     billing_adapter_base: str = Field(default="http://billing-adapter:9200", alias="BILLING_ADAPTER_BASE")
 
+    # X12 837 batches (app/x12, tasks/claims.submit_batch)
+    x12_sender_id: str = Field(default="SENDER", alias="X12_SENDER_ID")
+    x12_receiver_id: str = Field(default="PAYERID", alias="X12_RECEIVER_ID")
+    x12_usage: str = Field(default="T", alias="X12_USAGE")  # T=test, P=production
+    x12_submitter_name: str = Field(default="HEALTHCARE APP", alias="X12_SUBMITTER_NAME")
+    x12_submitter_phone: str = Field(default="5555550100", alias="X12_SUBMITTER_PHONE")
+    x12_payer_name: str = Field(default="DEMO PAYER", alias="X12_PAYER_NAME")
+    x12_billing_name: str = Field(default="MAIN CLINIC", alias="X12_BILLING_NAME")
+    x12_billing_npi: str = Field(default="1234567893", alias="X12_BILLING_NPI")
+    x12_billing_tax_id: str = Field(default="123456789", alias="X12_BILLING_TAX_ID")
+    x12_billing_street: str = Field(default="1 MAIN ST", alias="X12_BILLING_STREET")
+    x12_billing_city: str = Field(default="SPRINGFIELD", alias="X12_BILLING_CITY")
+    x12_billing_state: str = Field(default="IL", alias="X12_BILLING_STATE")
+    x12_billing_zip: str = Field(default="627010001", alias="X12_BILLING_ZIP")
+    claims_batch_size: int = Field(default=1000, alias="CLAIMS_BATCH_SIZE")
+    claims_per_interchange: int = Field(default=100, alias="CLAIMS_PER_INTERCHANGE")
+    claims_submit_parallelism: int = Field(default=4, alias="CLAIMS_SUBMIT_PARALLELISM")
+    claim_scrub_rules_path: str = Field(default="", alias="CLAIM_SCRUB_RULES_PATH")  # JSON list; empty = app/scrubber.DEFAULT_RULES
+
+    # LLM governor (app/utils/llm_governor.py): shared by every scribe draft call
+    llm_max_concurrency: int = Field(default=4, alias="LLM_MAX_CONCURRENCY")
+    llm_queue_timeout_seconds: float = Field(default=2.0, alias="LLM_QUEUE_TIMEOUT_SECONDS")
+    llm_call_timeout_seconds: float = Field(default=20.0, alias="LLM_CALL_TIMEOUT_SECONDS")
+    llm_breaker_slow_seconds: float = Field(default=8.0, alias="LLM_BREAKER_SLOW_SECONDS")
+    llm_breaker_failures: int = Field(default=3, alias="LLM_BREAKER_FAILURES")
+    llm_breaker_cooldown_seconds: float = Field(default=30.0, alias="LLM_BREAKER_COOLDOWN_SECONDS")
+    scribe_draft_cache_ttl_seconds: int = Field(default=24 * 3600, alias="SCRIBE_DRAFT_CACHE_TTL_SECONDS")
+
+    # Eligibility cache (app/utils/eligibility_cache.py): 271 results per member/payer/service date
+    eligibility_cache_ttl_seconds: int = Field(default=4 * 3600, alias="ELIGIBILITY_CACHE_TTL_SECONDS")
+    eligibility_cache_wait_seconds: float = Field(default=10.0, alias="ELIGIBILITY_CACHE_WAIT_SECONDS")
+    # nightly sweep of tomorrow's appointments (tasks/eligibility.sweep_upcoming)
+    eligibility_sweep_concurrency: int = Field(default=16, alias="ELIGIBILITY_SWEEP_CONCURRENCY")
+    eligibility_sweep_skip_hours: int = Field(default=12, alias="ELIGIBILITY_SWEEP_SKIP_HOURS")
+
+    # Analytics rollups (app/rollups.py): days re-aggregated on each refresh
+    analytics_rollup_lookback_days: int = Field(default=35, alias="ANALYTICS_ROLLUP_LOOKBACK_DAYS")
+    analytics_rollup_horizon_days: int = Field(default=400, alias="ANALYTICS_ROLLUP_HORIZON_DAYS")
+
+    # Schema cache (app/schema_cache.py): how often alembic_version is re-read
+    schema_cache_recheck_seconds: float = Field(default=60.0, alias="SCHEMA_CACHE_RECHECK_SECONDS")
+
+    # Streamed exports (app/utils/export_stream.py): rows per cursor fetch / encoded chunk
+    export_batch_rows: int = Field(default=5000, alias="EXPORT_BATCH_ROWS")
+
     otlp_endpoint: str = Field(default="", alias="OTEL_EXPORTER_OTLP_ENDPOINT")
     
     class Config: env_file = ".env"; extra = "ignore"
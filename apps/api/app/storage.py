@@ -1,35 +1,351 @@
 # apps/api/app/storage.py
+"""
+Object storage for documents, consents and compliance exports.
+
+Two interchangeable backends:
+- S3Storage    -> S3 / MinIO (default, matches docker-compose)
+- LocalStorage -> plain filesystem for on-prem clinics and CI
+
+Pick one with STORAGE_BACKEND=s3|local (LocalStorage writes under STORAGE_ROOT).
+Callers keep using put_pdf_and_sha(); readers go through storage_response(url)
+so stored objects are served without being copied through Python buffers.
+"""
+from __future__ import annotations
+
 import hashlib
-from typing import Tuple
-import boto3
-from botocore.client import Config
+import mimetypes
+import mmap
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
 from .settings import settings
 
-def _s3():
-    return boto3.client(
-        "s3",
-        endpoint_url=settings.s3_endpoint,
-        aws_access_key_id=settings.s3_access_key,
-        aws_secret_access_key=settings.s3_secret_key,
-        config=Config(signature_version="s3v4"),
-        region_name=settings.s3_region or "us-east-1",
-    )
+_CHUNK = 64 * 1024
+
+
+def _guess_type(key: str, default: str = "application/octet-stream") -> str:
+    return mimetypes.guess_type(key)[0] or default
+
+
+# ---------------------------------------------------------------------------
+# S3 / MinIO
+# ---------------------------------------------------------------------------
+class S3Storage:
+    scheme = "s3"
+
+    def __init__(self, bucket: str):
+        self.bucket = bucket
+        self._client = None
+        self._bucket_ready = False
+
+    def _s3(self):
+        if self._client is None:
+            import boto3
+            from botocore.client import Config
+
+            self._client = boto3.client(
+                "s3",
+                endpoint_url=settings.s3_endpoint,
+                aws_access_key_id=settings.s3_access_key,
+                aws_secret_access_key=settings.s3_secret_key,
+                config=Config(signature_version="s3v4"),
+                region_name=settings.s3_region or "us-east-1",
+            )
+        return self._client
+
+    def _ensure_bucket(self) -> None:
+        if self._bucket_ready:
+            return
+        # Create bucket if it doesn't exist (idempotent in MinIO)
+        try:
+            self._s3().create_bucket(Bucket=self.bucket)
+        except Exception:
+            pass
+        self._bucket_ready = True
+
+    def url_for(self, key: str) -> str:
+        return f"s3://{self.bucket}/{key}"
+
+    def put(self, key: str, data: bytes, content_type: Optional[str] = None) -> Tuple[str, str]:
+        sha256 = hashlib.sha256(data).hexdigest()
+        self._ensure_bucket()
+        self._s3().put_object(
+            Bucket=self.bucket,
+            Key=key,
+            Body=data,
+            ContentType=content_type or _guess_type(key),
+            Metadata={"sha256": sha256},
+        )
+        return self.url_for(key), sha256
+
+    def put_file(self, key: str, fileobj: BinaryIO, content_type: Optional[str] = None) -> Tuple[str, str]:
+        """Upload a seekable file without loading it: hash pass, then a managed (multipart) upload."""
+        digest = hashlib.sha256()
+        fileobj.seek(0)
+        for chunk in iter(lambda: fileobj.read(_CHUNK), b""):
+            digest.update(chunk)
+        fileobj.seek(0)
+        self._ensure_bucket()
+        self._s3().upload_fileobj(
+            fileobj, self.bucket, key,
+            ExtraArgs={"ContentType": content_type or _guess_type(key), "Metadata": {"sha256": digest.hexdigest()}},
+        )
+        return self.url_for(key), digest.hexdigest()
+
+    def exists(self, key: str) -> bool:
+        try:
+            self._s3().head_object(Bucket=self.bucket, Key=key)
+            return True
+        except Exception:
+            return False
+
+    # Incremental writes (scribe audio). S3 has no append: each chunk is its own
+    # part object, and finalize() stitches them with a multipart upload, buffering
+    # at most one 5 MiB part in memory.
+    _MIN_PART = 5 * 1024 * 1024
+
+    def _part_key(self, key: str, seq: int) -> str:
+        return f"{key}.parts/{int(seq):08d}"
+
+    def append(self, key: str, data: bytes, seq: int) -> None:
+        self._ensure_bucket()
+        self._s3().put_object(Bucket=self.bucket, Key=self._part_key(key, seq), Body=data)
+
+    def finalize(self, key: str, content_type: Optional[str] = None) -> Tuple[str, str]:
+        s3 = self._s3()
+        prefix = f"{key}.parts/"
+        part_keys = []
+        for page in s3.get_paginator("list_objects_v2").paginate(Bucket=self.bucket, Prefix=prefix):
+            part_keys.extend(o["Key"] for o in page.get("Contents", []))
+        part_keys.sort()
+
+        digest = hashlib.sha256()
+        mpu = s3.create_multipart_upload(Bucket=self.bucket, Key=key, ContentType=content_type or _guess_type(key))
+        parts, buf = [], bytearray()
+
+        def _flush() -> None:
+            n = len(parts) + 1
+            r = s3.upload_part(Bucket=self.bucket, Key=key, UploadId=mpu["UploadId"], PartNumber=n, Body=bytes(buf))
+            parts.append({"ETag": r["ETag"], "PartNumber": n})
+            buf.clear()
+
+        try:
+            for pk in part_keys:
+                chunk = s3.get_object(Bucket=self.bucket, Key=pk)["Body"].read()
+                digest.update(chunk)
+                buf.extend(chunk)
+                if len(buf) >= self._MIN_PART:
+                    _flush()
+            if buf or not parts:
+                _flush()
+            s3.complete_multipart_upload(Bucket=self.bucket, Key=key, UploadId=mpu["UploadId"],
+                                         MultipartUpload={"Parts": parts})
+        except BaseException:
+            s3.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=mpu["UploadId"])
+            raise
+        for i in range(0, len(part_keys), 1000):
+            s3.delete_objects(Bucket=self.bucket, Delete={"Objects": [{"Key": k} for k in part_keys[i:i + 1000]]})
+        return self.url_for(key), digest.hexdigest()
+
+    def open_read(self, key: str) -> BinaryIO:
+        """Streaming reader (botocore StreamingBody: read(n) / close())."""
+        return self._s3().get_object(Bucket=self.bucket, Key=key)["Body"]
+
+    def response(self, key: str, media_type: Optional[str] = None, filename: Optional[str] = None) -> Response:
+        from botocore.exceptions import ClientError
+
+        try:
+            obj = self._s3().get_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+                from fastapi import HTTPException
+                raise HTTPException(404, "Object not found")  # same as LocalStorage
+            raise
+        headers = {"Content-Length": str(obj["ContentLength"])}
+        if filename:
+            headers["Content-Disposition"] = f'inline; filename="{filename}"'
+        return StreamingResponse(
+            obj["Body"].iter_chunks(_CHUNK),
+            media_type=media_type or obj.get("ContentType") or _guess_type(key),
+            headers=headers,
+        )
+
+
+# ---------------------------------------------------------------------------
+# Local filesystem
+# ---------------------------------------------------------------------------
+class LocalStorage:
+    """
+    Layout: <root>/<h[0:2]>/<h[2:4]>/<h>, where h = sha256(key).
+    - Sharding keeps directories small no matter how many objects we hold.
+    - Writes go to a temp file in the target directory, are fsync'ed, then
+      os.replace()'d into place, so readers never observe a partial object.
+    - Reads are served via FileResponse (sendfile-capable servers skip the
+      Python copy) or mmap() for in-process consumers.
+    """
+
+    scheme = "local"
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+
+    def path_for(self, key: str) -> str:
+        h = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.root, h[0:2], h[2:4], h)
+
+    def url_for(self, key: str) -> str:
+        return f"local://{key}"
+
+    def put(self, key: str, data: bytes, content_type: Optional[str] = None) -> Tuple[str, str]:
+        sha256 = hashlib.sha256(data).hexdigest()
+        path = self.path_for(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except FileNotFoundError:
+                pass
+            raise
+        return self.url_for(key), sha256
+
+    def put_file(self, key: str, fileobj: BinaryIO, content_type: Optional[str] = None) -> Tuple[str, str]:
+        """Copy a file into place in _CHUNK pieces (same temp + fsync + replace as put())."""
+        digest = hashlib.sha256()
+        path = self.path_for(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        fileobj.seek(0)
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in iter(lambda: fileobj.read(_CHUNK), b""):
+                    digest.update(chunk)
+                    f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except FileNotFoundError:
+                pass
+            raise
+        return self.url_for(key), digest.hexdigest()
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self.path_for(key))
+
+    def append(self, key: str, data: bytes, seq: int) -> None:
+        """
+        Incremental write for streamed uploads: seq 0 starts the object, later chunks
+        are appended in place (callers enforce ordering). Unlike put(), readers may see
+        a partially written object until finalize().
+        """
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb" if int(seq) == 0 else "ab") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def finalize(self, key: str, content_type: Optional[str] = None) -> Tuple[str, str]:
+        return self.url_for(key), self.sha256(key)
+
+    @contextmanager
+    def mmap(self, key: str) -> Iterator[mmap.mmap | bytes]:
+        """Read-only memory map of the object (empty objects yield b'')."""
+        path = self.path_for(key)
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                yield b""
+                return
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                yield mm
+            finally:
+                mm.close()
+
+    def open_read(self, key: str) -> BinaryIO:
+        return open(self.path_for(key), "rb")
+
+    def sha256(self, key: str) -> str:
+        with self.mmap(key) as mm:
+            return hashlib.sha256(mm).hexdigest()
+
+    def response(self, key: str, media_type: Optional[str] = None, filename: Optional[str] = None) -> Response:
+        path = self.path_for(key)
+        if not os.path.isfile(path):
+            from fastapi import HTTPException
+            raise HTTPException(404, "Object not found")
+        return FileResponse(
+            path,
+            media_type=media_type or _guess_type(key),
+            filename=filename,
+            content_disposition_type="inline",
+        )
+
+
+# ---------------------------------------------------------------------------
+# Backend selection + module-level helpers (the API the rest of the app uses)
+# ---------------------------------------------------------------------------
+_backend: S3Storage | LocalStorage | None = None
+
+
+def get_storage() -> S3Storage | LocalStorage:
+    global _backend
+    if _backend is None:
+        if (settings.storage_backend or "s3").lower() == "local":
+            _backend = LocalStorage(settings.storage_root)
+        else:
+            _backend = S3Storage(settings.s3_bucket)
+    return _backend
+
+
+def split_url(url: str) -> Optional[Tuple[str, str]]:
+    """'s3://bucket/key' -> ('s3', 'key'); 'local://key' -> ('local', 'key'); else None."""
+    if url.startswith("local://"):
+        return "local", url[len("local://"):]
+    if url.startswith("s3://"):
+        rest = url[len("s3://"):]
+        _, _, key = rest.partition("/")
+        return "s3", key
+    return None
+
 
 def put_pdf_and_sha(key: str, pdf_bytes: bytes) -> Tuple[str, str]:
-    """Uploads bytes to the configured bucket and returns (s3_url, sha256_hex)."""
-    sha256 = hashlib.sha256(pdf_bytes).hexdigest()
-    s3 = _s3()
-    # Create bucket if it doesn't exist (idempotent in MinIO)
-    try:
-        s3.create_bucket(Bucket=settings.s3_bucket)
-    except Exception:
-        pass
-
-    s3.put_object(
-        Bucket=settings.s3_bucket,
-        Key=key,
-        Body=pdf_bytes,
-        ContentType="application/pdf",
-        Metadata={"sha256": sha256},
-    )
-    return f"s3://{settings.s3_bucket}/{key}", sha256
+    """Stores bytes with the configured backend and returns (url, sha256_hex)."""
+    return get_storage().put(key, pdf_bytes, content_type="application/pdf")
+
+
+def storage_response(url: str, media_type: Optional[str] = None, filename: Optional[str] = None) -> Response:
+    """
+    Serve a stored object by URL. Objects written by either backend stay
+    readable after switching STORAGE_BACKEND, as long as that backend is reachable.
+    """
+    parsed = split_url(url)
+    if not parsed:
+        from fastapi import HTTPException
+        raise HTTPException(404, "Unsupported storage URL")
+    scheme, key = parsed
+    backend = get_storage()
+    if scheme == "local" and not isinstance(backend, LocalStorage):
+        backend = LocalStorage(settings.storage_root)
+    elif scheme == "s3":
+        bucket = url[len("s3://"):].split("/", 1)[0]
+        if not isinstance(backend, S3Storage) or backend.bucket != bucket:
+            backend = S3Storage(bucket)
+    return backend.response(key, media_type=media_type, filename=filename)
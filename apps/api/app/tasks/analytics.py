@@ -5,6 +5,7 @@ from sqlalchemy import text
 from sqlalchemy.orm import sessionmaker
 from app.db import engine  # your db.py exposes "engine" for SessionLocal/engine
 from app.models import Experiment, ExperimentAssignment
+from app import rollups
 
 SessionLocal = sessionmaker(bind=engine)
 
@@ -39,7 +40,15 @@ def assign_variant(experiment_id: int, subject_id: int):
         session.close()
 
 @shared_task(name="analytics.nightly_rollups")
-def nightly_rollups():
-    """Placeholder: run nightly aggregations for dashboards if needed."""
-    # If you add materialized views later, refresh them here.
-    return {"ok": True}
+def nightly_rollups(full: bool = False, lookback_days: int = None, horizon_days: int = None):
+    """Re-aggregate appt_daily / elig_daily for recent days (everything on first run or full=True)."""
+    session = SessionLocal()
+    try:
+        out = rollups.refresh(session, full=full, lookback_days=lookback_days, horizon_days=horizon_days)
+        session.commit()
+        return {"ok": True, **out}
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
@@ -1,42 +1,25 @@
 # apps/api/app/tasks/claims.py
 from __future__ import annotations
 
-import json, logging, datetime as dt, httpx
-from typing import Dict, Any, Optional
+import json, logging, time, datetime as dt, httpx
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
 
 from sqlalchemy import text
 from app.db import SessionLocal
 from app.celery_app import celery_app
 from app.settings import settings
+from app.x12 import Claim837, claim_from_row, next_control_number, spool_interchange
+from app.x12.remit import IterReader, parse_835_items, staging_csv
+from app.scrubber import ClaimBatch, edits_json, get_scrubber, load_existing
 
 log = logging.getLogger(__name__)
 
-CREATE_CLAIMS_SQL = """
-CREATE TABLE IF NOT EXISTS claims (
-  id SERIAL PRIMARY KEY,
-  encounter_id TEXT NOT NULL,
-  appointment_id INT NULL,
-  patient_id INT NULL,
-  status TEXT NOT NULL DEFAULT 'NEW',
-  payer_ref TEXT NULL,
-  total_cents INT NULL,
-  payload_json JSON NOT NULL DEFAULT '{}'::json,
-  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
-  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
-);
-"""
-
-def _ensure(db):
-    db.execute(text(CREATE_CLAIMS_SQL))
-    db.commit()
-
 # ---- tiny assembler used by workflows (encounter -> JSON "837") --------------
 @celery_app.task(name="claims.assemble")
 def assemble(encounter_id: str, appointment_id: Optional[int] = None, patient_id: Optional[int] = None) -> Dict[str, Any]:
     db = SessionLocal()
     try:
-        _ensure(db)
-
         if patient_id is None and appointment_id is not None:
             row = db.execute(
                 text("SELECT patient_id FROM appointments WHERE id=:id"),
@@ -89,14 +72,26 @@ def submit(claim_id: int) -> Dict[str, Any]:
     """
     POSTs the stored JSON payload to the billing-adapter mock.
     Sets status=SUBMITTED or REJECTED and saves payer_ref if returned.
+    Claims failing the scrubber are REJECTED without an adapter call.
     """
     db = SessionLocal()
     try:
-        _ensure(db)
-        row = db.execute(text("SELECT id, payload_json FROM claims WHERE id=:id"), {"id": claim_id}).mappings().first()
+        row = db.execute(
+            text("SELECT id, patient_id, payload_json, created_at FROM claims WHERE id=:id"), {"id": claim_id}
+        ).mappings().first()
         if not row:
             return {"error": "not_found", "id": claim_id}
 
+        batch = ClaimBatch([row])
+        scrub = get_scrubber().scrub(batch, load_existing(db, batch))
+        if scrub.blocked:
+            db.execute(
+                text("UPDATE claims SET status='REJECTED', clearinghouse_resp=CAST(:resp AS JSON), updated_at=NOW() WHERE id=:id"),
+                {"id": claim_id, "resp": json.dumps({"scrub": edits_json(scrub.edits)})},
+            )
+            db.commit()
+            return {"id": claim_id, "status": "REJECTED", "error": "scrub_failed", "edits": edits_json(scrub.edits)}
+
         payload = row["payload_json"]
         adapter = getattr(settings, "billing_base", None) or "http://billing-adapter:9400"
 
@@ -126,6 +121,135 @@ def submit(claim_id: int) -> Dict[str, Any]:
     finally:
         db.close()
 
+# ---- batch submit: many claims per 837 interchange ----------------------------
+def _post_interchange(adapter: str, control: int, claims: List[Claim837]) -> Dict[int, Tuple[str, Optional[str], Dict[str, Any]]]:
+    """
+    One adapter call for a whole interchange -> {claim_id: (status, payer_ref, resp)}.
+    The interchange is spooled to a temp file and archived to storage (x12/837/<control>.x12)
+    before it is posted; an archive failure is logged but does not hold the submission.
+    """
+    ids = [c.claim_id for c in claims]
+    key, archive = f"x12/837/{control:09d}.x12", None
+    with spool_interchange(claims, control) as (raw, _):
+        try:
+            from app.storage import get_storage
+            url, sha = get_storage().put_file(key, raw, "application/edi-x12")
+            archive = {"url": url, "sha256": sha}
+        except Exception as e:
+            log.warning("Could not archive interchange %s to %s: %s", control, key, e)
+        raw.seek(0)
+        edi = raw.read().decode("ascii")
+    try:
+        with httpx.Client(timeout=30) as c:
+            r = c.post(f"{adapter}/claims/batch", json={"interchange_control": control, "edi837": edi, "claim_ids": ids})
+            r.raise_for_status()
+            data = r.json()
+    except Exception as e:
+        log.warning("Billing adapter failed for interchange %s (%s claims): %s", control, len(ids), e)
+        return {cid: ("REJECTED", None, {"error": "adapter_unavailable", "interchange": control, "archive": archive})
+                for cid in ids}
+
+    by_id = {int(x["claim_id"]): x for x in data.get("results", []) if "claim_id" in x}
+    out = {}
+    for cid in ids:
+        res = dict(by_id.get(cid) or {"accepted": False, "error": "missing_from_response"})
+        res["interchange"] = control
+        res["archive"] = archive
+        out[cid] = ("SUBMITTED" if res.get("accepted") else "REJECTED", res.get("payer_ref"), res)
+    return out
+
+
+@celery_app.task(name="claims.submit_batch")
+def submit_batch(limit: Optional[int] = None, per_interchange: Optional[int] = None,
+                 parallelism: Optional[int] = None) -> Dict[str, Any]:
+    """
+    End-of-day submission: lock up to `limit` NEW/RESUBMIT claims (SKIP LOCKED, so
+    concurrent runs split the work), pack them into interchanges of
+    `per_interchange` claims, post those with at most `parallelism` requests in
+    flight, then write every outcome back with one UPDATE. The whole batch is
+    scrubbed first (app/scrubber.py); claims with errors are REJECTED with their
+    edits instead of being sent.
+    Row locks are held until that UPDATE commits; a crash just releases them.
+    """
+    limit = int(limit or settings.claims_batch_size)
+    per_interchange = max(1, int(per_interchange or settings.claims_per_interchange))
+    parallelism = max(1, int(parallelism or settings.claims_submit_parallelism))
+    adapter = settings.billing_adapter_base
+
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            text(
+                """
+                SELECT c.id, c.patient_id, c.payload_json, c.created_at, p.first_name, p.last_name, p.mrn
+                  FROM claims c
+                  LEFT JOIN patients p ON p.id = c.patient_id
+                 WHERE c.status IN ('NEW','RESUBMIT')
+                 ORDER BY c.id
+                 LIMIT :n
+                 FOR UPDATE OF c SKIP LOCKED
+                """
+            ),
+            {"n": limit},
+        ).mappings().all()
+        if not rows:
+            db.rollback()
+            return {"claimed": 0, "submitted": 0, "rejected": 0, "interchanges": 0}
+
+        claim_batch = ClaimBatch(rows)
+        scrub = get_scrubber().scrub(claim_batch, load_existing(db, claim_batch))
+        blocked = scrub.blocked
+        results: Dict[int, Tuple[str, Optional[str], Dict[str, Any]]] = {
+            cid: ("REJECTED", None, {"scrub": edits_json(scrub.for_claim(cid))}) for cid in blocked
+        }
+        clean = [r for r in rows if int(r["id"]) not in blocked]
+
+        batches = [
+            (next_control_number(db), [claim_from_row(r) for r in clean[i:i + per_interchange]])
+            for i in range(0, len(clean), per_interchange)
+        ]
+        if batches:
+            with ThreadPoolExecutor(max_workers=min(parallelism, len(batches))) as pool:
+                for out in pool.map(lambda b: _post_interchange(adapter, b[0], b[1]), batches):
+                    results.update(out)
+
+        ids = list(results)
+        db.execute(
+            text(
+                """
+                UPDATE claims c
+                   SET status = u.status,
+                       payer_ref = COALESCE(u.ref, c.payer_ref),
+                       clearinghouse_resp = CAST(u.resp AS JSON),
+                       last_submit_at = NOW(),
+                       updated_at = NOW()
+                  FROM unnest(CAST(:ids AS INT[]), CAST(:statuses AS TEXT[]),
+                              CAST(:refs AS TEXT[]), CAST(:resps AS TEXT[])) AS u(id, status, ref, resp)
+                 WHERE c.id = u.id
+                """
+            ),
+            {
+                "ids": ids,
+                "statuses": [results[i][0] for i in ids],
+                "refs": [results[i][1] for i in ids],
+                "resps": [json.dumps(results[i][2]) for i in ids],
+            },
+        )
+        db.commit()
+    finally:
+        db.close()
+
+    submitted = sum(1 for st, _, _ in results.values() if st == "SUBMITTED")
+    # a full batch means there is probably more waiting
+    if len(rows) >= limit:
+        try:
+            submit_batch.delay(limit, per_interchange, parallelism)
+        except Exception:
+            pass
+    return {"claimed": len(rows), "submitted": submitted, "rejected": len(rows) - submitted,
+            "scrub_rejected": len(blocked), "interchanges": len(batches),
+            "scrub_ms": {k: round(v * 1000, 3) for k, v in scrub.timings.items()}}
+
 # ---- ingest a (mock) 835 remit ----------------------------------------------
 @celery_app.task(name="remits.ingest_835")
 def ingest_835(remit: Dict[str, Any]) -> Dict[str, Any]:
@@ -135,7 +259,6 @@ def ingest_835(remit: Dict[str, Any]) -> Dict[str, Any]:
     """
     db = SessionLocal()
     try:
-        _ensure(db)
         cid = int(remit["claim_id"])
         paid = int(remit.get("paid_cents") or 0)
         denial = remit.get("denial_code")
@@ -167,3 +290,141 @@ def ingest_835(remit: Dict[str, Any]) -> Dict[str, Any]:
         return {"id": cid, "status": "DENIED", "denial_code": denial or "CO-97"}
     finally:
         db.close()
+
+
+# ---- 835 files: stream -> COPY into a temp table -> set-based transitions -----
+_STAGE_DDL = """
+    CREATE TEMP TABLE remit_stage (
+        n                  INT,
+        claim_id           INT,
+        status_code        TEXT,
+        charge_cents       BIGINT,
+        paid_cents         BIGINT,
+        patient_resp_cents BIGINT,
+        payer_claim_ref    TEXT,
+        denial_code        TEXT,
+        new_status         TEXT
+    ) ON COMMIT DROP
+"""
+
+# latest CLP per claim wins (a reversal + re-adjudication can share one file);
+# new_status comes from app.x12.remit.claim_status (staged with the line);
+# one statement updates claims, opens correction tasks and returns the counts
+_APPLY_SQL = """
+    WITH latest AS (
+        SELECT DISTINCT ON (claim_id) *
+          FROM remit_stage
+         ORDER BY claim_id, n DESC
+    ),
+    upd AS (
+        UPDATE claims c
+           SET status = l.new_status,
+               paid_cents = CASE WHEN l.new_status = 'SUBMITTED' THEN 0 ELSE l.paid_cents END,
+               denial_code = CASE WHEN l.new_status = 'DENIED' THEN COALESCE(l.denial_code, 'CO-97') END,
+               updated_at = NOW()
+          FROM latest l
+         WHERE c.id = l.claim_id
+     RETURNING c.id, c.status, c.denial_code
+    ),
+    ins AS (
+        INSERT INTO tasks(type, status, payload_json, created_at)
+        SELECT 'claim_correction', 'OPEN',
+               jsonb_build_object('claim_id', u.id, 'denial_code', u.denial_code, 'remit', CAST(:src AS TEXT))::json,
+               NOW()
+          FROM upd u
+         WHERE u.status = 'DENIED'
+           AND NOT EXISTS (
+                SELECT 1 FROM tasks t
+                 WHERE t.type = 'claim_correction' AND t.status = 'OPEN'
+                   AND t.payload_json->>'claim_id' = u.id::text)
+     RETURNING 1
+    )
+    SELECT (SELECT COUNT(*) FROM latest)                        AS claims,
+           (SELECT COUNT(*) FROM upd)                           AS matched,
+           (SELECT COUNT(*) FROM upd WHERE status = 'PAID')     AS paid,
+           (SELECT COUNT(*) FROM upd WHERE status = 'DENIED')   AS denied,
+           (SELECT COUNT(*) FROM upd WHERE status = 'SUBMITTED') AS reversed,
+           (SELECT COUNT(*) FROM ins)                           AS correction_tasks
+"""
+
+
+def ingest_835_stream(db, fp, source: str) -> Dict[str, Any]:
+    """
+    Apply one 835 file inside the caller's transaction (caller commits).
+    Parsing, reconciliation (app/reconcile.py), CSV encoding and COPY are one
+    pipeline, so memory stays flat however many CLP loops the file has; only
+    the claim index and unmatched lines are held.
+    """
+    from app.reconcile import ClaimIndex, Reconciler, write_worklist
+
+    t0 = time.perf_counter()
+    recon = Reconciler(ClaimIndex.load(db))
+    indexed_at = time.perf_counter()
+
+    db.execute(text(_STAGE_DDL))
+    cur = db.connection().connection.cursor()
+    try:
+        lines = recon.resolve(parse_835_items(fp))
+        cur.copy_expert("COPY remit_stage FROM STDIN WITH (FORMAT csv)", IterReader(staging_csv(lines)))
+        staged = cur.rowcount
+    finally:
+        cur.close()
+    db.execute(text("ANALYZE remit_stage"))
+    staged_at = time.perf_counter()
+
+    counts = dict(db.execute(text(_APPLY_SQL), {"src": source}).mappings().one())
+    worklist = write_worklist(db, recon.unmatched, source)
+    elapsed = time.perf_counter() - t0
+    total = staged + len(recon.unmatched)
+    return {
+        "lines": total,
+        **{k: int(v) for k, v in counts.items()},
+        "unmatched": worklist,
+        "match_methods": dict(recon.methods),
+        "index_claims": len(recon.index),
+        "index_seconds": round(indexed_at - t0, 3),
+        "stage_seconds": round(staged_at - indexed_at, 3),
+        "seconds": round(elapsed, 3),
+        "lines_per_second": round(total / elapsed) if elapsed > 0 else None,
+    }
+
+
+@celery_app.task(name="remits.ingest_835_file")
+def ingest_835_file(url: str, sha256: str) -> Dict[str, Any]:
+    """
+    Ingest a stored 835 file. remit_files.sha256 is claimed first, so the same
+    file delivered twice is applied once; claims, tasks and the remit_files row
+    commit together.
+    """
+    from app.storage import get_storage, split_url
+
+    parsed = split_url(url)
+    if not parsed:
+        return {"error": "unsupported_url", "url": url}
+    db = SessionLocal()
+    try:
+        fid = db.execute(
+            text("INSERT INTO remit_files (sha256, url) VALUES (:sha, :url) ON CONFLICT (sha256) DO NOTHING RETURNING id"),
+            {"sha": sha256, "url": url},
+        ).scalar()
+        if fid is None:
+            db.rollback()
+            return {"duplicate": True, "sha256": sha256}
+
+        fp = get_storage().open_read(parsed[1])
+        try:
+            stats = ingest_835_stream(db, fp, url)
+        finally:
+            fp.close()
+        db.execute(
+            text("UPDATE remit_files SET stats = CAST(:s AS jsonb) WHERE id = :id"),
+            {"s": json.dumps(stats), "id": fid},
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    log.info("835 %s: %s", url, stats)
+    return {"file_id": fid, **stats}
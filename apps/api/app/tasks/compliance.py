@@ -11,8 +11,10 @@ Matches repo DB patterns:
 from __future__ import annotations
 
 from contextlib import contextmanager
+import json
+import tempfile
 from io import BytesIO
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterator, List, Optional
 
 from celery import shared_task
 from reportlab.lib.pagesizes import LETTER
@@ -21,7 +23,8 @@ from sqlalchemy import text, bindparam
 import sqlalchemy as sa
 
 from app.db import SessionLocal  # <- matches your repo
-from app.storage import put_pdf_and_sha  # same helper used elsewhere
+from app.redaction import Redactor, patient_identifiers
+from app.storage import get_storage, put_pdf_and_sha  # same helper used elsewhere
 # If you don't have storage wired yet, you can stub put_pdf_and_sha to return ("memory://pia.pdf", "sha")
 
 
@@ -85,7 +88,7 @@ def _set_request_status(db, req_id: int, status: str, extra_meta: Optional[Dict[
                 """
                 UPDATE compliance_requests
                 SET status = :status,
-                    meta   = COALESCE(meta::jsonb, '{}'::jsonb) || :extra::jsonb
+                    meta   = COALESCE(meta::jsonb, '{}'::jsonb) || CAST(:extra AS jsonb)
                 WHERE id = :id
                 """
             ).bindparams(bindparam("extra", type_=sa.JSON)),
@@ -106,6 +109,46 @@ def _get_request(db, req_id: int) -> Optional[Dict[str, Any]]:
     return dict(row) if row else None
 
 
+# ----------------------------
+# De-identified export (scribe notes)
+# ----------------------------
+EXPORT_BATCH = 500
+EXPORT_SPOOL_BYTES = 8 * 1024 * 1024  # JSONL stays in memory up to this, then spills to disk
+
+
+def _deidentified_notes(db, patient_id: int) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Keyset-paginated scribe drafts, redacted a batch at a time: one Redactor per batch
+    (identifiers of that batch's patients) and one redact_batch() pass over all drafts.
+    """
+    after = 0
+    while True:
+        rows = db.execute(
+            text(
+                """
+                SELECT s.id, s.status, a.patient_id, s.meta->>'draft' AS draft
+                  FROM scribe_sessions s
+                  LEFT JOIN appointments a ON a.id = s.appointment_id
+                 WHERE s.id > :after
+                   AND a.patient_id = :pid
+                   AND s.meta->>'draft' IS NOT NULL
+                 ORDER BY s.id
+                 LIMIT :n
+                """
+            ),
+            {"after": after, "pid": patient_id, "n": EXPORT_BATCH},
+        ).mappings().all()
+        if not rows:
+            return
+        redactor = Redactor(patient_identifiers(db, (r["patient_id"] for r in rows)))
+        redacted = redactor.redact_batch([r["draft"] for r in rows])
+        yield [
+            {"session_id": r["id"], "status": r["status"], "note": red.text, "phi_counts": red.counts}
+            for r, red in zip(rows, redacted)
+        ]
+        after = rows[-1]["id"]
+
+
 # ----------------------------
 # Tasks
 # ----------------------------
@@ -147,7 +190,11 @@ def pia_pack_generate(request_id: int) -> Dict[str, Any]:
 @shared_task(name="compliance.export_request")
 def export_request(request_id: int) -> Dict[str, Any]:
     """
-    Assemble export package (simple JSON stub here) and mark DONE with result_url.
+    Assemble one patient's export: de-identified scribe notes as JSON Lines
+    (meta.deidentified_url) plus a summary PDF (meta.result_url) with record and
+    redaction counts. Notes are written batch by batch to a spooled temp file and
+    uploaded with put_file, so memory stays flat however many notes there are.
+    A request without a patient_id is refused (status ERROR) rather than exporting everyone.
     """
     with session_scope() as db:
         req = _get_request(db, request_id)
@@ -155,10 +202,31 @@ def export_request(request_id: int) -> Dict[str, Any]:
             return {"ok": False, "error": "request_not_found", "request_id": request_id}
 
         meta = req.get("meta") or {}
+        if meta.get("patient_id") is None:
+            _set_request_status(db, request_id, status="ERROR", extra_meta={"error": "patient_id_required"})
+            return {"ok": False, "error": "patient_id_required", "request_id": request_id}
+
+        records = 0
+        totals: Dict[str, int] = {}
+        with tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_BYTES) as spool:
+            for batch in _deidentified_notes(db, int(meta["patient_id"])):
+                for rec in batch:
+                    for label, n in rec["phi_counts"].items():
+                        totals[label] = totals.get(label, 0) + n
+                    if records:
+                        spool.write(b"\n")
+                    spool.write(json.dumps(rec, separators=(",", ":")).encode("utf-8"))
+                    records += 1
+            data_url, data_sha = get_storage().put_file(
+                f"compliance/export/{request_id}.jsonl", spool, "application/x-ndjson"
+            )
+
         export_note = {
             "request_id": request_id,
             "scope": meta.get("scope", "patient_all_data"),
-            "redactions": meta.get("redactions", ["secrets", "internal_keys"]),
+            "records": records,
+            "redactions": totals or "none found",
+            "deidentified_sha256": data_sha,
         }
 
         pdf = _build_simple_pdf("Compliance Export Summary", export_note)
@@ -166,9 +234,12 @@ def export_request(request_id: int) -> Dict[str, Any]:
         url, sha = put_pdf_and_sha(key, pdf)
 
         _set_request_status(
-            db, request_id, status="DONE", extra_meta={"result_url": url, "artifact_sha256": sha}
+            db, request_id, status="DONE",
+            extra_meta={"result_url": url, "artifact_sha256": sha,
+                        "deidentified_url": data_url, "deidentified_sha256": data_sha,
+                        "records": records, "redaction_counts": totals},
         )
-        return {"ok": True, "request_id": request_id, "url": url}
+        return {"ok": True, "request_id": request_id, "url": url, "records": records}
 
 
 @shared_task(name="compliance.erasure_request")
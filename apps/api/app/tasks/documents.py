@@ -6,6 +6,7 @@ from sqlalchemy import text
 import base64, datetime as dt, secrets
 from app.celery_app import celery_app
 from app.db import SessionLocal
+from app.utils.discharge_index import remember_latest_discharge
 
 @celery_app.task(name="documents.render", acks_late=True)
 def render_discharge_task(appointment_id: int, encounter_id: str | None = None, language: str = "en") -> dict:
@@ -35,7 +36,7 @@ def render_discharge_task(appointment_id: int, encounter_id: str | None = None,
 
         data_url = "data:text/html;base64," + base64.b64encode(html.encode("utf-8")).decode("ascii")
 
-        db.execute(
+        doc_id = db.execute(
             text(
                 """
                 INSERT INTO documents(kind, url, meta)
@@ -51,12 +52,14 @@ def render_discharge_task(appointment_id: int, encounter_id: str | None = None,
                     'status', 'READY'
                   ))::json
                 )
+                RETURNING id
                 """
             ),
             {"url": data_url, "aid": row["id"], "enc": enc, "tok": token, "lang": language},
-        )
+        ).scalar_one()
         db.commit()
-        return {"status": "ok", "appointment_id": int(row["id"]), "encounter_id": enc}
+        remember_latest_discharge(enc, doc_id, data_url)
+        return {"status": "ok", "appointment_id": int(row["id"]), "encounter_id": enc, "document_id": int(doc_id)}
     except Exception as e:
         db.rollback()
         raise e
@@ -1,13 +1,18 @@
 import os
 import json
+import asyncio
 import httpx
-from typing import Dict, Any
+from datetime import date, datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 from celery.utils.log import get_task_logger
 
 from app.celery_app import celery_app
 from app.db import SessionLocal
 from app.models import EligibilityResponse, Task
+from app.settings import settings
+from app.utils.eligibility_cache import cache_key, eligibility_cache
 
 logger = get_task_logger(__name__)
 
@@ -21,6 +26,23 @@ def _create_followup_task(db: Session, appointment_id: int, payload: Dict[str, A
     setattr(t, "appointment_id", appointment_id) if hasattr(t, "appointment_id") else None
     db.add(t)
 
+def _followup_issue(insurance_number: Optional[str], eligible: bool) -> Optional[str]:
+    """Mismatch rule: no insurance OR not eligible -> follow-up."""
+    if not insurance_number:
+        return "missing_insurance"
+    return None if eligible else "ineligible"
+
+def _service_date(appointment_id: int):
+    db = _db()
+    try:
+        return db.execute(
+            text("SELECT start_at FROM appointments WHERE id=:id"), {"id": appointment_id}
+        ).scalar()
+    except Exception:
+        return None
+    finally:
+        db.close()
+
 @celery_app.task(
     name="eligibility.check_270",
     bind=True,
@@ -31,8 +53,9 @@ def _create_followup_task(db: Session, appointment_id: int, payload: Dict[str, A
 )
 def check_270(self, appointment_id: int, patient_email: str, reason: str, insurance_number: str | None):
     """
-    Build a tiny 270 payload, call the mock adapter, persist 271-like result,
-    and raise a follow-up task on mismatch.
+    Build a tiny 270 payload, call the mock adapter (through the 271 cache, so a
+    member verified minutes ago is not re-sent to the payer), persist 271-like
+    result, and raise a follow-up task on mismatch.
     """
     payload = {
         "appointment_id": appointment_id,
@@ -44,10 +67,14 @@ def check_270(self, appointment_id: int, patient_email: str, reason: str, insura
 
     logger.info("eligibility.check_270 payload=%s", payload)
 
-    with httpx.Client(base_url=BILLING_ADAPTER_URL, timeout=10) as client:
-        r = client.post("/eligibility", json=payload)
-        r.raise_for_status()
-        data = r.json()
+    def _fetch() -> Dict[str, Any]:
+        with httpx.Client(base_url=BILLING_ADAPTER_URL, timeout=10) as client:
+            r = client.post("/eligibility", json=payload)
+            r.raise_for_status()
+            return r.json()
+
+    key = cache_key(insurance_number, settings.x12_receiver_id, _service_date(appointment_id)) if insurance_number else None
+    data, cache = eligibility_cache.get_or_fetch(key, _fetch)
 
     db = _db()
     try:
@@ -60,8 +87,8 @@ def check_270(self, appointment_id: int, patient_email: str, reason: str, insura
         )
         db.add(er)
 
-        # Mismatch rule: no insurance OR not eligible -> follow-up
-        if not insurance_number or not er.eligible:
+        issue = _followup_issue(insurance_number, er.eligible)
+        if issue:
             _create_followup_task(
                 db,
                 appointment_id,
@@ -69,15 +96,189 @@ def check_270(self, appointment_id: int, patient_email: str, reason: str, insura
                     "appointment_id": appointment_id,
                     "reason": reason,
                     "patient_email": patient_email,
-                    "issue": "missing_insurance" if not insurance_number else "ineligible",
+                    "issue": issue,
                     "adapter_result": data,
                 },
             )
 
         db.commit()
-        logger.info("eligibility saved for appt=%s plan=%s copay=%s", appointment_id, er.plan, er.copay_cents)
+        logger.info("eligibility saved for appt=%s plan=%s copay=%s cache=%s",
+                    appointment_id, er.plan, er.copay_cents, cache)
     except Exception:
         db.rollback()
         raise
     finally:
         db.close()
+
+
+# ---- nightly sweep: check tomorrow's appointments before check-in ------------
+_SWEEP_SQL = """
+SELECT a.id, a.reason, a.start_at, p.email, f.answers
+  FROM appointments a
+  LEFT JOIN patients p ON p.id = a.patient_id
+  LEFT JOIN LATERAL (
+        SELECT answers_json AS answers
+          FROM intake_forms
+         WHERE appointment_id = a.id AND status <> 'DRAFT'
+         ORDER BY id DESC
+         LIMIT 1
+       ) f ON TRUE
+ WHERE a.start_at >= CAST(:day AS DATE)
+   AND a.start_at <  CAST(:day AS DATE) + 1
+   AND a.status NOT IN ('CANCELED', 'NO_SHOW', 'COMPLETED')
+   AND NOT EXISTS (
+        SELECT 1 FROM eligibility_responses e
+         WHERE e.appointment_id = a.id AND e.created_at >= :since
+       )
+ ORDER BY a.id
+"""
+
+_INSERT_RESPONSES_SQL = """
+INSERT INTO eligibility_responses (appointment_id, eligible, plan, copay_cents, raw_json, created_at)
+SELECT u.aid, u.ok, u.plan, u.copay, CAST(u.raw AS JSONB), :now
+  FROM unnest(CAST(:aids AS INT[]), CAST(:oks AS BOOLEAN[]), CAST(:plans AS TEXT[]),
+              CAST(:copays AS INT[]), CAST(:raws AS TEXT[])) AS u(aid, ok, plan, copay, raw)
+"""
+
+_INSERT_FOLLOWUPS_SQL = """
+INSERT INTO tasks (type, status, payload_json, created_at)
+SELECT 'eligibility_followup', 'OPEN', CAST(u.p AS JSON), NOW()
+  FROM unnest(CAST(:aids AS INT[]), CAST(:payloads AS TEXT[])) AS u(aid, p)
+ WHERE NOT EXISTS (
+        SELECT 1 FROM tasks t
+         WHERE t.type = 'eligibility_followup' AND t.status = 'OPEN'
+           AND t.payload_json->>'appointment_id' = u.aid::text
+       )
+"""
+
+
+def _intake_insurance(answers: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Intake answers are flattened "<formId>.<field>" (Coverage is form 2); older rows may use the bare key."""
+    answers = answers or {}
+    return answers.get("2.insurance_number") or answers.get("insurance_number") or None
+
+
+def _sweep_key(row: Dict[str, Any]) -> Tuple[Optional[str], Any]:
+    """(cache key, group key): appointments of the same member/payer/day share one adapter call."""
+    key = cache_key(row.get("ins"), settings.x12_receiver_id, row.get("start_at"))
+    return key, key or ("appt", row["id"])
+
+
+async def _fan_out(rows: List[Dict[str, Any]], concurrency: int,
+                   transport: Optional[httpx.AsyncBaseTransport] = None) -> Tuple[Dict[int, Dict[str, Any]], Dict[str, int]]:
+    """
+    Adapter results by appointment id, with at most `concurrency` requests in flight.
+    Cached 271s are reused; fresh ones are written back so the front desk hits the
+    cache at check-in. Failed calls are left out (the next sweep or check_270 retries).
+    """
+    groups: Dict[Any, List[Dict[str, Any]]] = {}
+    for r in rows:
+        groups.setdefault(_sweep_key(r)[1], []).append(r)
+
+    stats = {"calls": 0, "cache_hits": 0, "errors": 0}
+    results: Dict[int, Dict[str, Any]] = {}
+    sem = asyncio.Semaphore(max(1, int(concurrency)))
+
+    async def one(client: httpx.AsyncClient, members: List[Dict[str, Any]]) -> None:
+        first = members[0]
+        key = _sweep_key(first)[0]
+        data = eligibility_cache.get(key) if key else None
+        if data is not None:
+            stats["cache_hits"] += 1
+        else:
+            payload = {
+                "appointment_id": first["id"],
+                "patient_email": first.get("email"),
+                "reason": first.get("reason") or "",
+                "insurance_number": first.get("ins"),
+                "plan_hint": None,
+            }
+            async with sem:
+                stats["calls"] += 1
+                try:
+                    r = await client.post("/eligibility", json=payload)
+                    r.raise_for_status()
+                    data = r.json()
+                except Exception as e:
+                    stats["errors"] += 1
+                    logger.warning("eligibility sweep: adapter failed for appt=%s: %s", first["id"], e)
+                    return
+            if key:
+                eligibility_cache.put(key, data)
+        for m in members:
+            results[int(m["id"])] = data
+
+    async with httpx.AsyncClient(base_url=BILLING_ADAPTER_URL, timeout=10, transport=transport) as client:
+        await asyncio.gather(*(one(client, members) for members in groups.values()))
+    return results, stats
+
+
+@celery_app.task(name="eligibility.sweep_upcoming")
+def sweep_upcoming(day: Optional[str] = None, concurrency: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Nightly batch eligibility for `day` (default: tomorrow, UTC): one query for the
+    appointments and their latest intake insurance number, bounded async fan-out to
+    the adapter, then one INSERT for all responses and one for all follow-ups.
+    Appointments checked in the last ELIGIBILITY_SWEEP_SKIP_HOURS are skipped, so
+    re-running the sweep is cheap.
+    """
+    target = date.fromisoformat(day) if day else datetime.utcnow().date() + timedelta(days=1)
+    concurrency = int(concurrency or settings.eligibility_sweep_concurrency)
+    now = datetime.utcnow()
+
+    db = _db()
+    try:
+        rows = [dict(r) for r in db.execute(
+            text(_SWEEP_SQL),
+            {"day": target, "since": now - timedelta(hours=settings.eligibility_sweep_skip_hours)},
+        ).mappings()]
+        for r in rows:
+            r["ins"] = _intake_insurance(r.pop("answers", None))
+        if not rows:
+            return {"day": target.isoformat(), "appointments": 0}
+
+        results, stats = asyncio.run(_fan_out(rows, concurrency))
+
+        done = [r for r in rows if int(r["id"]) in results]
+        if done:
+            db.execute(
+                text(_INSERT_RESPONSES_SQL),
+                {
+                    "now": now,
+                    "aids": [int(r["id"]) for r in done],
+                    "oks": [bool(results[int(r["id"])].get("eligible")) for r in done],
+                    "plans": [str(results[int(r["id"])].get("plan") or "PPO-BASIC") for r in done],
+                    "copays": [int(results[int(r["id"])].get("copay_cents") or 0) for r in done],
+                    "raws": [json.dumps(results[int(r["id"])].get("raw_json") or {}) for r in done],
+                },
+            )
+
+        followups = []
+        for r in done:
+            data = results[int(r["id"])]
+            issue = _followup_issue(r.get("ins"), bool(data.get("eligible")))
+            if issue:
+                followups.append((int(r["id"]), json.dumps({
+                    "appointment_id": int(r["id"]),
+                    "reason": r.get("reason"),
+                    "patient_email": r.get("email"),
+                    "issue": issue,
+                    "adapter_result": data,
+                    "source": "sweep",
+                }, default=str)))
+        if followups:
+            db.execute(
+                text(_INSERT_FOLLOWUPS_SQL),
+                {"aids": [a for a, _ in followups], "payloads": [p for _, p in followups]},
+            )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    out = {"day": target.isoformat(), "appointments": len(rows), "checked": len(done),
+           "followups": len(followups), **stats}
+    logger.info("eligibility.sweep_upcoming %s", out)
+    return out
@@ -6,8 +6,9 @@ from ..db import SessionLocal
 from ..storage import put_pdf_and_sha
 from reportlab.lib.pagesizes import LETTER
 from reportlab.pdfgen import canvas
-import io, json, httpx
+import hashlib, io, json, httpx
 from ..settings import settings
+from ..utils.redis_cache import get_redis_client
 from app.celery_app import celery_app
 
 def _pdf_from_answers(answers: dict) -> bytes:
@@ -29,18 +30,79 @@ def _pdf_from_answers(answers: dict) -> bytes:
     c.showPage()
     c.save()
     return buf.getvalue()
+# ---------------------------------------------------------------------------
+# Render dedupe: renders are keyed by sha256(appointment_id, answers).
+# - intake:render:done:<aid>  -> hash of the last rendered answers (unchanged => skip)
+# - intake:render:lock:<hash> -> short NX lock so concurrent duplicates coalesce
+# ---------------------------------------------------------------------------
+RENDER_DONE_TTL = 30 * 24 * 3600
+RENDER_LOCK_TTL = 120
+
+
+def answers_hash(appointment_id: int, answers: dict) -> str:
+    canonical = json.dumps({"appointment_id": int(appointment_id), "answers": answers},
+                           sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _done_key(appointment_id: int) -> str:
+    return f"intake:render:done:{int(appointment_id)}"
+
+
+def _mark_rendered(appointment_id: int, digest: str) -> None:
+    try:
+        get_redis_client().setex(_done_key(appointment_id), RENDER_DONE_TTL, digest)
+    except Exception:
+        pass
+
+
+def render_is_current(appointment_id: int, digest: str) -> bool:
+    """Cheap pre-check used by submit_intake before enqueueing a render."""
+    try:
+        return get_redis_client().get(_done_key(appointment_id)) == digest
+    except Exception:
+        return False
+
+
 @celery_app.task(name="intake.render_intake_pdf")
-def render_intake_pdf(appointment_id: int, answers: dict):
+def render_intake_pdf(appointment_id: int, answers: dict, digest: str | None = None):
     """
+    - skip if these exact answers were already rendered for this appointment
+    - coalesce concurrent duplicates behind a Redis lock
     - render a PDF from answers
     - upload to S3/MinIO
     - insert into documents(patient_id, kind, url, meta, created_at)
     - mirror to EHR mock as FHIR DocumentReference
     """
+    digest = digest or answers_hash(appointment_id, answers)
+    if render_is_current(appointment_id, digest):
+        return {"status": "unchanged", "appointment_id": appointment_id, "answers_hash": digest}
+
+    r = get_redis_client()
+    lock_key = f"intake:render:lock:{digest}"
+    try:
+        if not r.set(lock_key, "1", ex=RENDER_LOCK_TTL, nx=True):
+            return {"status": "coalesced", "appointment_id": appointment_id, "answers_hash": digest}
+    except Exception:
+        pass  # Redis unavailable: fall through to the DB check below
+
     db = SessionLocal()
     try:
+        # Redis may have been flushed; the latest Intake document of this appointment is
+        # the source of truth. Only the latest counts: after A -> B -> A the third
+        # submission must render again even though a document for A exists.
+        latest = db.execute(
+            text("SELECT meta->>'answers_hash' FROM documents "
+                 "WHERE kind='Intake' AND (meta->>'appointment_id') = :aid ORDER BY id DESC LIMIT 1"),
+            {"aid": str(int(appointment_id))},
+        ).scalar()
+        if latest == digest:
+            _mark_rendered(appointment_id, digest)
+            return {"status": "unchanged", "appointment_id": appointment_id, "answers_hash": digest}
+
         pdf = _pdf_from_answers(answers)
-        key = f"intake/appointment-{appointment_id}.pdf"
+        # content-addressed key: a changed resubmission never overwrites the previous PDF
+        key = f"intake/appointment-{appointment_id}-{digest[:16]}.pdf"
         url, sha = put_pdf_and_sha(key, pdf)
 
         # resolve patient_id (nullable)
@@ -53,6 +115,7 @@ def render_intake_pdf(appointment_id: int, answers: dict):
         meta = {
             "title": f"Intake {appointment_id}",
             "sha256": sha,
+            "answers_hash": digest,
             "appointment_id": appointment_id,
             "answers_preview": {k: (str(v)[:80]) for k, v in list(answers.items())[:12]},
         }
@@ -64,6 +127,7 @@ def render_intake_pdf(appointment_id: int, answers: dict):
             {"pid": patient_id, "url": url, "meta": meta},
         )
         db.commit()
+        _mark_rendered(appointment_id, digest)
 
         # Mirror to EHR mock
         dr = {
@@ -86,5 +150,41 @@ def render_intake_pdf(appointment_id: int, answers: dict):
         except Exception:
             pass
 
+        return {"status": "rendered", "appointment_id": appointment_id, "answers_hash": digest, "url": url}
     finally:
         db.close()
+        try:
+            r.delete(lock_key)
+        except Exception:
+            pass
+
+
+# ---------------------------------------------------------------------------
+# Draft expiry flush: idle autosave drafts (app/intake_drafts.py) are written to
+# intake_forms in one batched INSERT per run, then released from Redis.
+# ---------------------------------------------------------------------------
+DRAFT_FLUSH_BATCH = 500
+
+
+@celery_app.task(name="intake.flush_idle_drafts")
+def flush_idle_drafts(limit: int = DRAFT_FLUSH_BATCH):
+    from ..intake_drafts import idle_drafts, release_if_untouched
+
+    drafts = [(aid, touched, answers) for aid, touched, answers in idle_drafts(limit) if answers]
+    if not drafts:
+        return {"flushed": 0}
+
+    db = SessionLocal()
+    try:
+        db.execute(
+            text("INSERT INTO intake_forms (appointment_id, answers_json, status, created_at) "
+                 "VALUES (:aid, :ans, 'DRAFT', NOW())")
+            .bindparams(bindparam("ans", type_=sa.JSON())),
+            [{"aid": aid, "ans": answers} for aid, _, answers in drafts],
+        )
+        db.commit()
+    finally:
+        db.close()
+
+    released = sum(1 for aid, touched, _ in drafts if release_if_untouched(aid, touched))
+    return {"flushed": len(drafts), "released": released}
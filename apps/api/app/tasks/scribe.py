@@ -25,13 +25,56 @@ def scribe_postprocess(session_id: int):
 @celery_app.task(name="scribe.safety")
 def scribe_safety(session_id: int):
     """
-    Example safety task:
-    - mark draft as 'safe=true' (placeholder for PHI redaction, toxicity filters, etc.)
+    PHI pass over the draft (app/redaction.py):
+    - known identifiers of the visit's patient + generic PHI patterns
+    - stores meta.draft_redacted (the clinical draft itself is left intact for the author)
+    - confidence_json.safe / phi_counts record what was found
     """
+    import json
+    from app.redaction import Redactor, patient_identifiers
+
     db = SessionLocal()
     try:
-        db.execute(text("UPDATE scribe_sessions SET confidence_json = jsonb_set(COALESCE(confidence_json,'{}'::jsonb),'{\"safe}\"','true'::jsonb) WHERE id=:i"), {"i": session_id})
+        row = db.execute(
+            text(
+                "SELECT s.meta->>'draft' AS draft, a.patient_id FROM scribe_sessions s "
+                "LEFT JOIN appointments a ON a.id = s.appointment_id WHERE s.id=:i"
+            ),
+            {"i": session_id},
+        ).mappings().first()
+        if not row:
+            return {"status": "not_found", "session_id": session_id}
+
+        result = Redactor(patient_identifiers(db, [row["patient_id"]])).redact(row["draft"] or "")
+        db.execute(
+            text(
+                "UPDATE scribe_sessions SET "
+                "meta = COALESCE(meta,'{}'::jsonb) || jsonb_build_object('draft_redacted', CAST(:red AS text)), "
+                "confidence_json = COALESCE(confidence_json,'{}'::jsonb) || "
+                "jsonb_build_object('safe', true, 'phi_counts', CAST(:counts AS jsonb)) WHERE id=:i"
+            ),
+            {"i": session_id, "red": result.text, "counts": json.dumps(result.counts)},
+        )
         db.commit()
-        return {"status": "ok", "session_id": session_id}
+        return {"status": "ok", "session_id": session_id, "phi_counts": result.counts}
     finally:
         db.close()
+
+@celery_app.task(name="scribe.transcribe_chunk")
+def transcribe_chunk(session_id: int, seq: int, audio_b64: str, content_type: str | None = None):
+    """
+    Ambient audio stage 2: transcribe one uploaded chunk and fold the text into the
+    running SOAP draft (app/scribe_audio.py). Chunks are small (<= 1 MiB), so the
+    bytes travel in the task payload rather than being re-read from storage.
+    """
+    import base64
+    from app.scribe_audio import record_segment
+    from app.transcription import get_transcriber
+
+    audio = base64.b64decode(audio_b64)
+    try:
+        text_out = get_transcriber().transcribe(audio, session_id=session_id, seq=seq, content_type=content_type)
+    except Exception:
+        text_out = f"[untranscribed audio chunk {seq}]"  # still drain the backlog; audio is kept in storage
+    record_segment(session_id, seq, text_out)
+    return {"session_id": session_id, "seq": seq, "chars": len(text_out)}
@@ -1,7 +1,176 @@
+# apps/api/app/tasks/signature.py
+import io
+
+import sqlalchemy as sa
+from reportlab.lib.pagesizes import LETTER
+from reportlab.pdfgen import canvas
+from sqlalchemy import bindparam, text
+
 from app.celery_app import celery_app
+from ..db import SessionLocal
+from ..storage import put_pdf_and_sha
+from ..utils.signature_status import FAILED, SIGNED, TERMINAL, publish_status, transition
+
+INBOX_BATCH = 50
+INBOX_MAX_ATTEMPTS = 5
+INBOX_LEASE_SECONDS = 300  # a PROCESSING claim older than this is retried
 
 
 @celery_app.task(name="signature.process_signature")
 def process_signature(consent_id: int):
     # TODO: verify signature webhook payload, update DB
     return {"status": "ok", "consent_id": consent_id}
+
+
+def _make_consent_pdf(appointment_id: int, signer_name: str) -> bytes:
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=LETTER)
+    w, h = LETTER
+    y = h - 50
+    c.setFont("Helvetica-Bold", 14); c.drawString(50, y, "Consent to Treat"); y -= 30
+    c.setFont("Helvetica", 10)
+    c.drawString(50, y, f"Appointment #{appointment_id}"); y -= 16
+    c.drawString(50, y, f"Signed by: {signer_name}"); y -= 16
+    c.drawString(50, y, "I consent to the proposed care plan."); y -= 16
+    c.showPage(); c.save(); return buf.getvalue()
+
+
+def _lock_request(db, rid: str, appointment_id: int) -> str:
+    """Row-lock the signature request (creating it PENDING if the provider got there first) -> status."""
+    db.execute(
+        text("INSERT INTO signature_requests (request_id, appointment_id, status, created_at, updated_at) "
+             "VALUES (:rid, :aid, 'PENDING', NOW(), NOW()) ON CONFLICT (request_id) DO NOTHING"),
+        {"rid": rid, "aid": appointment_id},
+    )
+    return db.execute(
+        text("SELECT status FROM signature_requests WHERE request_id = :rid FOR UPDATE"), {"rid": rid}
+    ).scalar()
+
+
+def _store_consent_pdf(rid: str, payload: dict):
+    """Render + upload, no transaction open -> (url, sha256)."""
+    # deterministic key: a retried event overwrites the same object instead of adding one
+    pdf = _make_consent_pdf(int(payload["appointment_id"]), payload.get("signer_name", "Unknown"))
+    return put_pdf_and_sha(f"consent/{rid}.pdf", pdf)
+
+
+def _apply_signed_event(db, rid: str, payload: dict, url: str, sha: str):
+    """
+    Everything the webhook used to do inline, minus the I/O: consent + document + audit rows
+    for the PDF already stored at `url`.
+    A request that is already SIGNED (or FAILED) is left alone: a second `signed` event
+    with a new event id passes the inbox dedupe but must not add a second consent.
+    Returns the status row to publish, or None when nothing changed.
+    """
+    appointment_id = int(payload["appointment_id"])
+    signer_name = payload.get("signer_name", "Unknown")
+    signer_ip = payload.get("signer_ip", "127.0.0.1")
+
+    if _lock_request(db, rid, appointment_id) in TERMINAL:
+        return None
+
+    row = db.execute(text("SELECT patient_id FROM appointments WHERE id=:id"), {"id": appointment_id}).first()
+    patient_id = row.patient_id if row else None
+
+    db.execute(
+        text("INSERT INTO consents (patient_id, pdf_url, sha256, signer_name, signer_ip, signed_at, created_at) "
+             "VALUES (:pid, :url, :sha, :name, :ip, NOW(), NOW())"),
+        {"pid": patient_id, "url": url, "sha": sha, "name": signer_name, "ip": signer_ip},
+    )
+    meta = {"title": "Consent (SIGNED)", "sha256": sha, "request_id": rid, "appointment_id": appointment_id}
+    doc_id = db.execute(
+        text("INSERT INTO documents (patient_id, kind, url, meta, created_at) "
+             "VALUES (:pid, 'Consent', :url, :meta, NOW()) RETURNING id")
+        .bindparams(bindparam("meta", type_=sa.JSON())),
+        {"pid": patient_id, "url": url, "meta": meta},
+    ).scalar()
+    db.execute(
+        text("INSERT INTO audit_logs (actor, action, target, details, created_at) "
+             "VALUES (:a, 'CONSENT_SIGNED', :t, :d, NOW())")
+        .bindparams(bindparam("d", type_=sa.JSON())),
+        {"a": signer_name, "t": rid, "d": {"appointment_id": appointment_id, "pdf": url}},
+    )
+    return transition(db, rid, SIGNED, appointment_id=appointment_id, document_id=doc_id)
+
+
+_CLAIM_SQL = """
+UPDATE signature_inbox i
+   SET status = 'PROCESSING', claimed_at = NOW()
+  FROM (SELECT id FROM signature_inbox
+         WHERE status = 'PENDING'
+            OR (status = 'PROCESSING' AND claimed_at < NOW() - make_interval(secs => :lease))
+         ORDER BY id
+         LIMIT :n
+         FOR UPDATE SKIP LOCKED) c
+ WHERE i.id = c.id
+RETURNING i.id, i.request_id, i.payload, i.attempts
+"""
+
+
+def _finish_event(db, r):
+    """
+    One event: cheap status read, PDF render + upload with no transaction open, then a
+    short transaction for the rows. Returns the status row to publish (or None).
+    """
+    rid, payload = r["request_id"], r["payload"] or {}
+    status = db.execute(text("SELECT status FROM signature_requests WHERE request_id = :rid"),
+                        {"rid": rid}).scalar()
+    db.rollback()  # end the read before the slow part
+    url = sha = None
+    if status not in TERMINAL:
+        url, sha = _store_consent_pdf(rid, payload)
+    status_row = _apply_signed_event(db, rid, payload, url, sha) if url else None
+    db.execute(
+        text("UPDATE signature_inbox SET status='DONE', attempts=attempts+1, "
+             "processed_at=NOW(), last_error=NULL WHERE id=:id"),
+        {"id": r["id"]},
+    )
+    db.commit()
+    return status_row
+
+
+@celery_app.task(name="signature.process_inbox")
+def process_inbox(limit: int = INBOX_BATCH):
+    """
+    Drain signature_inbox in batches. A batch is claimed by flipping it to PROCESSING
+    (FOR UPDATE SKIP LOCKED, so concurrent workers split the work) and committing;
+    rendering and uploading then run with no row locks held, and each event is
+    finished in its own short transaction. Claims older than INBOX_LEASE_SECONDS
+    (worker died mid-batch) are picked up again.
+    """
+    db = SessionLocal()
+    done = failed = 0
+    changed = []  # status rows to publish once committed
+    try:
+        rows = db.execute(text(_CLAIM_SQL), {"n": limit, "lease": INBOX_LEASE_SECONDS}).mappings().all()
+        db.commit()
+
+        for r in rows:
+            try:
+                changed.append(_finish_event(db, r))
+                done += 1
+            except Exception as e:
+                db.rollback()
+                status = db.execute(
+                    text("UPDATE signature_inbox SET attempts=attempts+1, last_error=:err, claimed_at=NULL, "
+                         "status = CASE WHEN attempts+1 >= :max THEN 'FAILED' ELSE 'PENDING' END "
+                         "WHERE id=:id RETURNING status"),
+                    {"id": r["id"], "err": str(e)[:2000], "max": INBOX_MAX_ATTEMPTS},
+                ).scalar()
+                if status == FAILED:
+                    changed.append(transition(db, r["request_id"], FAILED))
+                db.commit()
+                failed += 1
+    finally:
+        db.close()
+
+    for row in changed:
+        publish_status(row)
+
+    # a full batch means there is probably more waiting
+    if len(rows) >= limit:
+        try:
+            process_inbox.delay(limit)
+        except Exception:
+            pass
+    return {"claimed": len(rows), "done": done, "failed": failed}
@@ -0,0 +1,64 @@
+# apps/api/app/transcription.py
+"""
+Pluggable speech-to-text for ambient scribe audio.
+
+SCRIBE_TRANSCRIBER selects the backend:
+- "stub" (default): deterministic, offline. UTF-8 payloads are returned as the
+  "transcript" (tests and demos send text frames); anything else becomes a
+  placeholder noting the chunk size.
+- "openai": Whisper-style transcription through the shared LLM governor, falling
+  back to the stub when the governor sheds the call or upstream fails.
+"""
+from __future__ import annotations
+
+import io
+import os
+from functools import lru_cache
+from typing import Optional, Protocol
+
+
+class Transcriber(Protocol):
+    def transcribe(self, audio: bytes, *, session_id: int, seq: int,
+                   content_type: Optional[str] = None) -> str: ...
+
+
+class StubTranscriber:
+    def transcribe(self, audio: bytes, *, session_id: int, seq: int,
+                   content_type: Optional[str] = None) -> str:
+        try:
+            text = audio.decode("utf-8")
+            if text.strip() and all(c.isprintable() or c.isspace() for c in text):
+                return text.strip()
+        except UnicodeDecodeError:
+            pass
+        return f"[audio chunk {seq}: {len(audio)} bytes]"
+
+
+class OpenAITranscriber:
+    def __init__(self, model: str) -> None:
+        self.model = model
+        self._fallback = StubTranscriber()
+
+    def transcribe(self, audio: bytes, *, session_id: int, seq: int,
+                   content_type: Optional[str] = None) -> str:
+        from .utils.llm_governor import llm_governor
+        try:
+            from openai import OpenAI
+            client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+            ext = (content_type or "audio/webm").split("/")[-1].split(";")[0] or "webm"
+            with llm_governor.slot() as call:
+                out = client.audio.transcriptions.create(
+                    model=self.model, file=(f"chunk-{seq}.{ext}", io.BytesIO(audio), content_type or "audio/webm"),
+                )
+                call.ok()
+            return (getattr(out, "text", "") or "").strip()
+        except Exception:
+            return self._fallback.transcribe(audio, session_id=session_id, seq=seq, content_type=content_type)
+
+
+@lru_cache(maxsize=1)
+def get_transcriber() -> Transcriber:
+    kind = os.getenv("SCRIBE_TRANSCRIBER", "stub").lower()
+    if kind == "openai" and os.getenv("OPENAI_API_KEY"):
+        return OpenAITranscriber(os.getenv("OPENAI_TRANSCRIBE_MODEL", "whisper-1"))
+    return StubTranscriber()
@@ -0,0 +1,57 @@
+# app/utils/discharge_index.py
+"""
+Precomputed encounter_id -> latest Discharge document index.
+
+The portal endpoint used to find "latest Discharge for this encounter" with a
+JSON seq-scan over documents on every hit. Writers (render_document and the
+documents.render task) now record the newest doc id here, together with a
+strong ETag, so reads are a single Redis GET (plus a PK lookup on a miss).
+"""
+from __future__ import annotations
+
+import hashlib
+from typing import Optional, Tuple
+
+from .redis_cache import get_redis_client
+
+# Portal tokens live 7 days; keep the index a little longer than that.
+INDEX_TTL_SECONDS = 8 * 24 * 3600
+
+
+def _key(encounter_id: str) -> str:
+    return f"discharge:latest:{encounter_id}"
+
+
+def discharge_etag(doc_id: int, url: Optional[str]) -> str:
+    """Discharge docs are immutable once written, so id + content hash is a strong validator."""
+    digest = hashlib.sha256((url or "").encode("utf-8")).hexdigest()[:20]
+    return f'"d{int(doc_id)}-{digest}"'
+
+
+def remember_latest_discharge(encounter_id: str, doc_id: int, url: Optional[str]) -> None:
+    """Best-effort: never lets an older doc overwrite a newer one; never raises."""
+    try:
+        r = get_redis_client()
+        current = latest_discharge(encounter_id)
+        if current and current[0] > int(doc_id):
+            return
+        r.setex(_key(encounter_id), INDEX_TTL_SECONDS, f"{int(doc_id)}|{discharge_etag(doc_id, url)}")
+    except Exception:
+        pass
+
+
+def latest_discharge(encounter_id: str) -> Optional[Tuple[int, str]]:
+    """Returns (doc_id, etag) or None if the encounter isn't indexed (yet)."""
+    try:
+        val = get_redis_client().get(_key(encounter_id))
+    except Exception:
+        return None
+    if not val:
+        return None
+    if isinstance(val, bytes):
+        val = val.decode("utf-8")
+    doc_id, _, etag = str(val).partition("|")
+    try:
+        return int(doc_id), etag
+    except ValueError:
+        return None
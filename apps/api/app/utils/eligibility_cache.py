@@ -0,0 +1,182 @@
+# app/utils/eligibility_cache.py
+"""
+TTL cache of 271 eligibility results, with in-flight request coalescing.
+
+The front desk re-opening a chart, a retrying 270 task and the on-demand check
+all ask the payer the same question within minutes. Results are cached in Redis
+keyed by (insurance number, payer, service date) for ELIGIBILITY_CACHE_TTL_SECONDS.
+
+Concurrent misses for the same key share one adapter call (singleflight):
+- in-process: the first caller (leader) fetches, the rest wait on its result;
+- across processes (API workers, Celery): the leader holds a short Redis NX
+  lock and other processes poll the cache for up to ELIGIBILITY_CACHE_WAIT_SECONDS
+  before giving up and fetching themselves.
+Failed fetches are never cached; waiters in the same process get the leader's
+exception. Checks without an insurance number bypass the cache (no member key).
+
+Metrics (prometheus, exposed on /metrics): eligibility_cache_total{outcome}
+with hit | miss | coalesced | bypass, and adapter fetch latency.
+
+Usage:
+    key = cache_key(insurance_number, payer, service_date)
+    data, outcome = eligibility_cache.get_or_fetch(key, lambda: call_adapter(...))
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+from prometheus_client import Counter, Histogram
+
+from ..settings import settings
+from .redis_cache import get_redis_client
+
+ELIGIBILITY_CACHE = Counter(
+    "eligibility_cache_total", "Eligibility cache lookups", ["outcome"],  # hit|miss|coalesced|bypass
+)
+ELIGIBILITY_FETCH_LATENCY = Histogram(
+    "eligibility_fetch_seconds", "Payer adapter eligibility call latency (cache misses only)",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 16),
+)
+
+_POLL_SECONDS = 0.05
+
+
+def cache_key(insurance_number: Optional[str], payer: Optional[str],
+              service_date: Union[date, datetime, str, None]) -> Optional[str]:
+    """None when there is no member id to key on (such checks are not cached)."""
+    member = (insurance_number or "").strip().upper()
+    if not member:
+        return None
+    if isinstance(service_date, datetime):
+        service_date = service_date.date()
+    dos = service_date.isoformat() if isinstance(service_date, date) else str(service_date or "")[:10]
+    canonical = json.dumps([member, (payer or "").strip().upper(), dos], separators=(",", ":"))
+    return "elig:271:" + hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[BaseException] = None
+
+
+class EligibilityCache:
+    def __init__(self, ttl_seconds: int, wait_seconds: float) -> None:
+        self.ttl_seconds = int(ttl_seconds)
+        self.wait_seconds = float(wait_seconds)
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+
+    # -- redis (best effort: a broken cache must never block eligibility) -------
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            raw = get_redis_client().get(key)
+            return json.loads(raw) if raw else None
+        except Exception:
+            return None
+
+    def put(self, key: str, data: Dict[str, Any]) -> None:
+        try:
+            get_redis_client().setex(key, self.ttl_seconds, json.dumps(data, separators=(",", ":"), default=str))
+        except Exception:
+            pass
+
+    def _try_lock(self, key: str) -> bool:
+        try:
+            return bool(get_redis_client().set(key + ":lock", "1", nx=True, ex=max(1, int(self.wait_seconds))))
+        except Exception:
+            return True
+
+    def _unlock(self, key: str) -> None:
+        try:
+            get_redis_client().delete(key + ":lock")
+        except Exception:
+            pass
+
+    def _await_other_process(self, key: str) -> Optional[Dict[str, Any]]:
+        deadline = time.monotonic() + self.wait_seconds
+        while time.monotonic() < deadline:
+            time.sleep(_POLL_SECONDS)
+            data = self.get(key)
+            if data is not None:
+                return data
+        return None
+
+    # -- public -----------------------------------------------------------------
+    def invalidate(self, key: Optional[str]) -> None:
+        if key:
+            try:
+                get_redis_client().delete(key)
+            except Exception:
+                pass
+
+    def get_or_fetch(self, key: Optional[str], fetch: Callable[[], Dict[str, Any]]) -> Tuple[Dict[str, Any], str]:
+        """-> (adapter result, outcome); outcome is hit | miss | coalesced | bypass."""
+        if key is None:
+            ELIGIBILITY_CACHE.labels("bypass").inc()
+            return fetch(), "bypass"
+
+        data = self.get(key)
+        if data is not None:
+            ELIGIBILITY_CACHE.labels("hit").inc()
+            return data, "hit"
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            if not flight.done.wait(self.wait_seconds):
+                ELIGIBILITY_CACHE.labels("miss").inc()
+                return self._fetch(key, fetch), "miss"
+            if flight.error is not None:
+                raise flight.error
+            ELIGIBILITY_CACHE.labels("coalesced").inc()
+            return flight.result, "coalesced"
+
+        try:
+            outcome = "miss"
+            if self._try_lock(key):
+                try:
+                    data = self._fetch(key, fetch)
+                finally:
+                    self._unlock(key)
+            else:
+                data = self._await_other_process(key)
+                if data is not None:
+                    outcome = "coalesced"
+                else:
+                    data = self._fetch(key, fetch)
+            flight.result = data
+            ELIGIBILITY_CACHE.labels(outcome).inc()
+            return data, outcome
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def _fetch(self, key: str, fetch: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        t0 = time.monotonic()
+        data = fetch()
+        ELIGIBILITY_FETCH_LATENCY.observe(time.monotonic() - t0)
+        self.put(key, data)
+        return data
+
+
+eligibility_cache = EligibilityCache(
+    ttl_seconds=settings.eligibility_cache_ttl_seconds,
+    wait_seconds=settings.eligibility_cache_wait_seconds,
+)
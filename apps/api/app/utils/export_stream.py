@@ -0,0 +1,218 @@
+# app/utils/export_stream.py
+"""
+Streaming tabular exports: CSV, Arrow IPC stream, Parquet.
+
+Rows are pulled from a server-side cursor (query_rows -> yield_per) in batches
+of EXPORT_BATCH_ROWS and encoded batch by batch, so memory stays flat however
+large the extract is and the first bytes leave before the query finishes.
+The response has no Content-Length (chunked transfer encoding).
+
+    csv      text/csv, header from the first row
+    arrow    Arrow IPC stream (pyarrow.ipc.open_stream / pandas / polars)
+    parquet  one row group per batch
+
+CSV and Arrow are gzip-compressed on the fly when the client sends
+Accept-Encoding: gzip (Parquet is compressed internally). Arrow and Parquet
+need pyarrow, which is optional: without it those formats answer 501 and CSV
+keeps working.
+
+FastAPI closes `get_db` sessions before a streamed body is sent, so
+query_rows opens (and closes) its own session inside the generator.
+
+Usage:
+    rows = query_rows("SELECT ... FROM audit_logs WHERE ...", params)
+    return export_response(request, rows, "csv", filename="audit")
+"""
+from __future__ import annotations
+
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional
+
+from fastapi import HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import text
+
+from ..settings import settings
+
+FORMATS = ("csv", "arrow", "parquet")
+FORMAT_PATTERN = "^(csv|arrow|parquet)$"
+
+_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+_EXTENSIONS = {"csv": "csv", "arrow": "arrows", "parquet": "parquet"}
+
+
+# ---------------------------------------------------------------------------
+# Row sources
+# ---------------------------------------------------------------------------
+def query_rows(sql: str, params: Optional[Dict[str, Any]] = None, batch_size: Optional[int] = None,
+               session_factory: Optional[Callable[[], Any]] = None) -> Iterator[Dict[str, Any]]:
+    """Rows of `sql` as dicts, fetched batch_size at a time through a server-side cursor."""
+    if session_factory is None:
+        from ..db import SessionLocal as session_factory
+    size = batch_size or settings.export_batch_rows
+    db = session_factory()
+    try:
+        result = db.execute(text(sql).execution_options(yield_per=size), params or {})
+        for part in result.mappings().partitions(size):
+            for row in part:
+                yield dict(row)
+    finally:
+        db.close()
+
+
+def _batches(rows: Iterable[Mapping[str, Any]], size: int) -> Iterator[List[Mapping[str, Any]]]:
+    it = iter(rows)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _plain(v: Any) -> Any:
+    """JSON columns (details, meta) as JSON text in every format."""
+    if isinstance(v, (dict, list)):
+        return json.dumps(v, separators=(",", ":"), default=str)
+    return v
+
+
+# ---------------------------------------------------------------------------
+# Encoders: batches of rows -> bytes chunks
+# ---------------------------------------------------------------------------
+def _csv_cell(v: Any) -> Any:
+    v = _plain(v)
+    if isinstance(v, (datetime, date)):
+        return v.isoformat()
+    return "" if v is None else v
+
+
+def encode_csv(batches: Iterable[List[Mapping[str, Any]]]) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = None
+    for batch in batches:
+        if writer is None:
+            writer = csv.writer(buf)
+            fields = list(batch[0].keys())
+            writer.writerow(fields)
+        writer.writerows([_csv_cell(r.get(f)) for f in fields] for r in batch)
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise HTTPException(status_code=501, detail="arrow/parquet export requires pyarrow on the server")
+    return pa, pq
+
+
+def _record_batches(pa, batches: Iterable[List[Mapping[str, Any]]]):
+    """Schema inferred from the first batch; all-null columns there become strings."""
+    schema = None
+    for batch in batches:
+        cols = {k: [_plain(r.get(k)) for r in batch] for k in batch[0].keys()}
+        if schema is None:
+            inferred = pa.RecordBatch.from_pydict(cols).schema
+            schema = pa.schema([pa.field(f.name, pa.string()) if pa.types.is_null(f.type) else f for f in inferred])
+        for f in schema:
+            if pa.types.is_string(f.type):
+                cols[f.name] = [v if v is None or isinstance(v, str) else str(v) for v in cols[f.name]]
+        yield pa.RecordBatch.from_pydict(cols, schema=schema)
+
+
+_IPC_EOS = b"\xff\xff\xff\xff\x00\x00\x00\x00"
+
+
+def encode_arrow(batches: Iterable[List[Mapping[str, Any]]]) -> Iterator[bytes]:
+    pa, _ = _pyarrow()
+    first = True
+    for rb in _record_batches(pa, batches):
+        if first:
+            yield rb.schema.serialize().to_pybytes()
+            first = False
+        yield rb.serialize().to_pybytes()
+    yield _IPC_EOS
+
+
+class _Sink(io.RawIOBase):
+    """Write-only file the Parquet writer fills; drained after every row group."""
+
+    def __init__(self) -> None:
+        self.chunks: List[bytes] = []
+        self.pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self.chunks.append(bytes(b))
+        self.pos += len(b)
+        return len(b)
+
+    def tell(self) -> int:
+        return self.pos
+
+    def drain(self) -> bytes:
+        out, self.chunks = b"".join(self.chunks), []
+        return out
+
+
+def encode_parquet(batches: Iterable[List[Mapping[str, Any]]]) -> Iterator[bytes]:
+    pa, pq = _pyarrow()
+    sink, writer = _Sink(), None
+    for rb in _record_batches(pa, batches):
+        if writer is None:
+            writer = pq.ParquetWriter(sink, rb.schema, compression="zstd")
+        writer.write_batch(rb)
+        yield sink.drain()
+    if writer is not None:
+        writer.close()
+        yield sink.drain()
+
+
+_ENCODERS = {"csv": encode_csv, "arrow": encode_arrow, "parquet": encode_parquet}
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    z = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31 = gzip container
+    for chunk in chunks:
+        out = z.compress(chunk)
+        if out:
+            yield out
+    yield z.flush()
+
+
+# ---------------------------------------------------------------------------
+# Response
+# ---------------------------------------------------------------------------
+def _accepts_gzip(request: Optional[Request]) -> bool:
+    if request is None:
+        return False
+    return any(p.split(";")[0].strip() == "gzip" for p in request.headers.get("accept-encoding", "").split(","))
+
+
+def export_response(request: Optional[Request], rows: Iterable[Mapping[str, Any]], fmt: str = "csv",
+                    filename: str = "export", batch_size: Optional[int] = None) -> StreamingResponse:
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=422, detail=f"format must be one of {', '.join(FORMATS)}")
+    if fmt != "csv":
+        _pyarrow()  # 501 up front rather than a broken stream
+    chunks = _ENCODERS[fmt](_batches(rows, batch_size or settings.export_batch_rows))
+    headers = {"Content-Disposition": f'attachment; filename="{filename}.{_EXTENSIONS[fmt]}"'}
+    if fmt != "parquet" and _accepts_gzip(request):
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+    return StreamingResponse(chunks, media_type=_MEDIA_TYPES[fmt], headers=headers)
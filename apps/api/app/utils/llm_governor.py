@@ -0,0 +1,181 @@
+# app/utils/llm_governor.py
+"""
+Process-wide governor for LLM calls made on request threads (scribe drafts).
+
+- Concurrency: a bounded semaphore caps in-flight calls; callers wait at most
+  LLM_QUEUE_TIMEOUT_SECONDS for a slot, then get the fallback (load shedding)
+  instead of pinning a threadpool worker behind a slow model.
+- Circuit breaker: LLM_BREAKER_FAILURES consecutive errors or slow calls
+  (> LLM_BREAKER_SLOW_SECONDS to first useful output) open the circuit; while
+  open, callers go straight to the fallback. After the cooldown a single probe
+  call is let through (half-open) and its outcome closes or re-opens the circuit.
+- Metrics (prometheus, exposed on /metrics): queue wait, call latency,
+  outcomes and in-flight calls.
+
+Usage:
+    with llm_governor.slot() as call:   # raises LLMUnavailable -> use fallback
+        out = client.chat.completions.create(...)
+        call.ok()                       # latency measured up to here
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from ..settings import settings
+from .redis_cache import get_redis_client
+
+LLM_QUEUE_WAIT = Histogram(
+    "llm_queue_wait_seconds", "Time spent waiting for an LLM concurrency slot",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5),
+)
+LLM_CALL_LATENCY = Histogram(
+    "llm_call_seconds", "LLM call latency (to completion, or first token when streaming)",
+    buckets=(0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32),
+)
+LLM_CALLS = Counter("llm_calls_total", "LLM call outcomes", ["outcome"])  # ok|slow|error|shed|open
+LLM_INFLIGHT = Gauge("llm_inflight", "LLM calls currently in flight")
+
+
+class LLMUnavailable(Exception):
+    """No slot in time, or the circuit is open: caller should use its fallback."""
+
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failures: int, cooldown_seconds: float, slow_seconds: float) -> None:
+        self.failures = failures
+        self.cooldown_seconds = cooldown_seconds
+        self.slow_seconds = slow_seconds
+        self.state = self.CLOSED
+        self._consecutive = 0
+        self._opened_at = 0.0
+        self._probe_inflight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.cooldown_seconds:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._probe_inflight:
+                self._probe_inflight = True
+                return True
+            return False
+
+    def release_probe(self) -> None:
+        """A half-open probe that never reached upstream (shed) leaves the state unchanged."""
+        with self._lock:
+            self._probe_inflight = False
+
+    def record(self, ok: bool, latency: float) -> str:
+        """Returns the outcome label: ok | slow | error."""
+        outcome = "ok" if ok and latency <= self.slow_seconds else ("slow" if ok else "error")
+        with self._lock:
+            self._probe_inflight = False
+            if outcome == "ok":
+                self._consecutive = 0
+                self.state = self.CLOSED
+            else:
+                self._consecutive += 1
+                if self.state == self.HALF_OPEN or self._consecutive >= self.failures:
+                    self.state = self.OPEN
+                    self._opened_at = time.monotonic()
+        return outcome
+
+
+class _Call:
+    __slots__ = ("started", "latency")
+
+    def __init__(self) -> None:
+        self.started = time.monotonic()
+        self.latency: Optional[float] = None
+
+    def ok(self) -> None:
+        if self.latency is None:
+            self.latency = time.monotonic() - self.started
+
+
+class LLMGovernor:
+    def __init__(self, max_concurrency: int, queue_timeout_seconds: float, breaker: CircuitBreaker) -> None:
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.breaker = breaker
+        self._sem = threading.BoundedSemaphore(max(1, int(max_concurrency)))
+
+    @contextmanager
+    def slot(self) -> Iterator[_Call]:
+        if not self.breaker.allow():
+            LLM_CALLS.labels("open").inc()
+            raise LLMUnavailable("circuit open")
+
+        t0 = time.monotonic()
+        acquired = self._sem.acquire(timeout=self.queue_timeout_seconds)
+        LLM_QUEUE_WAIT.observe(time.monotonic() - t0)
+        if not acquired:
+            self.breaker.release_probe()
+            LLM_CALLS.labels("shed").inc()
+            raise LLMUnavailable("no LLM slot within queue timeout")
+
+        LLM_INFLIGHT.inc()
+        call = _Call()
+        recorded = False
+        try:
+            yield call
+        except Exception:
+            recorded = True
+            LLM_CALLS.labels(self.breaker.record(False, time.monotonic() - call.started)).inc()
+            raise
+        else:
+            call.ok()
+            LLM_CALL_LATENCY.observe(call.latency)
+            recorded = True
+            LLM_CALLS.labels(self.breaker.record(True, call.latency)).inc()
+        finally:
+            if not recorded:
+                # client went away mid-call (GeneratorExit / CancelledError): no verdict on
+                # upstream, but a half-open probe must not stay in flight forever
+                self.breaker.release_probe()
+            LLM_INFLIGHT.dec()
+            self._sem.release()
+
+
+llm_governor = LLMGovernor(
+    max_concurrency=settings.llm_max_concurrency,
+    queue_timeout_seconds=settings.llm_queue_timeout_seconds,
+    breaker=CircuitBreaker(
+        failures=settings.llm_breaker_failures,
+        cooldown_seconds=settings.llm_breaker_cooldown_seconds,
+        slow_seconds=settings.llm_breaker_slow_seconds,
+    ),
+)
+
+
+# ---------------------------------------------------------------------------
+# Draft cache: same appointment context + model + prompt => same draft
+# ---------------------------------------------------------------------------
+def draft_cache_key(context: Dict[str, Any], model: str, prompt_version: str) -> str:
+    canonical = json.dumps({"ctx": context, "model": model, "v": prompt_version},
+                           sort_keys=True, separators=(",", ":"), default=str)
+    return "scribe:draft:" + hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def cached_draft(key: str) -> Optional[str]:
+    try:
+        return get_redis_client().get(key)
+    except Exception:
+        return None
+
+
+def store_draft(key: str, draft: str) -> None:
+    try:
+        get_redis_client().setex(key, settings.scribe_draft_cache_ttl_seconds, draft)
+    except Exception:
+        pass
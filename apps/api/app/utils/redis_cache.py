@@ -12,7 +12,7 @@ class _InMemoryRedis:
 
     def __init__(self) -> None:
         self._data: dict[str, tuple[Any, Optional[float]]] = {}
-        self._lock = threading.Lock()
+        self._lock = threading.RLock()
 
     def _purge_expired(self, name: Optional[str] = None) -> None:
         now = time.monotonic()
@@ -35,6 +35,15 @@ class _InMemoryRedis:
         with self._lock:
             self._data[name] = (value, expires_at)
 
+    def set(self, name: str, value: Any, ex: Optional[int] = None, nx: bool = False) -> Optional[bool]:
+        self._purge_expired(name)
+        expires_at = time.monotonic() + int(ex) if ex else None
+        with self._lock:
+            if nx and name in self._data:
+                return None
+            self._data[name] = (value, expires_at)
+            return True
+
     def get(self, name: str) -> Optional[str]:
         self._purge_expired(name)
         with self._lock:
@@ -44,15 +53,140 @@ class _InMemoryRedis:
             value, _ = item
             return value
 
-    def delete(self, name: str) -> None:
+    def incr(self, name: str, amount: int = 1) -> int:
+        self._purge_expired(name)
         with self._lock:
-            self._data.pop(name, None)
+            value, expires_at = self._data.get(name, (0, None))
+            value = int(value) + int(amount)
+            self._data[name] = (str(value), expires_at)
+            return value
+
+    def delete(self, *names: str) -> int:
+        with self._lock:
+            return sum(1 for n in names if self._data.pop(n, None) is not None)
+
+    def expire(self, name: str, time_seconds: int) -> bool:
+        with self._lock:
+            item = self._data.get(name)
+            if item is None:
+                return False
+            self._data[name] = (item[0], time.monotonic() + int(time_seconds))
+            return True
+
+    # Hashes ----------------------------------------------------------------
+    def _container(self, name: str, factory):
+        self._purge_expired(name)
+        item = self._data.get(name)
+        if item is None:
+            item = (factory(), None)
+            self._data[name] = item
+        return item[0]
+
+    def hset(self, name: str, key: Optional[str] = None, value: Any = None, mapping: Optional[dict] = None) -> int:
+        with self._lock:
+            h = self._container(name, dict)
+            items = dict(mapping or {})
+            if key is not None:
+                items[key] = value
+            added = sum(1 for k in items if k not in h)
+            h.update({k: str(v) for k, v in items.items()})
+            return added
+
+    def hget(self, name: str, key: str) -> Optional[str]:
+        return self.hgetall(name).get(key)
+
+    def hincrby(self, name: str, key: str, amount: int = 1) -> int:
+        with self._lock:
+            h = self._container(name, dict)
+            h[key] = str(int(h.get(key, 0)) + int(amount))
+            return int(h[key])
+
+    def hgetall(self, name: str) -> dict:
+        self._purge_expired(name)
+        with self._lock:
+            item = self._data.get(name)
+            return dict(item[0]) if item else {}
+
+    # Lists -----------------------------------------------------------------
+    def rpush(self, name: str, *values: Any) -> int:
+        with self._lock:
+            lst = self._container(name, list)
+            lst.extend(str(v) for v in values)
+            return len(lst)
+
+    def lrange(self, name: str, start: int, end: int) -> list:
+        self._purge_expired(name)
+        with self._lock:
+            item = self._data.get(name)
+            lst = list(item[0]) if item else []
+        return lst[start:] if end == -1 else lst[start:end + 1]
+
+    # Sorted sets -----------------------------------------------------------
+    def zadd(self, name: str, mapping: dict) -> int:
+        with self._lock:
+            z = self._container(name, dict)
+            added = sum(1 for m in mapping if m not in z)
+            z.update({m: float(s) for m, s in mapping.items()})
+            return added
+
+    def zscore(self, name: str, member: str) -> Optional[float]:
+        with self._lock:
+            item = self._data.get(name)
+            return item[0].get(member) if item else None
+
+    def zrangebyscore(self, name: str, min: float, max: float, start: Optional[int] = None, num: Optional[int] = None) -> list:
+        with self._lock:
+            item = self._data.get(name)
+            members = sorted(((s, m) for m, s in (item[0] if item else {}).items() if float(min) <= s <= float(max)))
+        out = [m for _, m in members]
+        if start is not None and num is not None:
+            out = out[start:start + num]
+        return out
+
+    def zrem(self, name: str, *members: str) -> int:
+        with self._lock:
+            item = self._data.get(name)
+            if not item:
+                return 0
+            return sum(1 for m in members if item[0].pop(m, None) is not None)
+
+    def publish(self, channel: str, message: Any) -> int:
+        return 0  # no subscribers: waiters on the in-memory store poll instead
+
+    def pipeline(self, transaction: bool = True) -> "_InMemoryPipeline":
+        return _InMemoryPipeline(self)
 
     # Compatibility helpers -------------------------------------------------
     def ping(self) -> bool:  # pragma: no cover - identical to redis interface
         return True
 
 
+class _InMemoryPipeline:
+    """Queues calls and runs them on execute(), like redis-py's pipeline."""
+
+    def __init__(self, store: _InMemoryRedis) -> None:
+        self._store = store
+        self._calls: list = []
+
+    def __getattr__(self, name: str):
+        fn = getattr(self._store, name)
+
+        def _queue(*args, **kwargs):
+            self._calls.append((fn, args, kwargs))
+            return self
+        return _queue
+
+    def execute(self) -> list:
+        calls, self._calls = self._calls, []
+        return [fn(*a, **kw) for fn, a, kw in calls]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._calls = []
+
+
 _client: redis.Redis | _InMemoryRedis | None = None
 
 
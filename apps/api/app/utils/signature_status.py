@@ -0,0 +1,137 @@
+# app/utils/signature_status.py
+"""
+signature_requests status transitions + push notification.
+
+Writers (create endpoint, inbox worker) change status with `transition()` and,
+after committing, `publish_status()` on the Redis channel `signature:<request_id>`.
+Readers (long-poll / SSE endpoints) hold a `status_subscription()` while they wait,
+so the consent page learns about SIGNED the moment the worker commits instead of
+on its next poll.
+
+Without a reachable Redis (dev/test in-memory fallback) subscriptions degrade to a
+1s DB re-check, which keeps the endpoints correct, just not instant.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+from sqlalchemy import text
+
+from ..settings import settings
+from .redis_cache import _InMemoryRedis, get_redis_client
+
+PENDING, SIGNED, FAILED = "PENDING", "SIGNED", "FAILED"
+TERMINAL = frozenset({SIGNED, FAILED})
+POLL_FALLBACK_SECONDS = 1.0
+
+
+def channel(request_id: str) -> str:
+    return f"signature:{request_id}"
+
+
+def transition(db, request_id: str, status: str, appointment_id: Optional[int] = None,
+               document_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """
+    Upsert the request into `status` unless it is already terminal (SIGNED is final;
+    a late FAILED never overrides it). Returns the new row, or None when nothing changed.
+    Caller commits, then calls publish_status(row).
+    """
+    row = db.execute(
+        text("""
+          INSERT INTO signature_requests (request_id, appointment_id, status, document_id, created_at, updated_at)
+          VALUES (:rid, :aid, :st, :doc, NOW(), NOW())
+          ON CONFLICT (request_id) DO UPDATE
+             SET status = EXCLUDED.status,
+                 appointment_id = COALESCE(EXCLUDED.appointment_id, signature_requests.appointment_id),
+                 document_id = COALESCE(EXCLUDED.document_id, signature_requests.document_id),
+                 updated_at = NOW()
+           WHERE signature_requests.status <> 'SIGNED'
+             AND signature_requests.status IS DISTINCT FROM EXCLUDED.status
+          RETURNING request_id, appointment_id, status, document_id
+        """),
+        {"rid": request_id, "aid": appointment_id, "st": status, "doc": document_id},
+    ).mappings().first()
+    return dict(row) if row else None
+
+
+def publish_status(row: Optional[Dict[str, Any]]) -> None:
+    if not row:
+        return
+    try:
+        get_redis_client().publish(channel(row["request_id"]), json.dumps(row, default=str))
+    except Exception:
+        pass  # waiters fall back to their timeout re-check
+
+
+def read_status(db, request_id: str) -> Dict[str, Any]:
+    row = db.execute(
+        text("SELECT request_id, appointment_id, status, document_id "
+             "FROM signature_requests WHERE request_id = :rid"),
+        {"rid": request_id},
+    ).mappings().first()
+    # unknown ids stay PENDING: the provider's webhook may create the row later
+    return dict(row) if row else {"request_id": request_id, "status": PENDING}
+
+
+# ---------------------------------------------------------------------------
+# Subscriptions
+# ---------------------------------------------------------------------------
+_async_client = None
+
+
+def _get_async_client():
+    global _async_client
+    if _async_client is None:
+        import redis.asyncio as aioredis
+        _async_client = aioredis.from_url(settings.redis_url, decode_responses=True)
+    return _async_client
+
+
+class _PollingSubscription:
+    async def wait(self, timeout: float) -> None:
+        await asyncio.sleep(max(0.0, min(timeout, POLL_FALLBACK_SECONDS)))
+
+
+class _RedisSubscription:
+    def __init__(self, pubsub) -> None:
+        self._pubsub = pubsub
+
+    async def wait(self, timeout: float) -> None:
+        """Returns on the next published status (or timeout); the caller re-reads the row."""
+        try:
+            await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=max(0.0, timeout))
+        except Exception:
+            await asyncio.sleep(max(0.0, min(timeout, POLL_FALLBACK_SECONDS)))
+
+
+@asynccontextmanager
+async def status_subscription(request_id: str) -> AsyncIterator[Any]:
+    """
+    Subscribe *before* reading the current status so a transition committed between
+    the read and the wait is never missed.
+    """
+    if isinstance(get_redis_client(), _InMemoryRedis):
+        yield _PollingSubscription()
+        return
+    pubsub = None
+    try:
+        pubsub = _get_async_client().pubsub()
+        await pubsub.subscribe(channel(request_id))
+    except Exception:
+        pubsub = None
+    try:
+        yield _RedisSubscription(pubsub) if pubsub is not None else _PollingSubscription()
+    finally:
+        if pubsub is not None:
+            try:
+                await pubsub.unsubscribe(channel(request_id))
+                await pubsub.aclose()
+            except Exception:
+                pass
+
+
+def sse_event(data: Dict[str, Any], event: str = "status") -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
@@ -0,0 +1,12 @@
+# apps/api/app/x12/__init__.py
+from .envelope import next_control_number
+from .parser import SegmentReader, X12Error, check_envelope, parse_837
+from .writer import (
+    Claim837, Writer837P, build_interchange, claim_from_row, spool_interchange,
+    write_to_storage,
+)
+
+__all__ = [
+    "Claim837", "SegmentReader", "Writer837P", "X12Error", "build_interchange", "check_envelope",
+    "claim_from_row", "next_control_number", "parse_837", "spool_interchange", "write_to_storage",
+]
@@ -0,0 +1,52 @@
+# apps/api/app/x12/envelope.py
+"""
+X12 separators, segment formatting and interchange control numbers.
+
+Control numbers (ISA13 / GS06) come from the x12_control_seq Postgres sequence
+(migration 0013), so every API process and worker draws from one counter and a
+number is never reused within its 9-digit range.
+"""
+from __future__ import annotations
+
+from typing import Any
+
+from sqlalchemy import text
+
+SEG = "~"
+ELEM = "*"
+SUB = ":"
+REP = "^"
+VERSION = "005010X222A1"
+
+# separators and the segment terminator are not allowed inside element data
+_UNSAFE = str.maketrans({c: " " for c in "~*:^\r\n"})
+
+
+def next_control_number(db) -> int:
+    """ISA13/GS06 control number (1..999999999, cycles)."""
+    return int(db.execute(text("SELECT nextval('x12_control_seq')")).scalar())
+
+
+def clean(value: Any) -> str:
+    return "" if value is None else str(value).translate(_UNSAFE).strip()
+
+
+def seg(*elements: Any) -> str:
+    """One segment; trailing empty elements are dropped as X12 requires."""
+    parts = [e if type(e) is Composite else ("" if e is None else str(e).translate(_UNSAFE).strip())
+             for e in elements]
+    while len(parts) > 1 and parts[-1] == "":
+        parts.pop()
+    return ELEM.join(parts) + SEG
+
+
+class Composite(str):
+    """Pre-joined composite element (e.g. HC:99213) that seg() must not sanitise."""
+
+    @classmethod
+    def of(cls, *components: Any) -> "Composite":
+        return cls(SUB.join(clean(c) for c in components))
+
+
+def money(cents: int) -> str:
+    return f"{int(cents) / 100:.2f}"
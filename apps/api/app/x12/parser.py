@@ -0,0 +1,143 @@
+# apps/api/app/x12/parser.py
+"""
+Streaming X12 reader.
+
+SegmentReader takes the separators from the fixed-width ISA header (element
+separator at offset 3, component separator at 104, segment terminator at 105)
+and then yields one segment (list of elements) at a time from fixed-size reads,
+so a file of any size is parsed in constant memory. Line breaks between
+segments are ignored.
+
+check_envelope() validates control numbers and counts (ISA/IEA, GS/GE, ST/SE)
+as segments stream past; parse_837() builds on it for round-trip checks of the
+writer.
+"""
+from __future__ import annotations
+
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, TextIO, Union
+
+CHUNK = 64 * 1024
+
+
+class X12Error(ValueError):
+    pass
+
+
+class SegmentReader:
+    def __init__(self, fp: Union[TextIO, BinaryIO], chunk_size: int = CHUNK) -> None:
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.element_sep = "*"
+        self.component_sep = ":"
+        self.terminator = "~"
+
+    def _read(self, n: int) -> str:
+        data = self.fp.read(n)
+        return data.decode("ascii", "replace") if isinstance(data, bytes) else data
+
+    def __iter__(self) -> Iterator[List[str]]:
+        head = self._read(max(self.chunk_size, 256)).lstrip()  # ISA is 106 chars
+        if not head.startswith("ISA") or len(head) < 106:
+            raise X12Error("not an X12 interchange (missing ISA header)")
+        self.element_sep, self.component_sep, self.terminator = head[3], head[104], head[105]
+
+        buf = head
+        while True:
+            parts = buf.split(self.terminator)
+            buf = parts.pop()
+            for raw in parts:
+                raw = raw.strip()
+                if raw:
+                    yield raw.split(self.element_sep)
+            chunk = self._read(self.chunk_size)
+            if not chunk:
+                break
+            buf += chunk
+        if buf.strip():
+            raise X12Error("truncated segment at end of file")
+
+    def components(self, element: str) -> List[str]:
+        return element.split(self.component_sep)
+
+
+def check_envelope(reader: SegmentReader) -> Iterator[List[str]]:
+    """Pass segments through, raising X12Error on any envelope count/control mismatch."""
+    isa: Optional[str] = None
+    gs: Optional[str] = None
+    st: Optional[str] = None
+    groups = sets = seg_count = 0
+    for s in reader:
+        tag = s[0]
+        if st is not None:
+            seg_count += 1
+        if tag == "ISA":
+            isa, groups = s[13], 0
+        elif tag == "GS":
+            gs, sets = s[6], 0
+            groups += 1
+        elif tag == "ST":
+            st, seg_count = s[2], 1
+            sets += 1
+        elif tag == "SE":
+            if st is None or s[2] != st:
+                raise X12Error(f"SE02 {s[2]} does not match ST02 {st}")
+            if int(s[1]) != seg_count:
+                raise X12Error(f"SE01 says {s[1]} segments, set {st} has {seg_count}")
+            st = None
+        elif tag == "GE":
+            if s[2] != gs:
+                raise X12Error(f"GE02 {s[2]} does not match GS06 {gs}")
+            if int(s[1]) != sets:
+                raise X12Error(f"GE01 says {s[1]} sets, group has {sets}")
+            gs = None
+        elif tag == "IEA":
+            if s[2] != isa:
+                raise X12Error(f"IEA02 {s[2]} does not match ISA13 {isa}")
+            if int(s[1]) != groups:
+                raise X12Error(f"IEA01 says {s[1]} groups, interchange has {groups}")
+            isa = None
+        yield s
+    if isa is not None or gs is not None or st is not None:
+        raise X12Error("interchange not closed (missing SE/GE/IEA)")
+
+
+def _cents(amount: str) -> int:
+    return int(round(float(amount or 0) * 100))
+
+
+def parse_837(fp: Union[TextIO, BinaryIO]) -> Iterator[Dict[str, Any]]:
+    """Yield one dict per CLM (claim_id, total_cents, diag, svc, subscriber, control)."""
+    reader = SegmentReader(fp)
+    claim: Optional[Dict[str, Any]] = None
+    control = None
+    subscriber: Dict[str, Any] = {}
+    for s in check_envelope(reader):
+        tag = s[0]
+        if tag == "ISA":
+            control = int(s[13])
+        elif tag == "NM1" and s[1] == "IL":
+            subscriber = {"last_name": s[3], "first_name": s[4] if len(s) > 4 else "",
+                          "member_id": s[9] if len(s) > 9 else None}
+        elif tag == "CLM":
+            if claim:
+                yield claim
+            claim = {"claim_id": int(s[1]), "total_cents": _cents(s[2]), "diag": [], "svc": [],
+                     "mrn": None, "control": control, **subscriber}
+        elif claim is None:
+            continue
+        elif tag == "REF" and s[1] == "EA":
+            claim["mrn"] = s[2]
+        elif tag == "HI":
+            claim["diag"] += [reader.components(e)[1] for e in s[1:] if e]
+        elif tag == "SV1":
+            units = int(float(s[4] or 1))
+            line_cents = _cents(s[2])
+            claim["svc"].append({"cpt": reader.components(s[1])[1], "units": units,
+                                 "charge_cents": line_cents // units})
+        elif tag == "DTP" and s[1] == "472":
+            claim["svc"][-1]["dos"] = s[3]
+        elif tag in ("HL", "SE"):
+            yield claim
+            claim = None
+    if claim:
+        yield claim
@@ -0,0 +1,198 @@
+# apps/api/app/x12/remit.py
+"""
+X12 835 (remittance advice) streaming parser.
+
+One RemitItem per CLP (claim payment) loop:
+  CLP01 patient control number  -> our claims.id (what we sent in CLM01)
+  CLP02 claim status            -> 1/2/3 processed, 4 denied, 22 reversal (claim_status())
+  CLP03/04/05 charge / paid / patient responsibility
+  CLP07 payer claim control number
+  first CAS (claim or service level) -> denial_code "GROUP-REASON", e.g. "CO-97"
+  NM1*QC/IL 09, DTM*232              -> member id, service date (reconciliation)
+parse_835() narrows that to RemitLine (CLP01 taken as claims.id) for staging.
+Envelope counts are checked on the way through (check_envelope), so a
+truncated or spliced file fails instead of half-applying.
+
+build_835() writes the same shape; the mock billing adapter, tests and the
+benchmark use it to produce realistic files.
+"""
+from __future__ import annotations
+
+import io
+from datetime import datetime
+from typing import BinaryIO, Iterable, Iterator, NamedTuple, Optional, TextIO, Union
+
+from .envelope import ELEM, REP, SEG, SUB, money, seg
+from .parser import SegmentReader, X12Error, check_envelope
+
+DENIED_STATUS = "4"
+REVERSAL_STATUS = "22"
+
+
+class RemitLine(NamedTuple):
+    claim_id: int
+    status_code: str
+    charge_cents: int
+    paid_cents: int
+    patient_resp_cents: int
+    payer_claim_ref: Optional[str]
+    denial_code: Optional[str]
+
+
+def _cents(amount: str) -> int:
+    return int(round(float(amount or 0) * 100))
+
+
+class RemitItem(NamedTuple):
+    """A CLP loop as the payer sent it, before it is resolved to one of our claims."""
+    pcn: str                      # CLP01 patient control number
+    status_code: str
+    charge_cents: int
+    paid_cents: int
+    patient_resp_cents: int
+    payer_claim_ref: Optional[str]
+    denial_code: Optional[str]
+    member_id: Optional[str] = None     # NM1*QC / NM1*IL 09
+    service_date: Optional[str] = None  # DTM*232 (or first DTM*472), CCYYMMDD
+
+    def resolved(self, claim_id: int) -> RemitLine:
+        return RemitLine(claim_id, self.status_code, self.charge_cents, self.paid_cents,
+                         self.patient_resp_cents, self.payer_claim_ref, self.denial_code)
+
+
+def parse_835_items(fp: Union[TextIO, BinaryIO]) -> Iterator[RemitItem]:
+    """Stream every CLP loop with the identifiers reconciliation needs."""
+    cur: Optional[dict] = None
+    for s in check_envelope(SegmentReader(fp)):
+        tag = s[0]
+        if tag == "CLP":
+            if cur is not None:
+                yield RemitItem(**cur)
+            cur = {
+                "pcn": s[1],
+                "status_code": s[2],
+                "charge_cents": _cents(s[3]),
+                "paid_cents": _cents(s[4]) if len(s) > 4 else 0,
+                "patient_resp_cents": _cents(s[5]) if len(s) > 5 and s[5] else 0,
+                "payer_claim_ref": s[7] if len(s) > 7 and s[7] else None,
+                "denial_code": None,
+            }
+        elif cur is None:
+            continue
+        elif tag == "CAS" and cur["denial_code"] is None and len(s) > 2:
+            cur["denial_code"] = f"{s[1]}-{s[2]}"
+        elif tag == "NM1" and s[1] in ("QC", "IL") and len(s) > 9 and s[9] and not cur.get("member_id"):
+            cur["member_id"] = s[9]
+        elif tag == "DTM" and len(s) > 2 and (s[1] == "232" or (s[1] == "472" and not cur.get("service_date"))):
+            cur["service_date"] = s[2]
+        elif tag in ("SE", "LX"):
+            yield RemitItem(**cur)
+            cur = None
+    if cur is not None:
+        raise X12Error("835 ended inside a CLP loop")
+
+
+def parse_835(fp: Union[TextIO, BinaryIO], unmatched: Optional[list] = None) -> Iterator[RemitLine]:
+    """
+    Stream RemitLines keyed by CLP01 as our claim id. CLP01 values that are not
+    numeric are appended to `unmatched` (when given) instead of aborting the file;
+    app/reconcile.py resolves those by payer identifiers instead.
+    """
+    for item in parse_835_items(fp):
+        try:
+            claim_id = int(item.pcn)
+        except ValueError:
+            if unmatched is not None:
+                unmatched.append(item.pcn)
+            continue
+        yield item.resolved(claim_id)
+
+
+def build_835(lines: Iterable[Union[RemitLine, RemitItem]], control: int, now: Optional[datetime] = None,
+              payer: str = "PAYERID", payee: str = "SENDER") -> str:
+    """Single-transaction 835 for the given payments (test/mock helper)."""
+    now = now or datetime.utcnow()
+    lines = list(lines)
+    ctl = f"{int(control):09d}"
+    body = [
+        seg("BPR", "I", money(sum(l.paid_cents for l in lines)), "C", "ACH", "CCP", "", "", "", "", "", "",
+            "", "", "", f"{now:%Y%m%d}"),
+        seg("TRN", "1", f"EFT{control}", "1" + payee[:9]),
+        seg("N1", "PR", "DEMO PAYER"),
+        seg("N1", "PE", "MAIN CLINIC", "XX", "1234567893"),
+        seg("LX", "1"),
+    ]
+    for l in lines:
+        pcn = l.pcn if isinstance(l, RemitItem) else l.claim_id
+        body.append(seg("CLP", pcn, l.status_code, money(l.charge_cents), money(l.paid_cents),
+                        money(l.patient_resp_cents), "12", l.payer_claim_ref or ""))
+        if l.denial_code:
+            group, _, reason = l.denial_code.partition("-")
+            body.append(seg("CAS", group, reason, money(l.charge_cents - l.paid_cents)))
+        if getattr(l, "member_id", None):
+            body.append(seg("NM1", "QC", "1", "", "", "", "", "", "MI", l.member_id))
+        if getattr(l, "service_date", None):
+            body.append(seg("DTM", "232", l.service_date))
+    out = [
+        ELEM.join(["ISA", "00", " " * 10, "00", " " * 10, "ZZ", f"{payer:<15}"[:15], "ZZ", f"{payee:<15}"[:15],
+                   f"{now:%y%m%d}", f"{now:%H%M}", REP, "00501", ctl, "0", "T", SUB]) + SEG,
+        seg("GS", "HP", payer, payee, f"{now:%Y%m%d}", f"{now:%H%M}", int(control), "X", "005010X221A1"),
+        seg("ST", "835", "0001"),
+        *body,
+        seg("SE", len(body) + 2, "0001"),
+        seg("GE", "1", int(control)),
+        seg("IEA", "1", ctl),
+    ]
+    return "\n".join(out)
+
+
+def claim_status(line: Union[RemitLine, RemitItem]) -> str:
+    """
+    claims.status a CLP loop moves the claim to:
+      22 (reversal of a previous payment)       -> SUBMITTED, back in AR awaiting re-adjudication
+      4 (denied), or $0 paid with a CO adjustment -> DENIED
+      anything else processed (1/2/3/19/20/21...) -> PAID, including $0 paid when the whole
+                                                   amount went to patient responsibility (PR)
+    """
+    if line.status_code == REVERSAL_STATUS:
+        return "SUBMITTED"
+    if line.status_code == DENIED_STATUS:
+        return "DENIED"
+    if line.paid_cents <= 0 and (line.denial_code or "").upper().startswith("CO-"):
+        return "DENIED"
+    return "PAID"
+
+
+def staging_csv(lines: Iterable[RemitLine]) -> Iterator[str]:
+    """CSV rows for COPY ... FROM STDIN (FORMAT csv); empty field = NULL."""
+    for n, l in enumerate(lines, start=1):
+        yield (f"{n},{l.claim_id},{l.status_code},{l.charge_cents},{l.paid_cents},{l.patient_resp_cents},"
+               f"{_csv(l.payer_claim_ref)},{_csv(l.denial_code)},{claim_status(l)}\n")
+
+
+def _csv(value: Optional[str]) -> str:
+    if not value:
+        return ""
+    return '"' + value.replace('"', '""') + '"' if any(c in value for c in ',"\n\r') else value
+
+
+class IterReader(io.RawIOBase):
+    """File-like view over an iterator of str, for psycopg2 copy_expert()."""
+
+    def __init__(self, chunks: Iterable[str]) -> None:
+        self._it = iter(chunks)
+        self._buf = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while len(self._buf) < len(b):
+            try:
+                self._buf += next(self._it).encode("utf-8")
+            except StopIteration:
+                break
+        n = min(len(b), len(self._buf))
+        b[:n] = self._buf[:n]
+        self._buf = self._buf[n:]
+        return n
@@ -0,0 +1,271 @@
+# apps/api/app/x12/writer.py
+"""
+Streaming X12 837P (005010X222A1) writer.
+
+Segments are written to a text stream as they are produced, so a batch of many
+thousand claims never exists in memory as one string; spool_interchange() writes
+to a temp file and write_to_storage() hands that to the storage backend
+(multipart upload on S3). claims.submit_batch archives every interchange it
+sends this way, under x12/837/<control>.x12.
+
+Layout per transaction set (one ST/SE holds up to `max_claims_per_set` claims):
+  ST, BHT
+  1000A submitter   NM1*41, PER
+  1000B receiver    NM1*40
+  2000A billing     HL*n**20*1, NM1*85, N3, N4, REF*EI
+  per claim:
+    2000B subscriber  HL*n*<2000A>*22*0, SBR
+    2010BA            NM1*IL, N3, N4, DMG (required: the subscriber is the patient)
+    2010BB payer      NM1*PR
+    2300 claim        CLM, REF*EA (MRN), HI
+    2400 service      LX, SV1, DTP*472
+  SE
+Counts are kept while writing: SE01 (segments in the set, ST..SE), GE01 (sets),
+IEA01 (groups); HL ids restart at 1 in every set.
+"""
+from __future__ import annotations
+
+import io
+import tempfile
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import IO, Any, Dict, Iterable, Iterator, NamedTuple, Optional, Sequence, TextIO, Tuple
+
+from ..settings import settings
+from .envelope import ELEM, REP, SEG, SUB, VERSION, Composite, clean, money, seg
+
+MAX_CLAIMS_PER_SET = 5000  # implementation guide recommendation
+
+
+class Claim837(NamedTuple):
+    claim_id: int
+    payload: Dict[str, Any]
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    member_id: Optional[str] = None
+    mrn: Optional[str] = None
+    subscriber: Optional[Dict[str, Any]] = None  # street, city, state, zip, dob, gender
+
+
+_SUBSCRIBER_FIELDS = ("street", "city", "state", "zip", "dob", "gender")
+
+
+def claim_from_row(row: Any) -> Claim837:
+    """claims LEFT JOIN patients row (mapping) -> Claim837."""
+    payload = row["payload_json"] or {}
+    # patients has no address/demographics; they travel in the claim payload,
+    # either as payload["subscriber"] or as top-level keys
+    sub = dict(payload.get("subscriber") or {})
+    for f in _SUBSCRIBER_FIELDS:
+        if sub.get(f) is None and payload.get(f) is not None:
+            sub[f] = payload[f]
+    return Claim837(
+        claim_id=int(row["id"]),
+        payload=payload,
+        first_name=row.get("first_name"),
+        last_name=row.get("last_name"),
+        member_id=payload.get("member_id") or row.get("mrn"),
+        mrn=row.get("mrn"),
+        subscriber=sub or None,
+    )
+
+
+def _date8(value: Any) -> Optional[str]:
+    if isinstance(value, (date, datetime)):
+        return f"{value:%Y%m%d}"
+    if isinstance(value, str) and value[:10].replace("-", "").isdigit():
+        return value[:10].replace("-", "")
+    return None
+
+
+def _d8(value: Any, default: datetime) -> str:
+    return _date8(value) or f"{default:%Y%m%d}"
+
+
+_GENDERS = {"F": "F", "FEMALE": "F", "M": "M", "MALE": "M"}
+
+
+class Writer837P:
+    def __init__(
+        self,
+        out: TextIO,
+        control: int,
+        now: Optional[datetime] = None,
+        *,
+        sender: Optional[str] = None,
+        receiver: Optional[str] = None,
+        usage: Optional[str] = None,
+        max_claims_per_set: int = MAX_CLAIMS_PER_SET,
+        newline: str = "\n",
+    ) -> None:
+        self.out = out
+        self.control = int(control)
+        self.now = now or datetime.utcnow()
+        self.sender = sender or settings.x12_sender_id
+        self.receiver = receiver or settings.x12_receiver_id
+        self.usage = usage or settings.x12_usage
+        self.max_claims_per_set = max(1, int(max_claims_per_set))
+        self.newline = newline
+
+        self.claims = 0
+        self.sets = 0
+        self._set_segments = 0
+        self._set_claims = 0
+        self._hl = 0
+        self._billing_hl = 0
+        self._open = False
+        self._closed = False
+
+    # -- low level ---------------------------------------------------------------
+    def _raw(self, segment: str) -> None:
+        self.out.write(segment)
+        self.out.write(self.newline)
+
+    def _w(self, *elements: Any) -> None:
+        self._raw(seg(*elements))
+        self._set_segments += 1
+
+    def _w_seg(self, segment: str) -> None:
+        self._raw(segment)
+        self._set_segments += 1
+
+    def _st(self) -> str:
+        return f"{self.sets:04d}"
+
+    # -- envelope ----------------------------------------------------------------
+    def begin(self) -> "Writer837P":
+        ctl = f"{self.control:09d}"
+        self._raw(ELEM.join([
+            "ISA", "00", " " * 10, "00", " " * 10,
+            "ZZ", f"{clean(self.sender):<15}"[:15], "ZZ", f"{clean(self.receiver):<15}"[:15],
+            f"{self.now:%y%m%d}", f"{self.now:%H%M}", REP, "00501", ctl, "0", self.usage[:1], SUB,
+        ]) + SEG)
+        self._raw(seg("GS", "HC", self.sender, self.receiver, f"{self.now:%Y%m%d}", f"{self.now:%H%M}",
+                      self.control, "X", VERSION))
+        # per-claim segments that never change within an interchange
+        self._sbr = seg("SBR", "P", "18", "", "", "", "", "", "", "CI")
+        self._payer = seg("NM1", "PR", "2", settings.x12_payer_name, "", "", "", "", "PI", self.receiver)
+        self._open = True
+        return self
+
+    def _open_set(self) -> None:
+        self.sets += 1
+        self._set_segments = 0
+        self._set_claims = 0
+        self._hl = 0
+        self._w("ST", "837", self._st(), VERSION)
+        self._w("BHT", "0019", "00", f"{self.control}-{self.sets}", f"{self.now:%Y%m%d}", f"{self.now:%H%M}", "CH")
+        # 1000A submitter / 1000B receiver
+        self._w("NM1", "41", "2", settings.x12_submitter_name, "", "", "", "", "46", self.sender)
+        self._w("PER", "IC", settings.x12_submitter_name, "TE", settings.x12_submitter_phone)
+        self._w("NM1", "40", "2", settings.x12_payer_name, "", "", "", "", "46", self.receiver)
+        # 2000A billing provider
+        self._hl += 1
+        self._billing_hl = self._hl
+        self._w("HL", self._hl, "", "20", "1")
+        self._w("NM1", "85", "2", settings.x12_billing_name, "", "", "", "", "XX", settings.x12_billing_npi)
+        self._w("N3", settings.x12_billing_street)
+        self._w("N4", settings.x12_billing_city, settings.x12_billing_state, settings.x12_billing_zip)
+        self._w("REF", "EI", settings.x12_billing_tax_id)
+
+    def _close_set(self) -> None:
+        self._w("SE", self._set_segments + 1, self._st())
+        self._set_claims = 0
+
+    # -- claims ------------------------------------------------------------------
+    def write_claim(self, claim: Claim837) -> None:
+        if not self._open:
+            self.begin()
+        if self._set_claims == 0 or self._set_claims >= self.max_claims_per_set:
+            if self._set_claims:
+                self._close_set()
+            self._open_set()
+
+        p = claim.payload or {}
+        svc = p.get("svc") or []
+        lines = [(s, max(1, int(s.get("units", 1) or 1))) for s in svc]
+        total = sum(int(s.get("charge_cents", 0)) * u for s, u in lines)
+
+        # 2000B subscriber (patient is the subscriber)
+        self._hl += 1
+        self._w("HL", self._hl, self._billing_hl, "22", "0")
+        self._w_seg(self._sbr)
+        self._w("NM1", "IL", "1", claim.last_name or "UNKNOWN", claim.first_name or "", "", "", "",
+                "MI", claim.member_id or f"C{claim.claim_id}")
+        sub = claim.subscriber or {}
+        self._w("N3", sub.get("street") or "UNKNOWN")
+        self._w("N4", sub.get("city") or "UNKNOWN", sub.get("state") or "", sub.get("zip") or "")
+        dob = _date8(sub.get("dob"))
+        if dob:
+            self._w("DMG", "D8", dob, _GENDERS.get(str(sub.get("gender") or "").upper(), "U"))
+        self._w_seg(self._payer)
+        # 2300 claim
+        self._w("CLM", claim.claim_id, money(total), "", "", Composite.of("11", "B", "1"), "Y", "A", "Y", "Y")
+        if claim.mrn:
+            self._w("REF", "EA", claim.mrn)
+        diag = [str(d).replace(".", "") for d in (p.get("diag") or [])][:12]
+        if diag:
+            self._w("HI", *[Composite.of("ABK" if i == 0 else "ABF", d) for i, d in enumerate(diag)])
+        # 2400 service lines
+        dos = _d8(p.get("dos") or p.get("service_date"), self.now)
+        for n, (s, units) in enumerate(lines, start=1):
+            self._w("LX", n)
+            self._w("SV1", Composite.of("HC", s.get("cpt", "")), money(int(s.get("charge_cents", 0)) * units),
+                    "UN", units, "", "", Composite.of("1"))
+            self._w("DTP", "472", "D8", dos)
+
+        self._set_claims += 1
+        self.claims += 1
+
+    def write_all(self, claims: Iterable[Claim837]) -> int:
+        for c in claims:
+            self.write_claim(c)
+        return self.claims
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        if not self._open:
+            self.begin()
+        if self._set_claims:
+            self._close_set()
+        self._raw(seg("GE", self.sets, self.control))
+        self._raw(seg("IEA", "1", f"{self.control:09d}"))
+        self._closed = True
+
+    def __enter__(self) -> "Writer837P":
+        return self.begin()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+
+
+def build_interchange(claims: Sequence[Claim837], control: int, now: Optional[datetime] = None, **kw: Any) -> str:
+    """Small batches (single submit, tests): the whole interchange as a string."""
+    buf = io.StringIO()
+    with Writer837P(buf, control, now, **kw) as w:
+        w.write_all(claims)
+    return buf.getvalue()
+
+
+@contextmanager
+def spool_interchange(claims: Iterable[Claim837], control: int, **kw: Any) -> Iterator[Tuple[IO[bytes], int]]:
+    """Write the interchange to a temp file -> (binary file at offset 0, claims written)."""
+    with tempfile.TemporaryFile() as raw:
+        text = io.TextIOWrapper(raw, encoding="ascii", errors="replace", newline="")
+        with Writer837P(text, control, **kw) as w:
+            w.write_all(claims)
+        text.flush()
+        text.detach()
+        raw.seek(0)
+        yield raw, w.claims
+
+
+def write_to_storage(key: str, claims: Iterable[Claim837], control: int, **kw: Any) -> Tuple[str, str, int]:
+    """Stream a large batch to object storage -> (url, sha256, claims written)."""
+    from ..storage import get_storage
+
+    with spool_interchange(claims, control, **kw) as (raw, n):
+        url, sha = get_storage().put_file(key, raw, "application/edi-x12")
+    return url, sha, n
@@ -0,0 +1,52 @@
+"""
+Intake validation throughput (single core).
+
+    cd apps/api && python bench/bench_intake_validation.py [n]
+
+Target: >= 10k submissions/sec/core for the default 3-form set.
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.intake_validation import compile_form_set  # noqa: E402
+from app.routers.intake import FORMS  # noqa: E402
+
+
+def _submissions(n: int):
+    rnd = random.Random(7)
+    out = []
+    for i in range(n):
+        a = {
+            "1.full_name": f"Patient {i}",
+            "1.dob": "1980-01-01",
+            "1.email": f"p{i}@example.com",
+            "2.insurer": "ACME",
+            "2.insurance_number": f"M{i:08d}",
+            "3.has_fever": rnd.random() < 0.2,
+            "3.medications": "none",
+        }
+        if rnd.random() < 0.1:
+            a["1.full_name"] = ""  # ~10% invalid
+        out.append(a)
+    return out
+
+
+def main(n: int = 100_000) -> None:
+    t0 = time.perf_counter()
+    validate = compile_form_set(FORMS)
+    compile_ms = (time.perf_counter() - t0) * 1000
+
+    subs = _submissions(n)
+    t0 = time.perf_counter()
+    invalid = sum(1 for a in subs if validate(a))
+    dt = time.perf_counter() - t0
+    print(f"compile: {compile_ms:.2f} ms")
+    print(f"validated {n} submissions in {dt:.3f}s -> {n / dt:,.0f}/s ({invalid} invalid)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,58 @@
+"""
+835 ingest throughput. Without a database: parse + CSV encoding (everything
+before COPY). With --db: the full ingest_835_stream() against DATABASE_URL,
+rolled back at the end (claims ids 1..n should exist to exercise the UPDATE).
+
+    cd apps/api && python bench/bench_remit_835.py [lines] [--db]
+"""
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.x12.remit import IterReader, RemitLine, build_835, parse_835, staging_csv  # noqa: E402
+
+
+def lines(n):
+    for i in range(1, n + 1):
+        if i % 10 == 0:
+            yield RemitLine(i, "4", 12500, 0, 0, f"PCN{i}", "CO-97")
+        else:
+            yield RemitLine(i, "1", 12500, 10000, 2500, f"PCN{i}", None)
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    n = int(args[0]) if args else 50_000
+    edi = build_835(lines(n), 1)
+    mb = len(edi) / 1e6
+
+    t0 = time.perf_counter()
+    reader = IterReader(staging_csv(parse_835(io.StringIO(edi))))
+    size = 0
+    while True:
+        chunk = reader.read(8192)
+        if not chunk:
+            break
+        size += len(chunk)
+    dt = time.perf_counter() - t0
+    print(f"{n} CLP lines, {mb:.1f} MB 835 -> {size / 1e6:.1f} MB COPY stream")
+    print(f"parse + encode: {dt:.2f}s ({n / dt:,.0f} lines/s)")
+
+    if "--db" in sys.argv:
+        from app.db import SessionLocal
+        from app.tasks.claims import ingest_835_stream
+
+        db = SessionLocal()
+        try:
+            stats = ingest_835_stream(db, io.StringIO(edi), "bench")
+            print(f"full ingest: {stats}")
+        finally:
+            db.rollback()
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Per-request cost of the DDL the routers used to run, vs. the plain query they now run.
+
+    cd apps/api && DATABASE_URL=postgresql+psycopg2://... python bench/bench_request_ddl.py [n]
+
+"before" replays the old per-request preamble of GET /v1/coding/cases
+(_ensure_claims_schema: 1 CREATE + 10 ALTER TABLE ... IF NOT EXISTS + commit)
+followed by the worklist query; "after" runs only the query. Needs a migrated DB.
+"""
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text  # noqa: E402
+
+from app.db import SessionLocal  # noqa: E402
+
+OLD_PREAMBLE = [
+    "CREATE TABLE IF NOT EXISTS claims (id SERIAL PRIMARY KEY)",
+    "ALTER TABLE claims ADD COLUMN IF NOT EXISTS encounter_id TEXT",
+    "ALTER TABLE claims ADD COLUMN IF NOT EXISTS appointment_id INT",
+    "ALTER TABLE claims ADD COLUMN IF NOT EXISTS patient_id INT REFERENCES patients(id)",
+    "ALTER TABLE claims ADD COLUMN IF NOT EXISTS status TEXT NOT NULL DEFAULT 'NEW'",
+    "ALTER TABLE claims ADD COLUMN IF NOT EXISTS total_cents INT NOT NULL DEFAULT 0",
+    "ALTER TABLE claims ADD COLUMN IF NOT EXISTS payload_json JSON NOT NULL DEFAULT '{}'::json",
+    "ALTER TABLE claims ADD COLUMN IF NOT EXISTS payer_ref TEXT",
+    "ALTER TABLE claims ADD COLUMN IF NOT EXISTS last_submit_at TIMESTAMP",
+    "ALTER TABLE claims ADD COLUMN IF NOT EXISTS clearinghouse_resp JSON",
+    "ALTER TABLE claims ADD COLUMN IF NOT EXISTS created_at TIMESTAMP NOT NULL DEFAULT NOW()",
+]
+
+QUERY = text(
+    "SELECT id, encounter_id, appointment_id, status, payer_ref, total_cents, payload_json, updated_at "
+    "FROM claims WHERE status IN ('NEW','SUBMITTED','DENIED','REJECTED') ORDER BY updated_at DESC LIMIT 50"
+)
+
+
+def _run(n: int, with_ddl: bool) -> list:
+    samples = []
+    db = SessionLocal()
+    try:
+        for _ in range(n):
+            t0 = time.perf_counter()
+            if with_ddl:
+                for stmt in OLD_PREAMBLE:
+                    db.execute(text(stmt))
+                db.commit()
+            db.execute(QUERY).all()
+            db.rollback()
+            samples.append((time.perf_counter() - t0) * 1000)
+    finally:
+        db.close()
+    return samples
+
+
+def _report(label: str, s: list) -> None:
+    s = sorted(s)
+    p95 = s[int(len(s) * 0.95) - 1]
+    print(f"{label:7s} mean={statistics.mean(s):7.3f}ms  p50={statistics.median(s):7.3f}ms  p95={p95:7.3f}ms")
+
+
+def main(n: int = 500) -> None:
+    _run(20, True)  # warm up connection + catalog cache
+    before = _run(n, True)
+    after = _run(n, False)
+    _report("before", before)
+    _report("after", after)
+    print(f"saved   {statistics.mean(before) - statistics.mean(after):.3f}ms/request "
+          f"({len(OLD_PREAMBLE)} DDL statements + 1 commit)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
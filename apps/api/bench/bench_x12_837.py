@@ -0,0 +1,49 @@
+"""
+837P writer/parser throughput in claims per second, streaming to a temp file
+(the same path write_to_storage() takes before the upload). No database needed.
+
+    cd apps/api && python bench/bench_x12_837.py [claims]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.x12 import Claim837, Writer837P, parse_837  # noqa: E402
+
+
+def claims(n):
+    for i in range(n):
+        yield Claim837(
+            claim_id=i + 1,
+            payload={"svc": [{"cpt": "99213", "units": 1, "charge_cents": 12500},
+                             {"cpt": "87880", "units": 1, "charge_cents": 1550}],
+                     "diag": ["J06.9", "R05.1"], "dos": "2025-03-10"},
+            first_name="ADA", last_name="LOVELACE", member_id=f"M{i:07d}", mrn=f"MRN{i:07d}",
+        )
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    with tempfile.TemporaryFile("w+", encoding="ascii", newline="") as f:
+        t0 = time.perf_counter()
+        with Writer837P(f, 1) as w:
+            w.write_all(claims(n))
+        write_s = time.perf_counter() - t0
+        size_mb = f.tell() / 1e6
+
+        f.seek(0)
+        t0 = time.perf_counter()
+        parsed = sum(1 for _ in parse_837(f))
+        parse_s = time.perf_counter() - t0
+
+    assert parsed == n
+    print(f"{n} claims, {size_mb:.1f} MB, {w.sets} transaction sets")
+    print(f"write: {n / write_s:,.0f} claims/s ({size_mb / write_s:.1f} MB/s)")
+    print(f"parse + envelope check: {n / parse_s:,.0f} claims/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+from datetime import date
+
+import pytest
+
+from app.claim_history import rcm_metrics, rcm_window
+
+
+def _sums(**kw):
+    base = {"submitted": 0, "submitted_cents": 0, "first_pass_resolved": 0, "first_pass_accepted": 0,
+            "paid": 0, "paid_cents": 0, "days_to_pay_sum": 0.0, "denied": 0, "rejected": 0, "ar_cents": 0}
+    return {**base, **kw}
+
+
+def test_metrics_from_daily_sums():
+    m = rcm_metrics(_sums(submitted=90, submitted_cents=900_000, first_pass_resolved=80, first_pass_accepted=68,
+                          paid=70, paid_cents=700_000, days_to_pay_sum=1050.0, ar_cents=300_000), days=90)
+    assert m["first_pass_acceptance"] == pytest.approx(0.85)
+    assert m["dso"] == pytest.approx(30.0)  # 300k outstanding / 10k billed per day
+    assert m["days_to_pay_avg"] == pytest.approx(15.0)
+
+
+def test_empty_window_has_no_ratios():
+    m = rcm_metrics(_sums(), days=30)
+    assert m["first_pass_acceptance"] is None and m["dso"] is None and m["days_to_pay_avg"] is None
+
+
+class _Result:
+    def __init__(self, row):
+        self.row = row
+
+    def mappings(self):
+        return self
+
+    def one(self):
+        return self.row
+
+
+class _Db:
+    def __init__(self, row):
+        self.row, self.calls = row, []
+
+    def execute(self, stmt, params):
+        self.calls.append(params)
+        return _Result(self.row)
+
+
+def test_window_is_one_query_over_daily_rows():
+    db = _Db(_sums(submitted=7, submitted_cents=70_000, ar_cents=70_000))
+    out = rcm_window(db, days=7, end=date(2026, 3, 7))
+    assert db.calls == [{"start": date(2026, 3, 1), "end": date(2026, 3, 7)}]
+    assert (out["start"], out["end"], out["dso"]) == ("2026-03-01", "2026-03-07", pytest.approx(7.0))
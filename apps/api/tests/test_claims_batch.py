@@ -0,0 +1,43 @@
+import importlib.util
+from pathlib import Path
+
+from app import storage
+from app.tasks.claims import _post_interchange
+from app.x12 import Claim837, build_interchange
+
+CLAIM = {"encounter_id": "enc-1", "svc": [{"cpt": "99213", "units": 1, "charge_cents": 12500}], "diag": ["J06.9"]}
+
+
+def test_unreachable_adapter_rejects_the_whole_interchange(tmp_path, monkeypatch):
+    store = storage.LocalStorage(str(tmp_path))
+    monkeypatch.setattr(storage, "_backend", store)
+    out = _post_interchange("http://127.0.0.1:9", 7, [Claim837(1, CLAIM), Claim837(2, CLAIM)])
+    assert {cid: st for cid, (st, _, _) in out.items()} == {1: "REJECTED", 2: "REJECTED"}
+    resp = out[1][2]
+    assert (resp["error"], resp["interchange"]) == ("adapter_unavailable", 7)
+    # the interchange is archived before it is posted, whatever the adapter does
+    assert resp["archive"]["url"] == "local://x12/837/000000007.x12"
+    with open(store.path_for("x12/837/000000007.x12"), "rb") as f:
+        assert f.read().startswith(b"ISA*")
+
+
+def _billing_adapter():
+    path = Path(__file__).resolve().parents[3] / "services" / "billing-adapter" / "main.py"
+    spec = importlib.util.spec_from_file_location("billing_adapter_main", path)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def test_adapter_accepts_real_multi_claim_interchange():
+    adapter = _billing_adapter()
+    claims = [Claim837(i, CLAIM) for i in (1, 2, 3)]
+    edi = build_interchange(claims, 9, max_claims_per_set=2)
+    out = adapter.claims_batch(adapter.ClaimBatchIn(interchange_control=9, edi837=edi, claim_ids=[1, 2, 3]))
+    assert out["accepted"] and all(r["accepted"] and r["payer_ref"] for r in out["results"])
+
+    short = adapter.claims_batch(adapter.ClaimBatchIn(interchange_control=9, edi837=edi, claim_ids=[1, 2]))
+    assert not short["accepted"] and short["results"][0]["error"] == "3 claims in the interchange for 2 claim ids"
+    bad = adapter.claims_batch(adapter.ClaimBatchIn(interchange_control=9, edi837=edi.replace("GE*2*", "GE*1*"),
+                                                    claim_ids=[1, 2, 3]))
+    assert bad["results"][0]["error"] == "GE01 1 but 2 transaction sets"
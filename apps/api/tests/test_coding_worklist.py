@@ -0,0 +1,60 @@
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from app.routers.billing import _decode_cursor, _encode_cursor, _worklist
+
+
+class _Rows:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def mappings(self):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+class _Db:
+    def __init__(self, rows):
+        self.rows, self.sql, self.params = rows, None, None
+
+    def execute(self, stmt, params):
+        self.sql, self.params = str(stmt), params
+        return _Rows(self.rows)
+
+
+def _row(cid, ts):
+    return {"id": cid, "updated_at": ts, "status": "DENIED"}
+
+
+def test_cursor_round_trip():
+    ts = datetime(2026, 3, 4, 12, 30, 5, 123456, tzinfo=timezone.utc)
+    assert _decode_cursor(_encode_cursor(ts, 42)) == (ts, 42)
+    with pytest.raises(HTTPException):
+        _decode_cursor("not-a-cursor")
+
+
+def test_full_page_returns_keyset_cursor_and_filters():
+    ts = datetime(2026, 3, 4, tzinfo=timezone.utc)
+    db = _Db([_row(9, ts), _row(7, ts)])
+    page = _worklist(db, 2, status=["denied"], payer="ACME", denial_code="co-97")
+
+    assert "status IN ('NEW','SUBMITTED','DENIED','REJECTED')" in db.sql  # partial index predicate
+    assert "ORDER BY updated_at DESC, id DESC" in db.sql
+    assert db.params == {"n": 2, "st": ["DENIED"], "payer": "ACME", "dc": "CO-97"}
+    assert _decode_cursor(page["next_cursor"]) == (ts, 7)
+
+    db2 = _Db([_row(3, ts)])
+    last = _worklist(db2, 2, cursor=page["next_cursor"])
+    assert "(updated_at, id) < (:c_ts, :c_id)" in db2.sql
+    assert (db2.params["c_ts"], db2.params["c_id"]) == (ts, 7)
+    assert last["next_cursor"] is None
+
+
+def test_non_worklist_status_is_rejected():
+    with pytest.raises(HTTPException) as e:
+        _worklist(_Db([]), 10, status=["PAID"])
+    assert e.value.status_code == 422
@@ -0,0 +1,74 @@
+import json
+
+from app import storage
+from app.tasks import compliance
+
+
+class _Result:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def mappings(self):
+        return self
+
+    def all(self):
+        return self.rows
+
+    def first(self):
+        return self.rows[0] if self.rows else None
+
+
+class _Db:
+    """compliance_requests row `req`; patient 5 has `notes` scribe drafts; records the SQL."""
+
+    def __init__(self, req, notes=0):
+        self.req, self.notes, self.sql, self.status = req, notes, [], None
+
+    def execute(self, stmt, params=None):
+        sql = " ".join(str(stmt).split())
+        self.sql.append((sql, params))
+        if "FROM compliance_requests" in sql:
+            return _Result([self.req])
+        if "FROM scribe_sessions" in sql:
+            ids = range(params["after"] + 1, min(params["after"] + params["n"], self.notes) + 1)
+            return _Result([{"id": i, "status": "DRAFT", "patient_id": params["pid"],
+                             "draft": f"Call Ada Lovelace at 555-0100 about visit {i}."} for i in ids])
+        if "FROM patients" in sql:
+            return _Result([{"first_name": "Ada", "last_name": "Lovelace", "mrn": None,
+                             "phone": "555-0100", "email": None}])
+        if sql.startswith("UPDATE compliance_requests"):
+            self.status = params["status"]
+        return _Result([])
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_export_streams_one_patients_notes(tmp_path, monkeypatch):
+    store = storage.LocalStorage(str(tmp_path))
+    monkeypatch.setattr(storage, "_backend", store)
+    monkeypatch.setattr(compliance, "EXPORT_BATCH", 4)
+    db = _Db({"id": 1, "kind": "export", "status": "NEW", "meta": {"patient_id": 5}}, notes=10)
+    monkeypatch.setattr(compliance, "SessionLocal", lambda: db)
+
+    out = compliance.export_request.run(1)
+    assert out["ok"] and out["records"] == 10 and db.status == "DONE"
+    with open(store.path_for("compliance/export/1.jsonl"), "rb") as f:
+        lines = [json.loads(x) for x in f.read().split(b"\n")]
+    assert [r["session_id"] for r in lines] == list(range(1, 11))
+    assert "Lovelace" not in lines[0]["note"] and "555-0100" not in lines[0]["note"]
+    assert all(p["pid"] == 5 for sql, p in db.sql if "FROM scribe_sessions" in sql)
+
+
+def test_export_without_patient_is_refused(monkeypatch):
+    db = _Db({"id": 2, "kind": "export", "status": "NEW", "meta": {"reason": "audit"}}, notes=3)
+    monkeypatch.setattr(compliance, "SessionLocal", lambda: db)
+    assert compliance.export_request.run(2) == {"ok": False, "error": "patient_id_required", "request_id": 2}
+    assert db.status == "ERROR"
+    assert not any("FROM scribe_sessions" in sql for sql, _ in db.sql)
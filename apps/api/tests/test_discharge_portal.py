@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+
+import jwt
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.settings import settings
+from app.routers.documents import _VerifiedTokenCache
+from app.utils.discharge_index import discharge_etag, latest_discharge, remember_latest_discharge
+
+client = TestClient(app)
+
+
+def _token(enc: str, minutes: int = 10) -> str:
+    return jwt.encode(
+        {"iss": "health-app", "enc": enc, "doc": 1, "exp": datetime.utcnow() + timedelta(minutes=minutes)},
+        settings.jwt_secret,
+        algorithm="HS256",
+    )
+
+
+def test_token_cache_honours_exp():
+    cache = _VerifiedTokenCache(maxsize=2)
+    cache.put("a", {"enc": "enc-1", "exp": 0})
+    assert cache.get("a") is None
+
+    future = datetime.utcnow().timestamp() + 60
+    cache.put("b", {"enc": "enc-1", "exp": future})
+    cache.put("c", {"enc": "enc-1", "exp": future})
+    cache.put("d", {"enc": "enc-1", "exp": future})
+    assert cache.get("b") is None  # evicted (LRU)
+    assert cache.get("d")["enc"] == "enc-1"
+
+
+def test_index_keeps_newest_doc():
+    remember_latest_discharge("enc-index", 5, "data:x")
+    remember_latest_discharge("enc-index", 3, "data:old")
+    assert latest_discharge("enc-index") == (5, discharge_etag(5, "data:x"))
+
+
+def test_portal_not_modified_skips_db():
+    remember_latest_discharge("enc-304", 42, "data:text/html;base64,AAAA")
+    etag = discharge_etag(42, "data:text/html;base64,AAAA")
+
+    r = client.get(
+        "/v1/documents/discharge/enc-304",
+        params={"token": _token("enc-304")},
+        headers={"If-None-Match": etag},
+    )
+    assert r.status_code == 304
+    assert r.headers["etag"] == etag
+    assert r.headers["cache-control"].startswith("private")
+
+
+def test_portal_rejects_token_for_other_encounter():
+    r = client.get("/v1/documents/discharge/enc-2", params={"token": _token("enc-1")})
+    assert r.status_code == 403
@@ -0,0 +1,21 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routers.documents import _parse_fields
+
+client = TestClient(app)
+
+
+def test_default_fieldset_excludes_inline_body():
+    fields = _parse_fields(None)
+    assert "url" not in fields
+    assert "content_url" in fields
+
+
+def test_explicit_fieldset_can_opt_into_url():
+    assert _parse_fields("id, url") == ["id", "url"]
+
+
+def test_unknown_field_is_rejected():
+    r = client.get("/v1/documents", params={"fields": "id,secret"})
+    assert r.status_code == 422
@@ -0,0 +1,70 @@
+import threading
+import time
+from datetime import date, datetime
+
+import pytest
+
+from app.utils.eligibility_cache import EligibilityCache, cache_key
+from app.utils.redis_cache import _InMemoryRedis
+
+
+@pytest.fixture(autouse=True)
+def _fresh_redis(monkeypatch):
+    store = _InMemoryRedis()
+    monkeypatch.setattr("app.utils.eligibility_cache.get_redis_client", lambda: store)
+    return store
+
+
+def test_key_normalises_member_payer_and_date():
+    a = cache_key(" ins-123 ", "payerid", datetime(2026, 3, 4, 9, 30))
+    assert a == cache_key("INS-123", "PAYERID", date(2026, 3, 4))
+    assert a == cache_key("INS-123", "PAYERID", "2026-03-04T15:00:00")
+    assert a != cache_key("INS-123", "PAYERID", date(2026, 3, 5))
+    assert cache_key(None, "PAYERID", date(2026, 3, 4)) is None
+
+
+def test_second_lookup_is_a_hit_and_errors_are_not_cached():
+    cache = EligibilityCache(ttl_seconds=60, wait_seconds=1)
+    key = cache_key("INS-1", "P", "2026-03-04")
+    with pytest.raises(RuntimeError):
+        cache.get_or_fetch(key, lambda: (_ for _ in ()).throw(RuntimeError("adapter down")))
+
+    calls = []
+    fetch = lambda: calls.append(1) or {"eligible": True, "plan": "PPO"}
+    assert cache.get_or_fetch(key, fetch) == ({"eligible": True, "plan": "PPO"}, "miss")
+    assert cache.get_or_fetch(key, fetch) == ({"eligible": True, "plan": "PPO"}, "hit")
+    assert len(calls) == 1
+
+    assert cache.get_or_fetch(None, fetch)[1] == "bypass"
+    assert len(calls) == 2
+
+
+def test_concurrent_checks_share_one_adapter_call():
+    cache = EligibilityCache(ttl_seconds=60, wait_seconds=2)
+    key = cache_key("INS-2", "P", "2026-03-04")
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"eligible": True}
+
+    outcomes = []
+    threads = [threading.Thread(target=lambda: outcomes.append(cache.get_or_fetch(key, fetch)[1])) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert sorted(outcomes) == ["coalesced"] * 7 + ["miss"]
+
+
+def test_waits_for_fetch_in_another_process(_fresh_redis):
+    cache = EligibilityCache(ttl_seconds=60, wait_seconds=1)
+    key = cache_key("INS-3", "P", "2026-03-04")
+    _fresh_redis.set(key + ":lock", "1", nx=True, ex=1)  # another worker is fetching
+    threading.Timer(0.1, lambda: _fresh_redis.setex(key, 60, '{"eligible": false}')).start()
+
+    data, outcome = cache.get_or_fetch(key, lambda: pytest.fail("should reuse the other worker's result"))
+    assert (data, outcome) == ({"eligible": False}, "coalesced")
@@ -0,0 +1,116 @@
+import asyncio
+import json
+from datetime import datetime
+
+import httpx
+import pytest
+
+from app.tasks import eligibility
+from app.tasks.eligibility import _fan_out, _followup_issue, sweep_upcoming
+from app.utils.eligibility_cache import cache_key, eligibility_cache
+from app.utils.redis_cache import _InMemoryRedis
+from app.settings import settings
+
+
+@pytest.fixture(autouse=True)
+def _fresh_redis(monkeypatch):
+    store = _InMemoryRedis()
+    monkeypatch.setattr("app.utils.eligibility_cache.get_redis_client", lambda: store)
+    return store
+
+
+def _row(aid, ins, hour=9):
+    return {"id": aid, "reason": "visit", "start_at": datetime(2026, 3, 5, hour), "email": f"p{aid}@x.test", "ins": ins}
+
+
+def test_fan_out_dedupes_members_bounds_concurrency_and_fills_cache():
+    inflight = peak = 0
+    seen = []
+
+    async def handler(request):
+        nonlocal inflight, peak
+        body = json.loads(request.content)
+        seen.append(body["appointment_id"])
+        inflight += 1
+        peak = max(peak, inflight)
+        await asyncio.sleep(0.01)
+        inflight -= 1
+        if body["insurance_number"] == "BROKEN":
+            return httpx.Response(502)
+        ok = bool(body["insurance_number"])
+        return httpx.Response(200, json={"eligible": ok, "plan": "PPO", "copay_cents": 1500, "raw_json": {}})
+
+    # 1 and 2: same member, same day -> one call; 3, 4: no insurance -> one call each
+    rows = [_row(1, "INS-A"), _row(2, "ins-a", hour=14), _row(3, None), _row(4, None), _row(5, "BROKEN")]
+    rows += [_row(10 + i, f"INS-{i}") for i in range(10)]
+    results, stats = asyncio.run(_fan_out(rows, concurrency=3, transport=httpx.MockTransport(handler)))
+
+    assert peak <= 3
+    assert stats == {"calls": 14, "cache_hits": 0, "errors": 1}
+    assert len(seen) == 14
+    assert results[1] is results[2]
+    assert 5 not in results
+    assert len(results) == 14
+    assert eligibility_cache.get(cache_key("INS-A", settings.x12_receiver_id, "2026-03-05"))["plan"] == "PPO"
+
+    # second run is served from the cache for every insured member
+    results, stats = asyncio.run(_fan_out(rows[:2], concurrency=3, transport=httpx.MockTransport(handler)))
+    assert stats["cache_hits"] == 1 and stats["calls"] == 0
+
+
+def test_followup_rule_matches_check_270():
+    assert _followup_issue(None, True) == "missing_insurance"
+    assert _followup_issue("INS", False) == "ineligible"
+    assert _followup_issue("INS", True) is None
+
+
+class _SweepDb:
+    """Returns the sweep rows; records the follow-up INSERT."""
+
+    def __init__(self, rows):
+        self.rows, self.followups = rows, None
+
+    def execute(self, stmt, params=None):
+        sql = str(stmt)
+        if "INSERT INTO tasks" in sql:
+            self.followups = [json.loads(p) for p in params["payloads"]]
+        return self
+
+    def mappings(self):
+        return iter(self.rows)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_sweep_reads_insurance_from_flattened_intake(monkeypatch):
+    # intake stores "<formId>.<field>" keys; Coverage is form 2
+    rows = [
+        {"id": 1, "reason": "visit", "start_at": datetime(2026, 3, 5, 9), "email": "a@x.test",
+         "answers": {"1.first_name": "Ada", "2.insurance_number": "INS-FLAT", "2.dob": "1815-12-10"}},
+        {"id": 2, "reason": "visit", "start_at": datetime(2026, 3, 5, 10), "email": "b@x.test",
+         "answers": {"insurance_number": "INS-BARE"}},
+        {"id": 3, "reason": "visit", "start_at": datetime(2026, 3, 5, 11), "email": "c@x.test", "answers": None},
+    ]
+    db = _SweepDb(rows)
+    monkeypatch.setattr(eligibility, "_db", lambda: db)
+    members = []
+
+    def handler(request):
+        members.append(json.loads(request.content)["insurance_number"])
+        return httpx.Response(200, json={"eligible": True, "plan": "PPO", "copay_cents": 0, "raw_json": {}})
+
+    real = eligibility._fan_out
+    monkeypatch.setattr(eligibility, "_fan_out",
+                        lambda rows, c: real(rows, c, transport=httpx.MockTransport(handler)))
+    out = sweep_upcoming(day="2026-03-05")
+
+    assert sorted(m for m in members if m) == ["INS-BARE", "INS-FLAT"]
+    assert out["followups"] == 1
+    assert [(f["appointment_id"], f["issue"]) for f in db.followups] == [(3, "missing_insurance")]
@@ -0,0 +1,95 @@
+import gzip
+import importlib.util
+from datetime import date
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.utils.export_stream import encode_csv, export_response, gzip_chunks, query_rows
+
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+_ROWS = [{"id": i, "day": date(2026, 3, 1), "details": {"k": i} if i % 2 else None} for i in range(7)]
+
+app = FastAPI()
+
+
+@app.get("/x")
+def _export(request: Request, fmt: str = "csv"):
+    return export_response(request, iter(_ROWS), fmt, filename="x", batch_size=3)
+
+
+client = TestClient(app)
+
+
+def test_csv_is_encoded_batch_by_batch():
+    chunks = list(encode_csv([_ROWS[:3], _ROWS[3:]]))
+    assert len(chunks) == 2
+    lines = b"".join(chunks).decode().splitlines()
+    assert lines[0] == "id,day,details"
+    assert lines[1:3] == ["0,2026-03-01,", '1,2026-03-01,"{""k"":1}"']
+    assert len(lines) == 8
+
+
+def test_gzip_stream_round_trips():
+    data = [b"a,b\r\n", b"1,2\r\n" * 1000]
+    assert gzip.decompress(b"".join(gzip_chunks(data))) == b"".join(data)
+
+
+def test_response_is_chunked_and_gzipped_on_request():
+    r = client.get("/x", headers={"Accept-Encoding": "gzip"})
+    assert r.status_code == 200
+    assert r.headers["content-encoding"] == "gzip"
+    assert "content-length" not in r.headers
+    assert r.headers["content-disposition"] == 'attachment; filename="x.csv"'
+    assert r.text.splitlines()[0] == "id,day,details" and len(r.text.splitlines()) == 8
+
+    plain = client.get("/x", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+
+
+class _Result:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def mappings(self):
+        return self
+
+    def partitions(self, size):
+        for i in range(0, len(self.rows), size):
+            yield self.rows[i:i + size]
+
+
+class _Session:
+    def __init__(self):
+        self.options, self.closed = None, False
+
+    def execute(self, stmt, params):
+        self.options = stmt.get_execution_options()
+        return _Result([{"id": i} for i in range(5)])
+
+    def close(self):
+        self.closed = True
+
+
+def test_query_rows_uses_server_side_cursor_and_own_session():
+    s = _Session()
+    rows = query_rows("SELECT id FROM audit_logs", batch_size=2, session_factory=lambda: s)
+    assert s.options is None  # lazy: nothing runs until the response body is pulled
+    assert [r["id"] for r in rows] == [0, 1, 2, 3, 4]
+    assert s.options["yield_per"] == 2 and s.closed
+
+
+@pytest.mark.skipif(HAS_PYARROW, reason="pyarrow installed")
+def test_arrow_without_pyarrow_is_501():
+    assert client.get("/x", params={"fmt": "parquet"}).status_code == 501
+
+
+@pytest.mark.skipif(not HAS_PYARROW, reason="pyarrow not installed")
+def test_arrow_stream_round_trips():
+    import pyarrow as pa
+
+    r = client.get("/x", params={"fmt": "arrow"})
+    table = pa.ipc.open_stream(r.content).read_all()
+    assert table.num_rows == 7 and table.column("details").to_pylist()[1] == '{"k":1}'
@@ -0,0 +1,86 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.intake_drafts import DRAFT_TTL_SECONDS, idle_drafts, load_draft, release_if_untouched, save_draft
+from app.main import app
+from app.routers import intake
+
+client = TestClient(app)
+POU = {"X-Purpose-Of-Use": "TREATMENT"}
+
+
+class _Db:
+    """Appointments 200-299 exist; there are no flushed drafts."""
+
+    def execute(self, stmt, params=None):
+        self.params = params
+        return self
+
+    def first(self):
+        aid = self.params.get("id")
+        return (aid,) if aid is not None and 200 <= aid < 300 else None
+
+
+@pytest.fixture(autouse=True)
+def _fake_db():
+    app.dependency_overrides[intake.get_db] = lambda: _Db()
+    yield
+    app.dependency_overrides.pop(intake.get_db, None)
+
+
+def test_patch_merges_partial_answers():
+    client.patch("/v1/intake/forms/201/draft", json={"answers": {"1.full_name": "Ada"}}, headers=POU)
+    r = client.patch("/v1/intake/forms/201/draft", json={"answers": {"3.has_fever": False}}, headers=POU)
+    assert r.status_code == 200 and r.json()["saved"] == 1
+    assert load_draft(201) == {"1.full_name": "Ada", "3.has_fever": False}
+    got = client.get("/v1/intake/forms/201/draft", headers=POU).json()
+    assert got["answers"] == {"1.full_name": "Ada", "3.has_fever": False} and got["source"] == "cache"
+
+
+def test_draft_endpoints_are_gated():
+    url = "/v1/intake/forms/201/draft"
+    assert client.get(url).status_code == 400
+    assert client.patch(url, json={"answers": {"1.full_name": "Ada"}}).status_code == 400
+    assert client.get("/v1/intake/forms/999/draft", headers=POU).status_code == 404
+    assert client.patch("/v1/intake/forms/999/draft", json={"answers": {"1.full_name": "A"}},
+                        headers=POU).status_code == 404
+    assert client.patch(url, json={"answers": {"9.anything": "x"}}, headers=POU).status_code == 422
+    big = {"1.address": "x" * (intake.DRAFT_MAX_BYTES + 1)}
+    assert client.patch(url, json={"answers": big}, headers=POU).status_code == 413
+
+
+def test_idle_drafts_and_concurrent_touch():
+    save_draft(202, {"1.full_name": "Grace"})
+    later = time.time() + DRAFT_TTL_SECONDS + 1
+    idle = {aid: (touched, answers) for aid, touched, answers in idle_drafts(now=later)}
+    assert idle[202][1] == {"1.full_name": "Grace"}
+
+    # patient saved again while the flush was writing: keep the fresher draft
+    time.sleep(0.01)
+    save_draft(202, {"1.email": "g@example.com"})
+    assert release_if_untouched(202, idle[202][0]) is False
+    assert load_draft(202)["1.email"] == "g@example.com"
+
+    touched = idle_drafts(now=time.time() + DRAFT_TTL_SECONDS + 1)
+    assert release_if_untouched(202, [t for aid, t, _ in touched if aid == 202][0]) is True
+    assert load_draft(202) == {}
+
+
+def test_empty_drafts_never_crowd_out_real_ones():
+    from app.intake_drafts import DRAFT_INDEX_KEY
+    from app.utils.redis_cache import get_redis_client
+
+    r = get_redis_client()
+    save_draft(310, {})                      # empty PATCH: not indexed
+    assert r.zscore(DRAFT_INDEX_KEY, "310") is None
+    for aid in (301, 302, 303):              # hash expired before the flush
+        r.zadd(DRAFT_INDEX_KEY, {str(aid): 1.0})
+    save_draft(399, {"1.full_name": "Ada"})
+
+    later = time.time() + DRAFT_TTL_SECONDS + 1
+    idle = [aid for aid, _, _ in idle_drafts(limit=3, now=later)]
+    assert 399 in idle and not {301, 302, 303} & set(idle)
+    assert all(r.zscore(DRAFT_INDEX_KEY, str(aid)) is None for aid in (301, 302, 303))
+    release_if_untouched(399, r.zscore(DRAFT_INDEX_KEY, "399"))
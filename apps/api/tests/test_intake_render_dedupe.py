@@ -0,0 +1,67 @@
+from app.tasks.intake import _mark_rendered, answers_hash, render_intake_pdf, render_is_current
+from app.utils.redis_cache import get_redis_client
+
+
+def test_hash_is_order_independent():
+    a = answers_hash(1, {"1.full_name": "Ada", "3.has_fever": False})
+    b = answers_hash(1, {"3.has_fever": False, "1.full_name": "Ada"})
+    assert a == b
+    assert a != answers_hash(2, {"1.full_name": "Ada", "3.has_fever": False})
+
+
+def test_unchanged_resubmit_short_circuits():
+    answers = {"1.full_name": "Ada", "3.has_fever": True}
+    digest = answers_hash(101, answers)
+    _mark_rendered(101, digest)
+    assert render_is_current(101, digest)
+    assert render_intake_pdf.run(101, answers)["status"] == "unchanged"
+
+
+def test_inflight_duplicate_is_coalesced():
+    answers = {"1.full_name": "Grace", "3.has_fever": False}
+    digest = answers_hash(102, answers)
+    get_redis_client().set(f"intake:render:lock:{digest}", "1", ex=60, nx=True)
+    assert render_intake_pdf.run(102, answers, digest)["status"] == "coalesced"
+
+
+class _Docs:
+    """documents table for one appointment: Intake rows as (id, answers_hash)."""
+
+    def __init__(self, hashes):
+        self.hashes, self.sql = list(hashes), []
+
+    def execute(self, stmt, params=None):
+        sql = str(stmt)
+        self.sql.append(sql)
+        if "INSERT INTO documents" in sql:
+            self.hashes.append(params["meta"]["answers_hash"])
+        self.last = sql
+        return self
+
+    def scalar(self):
+        return self.hashes[-1] if self.hashes and "ORDER BY id DESC" in self.last else None
+
+    def first(self):
+        return None
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_resubmitting_earlier_answers_renders_again(monkeypatch):
+    from app.settings import settings
+    from app.tasks import intake
+
+    a, b = {"1.full_name": "Ada"}, {"1.full_name": "Ada Lovelace"}
+    docs = _Docs([answers_hash(103, a), answers_hash(103, b)])  # A, then B, already rendered
+    monkeypatch.setattr(intake, "SessionLocal", lambda: docs)
+    monkeypatch.setattr(intake, "put_pdf_and_sha", lambda key, pdf: ("local://" + key, "sha"))
+    monkeypatch.setattr(settings, "ehr_base", "http://127.0.0.1:9")
+
+    assert render_intake_pdf.run(103, a)["status"] == "rendered"  # A -> B -> A: latest shows A again
+    assert docs.hashes[-1] == answers_hash(103, a)
+    get_redis_client().delete("intake:render:done:103")              # Redis flushed: DB decides
+    assert render_intake_pdf.run(103, a)["status"] == "unchanged"
@@ -0,0 +1,33 @@
+from app.intake_schemas import ANNUAL_PHYSICAL
+from app.intake_validation import compile_form_set, validator_for
+from app.routers.intake import FORMS, _validate_answers
+
+
+def test_required_and_types_in_one_pass():
+    errors = _validate_answers({"1.full_name": "  ", "3.has_fever": "yes", "1.email": 42})
+    assert errors == {
+        "1.full_name": "Required",
+        "3.has_fever": "Must be yes or no",
+        "1.email": "Must be text",
+    }
+
+
+def test_valid_submission_has_no_errors():
+    assert _validate_answers({"1.full_name": "Ada Lovelace", "3.has_fever": False}) == {}
+
+
+def test_optional_blank_fields_are_skipped():
+    assert _validate_answers({"1.full_name": "Ada", "3.has_fever": True, "2.insurer": ""}) == {}
+
+
+def test_per_reason_schema_formats_and_unions():
+    v = compile_form_set([{"id": 1, "title": "Annual", "schema": ANNUAL_PHYSICAL}])
+    errors = v({
+        "1.first_name": "Ada", "1.last_name": "L", "1.dob": "1815-13-40", "1.phone": "555",
+        "1.address": "x", "1.allergies": "none", "1.medications": "none", "1.insurance": "PPO",
+    })
+    assert errors == {"1.dob": "Must be a date (YYYY-MM-DD)", "1.insurance": "Must be an object"}
+
+
+def test_form_sets_are_compiled_once():
+    assert validator_for(FORMS) is validator_for([dict(f) for f in FORMS])
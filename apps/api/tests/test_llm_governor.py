@@ -0,0 +1,86 @@
+import threading
+import time
+
+import pytest
+
+from app.utils.llm_governor import (
+    CircuitBreaker, LLMGovernor, LLMUnavailable, cached_draft, draft_cache_key, store_draft,
+)
+
+
+def _governor(max_concurrency=2, queue_timeout=0.05, failures=2, cooldown=60.0, slow=0.05):
+    return LLMGovernor(max_concurrency, queue_timeout, CircuitBreaker(failures, cooldown, slow))
+
+
+def test_slow_calls_open_the_circuit_and_fail_fast():
+    gov = _governor()
+    for _ in range(2):
+        with gov.slot():
+            time.sleep(0.06)  # slower than slow_seconds
+    assert gov.breaker.state == CircuitBreaker.OPEN
+
+    t0 = time.monotonic()
+    with pytest.raises(LLMUnavailable):
+        with gov.slot():
+            pass
+    assert time.monotonic() - t0 < 0.01
+
+
+def test_half_open_probe_closes_on_success():
+    gov = _governor(failures=1, cooldown=0.0)
+    with pytest.raises(RuntimeError):
+        with gov.slot():
+            raise RuntimeError("upstream 500")
+    assert gov.breaker.state == CircuitBreaker.OPEN
+    with gov.slot() as call:
+        call.ok()
+    assert gov.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_abandoned_probe_stream_releases_the_probe():
+    gov = _governor(failures=1, cooldown=0.0)
+    with pytest.raises(RuntimeError):
+        with gov.slot():
+            raise RuntimeError("upstream 500")
+
+    def stream():
+        with gov.slot():
+            yield "S: "
+            yield "cough"
+
+    s = stream()
+    assert next(s) == "S: "
+    s.close()  # client disconnected mid-stream (GeneratorExit inside the slot)
+    assert gov.breaker.state == CircuitBreaker.HALF_OPEN
+    assert gov.breaker.allow()  # a new probe is let through
+
+
+def test_saturated_governor_sheds_after_queue_timeout():
+    gov = _governor(max_concurrency=1)
+    held, release = threading.Event(), threading.Event()
+
+    def hold():
+        with gov.slot():
+            held.set()
+            release.wait(2)
+
+    t = threading.Thread(target=hold)
+    t.start()
+    held.wait(2)
+    try:
+        with pytest.raises(LLMUnavailable):
+            with gov.slot():
+                pass
+    finally:
+        release.set()
+        t.join()
+
+
+def test_draft_cache_key_and_roundtrip():
+    ctx = {"id": 9, "reason": "cough", "start_at": None, "end_at": None}
+    key = draft_cache_key(ctx, "m", "v1")
+    assert key == draft_cache_key(dict(reversed(list(ctx.items()))), "m", "v1")
+    assert key != draft_cache_key({**ctx, "reason": "fever"}, "m", "v1")
+    assert key != draft_cache_key(ctx, "m", "v2")
+    store_draft(key, "S: cough")
+    assert cached_draft(key) == "S: cough"
@@ -0,0 +1,55 @@
+import io
+
+from app.reconcile import CandidateClaim, ClaimIndex, Reconciler, norm
+from app.x12.remit import RemitItem, build_835, parse_835_items
+
+CLAIMS = [
+    CandidateClaim(1, "CH-1", "enc-0001", "M1", "20250310", 12500),
+    CandidateClaim(2, "CH-2", "enc-0002", "M2", "20250310", 9900),
+    CandidateClaim(3, None, None, "M3", "20250311", 5000),
+    CandidateClaim(4, None, None, "M3", "20250312", 5000),  # same member + amount as 3
+    CandidateClaim(5, None, None, None, "20250313", 7700),
+]
+
+
+def _item(pcn, charge=0, ref=None, member=None, dos=None):
+    return RemitItem(pcn, "1", charge, charge, 0, ref, None, member, dos)
+
+
+def test_match_order_and_fuzzy_fallbacks():
+    r = Reconciler(ClaimIndex(CLAIMS))
+    items = [
+        _item("1", 12500),
+        _item("X9", 9900, ref="CH-2"),
+        _item("ENC 2", 9900),
+        _item("?", 5000, member="m-3", dos="2025-03-11"),
+        _item("?", 5000, member="M3"),                   # only claim 4 left for (M3, 50.00)
+        _item("?", 7700, dos="20250313"),
+        _item("?", 1, member="M1"),
+    ]
+    out = [line.claim_id for line in r.resolve(items)]
+    assert out == [1, 2, 2, 3, 4, 5]
+    assert r.methods == {"id": 1, "payer_ref": 1, "encounter": 1, "member_dos": 1,
+                         "member_amt": 1, "dos_amt": 1, "unmatched": 1}
+    assert [u.charge_cents for u in r.unmatched] == [1]
+
+
+def test_ambiguous_fuzzy_key_is_left_for_the_worklist():
+    r = Reconciler(ClaimIndex(CLAIMS))
+    assert list(r.resolve([_item("?", 5000, member="M3")])) == []
+    assert len(r.unmatched) == 1
+
+
+def test_conflicting_member_never_falls_back_to_date_and_amount():
+    claims = CLAIMS[:4] + [CandidateClaim(5, None, None, "M5", "20250313", 7700)]
+    r = Reconciler(ClaimIndex(claims))
+    assert list(r.resolve([_item("?", 7700, member="OTHER-PATIENT", dos="2025-03-13")])) == []
+    assert r.methods == {"unmatched": 1} and r.unmatched[0].member_id == "OTHER-PATIENT"
+
+
+def test_norm_and_835_identifiers():
+    assert norm("ENC-000123") == norm("enc 123") == "ENC123"
+    assert norm("000042") == "42"
+    edi = build_835([_item("enc-0001", 12500, member="M1", dos="20250310")], 3)
+    (item,) = parse_835_items(io.StringIO(edi))
+    assert (item.pcn, item.member_id, item.service_date) == ("enc-0001", "M1", "20250310")
@@ -0,0 +1,29 @@
+from app.redaction import AhoCorasick, Redactor
+
+
+def test_aho_corasick_overlaps_case_and_word_boundaries():
+    ac = AhoCorasick([("he", "X"), ("she", "X"), ("hers", "X"), ("Ann", "NAME")])
+    hits = sorted((s, e) for s, e, _ in ac.finditer("Ushers SHE hers; Annual visit with ann."))
+    assert hits == [(7, 10), (11, 15), (35, 38)]
+
+
+def test_known_identifiers_and_generic_patterns():
+    r = Redactor([("Ada Lovelace", "NAME"), ("Ada", "NAME"), ("Lovelace", "NAME"), ("MRN00123", "MRN")])
+    out = r.redact(
+        "Ada Lovelace (MRN00123) seen 03/04/2024 by Dr. Smith. Temp 37.9. "
+        "Call (555) 123-4567 or ada@example.org. MRN: A12345. lovelace agrees."
+    )
+    assert out.text == (
+        "[NAME] ([MRN]) seen [DATE] by [NAME]. Temp 37.9. "
+        "Call [PHONE] or [EMAIL]. [MRN]. [NAME] agrees."
+    )
+    assert out.counts == {"NAME": 3, "MRN": 2, "DATE": 1, "PHONE": 1, "EMAIL": 1}
+
+
+def test_batch_matches_per_document_results():
+    r = Redactor([("Grace Hopper", "NAME")])
+    docs = ["Grace Hopper seen March 3rd, 2024.", "", None, "No PHI here: dr. visit, 128/82.", "grace hopper"]
+    batch = r.redact_batch(docs)
+    assert batch == [r.redact(d or "") for d in docs]
+    assert [b.text for b in batch] == ["[NAME] seen [DATE].", "", "", "No PHI here: dr. visit, 128/82.", "[NAME]"]
+    assert batch[3].counts == {}
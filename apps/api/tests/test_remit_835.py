@@ -0,0 +1,46 @@
+import csv
+import io
+
+import pytest
+
+from app.x12 import X12Error
+from app.x12.remit import IterReader, RemitLine, build_835, claim_status, parse_835, staging_csv
+
+LINES = [
+    RemitLine(101, "1", 15600, 12000, 3600, "PCN101", None),
+    RemitLine(102, "4", 9900, 0, 0, "PCN102", "CO-97"),
+    RemitLine(103, "1", 5000, 0, 0, None, "PR-1"),
+]
+
+
+def test_round_trip_and_denials():
+    edi = build_835(LINES, 77)
+    assert list(parse_835(io.StringIO(edi))) == LINES
+
+
+def test_non_numeric_patient_control_numbers_are_reported_not_fatal():
+    edi = build_835(LINES[:1], 78).replace("CLP*101*", "CLP*ABC-9*")
+    unmatched = []
+    assert list(parse_835(io.BytesIO(edi.encode()), unmatched)) == []
+    assert unmatched == ["ABC-9"]
+
+
+def test_truncated_file_is_rejected():
+    edi = build_835(LINES, 79)
+    with pytest.raises(X12Error):
+        list(parse_835(io.StringIO(edi[: edi.index("SE*")])))
+
+
+def test_copy_stream_is_valid_csv():
+    reader = io.BufferedReader(IterReader(staging_csv(LINES)), buffer_size=7)
+    rows = list(csv.reader(io.TextIOWrapper(reader, encoding="utf-8")))
+    assert rows[0] == ["1", "101", "1", "15600", "12000", "3600", "PCN101", "", "PAID"]
+    assert rows[1][7:] == ["CO-97", "DENIED"] and rows[2][6] == ""
+
+
+def test_claim_status_mapping():
+    assert [claim_status(l) for l in LINES] == ["PAID", "DENIED", "PAID"]  # $0 all-PR is adjudicated
+    assert claim_status(RemitLine(104, "1", 5000, 0, 0, None, "CO-50")) == "DENIED"
+    assert claim_status(RemitLine(105, "2", 5000, 0, 5000, None, "PR-2")) == "PAID"
+    assert claim_status(RemitLine(106, "22", -5000, -4000, 0, None, None)) == "SUBMITTED"
+    assert claim_status(RemitLine(107, "4", 5000, 0, 0, None, None)) == "DENIED"
@@ -0,0 +1,86 @@
+from datetime import date
+
+import pytest
+
+from app import rollups
+
+
+class _Result:
+    def __init__(self, row=None, rowcount=0):
+        self.row, self.rowcount = row, rowcount
+
+    def scalar(self):
+        return self.row
+
+    def mappings(self):
+        return self
+
+    def one(self):
+        return self.row
+
+
+class _Db:
+    """Answers the lock / bounds queries; records every statement and its params."""
+
+    def __init__(self, bounds, locked=True, sums=None):
+        self.bounds, self.locked, self.sums, self.calls = bounds, locked, sums, []
+
+    def execute(self, stmt, params=None):
+        sql = str(stmt)
+        self.calls.append((sql, params))
+        if "pg_try_advisory_xact_lock" in sql:
+            return _Result(self.locked)
+        if "AS empty" in sql:
+            return _Result(self.bounds)
+        if sql.lstrip().startswith("SELECT SUM"):
+            return _Result(self.sums)
+        return _Result(rowcount=3)
+
+    def params_for(self, prefix):
+        return [p for sql, p in self.calls if sql.strip().startswith(prefix)]
+
+
+def _bounds(empty=False):
+    return {"appt_lo": date(2024, 1, 5), "appt_hi": date(2028, 2, 1),
+            "elig_lo": date(2024, 1, 3), "elig_hi": date(2026, 3, 1), "empty": empty}
+
+
+def test_incremental_refresh_only_touches_window():
+    db = _Db(_bounds())
+    out = rollups.refresh(db, today=date(2026, 3, 1), lookback_days=10, horizon_days=30)
+    assert out["full"] is False
+    deletes = db.params_for("DELETE")
+    assert [(p["lo"], p["hi"]) for p in deletes] == [(date(2026, 2, 19), date(2026, 4, 1))] * 2
+    appt_insert = next(p for sql, p in db.calls if "INSERT INTO appt_daily" in sql)
+    assert (appt_insert["lo_ts"], appt_insert["hi_ts"]) == ("2026-02-19T00:00:00+00:00", "2026-04-01T00:00:00+00:00")
+
+
+def test_empty_rollups_trigger_full_backfill():
+    db = _Db(_bounds(empty=True))
+    out = rollups.refresh(db, today=date(2026, 3, 1), lookback_days=10, horizon_days=30)
+    assert out["full"] is True
+    assert out["appt_days"] == ["2024-01-05", "2028-02-02"]
+    assert out["elig_days"] == ["2024-01-03", "2026-04-01"]
+
+
+def test_refresh_skips_while_another_runs():
+    db = _Db(_bounds(), locked=False)
+    assert "skipped" in rollups.refresh(db, today=date(2026, 3, 1))
+    assert len(db.calls) == 1
+
+
+def test_ops_metrics_from_sums():
+    m = rollups.ops_metrics({"appts": 200, "no_shows": 14, "tta_seconds_sum": 72 * 3600 * 150, "tta_count": 150})
+    assert m["no_show_rate"] == pytest.approx(0.07)
+    assert m["tta_hours_avg"] == pytest.approx(72.0)
+    empty = rollups.ops_metrics({"appts": None, "no_shows": None, "tta_seconds_sum": None, "tta_count": None})
+    assert (empty["no_show_rate"], empty["tta_hours_avg"]) == (0.0, None)
+
+
+def test_window_filters():
+    db = _Db(_bounds(), sums={"ok": 9, "total": 12})
+    rate = rollups.eligibility_ok_rate(db, start=date(2026, 3, 1), end=date(2026, 3, 7), clinic="", channel="SMS")
+    sql, params = db.calls[-1]
+    assert "day >= :start AND day <= :end AND clinic = :clinic AND channel = :channel" in sql
+    assert params == {"start": date(2026, 3, 1), "end": date(2026, 3, 7), "clinic": "", "channel": "sms"}
+    assert rate == pytest.approx(0.75)
@@ -0,0 +1,55 @@
+from app.schema_cache import SchemaCache
+
+
+class _Rows:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def all(self):
+        return self.rows
+
+
+class _Db:
+    def __init__(self, tables, version="0017_coding_worklist"):
+        self.tables, self.version, self.calls = tables, version, []
+
+    def execute(self, stmt, params=None):
+        sql = str(stmt)
+        self.calls.append("version" if "alembic_version" in sql else "columns")
+        if "alembic_version" in sql:
+            return _Rows([(self.version,)])
+        rows = [(t, c) for t, cols in self.tables.items() for c in cols]
+        if self.version is not None:
+            rows.append(("alembic_version", "version_num"))
+        return _Rows(rows)
+
+
+def test_hot_path_does_no_queries():
+    db = _Db({"appointments": ["id", "status", "start_at"]})
+    cache = SchemaCache(recheck_seconds=3600)
+    assert cache.table_exists(db, "appointments")
+    assert cache.has_column(db, "appointments", "status")
+    assert not cache.table_exists(db, "appt_daily")
+    assert cache.columns(db, "nope") == frozenset()
+    assert db.calls == ["columns", "version"]  # one load, then dict lookups
+
+
+def test_reloads_only_when_migration_version_changes():
+    db = _Db({"appointments": ["id"]})
+    cache = SchemaCache(recheck_seconds=0)
+    assert not cache.table_exists(db, "appt_daily")
+    assert not cache.table_exists(db, "appt_daily")
+    assert db.calls == ["columns", "version", "version"]  # recheck, same version: no reload
+
+    db.tables["appt_daily"], db.version = ["day"], "0018_analytics_rollups"
+    db.calls.clear()
+    assert cache.table_exists(db, "appt_daily")
+    assert db.calls == ["version", "columns", "version"]
+
+
+def test_without_alembic_version_reloads_each_interval():
+    db = _Db({"audit_logs": ["id", "details"]}, version=None)
+    cache = SchemaCache(recheck_seconds=0)
+    assert cache.has_column(db, "audit_logs", "details")
+    assert cache.has_column(db, "audit_logs", "details")
+    assert db.calls == ["columns", "columns"]  # never queries a missing alembic_version
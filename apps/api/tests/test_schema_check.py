@@ -0,0 +1,35 @@
+from app.schema_check import REQUIRED_COLUMNS, check_schema, missing_schema
+
+
+class _Result:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+
+class _Conn:
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = 0
+
+    def execute(self, *_a, **_k):
+        self.calls += 1
+        return _Result(self.rows)
+
+
+def test_missing_schema_reports_tables_and_columns():
+    rows = [(t, c) for t, cols in REQUIRED_COLUMNS.items() for c in cols if t not in ("users", "claims")]
+    rows += [("claims", c) for c in REQUIRED_COLUMNS["claims"] if c != "updated_at"]
+    conn = _Conn(rows)
+    assert missing_schema(conn) == {"users": ["*"], "claims": ["updated_at"]}
+    assert conn.calls == 1  # one catalog query for every table
+
+
+def test_check_schema_is_non_fatal_without_db():
+    class _Broken:
+        def connect(self):
+            raise OSError("no database")
+
+    assert check_schema(_Broken()) == {}
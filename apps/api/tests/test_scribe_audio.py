@@ -0,0 +1,128 @@
+from fastapi.testclient import TestClient
+
+from app import storage
+from app.celery_app import celery_app
+from app.main import app
+from app.routers.scribe import _audio_session
+from app.scribe_audio import (
+    INFLIGHT_TIMEOUT_SECONDS, MAX_BACKLOG, accept_chunk, commit_chunk, ingest_state, record_segment, route_sentence,
+    running_draft, transcript,
+)
+
+client = TestClient(app)
+H = {"X-Purpose-Of-Use": "TREATMENT"}
+
+
+def _accept(sid, seq, size=10):
+    outcome, state = accept_chunk(sid, seq, size)
+    if outcome == "ok":
+        commit_chunk(sid, seq, size)
+    return outcome, state
+
+
+def test_accept_duplicate_gap_and_backpressure():
+    sid = 9101
+    assert _accept(sid, 0)[0] == "ok"
+    assert _accept(sid, 0)[0] == "duplicate"
+    outcome, state = _accept(sid, 3)
+    assert outcome == "gap" and state["next_seq"] == 1
+
+    for seq in range(1, MAX_BACKLOG):
+        assert _accept(sid, seq)[0] == "ok"
+    outcome, state = _accept(sid, MAX_BACKLOG)
+    assert outcome == "busy" and state["backlog"] == MAX_BACKLOG
+
+    record_segment(sid, 0, "hello")  # one chunk transcribed frees one slot
+    assert _accept(sid, MAX_BACKLOG)[0] == "ok"
+
+
+def test_running_draft_routes_sentences_in_chunk_order():
+    sid = 9102
+    assert route_sentence("Blood pressure 128 over 82.") == "O"
+    assert route_sentence("Plan to follow up in two weeks.") == "P"
+    record_segment(sid, 1, "Likely viral bronchitis. Start fluids and rest.")
+    record_segment(sid, 0, "Patient reports a dry cough for five days. Temperature is 37.9.")
+    draft = running_draft(sid)
+    assert draft.splitlines() == [
+        "Subjective: Patient reports a dry cough for five days.",
+        "Objective: Temperature is 37.9.",
+        "Assessment: Likely viral bronchitis.",
+        "Plan: Start fluids and rest.",
+    ]
+    assert [x["seq"] for x in transcript(sid)] == [0, 1]
+
+
+def test_local_storage_append_and_finalize(tmp_path):
+    st = storage.LocalStorage(str(tmp_path))
+    for i, part in enumerate([b"abc", b"def", b"g"]):
+        st.append("scribe/audio/session-1", part, i)
+    url, sha = st.finalize("scribe/audio/session-1")
+    assert url.startswith("local://")
+    with open(st.path_for("scribe/audio/session-1"), "rb") as f:
+        assert f.read() == b"abcdefg"
+    st.append("scribe/audio/session-1", b"new", 0)  # seq 0 starts a fresh recording
+    with open(st.path_for("scribe/audio/session-1"), "rb") as f:
+        assert f.read() == b"new"
+
+
+def test_upload_endpoint_streams_to_draft(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "_backend", storage.LocalStorage(str(tmp_path)))
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    app.dependency_overrides[_audio_session] = lambda session_id: session_id
+    try:
+        url = "/v1/scribe/sessions/9103/audio"
+        r = client.post(url, params={"seq": 0}, content=b"Patient reports headache.", headers=H)
+        assert r.status_code == 202 and r.json()["next_seq"] == 1
+        assert client.post(url, params={"seq": 0}, content=b"x", headers=H).json()["duplicate"] is True
+        r = client.post(url, params={"seq": 5}, content=b"x", headers=H)
+        assert r.status_code == 409 and r.json()["expected_seq"] == 1
+        assert client.post(url, params={"seq": 1}, content=b"", headers=H).status_code == 400
+
+        live = client.get("/v1/scribe/sessions/9103/draft/live", headers=H).json()
+        assert live["draft"].startswith("Subjective: Patient reports headache.")
+        assert live["backlog"] == 0
+    finally:
+        app.dependency_overrides.pop(_audio_session, None)
+
+
+def test_failed_storage_append_leaves_the_chunk_retryable(tmp_path, monkeypatch):
+    class _Flaky(storage.LocalStorage):
+        fail = True
+
+        def append(self, key, data, seq):
+            if self.fail:
+                raise OSError("disk full")
+            super().append(key, data, seq)
+
+    backend = _Flaky(str(tmp_path))
+    monkeypatch.setattr(storage, "_backend", backend)
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    app.dependency_overrides[_audio_session] = lambda session_id: session_id
+    try:
+        url = "/v1/scribe/sessions/9104/audio"
+        r = client.post(url, params={"seq": 0}, content=b"Patient reports cough.", headers=H)
+        assert r.status_code == 503
+        live = client.get("/v1/scribe/sessions/9104/draft/live", headers=H).json()
+        assert (live["next_seq"], live["received"], live["backlog"]) == (0, 0, 0)
+
+        backend.fail = False
+        r = client.post(url, params={"seq": 0}, content=b"Patient reports cough.", headers=H)
+        assert r.status_code == 202 and r.json()["duplicate"] is False and r.json()["next_seq"] == 1
+    finally:
+        app.dependency_overrides.pop(_audio_session, None)
+
+
+def test_lost_transcriptions_stop_counting_against_the_backlog():
+    sid, t0 = 9105, 1_000_000.0
+    for seq in range(MAX_BACKLOG):
+        outcome, _ = accept_chunk(sid, seq, 10, now=t0)
+        assert outcome == "ok"
+        commit_chunk(sid, seq, 10, now=t0)
+    assert accept_chunk(sid, MAX_BACKLOG, 10, now=t0 + 1)[0] == "busy"
+
+    # no transcription ever lands; once the in-flight timeout passes the chunks are abandoned
+    outcome, state = accept_chunk(sid, MAX_BACKLOG, 10, now=t0 + INFLIGHT_TIMEOUT_SECONDS + 1)
+    assert outcome == "ok" and state["backlog"] == 0 and state["abandoned"] == MAX_BACKLOG
+    record_segment(sid, 0, "late but kept")  # a late transcription still reaches the transcript
+    assert ingest_state(sid, now=t0 + INFLIGHT_TIMEOUT_SECONDS + 1)["abandoned"] == MAX_BACKLOG
+    assert transcript(sid)[0]["text"] == "late but kept"
@@ -0,0 +1,18 @@
+import json
+
+from app.routers.scribe import _sse, _stream_draft, _stub_draft
+
+
+def test_stub_stream_is_deterministic_and_complete(monkeypatch):
+    monkeypatch.setenv("SCRIBE_DRAFT_GENERATOR", "stub")
+    appt = {"id": 7, "reason": "cough"}
+    tokens = list(_stream_draft(appt))
+    assert len(tokens) > 10
+    assert "".join(tokens) == _stub_draft(appt)
+    assert tokens == list(_stream_draft(appt))
+
+
+def test_sse_frame():
+    frame = _sse("token", {"t": "Plan: "})
+    assert frame == 'event: token\ndata: {"t": "Plan: "}\n\n'
+    assert json.loads(frame.split("data: ")[1]) == {"t": "Plan: "}
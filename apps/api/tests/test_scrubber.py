@@ -0,0 +1,64 @@
+import pytest
+
+from app.scrubber import DEFAULT_RULES, ClaimBatch, Scrubber, compile_rules
+
+
+def _claim(cid, pid=None, dos="2026-03-04", svc=None, diag=("J06.9",), facility="MAIN_CLINIC"):
+    payload = {"svc": svc if svc is not None else [{"cpt": "99213", "units": 1, "charge_cents": 12500}],
+               "diag": list(diag), "dos": dos}
+    if facility:
+        payload["facility"] = facility
+    return {"id": cid, "patient_id": cid if pid is None else pid, "payload_json": payload}
+
+
+def _rules(report, cid):
+    return sorted(e.rule for e in report.for_claim(cid))
+
+
+def test_clean_claim_passes_every_rule():
+    report = Scrubber().scrub([_claim(1)])
+    assert report.edits == []
+    assert set(report.timings) == {r["id"] for r in DEFAULT_RULES}
+
+
+def test_batch_edits_by_rule():
+    rows = [
+        _claim(1, facility=None),
+        _claim(2, svc=[{"cpt": "99213", "units": 3, "charge_cents": 12500}]),       # E/M units
+        _claim(3, svc=[{"cpt": "9921", "units": 1, "charge_cents": 0}], diag=("6X",)),  # formats + charge
+        _claim(4, svc=[{"cpt": "87880", "units": 1, "charge_cents": 2500}], diag=("I10",)),  # strep w/o throat dx
+        _claim(5, pid=2, svc=[{"cpt": "87880", "units": 1, "charge_cents": 2500}], diag=("J02.9",)),
+        _claim(6, pid=2, svc=[{"cpt": "87880", "units": 1, "charge_cents": 2500}], diag=("J02.9",)),  # dup of 5
+        _claim(7, svc=[], diag=()),
+    ]
+    report = Scrubber().scrub(rows)
+
+    assert _rules(report, 1) == ["facility_missing"]
+    assert _rules(report, 2) == ["units_range"]
+    assert _rules(report, 3) == ["charge_range", "cpt_format", "icd_format"]
+    assert _rules(report, 4) == ["cpt_icd_pairing"]
+    assert _rules(report, 5) == []
+    assert _rules(report, 6) == ["duplicate_claim"]
+    assert _rules(report, 7) == ["diag_missing", "svc_missing"]
+    # pairing and charge sanity are warnings; the rest block submission
+    assert report.blocked == {1, 2, 3, 6, 7}
+    assert report.for_claim(2)[0].line == 1
+
+
+def test_duplicate_of_already_submitted_claim():
+    prior = ClaimBatch([_claim(90)])
+    existing = {prior.duplicate_key(0): 90}
+    report = Scrubber().scrub([_claim(1, pid=90)], existing)
+    assert [e.message for e in report.for_claim(1)] == [
+        "duplicate of claim 90 (same patient, date of service and CPTs)"
+    ]
+
+
+def test_rules_are_data():
+    rules = [{"id": "no_modifier_25", "kind": "pattern", "column": "cpt", "regex": r"\d{5}", "severity": "warning",
+              "message": "{value}"},
+             {"id": "off", "kind": "required", "field": "x", "enabled": False}]
+    report = Scrubber(rules).scrub([_claim(1, svc=[{"cpt": "9921A", "units": 1, "charge_cents": 1}])])
+    assert [(e.rule, e.severity, e.message) for e in report.edits] == [("no_modifier_25", "warning", "9921A")]
+    with pytest.raises(ValueError):
+        compile_rules([{"id": "x", "kind": "nope"}])
@@ -0,0 +1,72 @@
+from app.tasks import signature
+
+
+class _Result:
+    def __init__(self, value=None, rows=()):
+        self.value, self.rows = value, list(rows)
+
+    def scalar(self):
+        return self.value
+
+    def first(self):
+        return None
+
+    def mappings(self):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+class _Db:
+    """signature_requests row in `status`; records statements and transaction boundaries."""
+
+    def __init__(self, status, claimed=()):
+        self.status, self.claimed, self.log = status, list(claimed), []
+
+    def execute(self, stmt, params=None):
+        sql = " ".join(str(stmt).split())
+        self.log.append(sql)
+        if sql.startswith("UPDATE signature_inbox i SET status = 'PROCESSING'"):
+            return _Result(rows=self.claimed)
+        if sql.startswith("SELECT status FROM signature_requests"):
+            return _Result(self.status)
+        return _Result()
+
+    def commit(self):
+        self.log.append("COMMIT")
+
+    def rollback(self):
+        self.log.append("ROLLBACK")
+
+    def close(self):
+        pass
+
+
+def test_second_signed_event_does_not_add_a_consent():
+    db = _Db("SIGNED")
+    assert signature._apply_signed_event(db, "sig-7", {"appointment_id": 7, "event_id": "evt_2"}, "u", "s") is None
+    assert any(s.endswith("FOR UPDATE") for s in db.log)
+    assert not any("INSERT INTO consents" in s for s in db.log)
+
+
+def test_inbox_uploads_outside_the_claim_transaction(monkeypatch):
+    event = {"id": 1, "request_id": "sig-8", "payload": {"appointment_id": 8}, "attempts": 0}
+    db = _Db("PENDING", claimed=[event])
+    monkeypatch.setattr(signature, "SessionLocal", lambda: db)
+    monkeypatch.setattr(signature, "put_pdf_and_sha",
+                        lambda key, pdf: db.log.append("UPLOAD " + key) or ("local://" + key, "sha"))
+    monkeypatch.setattr(signature, "transition", lambda *a, **kw: None)
+
+    assert signature.process_inbox(limit=10) == {"claimed": 1, "done": 1, "failed": 0}
+    claim = next(i for i, s in enumerate(db.log) if "SET status = 'PROCESSING'" in s)
+    upload = db.log.index("UPLOAD consent/sig-8.pdf")
+    # the claim is committed, and the status read closed, before the slow render/upload
+    assert db.log[claim + 1] == "COMMIT" and db.log[upload - 1] == "ROLLBACK"
+    assert any("INSERT INTO consents" in s for s in db.log[upload:])
+    assert db.log[-1] == "COMMIT"
+
+    skipped = _Db("SIGNED", claimed=[event])
+    monkeypatch.setattr(signature, "SessionLocal", lambda: skipped)
+    assert signature.process_inbox(limit=10)["done"] == 1
+    assert not any(s.startswith("UPLOAD") or "INSERT INTO consents" in s for s in skipped.log)
@@ -0,0 +1,19 @@
+import asyncio
+import json
+
+from app.utils.signature_status import _PollingSubscription, sse_event, status_subscription
+
+
+def test_sse_event_frame():
+    frame = sse_event({"request_id": "sig-1", "status": "SIGNED"})
+    assert frame.startswith("event: status\ndata: ")
+    assert frame.endswith("\n\n")
+    assert json.loads(frame.split("data: ", 1)[1])["status"] == "SIGNED"
+
+
+def test_subscription_falls_back_to_polling_without_redis():
+    async def run():
+        async with status_subscription("sig-x") as sub:
+            assert isinstance(sub, _PollingSubscription)
+            await sub.wait(0.01)
+    asyncio.run(run())
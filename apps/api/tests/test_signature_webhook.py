@@ -0,0 +1,69 @@
+import hashlib
+import hmac
+import json
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routers import signature
+from app.routers.signature import WEBHOOK_SECRET, _event_key
+
+client = TestClient(app)
+
+
+def _signed(payload: dict):
+    raw = json.dumps(payload).encode()
+    sig = hmac.new(WEBHOOK_SECRET.encode(), raw, hashlib.sha256).hexdigest()
+    return raw, {"X-Signature": sig, "Content-Type": "application/json"}
+
+
+def test_webhook_rejects_bad_signature():
+    r = client.post("/v1/signature/webhook", content=b"{}", headers={"X-Signature": "nope"})
+    assert r.status_code == 401
+
+
+def test_webhook_requires_request_and_appointment():
+    raw, headers = _signed({"request_id": "sig-1"})
+    r = client.post("/v1/signature/webhook", content=raw, headers=headers)
+    assert r.status_code == 400
+
+
+def test_inbox_dedupes_per_attempt_not_per_request():
+    base = {"request_id": "sig-7", "appointment_id": 7}
+    assert _event_key({**base, "event_id": "evt_123"}) == "evt:evt_123"
+    assert _event_key({**base, "attempt": 2}) != _event_key({**base, "attempt": 1})
+    assert _event_key(base) is None  # keyed on signature_requests.attempt in the INSERT
+
+
+class _InboxDb:
+    """signature_inbox with its unique event_key."""
+
+    def __init__(self):
+        self.keys, self.commits = set(), 0
+
+    def execute(self, stmt, params=None):
+        key = params["ek"] or f"{params['rid']}#1"
+        self.inserted = key not in self.keys
+        self.keys.add(key)
+        return self
+
+    def first(self):
+        return (len(self.keys),) if self.inserted else None
+
+    def commit(self):
+        self.commits += 1
+
+
+def test_duplicate_event_is_acked_once(monkeypatch):
+    db, kicked = _InboxDb(), []
+    app.dependency_overrides[signature.get_db] = lambda: db
+    monkeypatch.setattr(signature.process_inbox, "delay", lambda *a: kicked.append(a))
+    try:
+        raw, headers = _signed({"request_id": "sig-9", "appointment_id": 9, "event_id": "evt_9"})
+        first = client.post("/v1/signature/webhook", content=raw, headers=headers)
+        again = client.post("/v1/signature/webhook", content=raw, headers=headers)
+    finally:
+        app.dependency_overrides.pop(signature.get_db, None)
+    assert first.status_code == again.status_code == 202
+    assert first.json()["duplicate"] is False and again.json()["duplicate"] is True
+    assert db.keys == {"evt:evt_9"} and len(kicked) == 1
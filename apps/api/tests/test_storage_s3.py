@@ -0,0 +1,29 @@
+import pytest
+from botocore.exceptions import ClientError
+from fastapi import HTTPException
+
+from app.storage import S3Storage
+
+
+class _Client:
+    def __init__(self, code):
+        self.code = code
+
+    def get_object(self, Bucket, Key):
+        raise ClientError({"Error": {"Code": self.code, "Message": "x"}}, "GetObject")
+
+
+@pytest.mark.parametrize("code", ["NoSuchKey", "404"])
+def test_missing_key_is_404_like_local(code):
+    store = S3Storage("docs")
+    store._client = _Client(code)
+    with pytest.raises(HTTPException) as exc:
+        store.response("consent/missing.pdf")
+    assert exc.value.status_code == 404
+
+
+def test_other_s3_errors_propagate():
+    store = S3Storage("docs")
+    store._client = _Client("AccessDenied")
+    with pytest.raises(ClientError):
+        store.response("consent/secret.pdf")
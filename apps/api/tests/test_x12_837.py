@@ -0,0 +1,92 @@
+import hashlib
+import io
+from datetime import datetime
+
+import pytest
+
+from app import storage
+from app.x12 import (
+    Claim837, SegmentReader, Writer837P, X12Error, build_interchange, claim_from_row, parse_837, write_to_storage,
+)
+
+NOW = datetime(2025, 3, 14, 9, 30)
+
+
+def _claims(n):
+    return [
+        Claim837(
+            claim_id=1000 + i,
+            payload={"svc": [{"cpt": "99213", "units": 1, "charge_cents": 12500},
+                             {"cpt": "87880", "units": 2, "charge_cents": 1550}],
+                     "diag": ["J06.9", "R05.1"], "dos": "2025-03-10"},
+            first_name="Ada", last_name=f"Lovelace*{i}", member_id=f"M{i:05d}", mrn=f"MRN{i}",
+        )
+        for i in range(n)
+    ]
+
+
+def _segments(edi):
+    return [s.strip() for s in edi.split("~") if s.strip()]
+
+
+def test_round_trip_with_set_rollover():
+    claims = _claims(7)
+    buf = io.StringIO()
+    with Writer837P(buf, 42, NOW, max_claims_per_set=3) as w:
+        w.write_all(claims)
+    edi = buf.getvalue()
+
+    segs = _segments(edi)
+    assert segs[0].split("*")[13] == "000000042" and segs[-1] == "IEA*1*000000042"
+    assert segs[-2] == "GE*3*42"  # 3 + 3 + 1 claims
+
+    parsed = list(parse_837(io.BytesIO(edi.encode("ascii"))))
+    assert [c["claim_id"] for c in parsed] == [c.claim_id for c in claims]
+    first = parsed[0]
+    assert first["total_cents"] == 12500 + 2 * 1550
+    assert first["diag"] == ["J069", "R051"]
+    assert first["svc"] == [{"cpt": "99213", "units": 1, "charge_cents": 12500, "dos": "20250310"},
+                            {"cpt": "87880", "units": 2, "charge_cents": 1550, "dos": "20250310"}]
+    # separator characters in data are neutralised instead of breaking the segment
+    assert first["last_name"] == "Lovelace 0" and first["member_id"] == "M00000" and first["mrn"] == "MRN0"
+    assert first["control"] == 42
+
+
+def test_parser_rejects_bad_counts():
+    edi = build_interchange(_claims(2), 5, NOW)
+    with pytest.raises(X12Error, match="SE01"):
+        list(parse_837(io.StringIO(edi.replace("SE*", "SE*9", 1))))
+    with pytest.raises(X12Error, match="GE01"):
+        list(parse_837(io.StringIO(edi.replace("GE*1*", "GE*2*"))))
+    with pytest.raises(X12Error, match="not closed"):
+        list(parse_837(io.StringIO(edi[: edi.index("GE*")])))
+
+
+def test_streams_in_small_reads():
+    edi = build_interchange(_claims(50), 6, NOW)
+    segs = list(SegmentReader(io.StringIO(edi), chunk_size=16))
+    assert len(segs) == len(_segments(edi))
+
+
+def test_subscriber_address_and_demographics():
+    row = {"id": 9, "payload_json": {"svc": [], "dob": "1815-12-10", "gender": "female",
+                                     "subscriber": {"street": "12 St James Sq", "city": "London", "state": "LN",
+                                                    "zip": "SW1Y4JH"}},
+           "first_name": "Ada", "last_name": "Lovelace", "mrn": "MRN9"}
+    segs = _segments(build_interchange([claim_from_row(row), Claim837(10, {})], 8, NOW))
+    nm1 = [i for i, s in enumerate(segs) if s.startswith("NM1*IL")]
+    assert segs[nm1[0] + 1:nm1[0] + 4] == ["N3*12 St James Sq", "N4*London*LN*SW1Y4JH", "DMG*D8*18151210*F"]
+    # no demographics on file: N3/N4 still present, DMG left out rather than invented
+    assert segs[nm1[1] + 1:nm1[1] + 3] == ["N3*UNKNOWN", "N4*UNKNOWN"] and segs[nm1[1] + 3].startswith("NM1*PR")
+
+
+def test_write_to_storage_local(tmp_path, monkeypatch):
+    store = storage.LocalStorage(str(tmp_path))
+    monkeypatch.setattr(storage, "_backend", store)
+    url, sha, n = write_to_storage("x12/837/000000011.x12", _claims(4), 11, now=NOW)
+    assert url == "local://x12/837/000000011.x12"
+    with open(store.path_for("x12/837/000000011.x12"), "rb") as f:
+        data = f.read()
+    assert n == 4 and data == build_interchange(_claims(4), 11, NOW).encode("ascii")
+    assert sha == hashlib.sha256(data).hexdigest()
+    assert [c["claim_id"] for c in parse_837(io.BytesIO(data))] == [c.claim_id for c in _claims(4)]
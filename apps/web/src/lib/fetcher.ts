@@ -1,7 +1,7 @@
 // apps/web/src/lib/fetcher.ts
 type ApiInit = RequestInit & { pou?: "OPERATIONS" | "TREATMENT" | "PAYMENT" | string };
 
-const API_BASE = import.meta.env.VITE_API_BASE || "http://localhost:8000";
+export const API_BASE = import.meta.env.VITE_API_BASE || "http://localhost:8000";
 
 // Default PoU by HTTP method (override by passing init.pou)
 const DEFAULT_POU_BY_METHOD: Record<string, string> = {
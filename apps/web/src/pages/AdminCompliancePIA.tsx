@@ -9,15 +9,23 @@ export default function AdminCompliancePIA() {
   const [err, setErr] = useState("");
   const [reqId, setReqId] = useState<number | null>(null);
   const [status, setStatus] = useState<string>("");
+  const [patientId, setPatientId] = useState("");
 
   async function run(kind: "pia-pack" | "export" | "erasure") {
     setErr(""); setMsg(""); setStatus("");
     setReqId(null);
+    // export and erasure are always scoped to one patient
+    const pid = Number(patientId);
+    if (kind !== "pia-pack" && !(Number.isInteger(pid) && pid > 0)) {
+      setErr("Enter a patient ID first.");
+      return;
+    }
     try {
       const path = kind === "pia-pack" ? "/v1/compliance/pia-pack"
                  : kind === "export"   ? "/v1/compliance/export"
                  :                       "/v1/compliance/erasure";
-      const r = await compliancePost<{ok:boolean; request_id:number}>(path, {});
+      const body = kind === "pia-pack" ? {} : { patient_id: pid };
+      const r = await compliancePost<{ok:boolean; request_id:number}>(path, body);
       setReqId(r.request_id);
       setMsg(`${kind} queued (id ${r.request_id}). Polling status…`);
     } catch (e: any) {
@@ -59,6 +67,8 @@ export default function AdminCompliancePIA() {
       {msg && <div className="text-green-700 text-sm">{msg}</div>}
 
       <div className="flex gap-2">
+        <input className="border rounded px-2 py-1 w-32" placeholder="Patient ID" inputMode="numeric"
+               value={patientId} onChange={(e)=>setPatientId(e.target.value)} />
         <button className="px-3 py-2 rounded bg-gray-800 text-white" onClick={()=>run("pia-pack")}>
           Generate PIA Pack (PDF)
         </button>
@@ -1,6 +1,6 @@
 import { useEffect, useState } from "react";
 import { useParams, useNavigate, Link, useSearchParams } from "react-router-dom";
-import { api } from "../lib/fetcher";
+import { api, API_BASE } from "../lib/fetcher";
 import { usePoll } from "../lib/usePoll";
 
 export default function Consent() {
@@ -17,10 +17,7 @@ export default function Consent() {
 
   async function check() {
     try {
-      const data = await api(`/v1/signature/requests/${requestId}`);
-      setStatus(data?.status || "PENDING"); // SIGNED | PENDING
-      if (!appt && data?.appointment_id) setAppt(String(data.appointment_id));
-      if (data?.status === "SIGNED") nav(`/docs?appt=${appt || data.appointment_id}`);
+      apply(await api(`/v1/signature/requests/${requestId}`));
     } catch (e: any) {
       setMsg(e.message || "Failed to check status");
     }
@@ -55,8 +52,23 @@ export default function Consent() {
     }
   }
 
-  useEffect(() => { check(); }, []);                 // first check immediately
-  usePoll(check, 3000, status === "PENDING");        // poll every 3s while pending
+  const [live, setLive] = useState(false);
+
+  function apply(data: any) {
+    setStatus(data?.status || "PENDING"); // SIGNED | PENDING | FAILED
+    if (!appt && data?.appointment_id) setAppt(String(data.appointment_id));
+    if (data?.status === "SIGNED") nav(`/docs?appt=${appt || data.appointment_id}`);
+  }
+
+  // Server pushes status changes (SSE); fall back to slow polling if the stream drops
+  useEffect(() => {
+    if (typeof EventSource === "undefined") { check(); return; }
+    const es = new EventSource(`${API_BASE}/v1/signature/requests/${requestId}/events`, { withCredentials: true });
+    es.addEventListener("status", (e) => { setLive(true); apply(JSON.parse((e as MessageEvent).data)); });
+    es.onerror = () => setLive(false);
+    return () => es.close();
+  }, [requestId]);
+  usePoll(check, 15000, status === "PENDING" && !live);
 
   return (
     <div className="p-6">
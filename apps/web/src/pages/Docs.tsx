@@ -1,6 +1,6 @@
 import { useEffect, useState } from "react";
 import { useSearchParams, Link } from "react-router-dom";
-import { api } from "../lib/fetcher";
+import { api, API_BASE } from "../lib/fetcher";
 import { getAppointment } from "../lib/api";
 
 export default function Docs() {
@@ -51,7 +51,7 @@ export default function Docs() {
       <ul className="list-disc pl-5">
         {docs.map((d) => (
           <li key={d.id}>
-            <a className="underline" href={d.url} target="_blank" rel="noreferrer">
+            <a className="underline" href={`${API_BASE}${d.content_url}`} target="_blank" rel="noreferrer">
               {d.title || d.kind}
             </a>
           </li>
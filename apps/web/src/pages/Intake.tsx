@@ -1,4 +1,4 @@
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import { useParams, useNavigate, Link } from "react-router-dom";
 import { api } from "../lib/fetcher";
 
@@ -13,6 +13,9 @@ export default function Intake() {
   const [msg, setMsg] = useState("");
   const [loading, setLoading] = useState(true);
   const nav = useNavigate();
+  // Autosave: changed fields are batched and PATCHed to the server-side draft
+  const pending = useRef<Record<string, any>>({});
+  const saveTimer = useRef<number | undefined>(undefined);
 
   useEffect(() => {
     (async () => {
@@ -24,6 +27,9 @@ export default function Intake() {
           ? data.forms
           : [{ id: 1, title: "Intake", schema: data?.schema || { properties: {} } }];
         setForms(f);
+        // Resume a draft saved on this or another device
+        const draft = await api(`/v1/intake/forms/${appointmentId}/draft`).catch(() => null);
+        if (draft?.answers) setAnswers(draft.answers);
       } catch (e: any) {
         setMsg(e.message || "Failed to load forms");
       } finally {
@@ -32,9 +38,26 @@ export default function Intake() {
     })();
   }, [appointmentId]);
 
+  function flushDraft() {
+    const batch = pending.current;
+    pending.current = {};
+    if (Object.keys(batch).length === 0) return;
+    api(`/v1/intake/forms/${appointmentId}/draft`, {
+      method: "PATCH",
+      body: JSON.stringify({ answers: batch }),
+    }).catch(() => {
+      pending.current = { ...batch, ...pending.current }; // retry with the next save
+    });
+  }
+
+  useEffect(() => () => window.clearTimeout(saveTimer.current), []);
+
   function onChange(formId: number, field: string, value: any) {
     const key = `${formId}.${field}`;
     setAnswers((prev) => ({ ...prev, [key]: value }));
+    pending.current[key] = value ?? null;
+    window.clearTimeout(saveTimer.current);
+    saveTimer.current = window.setTimeout(flushDraft, 1500);
     // Clear field-level error on edit
     setErrors((prev) => {
       if (!prev[key]) return prev;
@@ -46,6 +69,8 @@ export default function Intake() {
   async function submit() {
     setMsg("");
     setErrors({});
+    window.clearTimeout(saveTimer.current);
+    pending.current = {};
     try {
       // Submit all answers in one payload; server does validation and either:
       //  - returns { ok:false, errors:{...} } for validation errors (200 OK)
@@ -100,10 +125,26 @@ export default function Intake() {
                     <label className="block text-sm">
                       {meta.title || field} {required.has(field) && <span className="text-red-500">*</span>}
                     </label>
-                    <input
-                      className={`border p-2 w-full ${showErr ? "border-red-500" : ""}`}
-                      onChange={(e) => onChange(f.id, field, e.target.value)}
-                    />
+                    {meta.type === "boolean" ? (
+                      // Server validates types; send real booleans (or nothing) for yes/no questions
+                      <select
+                        className={`border p-2 w-full ${showErr ? "border-red-500" : ""}`}
+                        value={answers[key] === true ? "yes" : answers[key] === false ? "no" : ""}
+                        onChange={(e) =>
+                          onChange(f.id, field, e.target.value === "" ? undefined : e.target.value === "yes")
+                        }
+                      >
+                        <option value="">—</option>
+                        <option value="yes">Yes</option>
+                        <option value="no">No</option>
+                      </select>
+                    ) : (
+                      <input
+                        className={`border p-2 w-full ${showErr ? "border-red-500" : ""}`}
+                        value={answers[key] ?? ""}
+                        onChange={(e) => onChange(f.id, field, e.target.value)}
+                      />
+                    )}
                     {showErr && <p className="text-red-500 text-xs mt-1">{errors[key]}</p>}
                   </div>
                 );
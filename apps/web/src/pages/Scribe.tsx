@@ -1,10 +1,11 @@
 import { useState } from "react";
 import { useParams, Link, useNavigate } from "react-router-dom";
-import { api } from "../lib/fetcher";
+import { api, API_BASE } from "../lib/fetcher";
 
 /**
  * In-room Scribe for a specific appointment.
- * - Start -> POST /v1/scribe/sessions { appointment_id }
+ * - Start -> POST /v1/scribe/sessions/stream { appointment_id } (SSE: draft appears token by token);
+ *   falls back to POST /v1/scribe/sessions if streaming is unavailable
  * - Always keep a manual draft text area enabled (even if audio/LLM fails).
  * - Approve -> POST /v1/scribe/sessions/:sessionId/approve
  * - On approve: show buttons to Summary and Billing cases.
@@ -18,6 +19,52 @@ export default function ScribePage() {
   const [approved, setApproved] = useState(false);
   const nav = useNavigate();
 
+  const [streaming, setStreaming] = useState(false);
+
+  async function startStream() {
+    setErr("");
+    setStreaming(true);
+    // the `sessionId` state captured by this call stays null; track the server's id locally
+    let created: number | null = null;
+    try {
+      const res = await fetch(`${API_BASE}/v1/scribe/sessions/stream`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json", "X-Purpose-Of-Use": "TREATMENT" },
+        body: JSON.stringify({ appointment_id: aid }),
+        credentials: "include",
+      });
+      if (!res.ok || !res.body) throw new Error(await res.text());
+      const keepLocal = draft.trim().length > 0; // never clobber manual edits
+      const reader = res.body.getReader();
+      const dec = new TextDecoder();
+      let buf = "";
+      for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buf += dec.decode(value, { stream: true });
+        let idx;
+        while ((idx = buf.indexOf("\n\n")) >= 0) {
+          const frame = buf.slice(0, idx);
+          buf = buf.slice(idx + 2);
+          const ev = /^event: (.*)$/m.exec(frame)?.[1];
+          const data = JSON.parse(/^data: (.*)$/m.exec(frame)?.[1] || "{}");
+          if (ev === "session") {
+            created = data.session_id;
+            setSessionId(data.session_id);
+          }
+          else if (ev === "token" && !keepLocal) setDraft((d) => d + data.t);
+          else if (ev === "done" && !keepLocal) setDraft(data.draft);
+        }
+      }
+    } catch {
+      // non-streaming fallback only if the server never created a session
+      if (created === null) await start();
+      else setErr("Draft stream interrupted. The session is saved; finish the note manually.");
+    } finally {
+      setStreaming(false);
+    }
+  }
+
   async function start() {
     setErr("");
     try {
@@ -59,8 +106,8 @@ export default function ScribePage() {
       <h1 className="text-2xl font-semibold">In-room Scribe (Appt #{aid})</h1>
 
       <div className="flex gap-2">
-        <button className="px-3 py-1 border" onClick={start} disabled={!!sessionId}>
-          {sessionId ? `Session #${sessionId}` : "Start"}
+        <button className="px-3 py-1 border" onClick={startStream} disabled={!!sessionId || streaming}>
+          {sessionId ? `Session #${sessionId}${streaming ? " (drafting…)" : ""}` : "Start"}
         </button>
         <Link to={`/provider/prechart/${aid}`} className="border px-3 py-1">Pre-chart</Link>
       </div>
@@ -1,6 +1,6 @@
 from fastapi import FastAPI
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 import os
 
@@ -59,4 +59,49 @@ def claims_create(body: ClaimIn):
         "accepted": True,
         "payer_ref": f"CH-{body.claim_id}-{int(datetime.utcnow().timestamp())}",
         "received_at": datetime.utcnow().isoformat() + "Z",
-    }
\ No newline at end of file
+    }
+
+class ClaimBatchIn(BaseModel):
+    interchange_control: int
+    edi837: str
+    claim_ids: List[int]
+
+def _check_interchange(edi: str) -> tuple:
+    """-> (claim ids from CLM01 in file order, error or None). Checks SE01 and GE01 counts."""
+    ids, sets, in_set, error = [], 0, 0, None
+    for raw in edi.split("~"):
+        seg = raw.strip()
+        if not seg:
+            continue
+        tag = seg.split("*", 1)[0]
+        if tag == "ST":
+            sets, in_set = sets + 1, 0
+        in_set += 1
+        if tag == "CLM":
+            ids.append(seg.split("*")[1])
+        elif tag == "SE" and seg.split("*")[1] != str(in_set):
+            error = error or f"SE01 {seg.split('*')[1]} but {in_set} segments in set {sets}"
+        elif tag == "GE" and seg.split("*")[1] != str(sets):
+            error = error or f"GE01 {seg.split('*')[1]} but {sets} transaction sets"
+    return ids, error
+
+
+@app.post("/claims/batch")
+def claims_batch(body: ClaimBatchIn):
+    # one interchange, many claims per ST/SE; reject the whole file unless its CLMs are exactly claim_ids
+    clms, error = _check_interchange(body.edi837)
+    if error is None and sorted(clms) != sorted(str(c) for c in body.claim_ids):
+        error = f"{len(clms)} claims in the interchange for {len(body.claim_ids)} claim ids"
+    ts = int(datetime.utcnow().timestamp())
+    accepted = error is None
+    return {
+        "interchange_control": body.interchange_control,
+        "accepted": accepted,
+        "received_at": datetime.utcnow().isoformat() + "Z",
+        "results": [
+            {"claim_id": cid, "accepted": accepted,
+             "payer_ref": f"CH-{cid}-{ts}" if accepted else None,
+             "error": error}
+            for cid in body.claim_ids
+        ],
+    }